@@ -1,4 +1,11 @@
 import bpy
+import time
+from util import objectPool
+from util import renderDevice
+
+
+# Number of incremental resets done in this blender session, used to find the least recently used cached data blocks
+_reset_counter = 0
 
 
 class Initializer:
@@ -6,16 +13,32 @@ class Initializer:
     A class to cleans up the whole scene at first and then initializes basic blender settings, the world,
     the renderer, the camera and create scene collections.
 
+    The "full" reset mode removes every data block. The "incremental" reset mode is meant for blender sessions which
+    generate several images, it removes only the per-frame objects in one batch, purges the orphan data and keeps the
+    data blocks of the cacheable types (meshes, images, node groups, world) for the next image. With the object pool
+    enabled, the incremental reset releases the per-frame objects to the pool instead of removing them.
+
     Attributes
     ----------
+    scene_reset_mode (str): How the scene is cleaned up, "full" or "incremental".
+    cacheable_datablock_types (dict of str: int): The bpy.data collections kept by the incremental reset, paired with
+                                                  the maximum number of unused data blocks kept for each of them.
+    use_object_pool (bool): Release the per-frame objects to the object pool in the incremental reset.
+    max_pooled_object_per_asset (int): The maximum number of pooled objects of each asset.
+    reset_report (dict of str: float): Number of removed and kept data blocks and time consumed by the last reset.
+    render_device (str): Device to use for rendering, "AUTO" detects the available Cycles devices, "GPU" or "CPU" forces one.
+    num_render_threads (int): Number of CPU render threads, 0 to let blender detect it.
     __render_engine (str): Engine to use for rendering.
-    __render_device (str): Device to use for rendering.
     __collection_need_create (list of str): Scene Collection need to create.
+    __unlinked_collection_names (list of str): Collections not linked to the scene whose objects are per-frame objects.
     __camera_location (tuple of int): Initial camera location.
 
     Methods
     -------
+    __count_data_blocks(): Count the data blocks in all bpy.data collections.
     __remove_all_data(): Remove all data blocks except opened scripts and scene.
+    __protect_cacheable_data(): Protect the cacheable data blocks from the orphan purge with a fake user.
+    __remove_per_frame_data(): Remove the per-frame objects and purge the orphan data blocks.
     init(): Initialize the blender scene to its initial state.
 
     References
@@ -24,14 +47,39 @@ class Initializer:
     
     """
 
-    def __init__(self):
+    def __init__(self,
+                scene_reset_mode = "full",
+                cacheable_datablock_types = {"meshes": 256, "images": 64, "node_groups": 8, "worlds": 1},
+                use_object_pool = False,
+                max_pooled_object_per_asset = 32,
+                render_device = "AUTO",
+                num_render_threads = 0
+                ):
+        self.scene_reset_mode = scene_reset_mode
+        self.cacheable_datablock_types = cacheable_datablock_types
+        self.use_object_pool = use_object_pool
+        self.max_pooled_object_per_asset = max_pooled_object_per_asset
+        self.render_device = render_device
+        self.num_render_threads = num_render_threads
+        self.reset_report = {"removed": 0, "kept": 0, "time": 0.0}
         self.__render_engine = "CYCLES"
-        self.__render_device = "GPU"
         self.__collection_need_create = ["BackgroundObjectCollection", "ForegroundObjectCollection",
                                         "OccluderCollection"]
+        self.__unlinked_collection_names = ["BackgroundPrototypeCollection"]
         self.__camera_location = (0, 0, 3)
 
 
+    def __count_data_blocks(self):
+        """Count the data blocks in all bpy.data collections."""
+        num_data_blocks = 0
+        for collection in dir(bpy.data):
+            data_structure = getattr(bpy.data, collection)
+            if isinstance(data_structure, bpy.types.bpy_prop_collection):
+                num_data_blocks += len(data_structure)
+
+        return num_data_blocks
+
+
     def __remove_all_data(self):
         """Remove all data blocks except opened scripts and scene."""
         # Go through all attributes of bpy.data
@@ -47,6 +95,73 @@ class Initializer:
                         continue
                     data_structure.remove(block)
 
+    def __protect_cacheable_data(self, per_frame_data):
+        """Protect the cacheable data blocks from the orphan purge with a fake user.
+
+        Data blocks used in the finished frame are stamped with the reset counter, unused data blocks above the limit
+        of their type lose the protection, the least recently used first.
+
+        Args:
+            per_frame_data (set of bpy.types.ID): The data blocks used only by the per-frame objects.
+        """
+        for data_type, max_unused_num in self.cacheable_datablock_types.items():
+            unused_blocks = []
+            for block in getattr(bpy.data, data_type):
+                if block in per_frame_data:
+                    continue
+                if block.users - int(block.use_fake_user) > 0:
+                    block["sdg_last_used"] = _reset_counter
+                else:
+                    unused_blocks.append(block)
+                block.use_fake_user = True
+
+            # Least recently used first
+            unused_blocks.sort(key = lambda block: block.get("sdg_last_used", -1))
+            for block in unused_blocks[:max(len(unused_blocks) - max_unused_num, 0)]:
+                block.use_fake_user = False
+
+
+    def __remove_per_frame_data(self):
+        """Remove the per-frame objects and purge the orphan data blocks.
+
+        References
+        ----------
+        https://docs.blender.org/api/current/bpy.types.BlendData.html#bpy.types.BlendData.batch_remove
+        https://docs.blender.org/api/current/bpy.types.BlendData.html#bpy.types.BlendData.orphans_purge
+        """
+        global _reset_counter
+        _reset_counter += 1
+
+        # The labeler leaves the annotation scene active
+        if bpy.context.window is not None:
+            bpy.context.window.scene = bpy.data.scenes["Scene"]
+
+        if self.use_object_pool:
+            collections = [bpy.data.collections[name] for name in self.__collection_need_create if name in bpy.data.collections]
+            num_released = objectPool.release_objects(collections = collections,
+                                                      max_pooled_object_per_asset = self.max_pooled_object_per_asset)
+            print(f"Released {num_released} objects to the object pool")
+
+        per_frame_blocks = set()
+        per_frame_data = set()
+        for collection_name in self.__collection_need_create + self.__unlinked_collection_names:
+            collection = bpy.data.collections.get(collection_name)
+            if collection is None:
+                continue
+            for obj in collection.objects:
+                per_frame_blocks.add(obj)
+                if obj.data is not None:
+                    per_frame_data.add(obj.data)
+        for scene in bpy.data.scenes:
+            if scene.name != "Scene":
+                per_frame_blocks.add(scene)
+
+        self.__protect_cacheable_data(per_frame_data = per_frame_data)
+
+        bpy.data.batch_remove(per_frame_blocks)
+        bpy.data.orphans_purge(do_local_ids = True, do_linked_ids = True, do_recursive = True)
+
+
     def __remove_custom_properties(self):
         """Remove all custom properties registered at global entities like the scene."""
         for key in bpy.context.scene.keys():
@@ -60,28 +175,46 @@ class Initializer:
             bpy.ops.object.mode_set(mode='OBJECT')
 
         # Clean up data in blender file
-        self.__remove_all_data()
+        reset_start_time = time.time()
+        num_data_blocks = self.__count_data_blocks()
+        if self.scene_reset_mode == "incremental":
+            self.__remove_per_frame_data()
+        else:
+            self.__remove_all_data()
         self.__remove_custom_properties()
-
-        # Create new world
-        new_world = bpy.data.worlds.new("World")
+        num_kept_data_blocks = self.__count_data_blocks()
+        self.reset_report["removed"] = num_data_blocks - num_kept_data_blocks
+        self.reset_report["kept"] = num_kept_data_blocks
+        self.reset_report["time"] = time.time() - reset_start_time
+        print("Scene Reset ({}) removed {} data blocks, kept {} data blocks in {:.3f} seconds".format(
+            self.scene_reset_mode, self.reset_report["removed"], self.reset_report["kept"], self.reset_report["time"]))
+
+        # Create new world (the incremental reset keeps the world of the previous image)
+        new_world = bpy.data.worlds.get("World")
+        if new_world is None:
+            new_world = bpy.data.worlds.new("World")
         bpy.context.scene.world = new_world
         new_world["category_id"] = 0
 
         # Create the camera
-        cam = bpy.data.cameras.new("Camera")
-        cam_ob = bpy.data.objects.new("Camera", cam)
-        bpy.context.scene.collection.objects.link(cam_ob)
+        cam_ob = bpy.data.objects.get("Camera")
+        if cam_ob is None:
+            cam = bpy.data.cameras.new("Camera")
+            cam_ob = bpy.data.objects.new("Camera", cam)
+            bpy.context.scene.collection.objects.link(cam_ob)
         bpy.context.scene.camera = cam_ob
         cam_ob.location = self.__camera_location
 
         # Create new synthdet collections
         for collection in self.__collection_need_create:
-            bpy.context.scene.collection.children.link(bpy.data.collections.new(collection))
+            if bpy.data.collections.get(collection) is None:
+                bpy.context.scene.collection.children.link(bpy.data.collections.new(collection))
 
         # Set rendering setting
         bpy.context.scene.render.engine = self.__render_engine
-        bpy.context.scene.cycles.device = self.__render_device
+        renderDevice.configure_render_device(scene = bpy.context.scene,
+                                             render_device = self.render_device,
+                                             num_render_threads = self.num_render_threads)
 
         print("INITIALIZE COMPLERED !!!")
 
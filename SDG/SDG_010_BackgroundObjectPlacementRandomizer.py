@@ -1,12 +1,16 @@
 import bpy
 import numpy as np
 from util import poissonDiscSampling
+from util import bridsonVariableRadius
+from util import assetLoader
+from util import objectPool
+from util import batchTransform
+from util import exitCode
 import math
 import random
 from mathutils import Euler
 import os
 import glob
-import sys
 
 
 class BackgroundObjectPlacementRandomizer:
@@ -18,12 +22,27 @@ class BackgroundObjectPlacementRandomizer:
     of the virtual scene to form a background wall.The placement positions of the 3D models and their distances from each other 
     are determined throughPoisson distribution sampling within the specified plane area.
 
+    With use_instancing enabled, the background wall is a single point cloud object instead of one object per particle.
+    Each asset is loaded once into an unlinked prototype collection, in num_background_material_variant copies which
+    receive their own material from the texture randomizer. The particle positions and the prototype index of each
+    particle are written with foreach_set, ObjectScaleRandomizer and RotationRandomizer write the scale and rotation
+    point attributes, and a geometry nodes modifier instances the prototypes on the points.
+
     Attributes
     ----------
     __background_plane_size (list of float): Background plane dimension(x, y).
     background_poisson_disk_sampling_radius (float): Background objects separation distance.
+    background_density_map (str): "center", "edge" or the path to a .npy density map, which places the objects closer in the dense areas with a variable sampling radius, None for the fixed radius.
+    background_poisson_disk_sampling_radius_range (dict of str: float): The sampling radius of the densest and of the sparsest areas of the density map.
     __background_domain_size (numpy.ndarray): Spatial distribution area of background objects.
     asset_background_object_folder_path (str): The path to background object assets.
+    use_asset_template_cache (bool): Copy the assets kept by the incremental scene reset instead of parsing the .blend files again.
+    asset_pack_path (str): The path of the asset pack written by SDG_520_AssetPacker.py to build the objects from, None loads the .blend files.
+    use_object_pool (bool): Reuse the objects released to the object pool by the incremental scene reset.
+    use_instancing (bool): Instance the background objects on a point cloud with geometry nodes.
+    num_background_material_variant (int): Number of differently textured copies of each background asset in the instancing mode.
+    __prototype_collection_name (str): Name of the unlinked collection which holds the instanced prototypes.
+    __instancer_node_group_name (str): Name of the geometry nodes group which instances the prototypes on the points.
     __background_object_collection (bpy.types.Collection): The Collection data-block of background objects.
     __n_particle (int): Number of generated particles of the poisson disks sampling.
     __particle_coordinates (numpy.ndarray): Coordinates of the poisson disks sampling.
@@ -32,20 +51,44 @@ class BackgroundObjectPlacementRandomizer:
     -------
     __error_check(): Check assigned background object assets folder path isn't empty.
     __load_object(): Load asset from other blendfile to the current blendfile.
-    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling.
+    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling, with a variable radius if a density map is set.
     __import_background_object_asset(): Import __n_particle background objects into the current Blender scene.
+    __create_prototypes(): Load each background asset once and copy it for each material variant.
+    __get_instancer_node_group(): Get the geometry nodes group which instances the prototypes on the points.
+    __create_instancer(): Create the point cloud object of the particles and the geometry nodes modifier.
     background_object_placement_randomize(): Generate background.
 
+    References
+    ----------
+    https://docs.blender.org/manual/en/latest/modeling/geometry_nodes/instances/instance_on_points.html
+    https://docs.blender.org/api/current/bpy.types.AttributeGroup.html
+    https://docs.blender.org/api/current/info_best_practice.html#data-access
+
     """
 
     def __init__(self, 
                 asset_background_object_folder_path = 'C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/background_object',
-                background_poisson_disk_sampling_radius = 0.2
+                background_poisson_disk_sampling_radius = 0.2,
+                background_density_map = None,
+                background_poisson_disk_sampling_radius_range = {"min": 0.15, "max": 0.3},
+                use_asset_template_cache = False,
+                use_object_pool = False,
+                use_instancing = False,
+                num_background_material_variant = 16
                 ):
         self.__background_plane_size = [3.2,2.4] # x, y 
         self.background_poisson_disk_sampling_radius = background_poisson_disk_sampling_radius
+        self.background_density_map = background_density_map
+        self.background_poisson_disk_sampling_radius_range = background_poisson_disk_sampling_radius_range
         self.__background_domain_size = np.array([float(self.__background_plane_size[0]),float(self.__background_plane_size[1])])
         self.asset_background_object_folder_path = asset_background_object_folder_path
+        self.use_asset_template_cache = use_asset_template_cache
+        self.asset_pack_path = None
+        self.use_object_pool = use_object_pool
+        self.use_instancing = use_instancing
+        self.num_background_material_variant = num_background_material_variant
+        self.__prototype_collection_name = "BackgroundPrototypeCollection"
+        self.__instancer_node_group_name = "SDGBackgroundInstancer"
         self.__background_object_collection = bpy.data.collections["BackgroundObjectCollection"]
         self.__n_particle = None
         self.__particle_coordinates = None
@@ -59,9 +102,7 @@ class BackgroundObjectPlacementRandomizer:
         """
         num_asset_in_folder = len(asset_path_list)
         if num_asset_in_folder < 1:
-            print(f'ERROR!!! can not find any background asset in {self.asset_background_object_folder_path}')
-            input("Press Enter to continue...")
-            sys.exit()
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any background asset in {self.asset_background_object_folder_path}')
 
 
     def __load_object(self,filepath):
@@ -70,20 +111,17 @@ class BackgroundObjectPlacementRandomizer:
         Args:
             filepath (str): The path to background object assets.
 
-        References
-        ----------
-        https://studio.blender.org/training/scripting-for-artists/5eabe54d521eafd0953f6d45/
-        https://docs.blender.org/api/current/bpy.types.BlendDataLibraries.html
-        https://blender.stackexchange.com/questions/17876/import-object-without-bpy-ops-wm-link-append/33998#33998 
-        https://blender.stackexchange.com/questions/34540/how-to-link-append-a-data-block-using-the-python-api?noredirect=1&lq=1
-        """ 
-        # Append object from .blend file
-        with bpy.data.libraries.load(filepath, link = False,assets_only = True) as (data_from, data_to):
-            data_to.objects = data_from.objects
-        # Link object to current scene
-        for obj in data_to.objects:
-            if obj is not None:
-                self.__background_object_collection.objects.link(obj)
+        """
+        if self.use_object_pool:
+            objectPool.acquire_object(filepath = filepath,
+                                      collection = self.__background_object_collection,
+                                      use_template_cache = self.use_asset_template_cache,
+                                      asset_pack_path = self.asset_pack_path)
+        else:
+            assetLoader.load_object(filepath = filepath,
+                                    collection = self.__background_object_collection,
+                                    use_template_cache = self.use_asset_template_cache,
+                                    asset_pack_path = self.asset_pack_path)
 
 
     def __posson_disc_sampling(self):
@@ -91,9 +129,16 @@ class BackgroundObjectPlacementRandomizer:
         # It seem like function poisson_disc_sampling sometimes will break (mtbf:2000-3000 cycle), when it break , return a empty list[]
         # add condition check len(self.__particle_coordinates) must >= 1
         while self.__n_particle == None or self.__n_particle == 0:
-            self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.background_poisson_disk_sampling_radius,
-                                                                                    sample_domain_size = self.__background_domain_size,
-                                                                                    sample_rejection_threshold = 30)
+            if self.background_density_map is None:
+                self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.background_poisson_disk_sampling_radius,
+                                                                                        sample_domain_size = self.__background_domain_size,
+                                                                                        sample_rejection_threshold = 30)
+            else:
+                radius_map = bridsonVariableRadius.make_radius_map(radius_range = self.background_poisson_disk_sampling_radius_range,
+                                                                   density_map = self.background_density_map)
+                self.__particle_coordinates = bridsonVariableRadius.variable_radius_poisson_disc_sampling(radius_map = radius_map,
+                                                                                                          sample_domain_size = self.__background_domain_size,
+                                                                                                          k = 30)
             self.__n_particle = len(self.__particle_coordinates)
 
         loc_offset = np.array([float(self.__background_plane_size[0])/2,float(self.__background_plane_size[1])/2])
@@ -126,22 +171,143 @@ class BackgroundObjectPlacementRandomizer:
                     self.__load_object(filepath = bg_obj_path)
 
 
+    def __create_prototypes(self):
+        """Load each background asset once and copy it for each material variant.
+
+        The prototypes are named by their index, the Collection Info node orders the separated children by name.
+
+        Return:
+            num_asset (int): Number of background assets.
+        """
+        background_object_path_list = glob.glob(os.path.join(self.asset_background_object_folder_path, "*.blend"))
+        self.__error_check(asset_path_list = background_object_path_list)
+
+        prototype_collection = bpy.data.collections.get(self.__prototype_collection_name)
+        if prototype_collection is None:
+            # Not linked to the scene, the prototypes are only rendered as instances
+            prototype_collection = bpy.data.collections.new(self.__prototype_collection_name)
+            prototype_collection.use_fake_user = True
+
+        prototype_index = 0
+        for bg_obj_path in background_object_path_list:
+            obj = assetLoader.load_object(filepath = bg_obj_path,
+                                          collection = prototype_collection,
+                                          use_template_cache = self.use_asset_template_cache,
+                                          asset_pack_path = self.asset_pack_path)[0]
+            obj.location = (0, 0, 0)
+            obj.rotation_euler = (0, 0, 0)
+            for variant in range(self.num_background_material_variant):
+                prototype = obj
+                if variant > 0:
+                    prototype = obj.copy()
+                    prototype.data = obj.data.copy()
+                    prototype_collection.objects.link(prototype)
+                prototype.name = "BGPrototype_{:04d}".format(prototype_index)
+                prototype["sdg_prototype"] = True
+                prototype_index += 1
+
+        return len(background_object_path_list)
+
+
+    def __get_instancer_node_group(self):
+        """Get the geometry nodes group which instances the prototypes on the points.
+
+        The node group is a cacheable data block, it is only built when the scene reset removed it.
+
+        Return:
+            node_group (bpy.types.GeometryNodeTree): The geometry nodes group.
+        """
+        node_group = bpy.data.node_groups.get(self.__instancer_node_group_name)
+        if node_group is None:
+            node_group = bpy.data.node_groups.new(self.__instancer_node_group_name, "GeometryNodeTree")
+            if hasattr(node_group, "interface"):
+                # Blender 4.0+
+                node_group.interface.new_socket(name = "Geometry", in_out = "INPUT", socket_type = "NodeSocketGeometry")
+                node_group.interface.new_socket(name = "Geometry", in_out = "OUTPUT", socket_type = "NodeSocketGeometry")
+            else:
+                node_group.inputs.new("NodeSocketGeometry", "Geometry")
+                node_group.outputs.new("NodeSocketGeometry", "Geometry")
+            nodes = node_group.nodes
+            links = node_group.links
+
+            node_GroupInput = nodes.new("NodeGroupInput")
+            node_GroupOutput = nodes.new("NodeGroupOutput")
+            node_CollectionInfo = nodes.new("GeometryNodeCollectionInfo")
+            node_CollectionInfo.name = "Prototype Collection Info"
+            node_CollectionInfo.transform_space = "ORIGINAL"
+            node_CollectionInfo.inputs["Separate Children"].default_value = True
+            node_CollectionInfo.inputs["Reset Children"].default_value = False
+            node_InstanceOnPoints = nodes.new("GeometryNodeInstanceOnPoints")
+            node_InstanceOnPoints.inputs["Pick Instance"].default_value = True
+
+            links.new(node_GroupInput.outputs[0], node_InstanceOnPoints.inputs["Points"])
+            links.new(node_CollectionInfo.outputs[0], node_InstanceOnPoints.inputs["Instance"])
+            for attribute_name, data_type, input_name in [("sdg_prototype_index", "INT", "Instance Index"),
+                                                          ("sdg_rotation", "FLOAT_VECTOR", "Rotation"),
+                                                          ("sdg_scale", "FLOAT", "Scale")]:
+                node_NamedAttribute = nodes.new("GeometryNodeInputNamedAttribute")
+                node_NamedAttribute.data_type = data_type
+                node_NamedAttribute.inputs["Name"].default_value = attribute_name
+                # Blender 3.x has one output per data type
+                attribute_output = [output for output in node_NamedAttribute.outputs if output.enabled][0]
+                links.new(attribute_output, node_InstanceOnPoints.inputs[input_name])
+            links.new(node_InstanceOnPoints.outputs[0], node_GroupOutput.inputs[0])
+
+        node_group.nodes["Prototype Collection Info"].inputs["Collection"].default_value = \
+            bpy.data.collections[self.__prototype_collection_name]
+
+        return node_group
+
+
+    def __create_instancer(self, num_asset):
+        """Create the point cloud object of the particles and the geometry nodes modifier.
+
+        Args:
+            num_asset (int): Number of background assets.
+        """
+        num_point = self.__n_particle
+        mesh = bpy.data.meshes.new("BackgroundPointCloud")
+        mesh.vertices.add(num_point)
+        coordinates = np.zeros((num_point, 3), dtype = np.float32)
+        coordinates[:, :2] = self.__particle_coordinates
+        mesh.vertices.foreach_set("co", coordinates.ravel())
+
+        # The assets are used in turn like the object mode, each particle gets a random material variant
+        asset_index = np.arange(num_point) % num_asset
+        variant_index = np.random.randint(0, self.num_background_material_variant, size = num_point)
+        prototype_index = (asset_index * self.num_background_material_variant + variant_index).astype(np.int32)
+        mesh.attributes.new("sdg_prototype_index", "INT", "POINT").data.foreach_set("value", prototype_index)
+        mesh.attributes.new("sdg_rotation", "FLOAT_VECTOR", "POINT").data.foreach_set(
+            "vector", np.zeros(num_point * 3, dtype = np.float32))
+        mesh.attributes.new("sdg_scale", "FLOAT", "POINT").data.foreach_set(
+            "value", np.ones(num_point, dtype = np.float32))
+        mesh.update()
+
+        instancer = bpy.data.objects.new("BackgroundInstancer", mesh)
+        instancer["sdg_instancer"] = True
+        self.__background_object_collection.objects.link(instancer)
+        modifier = instancer.modifiers.new(self.__instancer_node_group_name, "NODES")
+        modifier.node_group = self.__get_instancer_node_group()
+
+
     def background_object_placement_randomize(self):
         """Generate background."""  
         # PoissonDiskSampling
         self.__posson_disc_sampling()
 
+        if self.use_instancing:
+            num_asset = self.__create_prototypes()
+            self.__create_instancer(num_asset = num_asset)
+            print("nParticle: {}, Prototypes: {}".format(self.__n_particle, num_asset * self.num_background_material_variant))
+            print("Background Object Placement Randomize COMPLERED !!!")
+            return
+
         # Import background object asset
         self.__import_background_object_asset()
 
         # Move all backgeound objects to particleCoordinates
-        bg_obj_list = []
-        for bg_obj in self.__background_object_collection.objects:
-            bg_obj_list.append(bg_obj)
-
-        for i in range(self.__n_particle):
-            obj_location = (self.__particle_coordinates[i][0], self.__particle_coordinates[i][1], 0)
-            bg_obj_list[i].location = obj_location
+        batchTransform.set_locations(objects = self.__background_object_collection.objects,
+                                     locations = self.__particle_coordinates)
         
         print("nParticle: {}".format(self.__n_particle))
         print("Background Object Placement Randomize COMPLERED !!!")
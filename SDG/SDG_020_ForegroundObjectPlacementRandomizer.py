@@ -1,12 +1,17 @@
 import bpy
 import numpy as np
 from util import poissonDiscSampling
+from util import bridsonVariableRadius
+from util import assetLoader
+from util import objectPool
+from util import batchTransform
+from util import classBalance
+from util import exitCode
 import math
 import random
 from mathutils import Euler
 import os
 import glob
-import sys
 
 
 class ForegroundObjectPlacementRandomizer:
@@ -18,6 +23,9 @@ class ForegroundObjectPlacementRandomizer:
     The placement positions of the foreground objects and their distances from each other are determined through 
     Poisson distribution sampling within the specified spatial area.
 
+    The "balanced" selection policy draws the assets by the deficit of their class in the labeled instances so far, so
+    the dataset converges to a uniform or weighted class distribution with fewer images than the random selection.
+
     Attributes
     ----------
     num_foreground_object_in_scene_range (dict of str: int): The distribution of the number of retail items within the blender scene.
@@ -25,7 +33,16 @@ class ForegroundObjectPlacementRandomizer:
     foreground_area (list of float): Spatial distribution area of foreground objects.
     __foreground_domain_size (numpy.ndarray): Spatial distribution area of foreground objects(convert foreground_area to ndarray).
     foreground_poisson_disk_sampling_radius (float): Foreground objects separation distance.
+    foreground_density_map (str): "center", "edge" or the path to a .npy density map, which places the objects closer in the dense areas with a variable sampling radius, None for the fixed radius.
+    foreground_poisson_disk_sampling_radius_range (dict of str: float): The sampling radius of the densest and of the sparsest areas of the density map.
     asset_foreground_object_folder_path (str): The path to foreground object assets.
+    use_asset_template_cache (bool): Copy the assets kept by the incremental scene reset instead of parsing the .blend files again.
+    asset_pack_path (str): The path of the asset pack written by SDG_520_AssetPacker.py to build the objects from, None loads the .blend files.
+    use_object_pool (bool): Reuse the objects released to the object pool by the incremental scene reset.
+    foreground_selection_policy (str): "random" samples the assets uniformly, "balanced" samples them by the deficit of their class.
+    class_instance_num (dict of str: int): The labeled instances of each yolo class id so far, used by the "balanced" policy.
+    class_weights (dict of str: float): The target weight of each class name, None for a uniform class distribution.
+    class_id_mapping (dict of str: int): Asset names paired with their yolo class id, from YOLOLabeler.get_class_id_mapping().
     __foreground_object_collection (bpy.types.Collection): The blender collection data-block of foreground objects.
     __n_particle (int): Number of generated particles of the poisson disks sampling.
     __particle_coordinates (numpy.ndarray): Coordinates of the poisson disks sampling.
@@ -34,7 +51,9 @@ class ForegroundObjectPlacementRandomizer:
     -------
     __error_check(): Check assigned background object assets folder path isn't empty.
     __load_object(): Load asset from other blendfile to the current blendfile.
-    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling.
+    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling, with a variable radius if a density map is set.
+    __get_asset_class_id(): Get the yolo class id of a foreground asset.
+    __select_balanced_asset(): Select the foreground assets by the deficit of their class.
     __import_foreground_object_asset(): Import __n_particle foreground objects into the current Blender scene.
     foreground_object_placement_randomize(): Generate foreground.
 
@@ -44,14 +63,28 @@ class ForegroundObjectPlacementRandomizer:
                  num_foreground_object_in_scene_range = {"min": 8 , "max": 20},
                  foreground_area = [2, 1.5, 0.5],
                  foreground_poisson_disk_sampling_radius = 0.3,
-                 asset_foreground_object_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/foreground_object"
+                 foreground_density_map = None,
+                 foreground_poisson_disk_sampling_radius_range = {"min": 0.2, "max": 0.35},
+                 asset_foreground_object_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/foreground_object",
+                 use_asset_template_cache = False,
+                 use_object_pool = False,
+                 foreground_selection_policy = "random"
                  ):
         self.num_foreground_object_in_scene_range = num_foreground_object_in_scene_range
         self.__num_foreground_object_in_scene = None
         self.foreground_area = foreground_area
         self.__foreground_domain_size = np.array(self.foreground_area)
         self.foreground_poisson_disk_sampling_radius = foreground_poisson_disk_sampling_radius
+        self.foreground_density_map = foreground_density_map
+        self.foreground_poisson_disk_sampling_radius_range = foreground_poisson_disk_sampling_radius_range
         self.asset_foreground_object_folder_path = asset_foreground_object_folder_path
+        self.use_asset_template_cache = use_asset_template_cache
+        self.asset_pack_path = None
+        self.use_object_pool = use_object_pool
+        self.foreground_selection_policy = foreground_selection_policy
+        self.class_instance_num = {}
+        self.class_weights = None
+        self.class_id_mapping = {}
         self.__foreground_object_collection = bpy.data.collections["ForegroundObjectCollection"]
         self.__n_particle = None
         self.__particle_coordinates = None
@@ -66,31 +99,26 @@ class ForegroundObjectPlacementRandomizer:
         """ 
         num_asset_in_folder = len(asset_path_list)
         if num_asset_in_folder < 1:
-            print(f'ERROR!!! can not find any foreground asset in {self.asset_foreground_object_folder_path}')
-            input("Press Enter to continue...")
-            sys.exit()
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any foreground asset in {self.asset_foreground_object_folder_path}')
     
 
     def __load_object(self,filepath):
         """Load asset from other blendfile to the current blendfile.
 
         Args:
-            filepath (str): The path to background object assets.
+            filepath (str): The path to foreground object assets.
 
-        References
-        ----------
-        https://studio.blender.org/training/scripting-for-artists/5eabe54d521eafd0953f6d45/
-        https://docs.blender.org/api/current/bpy.types.BlendDataLibraries.html
-        https://blender.stackexchange.com/questions/17876/import-object-without-bpy-ops-wm-link-append/33998#33998 
-        https://blender.stackexchange.com/questions/34540/how-to-link-append-a-data-block-using-the-python-api?noredirect=1&lq=1
-        """ 
-        ## Append object from .blend file
-        with bpy.data.libraries.load(filepath, link = False,assets_only = True) as (data_from, data_to):
-            data_to.objects = data_from.objects
-        ## Link object to current scene
-        for obj in data_to.objects:
-            if obj is not None:
-                self.__foreground_object_collection.objects.link(obj)
+        """
+        if self.use_object_pool:
+            objectPool.acquire_object(filepath = filepath,
+                                      collection = self.__foreground_object_collection,
+                                      use_template_cache = self.use_asset_template_cache,
+                                      asset_pack_path = self.asset_pack_path)
+        else:
+            assetLoader.load_object(filepath = filepath,
+                                    collection = self.__foreground_object_collection,
+                                    use_template_cache = self.use_asset_template_cache,
+                                    asset_pack_path = self.asset_pack_path)
 
 
     def __posson_disc_sampling(self):
@@ -98,22 +126,66 @@ class ForegroundObjectPlacementRandomizer:
         # It seem like function poisson_disc_sampling sometimes will break (mtbf:2000-3000 cycle), when it break , return a empty list[]
         # add condition check len(self.__particle_coordinates) must >= 1
         while self.__n_particle == None or self.__n_particle == 0:
-            self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.foreground_poisson_disk_sampling_radius,
-                                                                            sample_domain_size = self.__foreground_domain_size,
-                                                                            sample_rejection_threshold = 30)
+            if self.foreground_density_map is None:
+                self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.foreground_poisson_disk_sampling_radius,
+                                                                                        sample_domain_size = self.__foreground_domain_size,
+                                                                                        sample_rejection_threshold = 30)
+            else:
+                radius_map = bridsonVariableRadius.make_radius_map(radius_range = self.foreground_poisson_disk_sampling_radius_range,
+                                                                   density_map = self.foreground_density_map)
+                self.__particle_coordinates = bridsonVariableRadius.variable_radius_poisson_disc_sampling(radius_map = radius_map,
+                                                                                                          sample_domain_size = self.__foreground_domain_size,
+                                                                                                          k = 30)
             self.__n_particle = len(self.__particle_coordinates)
             
         loc_offset = np.array([self.__foreground_domain_size[0]/2,self.__foreground_domain_size[1]/2,-0.5])
         self.__particle_coordinates -= loc_offset
 
 
+    def __get_asset_class_id(self, filepath):
+        """Get the yolo class id of a foreground asset.
+
+        Args:
+            filepath (str): The path to the foreground object asset.
+
+        Return:
+            class_id (str): The yolo class id, the asset name if the asset has no class id.
+        """
+        asset_name = os.path.splitext(os.path.basename(filepath))[0]
+        for key, class_id in self.class_id_mapping.items():
+            if key in asset_name:
+                return str(class_id)
+
+        return asset_name
+
+
+    def __select_balanced_asset(self, foreground_object_path_list):
+        """Select the foreground assets by the deficit of their class.
+
+        Args:
+            foreground_object_path_list (list of str): The paths to the foreground object assets.
+
+        Return:
+            foreground_object_path_list_selected (list of str): The paths of the __num_foreground_object_in_scene selected assets.
+        """
+        asset_class_ids = [self.__get_asset_class_id(filepath = path) for path in foreground_object_path_list]
+        class_weights = None
+        if self.class_weights is not None:
+            class_weights = {str(self.class_id_mapping.get(name, name)): weight for name, weight in self.class_weights.items()}
+        target_share = classBalance.get_target_share(class_ids = asset_class_ids, class_weights = class_weights)
+        selected_indices = classBalance.select_balanced(asset_class_ids = asset_class_ids,
+                                                        num_select = self.__num_foreground_object_in_scene,
+                                                        class_instance_num = self.class_instance_num,
+                                                        target_share = target_share)
+
+        return [foreground_object_path_list[i] for i in selected_indices]
+
+
     def __import_foreground_object_asset(self):
         """Import a number of __n_particle foreground objects into current blender scene."""  
         # Check n_particle must bigger than num_foreground_object_in_scene
         if self.__n_particle < self.__num_foreground_object_in_scene:
-            print('Warning!!! nParticle:{} must bigger than fg_obj_in_scene_num:{}'.format(self.__n_particle,self.__num_foreground_object_in_scene))
-            input("Press Enter to continue...") 
-            sys.exit()
+            exitCode.fail(exitCode.PLACEMENT_FAILED, 'nParticle:{} must bigger than fg_obj_in_scene_num:{}'.format(self.__n_particle,self.__num_foreground_object_in_scene))
         
         # Get foreground object asset path
         foreground_object_path_list = glob.glob(os.path.join(self.asset_foreground_object_folder_path, "*.blend"))
@@ -121,8 +193,11 @@ class ForegroundObjectPlacementRandomizer:
         num_fg_obj = len(foreground_object_path_list)
         print("num fg obj in folder: {}".format(num_fg_obj))
 
+        if self.foreground_selection_policy == "balanced":
+            for fg_obj_path in self.__select_balanced_asset(foreground_object_path_list = foreground_object_path_list):
+                self.__load_object(filepath = fg_obj_path)
         # Check num_foreground_object_in_scene is bigger than num_fg_obj
-        if self.__num_foreground_object_in_scene >= num_fg_obj:
+        elif self.__num_foreground_object_in_scene >= num_fg_obj:
             # Loop importforeground object
             num_loop = self.__num_foreground_object_in_scene // num_fg_obj
             num_remain = self.__num_foreground_object_in_scene % num_fg_obj
@@ -164,13 +239,7 @@ class ForegroundObjectPlacementRandomizer:
         print("fg_location:\n {} ".format(fg_location))
 
         # Move all foregeound objects to fg_location
-        fg_obj_list = []
-        for fg_obj in self.__foreground_object_collection.objects:
-            fg_obj_list.append(fg_obj)
-
-        for i in range(self.__num_foreground_object_in_scene):
-            obj_location = (fg_location[i][0],fg_location[i][1], fg_location[i][2])
-            fg_obj_list[i].location = obj_location
+        batchTransform.set_locations(objects = self.__foreground_object_collection.objects, locations = fg_location)
         
         print("Foreground Object Placement Randomize COMPLERED !!!")
 
@@ -1,12 +1,16 @@
 import bpy
 import numpy as np
 from util import poissonDiscSampling
+from util import bridsonVariableRadius
+from util import assetLoader
+from util import objectPool
+from util import batchTransform
+from util import exitCode
 import math
 import random
 from mathutils import Euler
 import os
 import glob
-import sys
 
 
 class OccluderPlacementRandomizer:
@@ -24,7 +28,12 @@ class OccluderPlacementRandomizer:
     occluder_area (list of float): Spatial distribution area of occlusion objects.
     __occluder_domain_size (numpy.ndarray): Spatial distribution area of occlusion objects.
     occluder_poisson_disk_sampling_radius (float): Occlusion objects separation distance.
+    occluder_density_map (str): "center", "edge" or the path to a .npy density map, which places the objects closer in the dense areas with a variable sampling radius, None for the fixed radius.
+    occluder_poisson_disk_sampling_radius_range (dict of str: float): The sampling radius of the densest and of the sparsest areas of the density map.
     asset_occluder_folder_path (str): The path to occlusion object assets.
+    use_asset_template_cache (bool): Copy the assets kept by the incremental scene reset instead of parsing the .blend files again.
+    asset_pack_path (str): The path of the asset pack written by SDG_520_AssetPacker.py to build the objects from, None loads the .blend files.
+    use_object_pool (bool): Reuse the objects released to the object pool by the incremental scene reset.
     __occluder_collection (bpy.types.Collection): The blender collection data-block of occlusion objects.
     __n_particle (int): Number of generated particles of the poisson disks sampling.
     __particle_coordinates (numpy.ndarray): Coordinates of the poisson disks sampling.
@@ -33,7 +42,7 @@ class OccluderPlacementRandomizer:
     -------
     __error_check(): Check assigned occlusion object assets folder path isn't empty.
     __load_object(): Load asset from other blendfile to the current blendfile.
-    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling.
+    __posson_disc_sampling(): Using poisson disk sampling algorithm to generate the sampling, with a variable radius if a density map is set.
     __import_occluder_asset(): Import __n_particle occluder objects into the current Blender scene.
     occluder_placement_randomize(): Generate occlusion.
 
@@ -43,14 +52,23 @@ class OccluderPlacementRandomizer:
                 num_occluder_in_scene_range = {"min": 5 , "max": 10},
                 occluder_area = [1.2, 0.8, 0.4],
                 occluder_poisson_disk_sampling_radius = 0.25,
-                asset_occluder_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/occluder"
+                occluder_density_map = None,
+                occluder_poisson_disk_sampling_radius_range = {"min": 0.15, "max": 0.25},
+                asset_occluder_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/occluder",
+                use_asset_template_cache = False,
+                use_object_pool = False
                 ):
         self.num_occluder_in_scene_range = num_occluder_in_scene_range
         self.__num_occluder_in_scene = None
         self.occluder_area = occluder_area
         self.__occluder_domain_size = np.array(self.occluder_area)
         self.occluder_poisson_disk_sampling_radius = occluder_poisson_disk_sampling_radius
+        self.occluder_density_map = occluder_density_map
+        self.occluder_poisson_disk_sampling_radius_range = occluder_poisson_disk_sampling_radius_range
         self.asset_occluder_folder_path = asset_occluder_folder_path
+        self.use_asset_template_cache = use_asset_template_cache
+        self.asset_pack_path = None
+        self.use_object_pool = use_object_pool
         self.__occluder_collection = bpy.data.collections["OccluderCollection"]
         self.__n_particle = None
         self.__particle_coordinates = None
@@ -65,31 +83,26 @@ class OccluderPlacementRandomizer:
         """
         num_asset_in_folder = len(asset_path_list)
         if num_asset_in_folder < 1:
-            print(f'ERROR!!! can not find any occluder asset in {self.asset_occluder_folder_path}')
-            input("Press Enter to continue...")
-            sys.exit()
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any occluder asset in {self.asset_occluder_folder_path}')
 
 
     def __load_object(self,filepath):
         """Load asset from other blendfile to the current blendfile.
 
         Args:
-            filepath (str): The path to background object assets.
+            filepath (str): The path to occluder object assets.
 
-        References
-        ----------
-        https://studio.blender.org/training/scripting-for-artists/5eabe54d521eafd0953f6d45/
-        https://docs.blender.org/api/current/bpy.types.BlendDataLibraries.html
-        https://blender.stackexchange.com/questions/17876/import-object-without-bpy-ops-wm-link-append/33998#33998 
-        https://blender.stackexchange.com/questions/34540/how-to-link-append-a-data-block-using-the-python-api?noredirect=1&lq=1
         """
-        # Append object from .blend file
-        with bpy.data.libraries.load(filepath, link = False,assets_only = True) as (data_from, data_to):
-            data_to.objects = data_from.objects
-        # Link object to current scene
-        for obj in data_to.objects:
-            if obj is not None:
-                self.__occluder_collection.objects.link(obj)
+        if self.use_object_pool:
+            objectPool.acquire_object(filepath = filepath,
+                                      collection = self.__occluder_collection,
+                                      use_template_cache = self.use_asset_template_cache,
+                                      asset_pack_path = self.asset_pack_path)
+        else:
+            assetLoader.load_object(filepath = filepath,
+                                    collection = self.__occluder_collection,
+                                    use_template_cache = self.use_asset_template_cache,
+                                    asset_pack_path = self.asset_pack_path)
 
 
     def __posson_disc_sampling(self):
@@ -97,9 +110,16 @@ class OccluderPlacementRandomizer:
         # It seem like function poisson_disc_sampling sometimes will break (mtbf:2000-3000 cycle), when it break , return a empty list[]
         # Add condition check len(self.__particle_coordinates) must >= 1
         while self.__n_particle == None or self.__n_particle == 0:
-            self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.occluder_poisson_disk_sampling_radius,
-                                                                            sample_domain_size = self.__occluder_domain_size,
-                                                                            sample_rejection_threshold = 30)
+            if self.occluder_density_map is None:
+                self.__particle_coordinates = poissonDiscSampling.poisson_disc_sampling(radius = self.occluder_poisson_disk_sampling_radius,
+                                                                                        sample_domain_size = self.__occluder_domain_size,
+                                                                                        sample_rejection_threshold = 30)
+            else:
+                radius_map = bridsonVariableRadius.make_radius_map(radius_range = self.occluder_poisson_disk_sampling_radius_range,
+                                                                   density_map = self.occluder_density_map)
+                self.__particle_coordinates = bridsonVariableRadius.variable_radius_poisson_disc_sampling(radius_map = radius_map,
+                                                                                                          sample_domain_size = self.__occluder_domain_size,
+                                                                                                          k = 30)
             self.__n_particle = len(self.__particle_coordinates)
 
         loc_offset = np.array([self.__occluder_domain_size[0]/2,self.__occluder_domain_size[1]/2,-1.5])
@@ -110,9 +130,7 @@ class OccluderPlacementRandomizer:
         """Import a number of __n_particle occlusion objects into current blender scene."""  
         # Check n_particle must bigger than num_occluder_in_scene
         if self.__n_particle < self.__num_occluder_in_scene:
-            print('Warning!!! nParticle:{} must bigger than num_occluder_in_scene:{}'.format(self.__n_particle,self.__num_occluder_in_scene))
-            input("Press Enter to continue...") 
-            sys.exit()
+            exitCode.fail(exitCode.PLACEMENT_FAILED, 'nParticle:{} must bigger than num_occluder_in_scene:{}'.format(self.__n_particle,self.__num_occluder_in_scene))
         
         # Get occluder asset path
         occluder_path_list = glob.glob(os.path.join(self.asset_occluder_folder_path, "*.blend"))
@@ -161,13 +179,7 @@ class OccluderPlacementRandomizer:
         print("occluder_location:\n {} ".format(occluder_location))
 
         # Move all occluder to occluder_location
-        occluder_list = []
-        for occluder in self.__occluder_collection.objects:
-            occluder_list.append(occluder)
-
-        for k in range(self.__num_occluder_in_scene):
-            occluder_location_tomove = (occluder_location[k][0],occluder_location[k][1], occluder_location[k][2])
-            occluder_list[k].location = occluder_location_tomove
+        batchTransform.set_locations(objects = self.__occluder_collection.objects, locations = occluder_location)
 
         print("Occluder Placement Randomize COMPLERED !!!")
 
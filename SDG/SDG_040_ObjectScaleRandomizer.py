@@ -1,11 +1,15 @@
 import bpy
-import random
+import numpy as np
+from util import batchTransform
 
 
 class ObjectScaleRandomizer:
     """
     A randomizer class which randomizes the scale of the background, foreground and occluder objects in the scene.
 
+    The scales of a collection are drawn as one numpy array and written with foreach_set, the object scale is multiplied
+    by the ratio instead of scaling obj.dimensions, which would evaluate the bounding box of each object.
+
     Attributes
     ----------
     bg_obj_scale_ratio_range (dict of str: float): The distribution of the scale ratio of background objects within the blender scene.
@@ -17,6 +21,7 @@ class ObjectScaleRandomizer:
 
     Methods
     -------
+    __instancer_scale_randomize(): Randomizes the scale of the instances of a geometry nodes instancer.
     __obj_scale_randomize(): Randomizes the scale of the objects in the scene.
     __background_scale_randomize(): Randomizes the scale of the background objects in the scene.
     __foreground_scale_randomize(): Randomizes the scale of the foreground objects in the scene.
@@ -38,6 +43,25 @@ class ObjectScaleRandomizer:
         self.__occluder_collection = bpy.data.collections["OccluderCollection"]
 
 
+    def __instancer_scale_randomize(self, instancer, obj_scale_ratio_range):
+        """Randomizes the scale of the instances of a geometry nodes instancer.
+
+        The instances keep the scale of their prototype, the scale ratio of each point is written to its "sdg_scale" attribute.
+
+        Args:
+            instancer (bpy.types.Object): The point cloud object of the instanced background.
+            obj_scale_ratio_range (dict of str: float): The distribution of the scale ratio of objects.
+        """
+        num_point = len(instancer.data.vertices)
+        if obj_scale_ratio_range["min"] == obj_scale_ratio_range["max"]:
+            scale_ratio = np.full(num_point, obj_scale_ratio_range["max"], dtype = np.float32)
+        else:
+            scale_ratio = np.random.randint(int(obj_scale_ratio_range["min"]*10),
+                                            int(obj_scale_ratio_range["max"]*10), size = num_point).astype(np.float32)/10
+        instancer.data.attributes["sdg_scale"].data.foreach_set("value", scale_ratio)
+        instancer.data.update()
+
+
     def __obj_scale_randomize(self, collection, obj_scale_ratio_range):
         """Randomizes the scale of the objects in the scene.
 
@@ -46,15 +70,13 @@ class ObjectScaleRandomizer:
             obj_scale_ratio_range (dict of str: float): The distribution of the scale ratio of objects.
 
         """ 
-        for obj in collection.objects:
-            if obj_scale_ratio_range["min"] == obj_scale_ratio_range["max"]:
-                scale_ratio = obj_scale_ratio_range["max"]
-            else:
-                scale_ratio = random.randrange(int(obj_scale_ratio_range["min"]*10),
-                                    int(obj_scale_ratio_range["max"]*10), 1)/10
-            prev_size = obj.dimensions.xyz
-            scale_size = prev_size * scale_ratio
-            obj.dimensions.xyz = scale_size[0], scale_size[1], scale_size[2]
+        # An instanced collection only holds its instancer
+        instancers = [obj for obj in collection.objects if obj.get("sdg_instancer", False)]
+        if len(instancers) > 0:
+            for instancer in instancers:
+                self.__instancer_scale_randomize(instancer = instancer, obj_scale_ratio_range = obj_scale_ratio_range)
+        else:
+            batchTransform.randomize_scales(objects = collection.objects, scale_ratio_range = obj_scale_ratio_range)
 
         print(f"Object in {collection.name} Scale Randomize COMPLERED!")
 
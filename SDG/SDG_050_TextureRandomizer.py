@@ -1,7 +1,8 @@
 import bpy 
 import os 
 import random
-import sys
+from util import textureLOD
+from util import exitCode
 
 
 class TextureRandomizer:
@@ -11,19 +12,28 @@ class TextureRandomizer:
     Configure the surface textures of objects placed in the blender scene. The surface textures are derived from 1369 types of PBR materials.
     Randomly select a subset of these materials and apply them to the surfaces of the objects.
 
+    With use_texture_lod enabled, the texture maps are loaded at the smallest tier built by SDG_510_TextureLODBuilder.py
+    which covers the projected size of the object, and stepped down while the scene exceeds the texture memory budget.
+
     Attributes
     ----------
     asset_ambientCGMaterial_folder_path (str): The path to the downloaded ambientCG PBR materials.
+    use_texture_lod (bool): Select the texture tier of each object from its projected size.
+    texture_memory_budget_mb (float): The estimated texture memory budget of the scene in MB, None disables it.
+    img_resolution_x (int): Number of horizontal pixels in the rendered image.
+    camera_focal_length (float): Focal length of the camera in millimeters used for the render.
     __collections_need_assign_material (list of bpy.types.Collection): List of the blender collections which need to apply material.
     __objects_need_assign_material (list of bpy.types.Object): A list of the blender objects which need to apply material.
     __asset_base_image_path_list (list of str): All color map img paths from asset_ambientCGMaterial_folder_path.
     __randomly_selected_base_image_path_list (list of str): A list of randomly selected color map img paths.
+    __map_names (list of str): The names of the texture maps of an ambientCG material except the color map.
 
     Methods
     -------
      __get_all_material_image_paths(): Get all color map image paths.
      __get_objects_need_assign_material(): Get all objects which need assign material.
      __randomly_select_materials(): Randomly select material.
+     __select_texture_tiers(): Replace the selected color maps by the tier which covers the projected size of each object.
      __create_and_assign_material(): Create blender material shader node group, then import PBR texture maps.
      texture_randomize(): Randomly apply materials to objects.
 
@@ -36,9 +46,20 @@ class TextureRandomizer:
 
     """
 
-    def __init__(self, asset_ambientCGMaterial_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/texture"):       
+    def __init__(self,
+                 asset_ambientCGMaterial_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/texture",
+                 use_texture_lod = False,
+                 texture_memory_budget_mb = 1024,
+                 img_resolution_x = 1728,
+                 camera_focal_length = 35
+                 ):       
         
         self.asset_ambientCGMaterial_folder_path = asset_ambientCGMaterial_folder_path
+        self.use_texture_lod = use_texture_lod
+        self.texture_memory_budget_mb = texture_memory_budget_mb
+        self.img_resolution_x = img_resolution_x
+        self.camera_focal_length = camera_focal_length
+        self.__map_names = ["AmbientOcclusion", "Metalness", "Roughness", "Opacity", "NormalGL", "Displacement"]
         self.__collections_need_assign_material = [bpy.data.collections["OccluderCollection"], bpy.data.collections["BackgroundObjectCollection"]]
         self.__objects_need_assign_material = list()
         self.__asset_base_image_path_list = list()
@@ -60,8 +81,15 @@ class TextureRandomizer:
 
     def __get_objects_need_assign_material(self):
         """Get all objects which need assign material.""" 
-        for collection in self.__collections_need_assign_material:
+        collections_need_assign_material = list(self.__collections_need_assign_material)
+        # Instanced background prototypes
+        prototype_collection = bpy.data.collections.get("BackgroundPrototypeCollection")
+        if prototype_collection is not None:
+            collections_need_assign_material.append(prototype_collection)
+        for collection in collections_need_assign_material:
             for obj in collection.objects:
+                if obj.get("sdg_instancer", False):
+                    continue
                 self.__objects_need_assign_material.append(obj)
 
 
@@ -73,6 +101,27 @@ class TextureRandomizer:
         random.choices(self.__asset_base_image_path_list, k = num_objects_need_assign_material)
 
 
+    def __select_texture_tiers(self):
+        """Replace the selected color maps by the tier which covers the projected size of each object."""
+        tier_size_list = textureLOD.select_object_tiers(objects = self.__objects_need_assign_material,
+                                                        focal_length = self.camera_focal_length,
+                                                        img_resolution_x = self.img_resolution_x)
+        # A material used by several objects is loaded once, at the largest tier they need
+        tier_selections = {}
+        num_map_list = {}
+        for base_image_path, tier_size in zip(self.__randomly_selected_base_image_path_list, tier_size_list):
+            tier_selections[base_image_path] = max(tier_selections.get(base_image_path, 0), tier_size)
+            if base_image_path not in num_map_list:
+                num_map_list[base_image_path] = 1 + sum(os.path.exists(base_image_path.replace("Color", map_name))
+                                                        for map_name in self.__map_names)
+        tier_selections, texture_memory_mb = textureLOD.apply_memory_budget(tier_selections = tier_selections,
+                                                                            num_map_list = num_map_list,
+                                                                            texture_memory_budget_mb = self.texture_memory_budget_mb)
+        self.__randomly_selected_base_image_path_list = [textureLOD.get_tier_path(path, tier_selections[path])
+                                                         for path in self.__randomly_selected_base_image_path_list]
+        print(f"Estimated Texture Memory: {texture_memory_mb:.1f} MB")
+
+
     def __create_and_assign_material(self):
         """Create blender material shader node group, then import PBR texture maps.""" 
         num_materials = len(self.__randomly_selected_base_image_path_list)
@@ -80,9 +129,7 @@ class TextureRandomizer:
 
         # Check num_materials is equal to num_objs
         if num_materials != num_objs:
-            print(f"Warning!!! num_materials: {num_materials} not equal to num_objs: {num_objs}") 
-            input("Press Enter to continues...")
-            sys.exit()
+            exitCode.fail(exitCode.MATERIAL_MISMATCH, f"num_materials: {num_materials} not equal to num_objs: {num_objs}")
 
         for i in range(num_materials):
             current_obj = self.__objects_need_assign_material[i]
@@ -98,6 +145,7 @@ class TextureRandomizer:
             # Create new material
             new_mat_name = 'Material' + '_' + current_obj.name
             new_mat = bpy.data.materials.new(name=new_mat_name)
+            new_mat["sdg_per_frame"] = True
 
             # Get the nodes and links
             new_mat.use_nodes = True
@@ -122,7 +170,7 @@ class TextureRandomizer:
             if os.path.exists(base_image_path):
                 base_color = nodes.new('ShaderNodeTexImage')
                 base_color.location = (_x_texture_node, _y_texture_node)
-                base_color.image =  bpy.data.images.load(base_image_path)
+                base_color.image =  bpy.data.images.load(base_image_path, check_existing = True)
                 links.new(base_color.outputs["Color"], principled_bsdf.inputs["Base Color"])
 
                 collection_of_texture_nodes.append(base_color)
@@ -131,7 +179,7 @@ class TextureRandomizer:
             if os.path.exists(ambient_occlusion_image_path):
                 ao_color = nodes.new('ShaderNodeTexImage')
                 ao_color.location = (_x_texture_node, _y_texture_node * 2)
-                ao_color.image =  bpy.data.images.load(ambient_occlusion_image_path)
+                ao_color.image =  bpy.data.images.load(ambient_occlusion_image_path, check_existing = True)
                 ao_color.image.colorspace_settings.name = 'Non-Color'
                 math_node = nodes.new(type='ShaderNodeMixRGB')
                 math_node.blend_type = "MULTIPLY"
@@ -148,7 +196,7 @@ class TextureRandomizer:
             if os.path.exists(metallic_image_path):
                 metallic = nodes.new('ShaderNodeTexImage')
                 metallic.location = (_x_texture_node, 0)
-                metallic.image =  bpy.data.images.load(metallic_image_path)
+                metallic.image =  bpy.data.images.load(metallic_image_path, check_existing = True)
                 metallic.image.colorspace_settings.name = 'Non-Color'
                 links.new(metallic.outputs["Color"], principled_bsdf.inputs["Metallic"])
 
@@ -158,7 +206,7 @@ class TextureRandomizer:
             if os.path.exists(roughness_image_path):
                 roughness_texture = nodes.new('ShaderNodeTexImage')
                 roughness_texture.location = (_x_texture_node, _y_texture_node * -1)
-                roughness_texture.image =  bpy.data.images.load(roughness_image_path)
+                roughness_texture.image =  bpy.data.images.load(roughness_image_path, check_existing = True)
                 roughness_texture.image.colorspace_settings.name = 'Non-Color'
                 links.new(roughness_texture.outputs["Color"], principled_bsdf.inputs["Roughness"])
 
@@ -168,7 +216,7 @@ class TextureRandomizer:
             if os.path.exists(alpha_image_path):
                 alpha_texture = nodes.new('ShaderNodeTexImage')
                 alpha_texture.location = (_x_texture_node, _y_texture_node * -2)
-                alpha_texture.image =  bpy.data.images.load(alpha_image_path)
+                alpha_texture.image =  bpy.data.images.load(alpha_image_path, check_existing = True)
                 alpha_texture.image.colorspace_settings.name = 'Non-Color'
                 links.new(alpha_texture.outputs["Color"], principled_bsdf.inputs["Alpha"])
 
@@ -179,7 +227,7 @@ class TextureRandomizer:
                 normal_texture = nodes.new('ShaderNodeTexImage')
                 normal_y_value = _y_texture_node * -3
                 normal_texture.location = (_x_texture_node, normal_y_value)
-                normal_texture.image =  bpy.data.images.load(normal_image_path)
+                normal_texture.image =  bpy.data.images.load(normal_image_path, check_existing = True)
 
                 separate_rgba = nodes.new('ShaderNodeSeparateRGB')
                 separate_rgba.location.x = 4.0 / 5.0 * _x_texture_node
@@ -214,7 +262,7 @@ class TextureRandomizer:
             if os.path.exists(displacement_image_path):
                 displacement_texture = nodes.new('ShaderNodeTexImage')
                 displacement_texture.location = (_x_texture_node, _y_texture_node * -4)
-                displacement_texture.image =  bpy.data.images.load(displacement_image_path)
+                displacement_texture.image =  bpy.data.images.load(displacement_image_path, check_existing = True)
 
                 displacement_node = nodes.new("ShaderNodeDisplacement")
                 displacement_node.inputs["Midlevel"].default_value = 0.5
@@ -255,6 +303,8 @@ class TextureRandomizer:
         self.__get_all_material_image_paths()
         self.__get_objects_need_assign_material()
         self.__randomly_select_materials()
+        if self.use_texture_lod:
+            self.__select_texture_tiers()
         self.__create_and_assign_material()
         print('Material Randomize COMPLERED !!!')
 
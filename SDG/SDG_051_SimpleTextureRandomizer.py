@@ -2,7 +2,9 @@ import bpy
 import os
 from glob import glob
 import random
-import sys
+from util import textureAtlas
+from util import textureLOD
+from util import exitCode
 
 
 class SimpleTextureRandomizer:
@@ -12,9 +14,20 @@ class SimpleTextureRandomizer:
     Configure the surface textures of objects placed in the virtual scene. The surface textures are derived from 5000 types of image textures.
     Randomly select a subset of these materials and apply them to the surfaces of the objects.
 
+    With texture_atlas_folder_path set, the image textures come from the atlases built by SDG_530_TextureAtlasBuilder.py.
+    All objects share one atlas material, num_atlas_per_frame atlases are selected for each image and each object
+    gets a different tile of them through a custom property, so no material is copied and no image is loaded per
+    object. The tile size of the atlases takes the place of the texture LOD.
+
     Attributes
     ----------
     asset_img_texture_path (str): The path to the downloaded Freiburg Groceries dataset image textures.
+    use_texture_lod (bool): Load the image texture tier built by SDG_510_TextureLODBuilder.py which covers the projected size of each object.
+    texture_memory_budget_mb (float): The estimated texture memory budget of the scene in MB, None disables it.
+    img_resolution_x (int): Number of horizontal pixels in the rendered image.
+    camera_focal_length (float): Focal length of the camera in millimeters used for the render.
+    texture_atlas_folder_path (str): The path to the texture atlases built by SDG_530_TextureAtlasBuilder.py, None loads one image per object.
+    num_atlas_per_frame (int): Number of atlases the objects of one image take their tiles from.
     __collections_need_assign_texture (list of bpy.types.Collection): List of the blender collections which need to apply image texture.
     __objects_need_assign_texture (list of bpy.types.Object): A list of the objects which need to apply image texture.
     __mat (bpy.types.Material): temporary storage of a blender material.
@@ -22,19 +35,35 @@ class SimpleTextureRandomizer:
     Methods
     -------
     __create_new_material_and_shader_nodes(): Create blender material shader node group.
+    __get_objects_need_assign_texture(): Get the objects which need to apply image texture.
     __add_empty_material_to_object(): Add empty material to objects.
+    __atlas_texture_randomize(): Randomly apply atlas tiles to objects.
     texture_randomize(): Randomly apply image textures to objects.
 
     References
     ----------
     https://blender.stackexchange.com/questions/23436/control-cycles-eevee-material-nodes-and-material-properties-using-python
     https://blender.stackexchange.com/questions/240278/how-to-access-shader-node-via-python-script
+    https://docs.blender.org/manual/en/latest/render/shader_nodes/input/attribute.html
  
     """ 
 
 
-    def __init__(self ,asset_img_texture_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/img_texture"):
+    def __init__(self ,asset_img_texture_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/img_texture",
+                 use_texture_lod = False,
+                 texture_memory_budget_mb = 1024,
+                 img_resolution_x = 1728,
+                 camera_focal_length = 35,
+                 texture_atlas_folder_path = None,
+                 num_atlas_per_frame = 4
+                 ):
         self.asset_img_texture_path = asset_img_texture_path
+        self.use_texture_lod = use_texture_lod
+        self.texture_memory_budget_mb = texture_memory_budget_mb
+        self.img_resolution_x = img_resolution_x
+        self.camera_focal_length = camera_focal_length
+        self.texture_atlas_folder_path = texture_atlas_folder_path
+        self.num_atlas_per_frame = num_atlas_per_frame
         self.__collections_need_assign_texture = [bpy.data.collections["OccluderCollection"],
                                                 bpy.data.collections["BackgroundObjectCollection"]]
         self.__objects_need_assign_texture = []
@@ -72,23 +101,71 @@ class SimpleTextureRandomizer:
         links.new(node_HueSaturationValue.outputs["Color"], node_PrincipledBSDF.inputs["Base Color"])
 
 
+    def __get_objects_need_assign_texture(self):
+        """Get the objects which need to apply image texture."""
+        collections_need_assign_texture = list(self.__collections_need_assign_texture)
+        # Instanced background prototypes
+        prototype_collection = bpy.data.collections.get("BackgroundPrototypeCollection")
+        if prototype_collection is not None:
+            collections_need_assign_texture.append(prototype_collection)
+        for collection in collections_need_assign_texture:
+            for obj in collection.objects:
+                if obj.get("sdg_instancer", False):
+                    continue
+                self.__objects_need_assign_texture.append(obj)
+
+
     def __add_empty_material_to_object(self):
         """Add empty material to objects."""    
         #　Add empty material to BG & OCC objects
-        for collection in self.__collections_need_assign_texture:
-            for obj in collection.objects:
-                self.__objects_need_assign_texture.append(obj)
-                new_mat = self.__mat.copy()
-                new_mat.name = 'Material' +'_' + obj.name
+        self.__get_objects_need_assign_texture()
+        for obj in self.__objects_need_assign_texture:
+            new_mat = self.__mat.copy()
+            new_mat.name = 'Material' +'_' + obj.name
+            new_mat["sdg_per_frame"] = True
+
+            if obj.data.materials:
+                obj.data.materials[0] = new_mat
+            else:
+                obj.data.materials.append(new_mat)
+
+
+    def __atlas_texture_randomize(self):
+        """Randomly apply atlas tiles to objects."""
+        lookup_table = textureAtlas.read_lookup_table(self.texture_atlas_folder_path)
+        if lookup_table is None or len(lookup_table["atlases"]) < 1:
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any texture atlas in {self.texture_atlas_folder_path}, run SDG_530_TextureAtlasBuilder.py first')
+
+        # The same atlases stay in the material slots, only their images change
+        num_atlas_slot = min(self.num_atlas_per_frame, len(lookup_table["atlases"]))
+        material = textureAtlas.get_atlas_material(num_atlas_slot = num_atlas_slot,
+                                                   tile_uv_scale = textureAtlas.get_tile_uv_scale(lookup_table))
+        atlas_list_selected = random.sample(lookup_table["atlases"], num_atlas_slot)
+        textureAtlas.set_atlas_slots(material = material,
+                                     atlas_path_list = [os.path.join(self.texture_atlas_folder_path, atlas["file_name"]) for atlas in atlas_list_selected])
+
+        self.__get_objects_need_assign_texture()
+        tile_list = [(slot, tile) for slot, atlas in enumerate(atlas_list_selected) for tile in atlas["tiles"]]
+        num_objects_need_assign_texture = len(self.__objects_need_assign_texture)
+
+        # Check tiles number of the selected atlases is bigger than BG & OCC objects number
+        if len(tile_list) < num_objects_need_assign_texture:
+            exitCode.fail(exitCode.MATERIAL_MISMATCH, 'num_atlas_tile:{} must bigger than objects_need_assign_texture:{}, increase num_atlas_per_frame'.\
+                format(len(tile_list), num_objects_need_assign_texture))
 
-                if obj.data.materials:
-                    obj.data.materials[0] = new_mat
-                else:
-                    obj.data.materials.append(new_mat)
+        tile_list_selected = random.sample(tile_list, num_objects_need_assign_texture)
+        for obj, (slot, tile) in zip(self.__objects_need_assign_texture, tile_list_selected):
+            textureAtlas.assign_tile(obj = obj, tile_offset = tile["offset"], slot = slot, material = material)
+
+        print('Simple Texture Randomize COMPLERED !!!')
 
 
     def texture_randomize(self):
         """Randomly apply image textures to objects."""
+        if self.texture_atlas_folder_path is not None:
+            self.__atlas_texture_randomize()
+            return
+
          # Create new empty material and shader nodes
         self.__create_new_material_and_shader_nodes()
 
@@ -104,16 +181,24 @@ class SimpleTextureRandomizer:
 
         # Check img textures number is bigger than BG & OCC objects number
         if num_img_texture < num_objects_need_assign_texture:
-            print('Warning!!! num_img_texture:{} must bigger than objects_need_assign_texture:{}'.\
+            exitCode.fail(exitCode.MATERIAL_MISMATCH, 'num_img_texture:{} must bigger than objects_need_assign_texture:{}'.\
                 format(num_img_texture, num_objects_need_assign_texture))
-            input("Press Enter to continues...")
-            sys.exit()
         
         # Randomly select a texture, then add texture to BG & OCC objects material
         img_texture_list_selected = random.sample(img_texture_path_list, num_objects_need_assign_texture)
+        if self.use_texture_lod:
+            tier_size_list = textureLOD.select_object_tiers(objects = self.__objects_need_assign_texture,
+                                                            focal_length = self.camera_focal_length,
+                                                            img_resolution_x = self.img_resolution_x)
+            tier_selections = dict(zip(img_texture_list_selected, tier_size_list))
+            tier_selections, texture_memory_mb = textureLOD.apply_memory_budget(tier_selections = tier_selections,
+                                                                                num_map_list = {path: 1 for path in tier_selections},
+                                                                                texture_memory_budget_mb = self.texture_memory_budget_mb)
+            img_texture_list_selected = [textureLOD.get_tier_path(path, tier_selections[path]) for path in img_texture_list_selected]
+            print(f"Estimated Texture Memory: {texture_memory_mb:.1f} MB")
 
         for i in range(num_objects_need_assign_texture):
-            assign_image = bpy.data.images.load(img_texture_list_selected[i])
+            assign_image = bpy.data.images.load(img_texture_list_selected[i], check_existing = True)
             self.__objects_need_assign_texture[i].material_slots[0].material.node_tree.nodes["Image Texture"].image = assign_image
 
         print('Simple Texture Randomize COMPLERED !!!')
@@ -1,13 +1,16 @@
 import bpy 
 import math
-import random
-from mathutils import Euler
+import numpy as np
+from util import batchTransform
 
 
 class RotationRandomizer:
     """
     A randomizer class which randomly rotates the background shapes and occluder objects.
 
+    The rotations of a collection are drawn as one numpy array and written with foreach_set. The instances of a
+    geometry nodes instancer get their rotation from the "sdg_rotation" point attribute.
+
     Attributes
     ----------
     __collections_for_rotation_randomize (list of bpy.types.Collection): List of the blender collections which need to been rotated.
@@ -26,9 +29,15 @@ class RotationRandomizer:
     def rotation_randomize(self):
         """Applies random rotation to all objects in background and occluder collections.""" 
         for collection in self.__collections_for_rotation_randomize:
-            for obj_to_rotate in collection.objects:
-                random_rot = (random.random() * 2 * math.pi, random.random() * 2 * math.pi, random.random() * 2 * math.pi)
-                obj_to_rotate.rotation_euler = Euler(random_rot, 'XYZ')
+            # An instanced collection only holds its instancer
+            instancers = [obj for obj in collection.objects if obj.get("sdg_instancer", False)]
+            if len(instancers) == 0:
+                batchTransform.randomize_rotations(objects = collection.objects)
+            for instancer in instancers:
+                num_point = len(instancer.data.vertices)
+                random_rot = np.random.random(num_point * 3).astype(np.float32) * 2 * math.pi
+                instancer.data.attributes["sdg_rotation"].data.foreach_set("vector", random_rot)
+                instancer.data.update()
              
         print("Rotation Randomize COMPLERED !!!")
 
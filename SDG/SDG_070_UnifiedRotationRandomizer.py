@@ -1,7 +1,5 @@
 import bpy 
-import math
-import random
-from mathutils import Euler
+from util import batchTransform
 
 
 class UnifiedRotationRandomizer:
@@ -26,9 +24,7 @@ class UnifiedRotationRandomizer:
     def unified_rotation_randomize(self):
         """ Applies unified random rotation to all objects in foreground collections.""" 
         for collection in self.__collections_for_unified_rotation_randomize:
-            random_rot = (random.random() * 2 * math.pi, random.random() * 2 * math.pi, random.random() * 2 * math.pi)
-            for obj_to_unified_rotate in collection.objects:
-               obj_to_unified_rotate.rotation_euler = Euler(random_rot, 'XYZ')
+            batchTransform.randomize_rotations(objects = collection.objects, unified = True)
         
         print("Unified Rotation Randomize COMPLERED !!!")
 
@@ -0,0 +1,238 @@
+import bpy
+import numpy as np
+from mathutils.bvhtree import BVHTree
+
+
+class OverlapResolver:
+    """
+    A class which relocates or drops the foreground and occlusion objects intersecting each other after they are scaled
+    and rotated, so no frame is rendered with interpenetrating products, which give merged or ambiguous ID masks.
+
+    The Poisson disk sampling keeps the object locations apart by a fixed radius, but ObjectScaleRandomizer scales the
+    objects by up to 2.5 times. The extent of each object is its oriented bounding box (OBB), the bounding box of
+    the asset transformed by the world matrix of the object. The pairs whose bounding spheres intersect are tested with
+    the separating axis theorem, with overlap_test "bvh" the pairs whose OBBs intersect are tested again with BVH trees
+    of their evaluated meshes, which accepts the objects whose boxes intersect but whose surfaces do not (the BVH test
+    does not detect an object entirely inside another one).
+
+    The objects are accepted one by one, the foreground objects first. An object intersecting an accepted object moves
+    to random locations of its placement area until it intersects none, after max_relocation_attempts it is removed.
+
+    Attributes
+    ----------
+    foreground_area (list of float): Spatial distribution area of foreground objects.
+    occluder_area (list of float): Spatial distribution area of occlusion objects.
+    overlap_test (str): "obb" tests the oriented bounding boxes, "bvh" also tests the meshes of the intersecting boxes.
+    max_relocation_attempts (int): Number of random locations tried for an intersecting object before it is removed.
+    num_relocated (int): The quantity of objects relocated in the last image.
+    num_dropped (int): The quantity of objects removed in the last image.
+    __foreground_object_collection (bpy.types.Collection): The blender collection data-block of foreground objects.
+    __occluder_collection (bpy.types.Collection): The blender collection data-block of occlusion objects.
+    __area_z_offset (dict of str: float): The lowest z of the placement area of each collection, the same as the location offset of its placement randomizer.
+    __bvh_trees (dict of str: BVHTree): Object names paired with the BVH tree of their mesh in world space at the current location.
+
+    Methods
+    -------
+    __get_obb(): Get the oriented bounding box of an object.
+    __obb_intersect(): Test whether two oriented bounding boxes intersect with the separating axis theorem.
+    __get_bvh_tree(): Get the BVH tree of the evaluated mesh of an object in world space.
+    __intersect(): Test whether two objects intersect.
+    __get_random_location(): Get a random location in the placement area of an object.
+    overlap_resolve(): Relocate or remove the intersecting foreground and occlusion objects.
+
+    References
+    ----------
+    https://docs.blender.org/api/current/mathutils.bvhtree.html
+    https://www.geometrictools.com/Documentation/DynamicCollisionDetection.pdf
+    Christer Ericson, Real-Time Collision Detection, 4.4 Oriented Bounding Boxes
+
+    """
+
+    def __init__(self,
+                 foreground_area = [2, 1.5, 0.5],
+                 occluder_area = [1.2, 0.8, 0.4],
+                 overlap_test = "obb",
+                 max_relocation_attempts = 20
+                 ):
+        self.foreground_area = foreground_area
+        self.occluder_area = occluder_area
+        self.overlap_test = overlap_test
+        self.max_relocation_attempts = max_relocation_attempts
+        self.num_relocated = 0
+        self.num_dropped = 0
+        self.__foreground_object_collection = bpy.data.collections["ForegroundObjectCollection"]
+        self.__occluder_collection = bpy.data.collections["OccluderCollection"]
+        self.__area_z_offset = {"ForegroundObjectCollection": 0.5, "OccluderCollection": 1.5}
+        self.__bvh_trees = {}
+
+
+    def __get_obb(self, obj):
+        """Get the oriented bounding box of an object.
+
+        Args:
+            obj (bpy.types.Object): The object.
+
+        Return:
+            obb (dict of str: numpy.ndarray): The "center", the unit "axes" (one per row) and the "half_size" along the axes.
+        """
+        matrix_world = np.array(obj.matrix_world)
+        corners = np.array([corner[:] for corner in obj.bound_box])
+        local_center = (corners.min(axis = 0) + corners.max(axis = 0)) / 2
+        local_half_size = (corners.max(axis = 0) - corners.min(axis = 0)) / 2
+        axis_scale = np.maximum(np.linalg.norm(matrix_world[:3, :3], axis = 0), 1e-9)
+
+        return {"center": matrix_world[:3, :3] @ local_center + matrix_world[:3, 3],
+                "axes": (matrix_world[:3, :3] / axis_scale).T,
+                "half_size": local_half_size * axis_scale}
+
+
+    def __obb_intersect(self, obb_a, obb_b):
+        """Test whether two oriented bounding boxes intersect with the separating axis theorem.
+
+        Args:
+            obb_a (dict of str: numpy.ndarray): The first oriented bounding box.
+            obb_b (dict of str: numpy.ndarray): The second oriented bounding box.
+
+        Return:
+            intersect (bool): True if no axis separates the boxes.
+        """
+        half_a, half_b = obb_a["half_size"], obb_b["half_size"]
+        rotation = obb_a["axes"] @ obb_b["axes"].T
+        abs_rotation = np.abs(rotation) + 1e-9 # Keep parallel edges from giving a null cross product axis
+        translation = obb_a["axes"] @ (obb_b["center"] - obb_a["center"])
+
+        # Face axes of A and of B
+        if np.any(np.abs(translation) > half_a + abs_rotation @ half_b):
+            return False
+        if np.any(np.abs(rotation.T @ translation) > abs_rotation.T @ half_a + half_b):
+            return False
+        # Cross products of the edge axes
+        for i in range(3):
+            i1, i2 = (i + 1) % 3, (i + 2) % 3
+            for j in range(3):
+                j1, j2 = (j + 1) % 3, (j + 2) % 3
+                radius_a = half_a[i1] * abs_rotation[i2, j] + half_a[i2] * abs_rotation[i1, j]
+                radius_b = half_b[j1] * abs_rotation[i, j2] + half_b[j2] * abs_rotation[i, j1]
+                if abs(translation[i2] * rotation[i1, j] - translation[i1] * rotation[i2, j]) > radius_a + radius_b:
+                    return False
+
+        return True
+
+
+    def __get_bvh_tree(self, obj):
+        """Get the BVH tree of the evaluated mesh of an object in world space.
+
+        Args:
+            obj (bpy.types.Object): The object.
+
+        Return:
+            bvh_tree (mathutils.bvhtree.BVHTree): The BVH tree, None if the object has no mesh.
+        """
+        if obj.name in self.__bvh_trees:
+            return self.__bvh_trees[obj.name]
+        bvh_tree = None
+        if obj.type == "MESH":
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            obj_eval = obj.evaluated_get(depsgraph)
+            mesh = obj_eval.to_mesh()
+            mesh.calc_loop_triangles()
+            vertices = np.empty(len(mesh.vertices) * 3, dtype = np.float32)
+            mesh.vertices.foreach_get("co", vertices)
+            triangles = np.empty(len(mesh.loop_triangles) * 3, dtype = np.int32)
+            mesh.loop_triangles.foreach_get("vertices", triangles)
+            obj_eval.to_mesh_clear()
+            matrix_world = np.array(obj.matrix_world)
+            vertices = vertices.reshape(-1, 3) @ matrix_world[:3, :3].T + matrix_world[:3, 3]
+            bvh_tree = BVHTree.FromPolygons(vertices.tolist(), triangles.reshape(-1, 3).tolist())
+        self.__bvh_trees[obj.name] = bvh_tree
+
+        return bvh_tree
+
+
+    def __intersect(self, obj_a, obb_a, obj_b, obb_b):
+        """Test whether two objects intersect.
+
+        Args:
+            obj_a (bpy.types.Object): The first object.
+            obb_a (dict of str: numpy.ndarray): The oriented bounding box of the first object.
+            obj_b (bpy.types.Object): The second object.
+            obb_b (dict of str: numpy.ndarray): The oriented bounding box of the second object.
+
+        Return:
+            intersect (bool): True if the objects intersect.
+        """
+        # Bounding spheres first, most pairs are far apart
+        if np.linalg.norm(obb_a["center"] - obb_b["center"]) > np.linalg.norm(obb_a["half_size"]) + np.linalg.norm(obb_b["half_size"]):
+            return False
+        if not self.__obb_intersect(obb_a, obb_b):
+            return False
+        if self.overlap_test == "bvh":
+            bvh_tree_a = self.__get_bvh_tree(obj_a)
+            bvh_tree_b = self.__get_bvh_tree(obj_b)
+            if bvh_tree_a is not None and bvh_tree_b is not None:
+                return len(bvh_tree_a.overlap(bvh_tree_b)) > 0
+
+        return True
+
+
+    def __get_random_location(self, collection_name):
+        """Get a random location in the placement area of an object.
+
+        Args:
+            collection_name (str): The name of the collection of the object.
+
+        Return:
+            location (numpy.ndarray): The random location.
+        """
+        area = np.array(self.foreground_area if collection_name == "ForegroundObjectCollection" else self.occluder_area, dtype = float)
+        location = (np.random.random(3) - 0.5) * area
+        location[2] = self.__area_z_offset[collection_name] + np.random.random() * area[2]
+
+        return location
+
+
+    def overlap_resolve(self):
+        """Relocate or remove the intersecting foreground and occlusion objects."""
+        self.num_relocated = 0
+        self.num_dropped = 0
+        self.__bvh_trees = {}
+        # The world matrices of the scaled and rotated objects are evaluated by the view layer update
+        bpy.context.view_layer.update()
+
+        accepted = []
+        dropped_objects = []
+        for collection in [self.__foreground_object_collection, self.__occluder_collection]:
+            for obj in collection.objects:
+                obb = self.__get_obb(obj)
+                if not any(self.__intersect(obj, obb, other_obj, other_obb) for other_obj, other_obb in accepted):
+                    accepted.append((obj, obb))
+                    continue
+
+                relocated = False
+                for attempt in range(self.max_relocation_attempts):
+                    new_location = self.__get_random_location(collection_name = collection.name)
+                    offset = new_location - np.array(obj.location)
+                    # Move the world matrix as well, it is only evaluated again by the next view layer update
+                    obj.matrix_world.translation = (np.array(obj.matrix_world.translation) + offset).tolist()
+                    obb["center"] = obb["center"] + offset
+                    self.__bvh_trees.pop(obj.name, None)
+                    if not any(self.__intersect(obj, obb, other_obj, other_obb) for other_obj, other_obb in accepted):
+                        relocated = True
+                        break
+                if relocated:
+                    accepted.append((obj, obb))
+                    self.num_relocated += 1
+                else:
+                    dropped_objects.append(obj)
+
+        for obj in dropped_objects:
+            bpy.data.objects.remove(obj, do_unlink = True)
+        self.num_dropped = len(dropped_objects)
+
+        print(f"Relocated {self.num_relocated} and removed {self.num_dropped} intersecting objects")
+        print("Overlap Resolve COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    resolver = OverlapResolver()
+    resolver.overlap_resolve()
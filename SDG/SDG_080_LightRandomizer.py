@@ -3,7 +3,11 @@ import os
 from glob import glob
 import random
 import math
-import sys
+from util import exitCode
+
+
+# HDRI folder -> paths of its HDRIs, only valid inside one blender session
+_hdri_path_list_cache = {}
 
 
 class LightRandomizer:
@@ -11,14 +15,29 @@ class LightRandomizer:
     A randomizer class which randomly select a high dynamic range image(HDRI) as scene lighting. The HDRIs are download from Poly Haven.
     This randomizer also randomly set the strength factor for the intensity of the HDRI scene light.
 
+    The HDRIs converted by SDG_500_HDRIPreprocessor.py are used when they exist. The world node tree is only built when
+    the world has none, it is kept between the images of a blender session, and an HDRI already loaded is reused.
+
+    The images which reuse a background plate (SDG_095_BackgroundPlateCompositor.py) are lit by the HDRI and the
+    rotation of their plate, only the strength is randomized.
+
     Attributes
     ----------
     asset_hdri_lighting_folder_path (str): The path to the downloaded Poly Haven HDRIs.
     hdri_lighting_strength_range (dict of str: float): The distribution of the strength factor for the intensity of the HDRI scene light.
+    asset_hdri_cache_folder_path (str): The path to the HDRIs converted by SDG_500_HDRIPreprocessor.py, None disables it.
+    hdri_cache_max_resolution (int): The maximum width of the converted HDRIs to use.
+    selected_hdri_name (str): The name of the HDRI selected for the last image.
+    keep_hdri (bool): Keep the HDRI of the previous frame and only randomize the strength and rotation, for the frames of a timeline batch.
+    fixed_hdri_path (str): The path of the HDRI to use instead of a random one, None selects a random HDRI.
+    fixed_hdri_rotation (list of float): The XYZ rotation of the HDRI in radians to use instead of a random one, None randomizes it.
+    selected_hdri_path (str): The path of the HDRI of the last image.
+    selected_hdri_rotation (list of float): The XYZ rotation of the HDRI of the last image in radians.
 
     Methods
     -------
     __error_check(): Check assigned HDRI assets folder path isn't empty.
+    __get_hdri_path_list(): Get the paths of the HDRIs, the converted ones if they exist.
     __create_world_shader_nodes(): Create world shader node group.
     light_randomize(): Randomly apply a HDRI lighting and adjust light intensity.
 
@@ -30,28 +49,60 @@ class LightRandomizer:
 
     def __init__(self,
                 asset_hdri_lighting_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/HDRI",
-                hdri_lighting_strength_range = {"min": 0.1 , "max": 2}
+                hdri_lighting_strength_range = {"min": 0.1 , "max": 2},
+                asset_hdri_cache_folder_path = None,
+                hdri_cache_max_resolution = 2048
                 ):
         self.asset_hdri_lighting_folder_path = asset_hdri_lighting_folder_path
         self.hdri_lighting_strength_range = hdri_lighting_strength_range
+        self.asset_hdri_cache_folder_path = asset_hdri_cache_folder_path
+        self.hdri_cache_max_resolution = hdri_cache_max_resolution
+        self.selected_hdri_name = None
+        self.keep_hdri = False
+        self.fixed_hdri_path = None
+        self.fixed_hdri_rotation = None
+        self.selected_hdri_path = None
+        self.selected_hdri_rotation = None
 
 
     def __error_check(self,asset_path_list):
         """Check assigned HDRI assets folder path isn't empty."""
         num_asset_in_folder = len(asset_path_list)
         if num_asset_in_folder < 1:
-            print(f'ERROR!!! can not find any light asset in {self.asset_hdri_lighting_folder_path}')
-            input("Press Enter to continue...")
-            sys.exit()
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any light asset in {self.asset_hdri_lighting_folder_path}')
+
+
+    def __get_hdri_path_list(self):
+        """Get the paths of the HDRIs, the converted ones if they exist.
+
+        Return:
+            hdri_lighting_path_list (list of str): The paths of the HDRIs.
+        """
+        if self.asset_hdri_cache_folder_path is not None:
+            cache_key = (self.asset_hdri_cache_folder_path, self.hdri_cache_max_resolution)
+            if cache_key not in _hdri_path_list_cache:
+                _hdri_path_list_cache[cache_key] = glob(os.path.join(self.asset_hdri_cache_folder_path,
+                                                                     f"*_{self.hdri_cache_max_resolution}.exr"))
+                if len(_hdri_path_list_cache[cache_key]) == 0:
+                    print(f"Warning!!! no converted HDRI in {self.asset_hdri_cache_folder_path}, run SDG_500_HDRIPreprocessor.py first")
+            if len(_hdri_path_list_cache[cache_key]) > 0:
+                return _hdri_path_list_cache[cache_key]
+
+        if self.asset_hdri_lighting_folder_path not in _hdri_path_list_cache:
+            _hdri_path_list_cache[self.asset_hdri_lighting_folder_path] = glob(os.path.join(self.asset_hdri_lighting_folder_path, "*.exr"))
+
+        return _hdri_path_list_cache[self.asset_hdri_lighting_folder_path]
 
 
     def __create_world_shader_nodes(self):
-        """Create world shader node group.""" 
+        """Create world shader node group, keep the node group of the previous image if the world has one.""" 
         # Use Nodes
         bpy.data.worlds['World'].use_nodes = True
 
         # Environment node tree reference
         nodes = bpy.data.worlds['World'].node_tree.nodes
+        if all(node_name in nodes for node_name in ["World Output", "Background", "Environment Texture", "Mapping", "Texture Coordinate"]):
+            return
 
         # Clear all nodes
         nodes.clear()
@@ -88,14 +139,22 @@ class LightRandomizer:
         # Mapping node reference
         node_MappingLighting = bpy.data.worlds["World"].node_tree.nodes["Mapping"]
 
-        # Get hdri lighting asset path
-        hdri_lighting_path_list = glob(os.path.join(self.asset_hdri_lighting_folder_path, "*.exr"))
-        self.__error_check(asset_path_list = hdri_lighting_path_list)
-
-        # Randomly select a hdri lighting, then add hdri lighting to node_EnvironmentTexture
-        hdri_lighting_selected = random.sample(hdri_lighting_path_list, 1)
-        hdri_lighting = bpy.data.images.load(hdri_lighting_selected[0])
-        node_EnvironmentTexture.image = hdri_lighting
+        if self.fixed_hdri_path is not None:
+            hdri_lighting = bpy.data.images.load(self.fixed_hdri_path, check_existing = True)
+            if node_EnvironmentTexture.image != hdri_lighting:
+                node_EnvironmentTexture.image = hdri_lighting
+        elif not self.keep_hdri or node_EnvironmentTexture.image is None:
+            # Get hdri lighting asset path
+            hdri_lighting_path_list = self.__get_hdri_path_list()
+            self.__error_check(asset_path_list = hdri_lighting_path_list)
+
+            # Randomly select a hdri lighting, then add hdri lighting to node_EnvironmentTexture
+            hdri_lighting_selected = random.sample(hdri_lighting_path_list, 1)
+            hdri_lighting = bpy.data.images.load(hdri_lighting_selected[0], check_existing = True)
+            if node_EnvironmentTexture.image != hdri_lighting:
+                node_EnvironmentTexture.image = hdri_lighting
+        self.selected_hdri_path = bpy.path.abspath(node_EnvironmentTexture.image.filepath)
+        self.selected_hdri_name = os.path.splitext(os.path.basename(self.selected_hdri_path))[0]
 
         # Randomly set lighting strength
         max = int(self.hdri_lighting_strength_range["max"] * 10)
@@ -104,12 +163,16 @@ class LightRandomizer:
         node_Background.inputs["Strength"].default_value = lighting_strength
 
         # Randomly rotate lighting
-        random_rot_x = random.uniform(-30/360, 120/360) * 2 * math.pi # -30~+120 degree
-        random_rot_y = random.uniform(-30/360, 30/360) * 2 * math.pi # -30~+30 degree
-        random_rot_z = random.uniform(0,360/360)  * 2* math.pi # 0~360 degree
+        if self.fixed_hdri_rotation is not None:
+            random_rot_x, random_rot_y, random_rot_z = self.fixed_hdri_rotation
+        else:
+            random_rot_x = random.uniform(-30/360, 120/360) * 2 * math.pi # -30~+120 degree
+            random_rot_y = random.uniform(-30/360, 30/360) * 2 * math.pi # -30~+30 degree
+            random_rot_z = random.uniform(0,360/360)  * 2* math.pi # 0~360 degree
         node_MappingLighting.inputs["Rotation"].default_value[0] =  random_rot_x
         node_MappingLighting.inputs["Rotation"].default_value[1] =  random_rot_y
         node_MappingLighting.inputs["Rotation"].default_value[2] =  random_rot_z
+        self.selected_hdri_rotation = [random_rot_x, random_rot_y, random_rot_z]
 
         print("Light Randomize COMPLERED !!!")
 
@@ -10,6 +10,10 @@ class CameraRandomizer:
     noise, color temperature, brightness, contrast, hue and saturation. This randomizer increase the synthetic image
     appearance diversity, acting as a data augmentation technique. 
 
+    The compositing nodes are built once and kept between the images of a blender session, only their values are
+    randomized. The nodes of the effects which are off in the current image are muted, the compositor is disabled
+    when every effect is off. The effects only read the Image pass, the Z pass is disabled.
+
     Attributes
     ----------
     camera_focal_length (int): Perspective Camera focal length value in millimeters.
@@ -36,6 +40,8 @@ class CameraRandomizer:
     hue_value_range (dict of str: float): The distribution of the value of Hue Saturation Value nodes input-Hue, which adjust the hue.
     saturation_probability (float): Probability of saturation adjustment being enabled.
     saturation_value_range (dict of str: float): The distribution of the value of Hue Saturation Value nodes input-Saturation, which adjust the saturation.
+    active_effects (list of str): The camera effects which are on in the current image.
+    __effect_node_names (dict of str: list of str): The camera effects paired with the names of their compositing nodes.
     __vector_blur_factor (float): Control the Vector Blur nodes input-Blur, which is the scaling factor for the motion vector.
     __curve_r_point_list (list of float): Convert Temperature (K) to RGB (sRGB) using RGB Curves node - red channel's curve data points.
     __curve_g_point_list (list of float): Convert Temperature (K) to RGB (sRGB) using RGB Curves node - green channel's curve data points.
@@ -46,7 +52,9 @@ class CameraRandomizer:
     __set_camera(): Set camera focal length, image resolution and number of samples to render for each pixel.
     __set_curve_point_loction(): Set points in RGB Curves node.
     __create_wb_node_group(): Create the WhiteBalanceNode node group.
+    __is_compositing_nodes_valid(): Check the compositing nodes of the previous image can be reused.
     __create_compositing_nodes(): Create the compositing Nodes in blender to simulates camera effects.
+    __bypass_inactive_effects(): Mute the compositing nodes of the effects which are off in the current image.
     __chromatic_aberration_randomize(): Randomizes the value of Lens Distortion nodes input-Dispersion, which simulates chromatic aberration. 
     __blur_randomize(): Randomizes the value of Blur nodes input-Size, which controls the blur radius values.
     __motion_blur_randomize(): Randomizes the value of Vector Blur nodes input-Speed, which controls the direction of motion.
@@ -142,6 +150,15 @@ class CameraRandomizer:
         self.saturation_probability = saturation_probability
         self.saturation_value_range = saturation_value_range
 
+        self.active_effects = []
+        self.__effect_node_names = {"chromatic_aberration": ["Lens Distortion"],
+                                    "blur": ["Blur"],
+                                    "motion_blur": ["Vector Blur"],
+                                    "exposure": ["Exposure"],
+                                    "noise": ["Mix", "Texture"],
+                                    "white_balance": ["Wb"],
+                                    "brightness_contrast": ["Bright/Contrast"],
+                                    "hue_saturation": ["Hue Saturation Value"]}
         self.__vector_blur_factor = 10.0
         self.__curve_r_point_list = [[0.0, 0.0], 
                                      [0.02500000037252903, 1.0], [0.16249999403953552, 1.0], 
@@ -268,10 +285,39 @@ class CameraRandomizer:
         self.__set_curve_point_loction(node_RGBCurves_1.mapping.curves[2], self.__curve_b_point_list)
 
 
+    def __is_compositing_nodes_valid(self):
+        """Check the compositing nodes of the previous image can be reused.
+
+        Return:
+            valid (bool): True if every compositing node exists and still references its node group and texture.
+        """
+        node_tree = bpy.data.scenes['Scene'].node_tree
+        if node_tree is None:
+            return False
+        nodes = node_tree.nodes
+        for node_names in self.__effect_node_names.values():
+            for node_name in node_names:
+                if node_name not in nodes:
+                    return False
+        if "Render Layers" not in nodes or "Composite" not in nodes:
+            return False
+
+        # The full scene reset removes the node group and the noise texture
+        return nodes["Wb"].node_tree is not None and nodes["Texture"].texture is not None
+
+
     def __create_compositing_nodes(self):
         """Create the compositing Nodes in blender to simulates camera effects.""" 
         # Active compositing nodes
         bpy.data.scenes['Scene'].use_nodes = True
+        # The camera effects only read the Image pass
+        bpy.data.scenes['Scene'].view_layers["ViewLayer"].use_pass_z = False
+
+        # Keep the nodes of the previous image
+        if self.__is_compositing_nodes_valid():
+            for node in bpy.data.scenes['Scene'].node_tree.nodes:
+                node.mute = False
+            return
 
         # Clear all nodes
         bpy.data.scenes['Scene'].node_tree.nodes.clear()
@@ -476,6 +522,33 @@ class CameraRandomizer:
         node_HueSaturationValue.inputs['Saturation'].default_value = saturation_value[0]
 
  
+    def __bypass_inactive_effects(self):
+        """Mute the compositing nodes of the effects which are off in the current image.
+
+        A muted node passes its input image through. Without any active effect the compositor is disabled.
+        """
+        nodes = bpy.data.scenes['Scene'].node_tree.nodes
+        effect_active = {
+            "chromatic_aberration": nodes["Lens Distortion"].inputs["Dispersion"].default_value != 0,
+            "blur": nodes["Blur"].size_x != 0 or nodes["Blur"].size_y != 0,
+            "motion_blur": any(value != 0 for value in nodes["Vector Blur"].inputs["Speed"].default_value),
+            "exposure": nodes["Exposure"].inputs["Exposure"].default_value != 0,
+            "noise": nodes["Mix"].inputs["Fac"].default_value != 0,
+            "white_balance": nodes["Wb"].inputs["ColorTemperature"].default_value != 6500,
+            "brightness_contrast": nodes["Bright/Contrast"].inputs["Bright"].default_value != 0 or \
+                                   nodes["Bright/Contrast"].inputs["Contrast"].default_value != 0,
+            "hue_saturation": nodes["Hue Saturation Value"].inputs["Hue"].default_value != 0.5 or \
+                              nodes["Hue Saturation Value"].inputs["Saturation"].default_value != 1
+        }
+        self.active_effects = [effect for effect, active in effect_active.items() if active]
+        for effect, node_names in self.__effect_node_names.items():
+            for node_name in node_names:
+                nodes[node_name].mute = not effect_active[effect]
+        bpy.data.scenes['Scene'].use_nodes = len(self.active_effects) > 0
+
+        print("Active Camera Effects: {}".format(self.active_effects))
+
+
     def camera_randomize(self):
         """Randomizes vary camera sensor effects - chromatic aberration, blur, motion blur ,exposure, noise, color temperature, 
         brightness, contrast, hue and saturation.
@@ -493,6 +566,7 @@ class CameraRandomizer:
         self.__contrast_randomize()
         self.__hue_randomize()
         self.__saturation_randomize()
+        self.__bypass_inactive_effects()
 
         print("Camera Randomize COMPLERED !!!")
 
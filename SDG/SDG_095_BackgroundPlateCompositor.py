@@ -0,0 +1,207 @@
+import bpy
+import numpy as np
+import os
+import random
+from glob import glob
+from util import multiResolution
+from util import exitCode
+
+
+# (plate path, render width, render height) paired with the plate scaled to cover the render, only valid inside one blender session
+_plate_cache = {}
+
+
+class BackgroundPlateCompositor:
+    """
+    A class which renders only the foreground and occlusion objects and composites them onto a background plate, a
+    pre-rendered background or a real shelf photo randomly selected from a folder of images.
+
+    The background wall of hundreds of textured objects is most of the build and path tracing time of an image. With
+    the foreground-only render, the background objects are not created, the film is transparent and a shadow catcher
+    plane takes the place of the background wall, so the shadows of the products are kept in the alpha channel. After
+    the render, the RGBA image is composited over the plate with numpy and saved again as an RGB image. The labels come
+    from the ID mask of the foreground objects and are not changed.
+
+    The plates are scaled to cover the render resolution and cropped at a random offset for each image, the scaled
+    plates of the session are cached.
+
+    With the background plate reuse of DataGenerator, the plate is not taken from the folder: a background wall is built
+    and rendered as a plate without the compositor, then the foreground, occluder, light strength and camera randomizers
+    run for several images against it. The camera effects of these images only apply to the rendered foreground.
+
+    Attributes
+    ----------
+    background_plate_folder_path (str): The path to the background plate images (png or jpg).
+    max_cached_background_plate (int): The maximum number of scaled plates kept in memory in the blender session.
+    plate_path (str): The plate of the current image, None selects a random plate of background_plate_folder_path.
+    selected_plate_path (str): The path of the plate of the current image.
+    __shadow_catcher_size (list of float): Shadow catcher plane dimension(x, y), the same as the background plane.
+    __background_object_collection (bpy.types.Collection): The Collection data-block of background objects, which holds the shadow catcher.
+
+    Methods
+    -------
+    __error_check(): Check assigned background plate folder path isn't empty.
+    __create_shadow_catcher(): Create the shadow catcher plane in place of the background wall.
+    __get_plate(): Get the plate resized and cropped to the render resolution.
+    foreground_only_render_setup(): Make the film transparent, create the shadow catcher and select the plate of the current image.
+    render_background_plate(): Render the background wall of the current scene as a plate.
+    composite_plate(): Composite the rendered image over the selected plate.
+
+    References
+    ----------
+    https://docs.blender.org/manual/en/latest/render/cycles/object_settings/object_data.html#shadow-catcher
+    https://docs.blender.org/api/current/bpy.types.RenderSettings.html#bpy.types.RenderSettings.film_transparent
+    https://en.wikipedia.org/wiki/Alpha_compositing
+
+    """
+
+    def __init__(self,
+                background_plate_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/background_plate",
+                max_cached_background_plate = 16
+                ):
+        self.background_plate_folder_path = background_plate_folder_path
+        self.max_cached_background_plate = max_cached_background_plate
+        self.plate_path = None
+        self.selected_plate_path = None
+        self.__shadow_catcher_size = [3.2, 2.4] # x, y
+        self.__background_object_collection = bpy.data.collections["BackgroundObjectCollection"]
+
+
+    def __error_check(self, plate_path_list):
+        """Check assigned background plate folder path isn't empty.
+
+        Args:
+            plate_path_list (list of str): The paths of the background plates.
+        """
+        num_plate_in_folder = len(plate_path_list)
+        if num_plate_in_folder < 1:
+            exitCode.fail(exitCode.ASSET_NOT_FOUND, f'can not find any background plate in {self.background_plate_folder_path}')
+
+
+    def __create_shadow_catcher(self):
+        """Create the shadow catcher plane in place of the background wall."""
+        half_x = self.__shadow_catcher_size[0] / 2
+        half_y = self.__shadow_catcher_size[1] / 2
+        mesh = bpy.data.meshes.new("ShadowCatcher")
+        mesh.from_pydata([(-half_x, -half_y, 0), (half_x, -half_y, 0), (half_x, half_y, 0), (-half_x, half_y, 0)], [], [(0, 1, 2, 3)])
+        shadow_catcher = bpy.data.objects.new("ShadowCatcher", mesh)
+        shadow_catcher.is_shadow_catcher = True
+        self.__background_object_collection.objects.link(shadow_catcher)
+
+
+    def __get_plate(self, plate_path, width, height):
+        """Get the plate resized and cropped to the render resolution.
+
+        Args:
+            plate_path (str): The path of the plate image.
+            width (int): The width of the render.
+            height (int): The height of the render.
+
+        Return:
+            plate (numpy.ndarray): The (height, width, 3) plate with values in [0, 1], the first row is the top.
+        """
+        cache_key = (plate_path, width, height)
+        if cache_key not in _plate_cache:
+            image = bpy.data.images.load(plate_path)
+            plate_width, plate_height = image.size
+            num_channel = image.channels
+            pixels = np.empty(plate_width * plate_height * num_channel, dtype = np.float32)
+            image.pixels.foreach_get(pixels)
+            bpy.data.images.remove(image)
+            # Blender stores the bottom row first
+            plate = np.flipud(pixels.reshape(plate_height, plate_width, num_channel))[:, :, :3]
+
+            # Scale the plate to cover the render
+            scale = max(width / plate_width, height / plate_height)
+            scaled_width = max(round(plate_width * scale), width)
+            scaled_height = max(round(plate_height * scale), height)
+            if len(_plate_cache) >= self.max_cached_background_plate:
+                _plate_cache.pop(next(iter(_plate_cache)))
+            _plate_cache[cache_key] = multiResolution.area_resize(np.ascontiguousarray(plate), scaled_width, scaled_height)
+
+        # Crop the scaled plate at a random offset
+        plate = _plate_cache[cache_key]
+        offset_x = random.randint(0, plate.shape[1] - width)
+        offset_y = random.randint(0, plate.shape[0] - height)
+        plate = plate[offset_y:offset_y + height, offset_x:offset_x + width]
+
+        return plate
+
+
+    def foreground_only_render_setup(self):
+        """Make the film transparent, create the shadow catcher and select the plate of the current image."""
+        if self.plate_path is not None:
+            self.selected_plate_path = self.plate_path
+        else:
+            plate_path_list = []
+            for extension in ["png", "jpg", "jpeg"]:
+                plate_path_list += glob(os.path.join(self.background_plate_folder_path, "*." + extension))
+            self.__error_check(plate_path_list = plate_path_list)
+            self.selected_plate_path = random.choice(sorted(plate_path_list))
+
+        scene = bpy.data.scenes["Scene"]
+        scene.render.film_transparent = True
+        scene.render.image_settings.color_mode = "RGBA"
+        self.__create_shadow_catcher()
+
+        print(f"Background Plate: {os.path.basename(self.selected_plate_path)}")
+        print("Foreground Only Render Setup COMPLERED !!!")
+
+
+    def render_background_plate(self, plate_path):
+        """Render the background wall of the current scene as a plate, opaque and without the camera effects.
+
+        Args:
+            plate_path (str): The path where the plate (PNG) will be saved.
+        """
+        scene = bpy.data.scenes["Scene"]
+        scene.render.film_transparent = False
+        scene.render.image_settings.color_mode = "RGB"
+        scene.use_nodes = False
+        os.makedirs(os.path.dirname(plate_path), exist_ok = True)
+        scene.render.filepath = plate_path
+        print("Start Render Background Plate")
+        bpy.ops.render.render(write_still=True, scene='Scene')
+        print("End Render Background Plate")
+
+        print("SAVE BACKGROUND PLATE AT {}".format(plate_path))
+        print("Background Plate Render COMPLERED !!!")
+
+
+    def composite_plate(self, img_file_path):
+        """Composite the rendered image over the selected plate.
+
+        The PNG of blender keeps the colors unassociated with the alpha, shadows on the shadow catcher are black
+        with the alpha of the shadow.
+
+        Args:
+            img_file_path (str): The path of the rendered RGBA PNG, overwritten by the composited RGB image.
+
+        Return:
+            composited (numpy.ndarray): The (height, width, 3) composited image, the first row is the top, None if the
+                                        rendered image has no alpha channel.
+        """
+        image = bpy.data.images.load(img_file_path)
+        width, height = image.size
+        num_channel = image.channels
+        pixels = np.empty(width * height * num_channel, dtype = np.float32)
+        image.pixels.foreach_get(pixels)
+        bpy.data.images.remove(image)
+        pixels = np.flipud(pixels.reshape(height, width, num_channel))
+        if num_channel < 4:
+            print("Warning!!! the rendered image has no alpha channel, skip the background plate")
+            return None
+
+        plate = self.__get_plate(plate_path = self.selected_plate_path, width = width, height = height)
+        alpha = pixels[:, :, 3:4]
+        composited = pixels[:, :, :3] * alpha + plate * (1 - alpha)
+        multiResolution.write_png(img_file_path, composited)
+
+        print("Background Plate Composite COMPLERED !!!")
+
+        return composited
+
+
+if __name__ == '__main__':
+    compositor = BackgroundPlateCompositor()
+    compositor.foreground_only_render_setup()
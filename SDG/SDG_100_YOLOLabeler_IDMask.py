@@ -2,6 +2,7 @@ import bpy
 import numpy as np
 import datetime
 import os
+from util import multiResolution
 
 
 class YOLOLabeler:
@@ -9,10 +10,26 @@ class YOLOLabeler:
     A class which render the current blender scene, outputs the synthetic image(PNG format) and generate the foreground objects annotation/labeling 
     data(yolo format txt file).
 
+    Downscaled copies of the image and labels for other training input sizes are written to parallel output folders
+    (e.g. images_1280, labels_1280) from the same render, on a thread pool.
+
+    With a plate compositor (the foreground-only render of SDG_095_BackgroundPlateCompositor.py), the rendered image is
+    composited over its background plate before the labels and the downscaled copies are saved.
+
+    A timeline batch of DataGenerator renders the K frames of the scene with one animation render, the images are named
+    <batch id>_<frame>, and the labels of each frame come from an annotation render of that frame.
+
     Attributes
     ----------
     output_img_path (str): The path where rendered images will be saved.
     output_label_path (str): The path where YOLO format bounding box annotations will be saved.
+    render_worker_id (int): ID of the blender process when several processes render on the same PC, None for a single process.
+    labels (list of tuple): The (class id, center x, center y, width, height) YOLO label of each object in the last image.
+    output_long_sides (list of int): The long side in pixels of each downscaled copy, empty disables them.
+    output_min_box_size (int): The minimum width and height in pixels of a box in the labels of a downscaled copy.
+    num_resize_threads (int): Number of threads writing the downscaled copies.
+    batch_labels (list of list of tuple): The labels of each frame of the last timeline batch.
+    plate_compositor (BackgroundPlateCompositor): Composites the rendered image over a background plate, None keeps the rendered image.
     __obj_name_and_id_dict (dict of str: int): Object names paired with their corresponding Pass index id.
     __obj_name_and_bbox_dict (dict of str: list of list of int): Object names paired with their corresponding bounding box coordinates.
     __target_obj_collection (bpy.types.Collection): The collection that needs extract bounding box annotation from its containing objects.
@@ -32,7 +49,10 @@ class YOLOLabeler:
     __get_obj_class_id(): Reference objects yolo class id from attribute-__obj_name_and_class_id_mapping.
     __format_coordinates(): Format bounding box coordinates to yolo format.
     __get_all_coordinates(): Merge all objects bounding box coordinates in the current image.
+    __save_yolo_label(): Save the labels of the bounding boxes found in the current image.
+    get_class_id_mapping(): Get the object names paired with their yolo class id.
     get_and_save_yolo_label(): Render the image and generate the corresponding annotation/labeling data.
+    get_and_save_batch_yolo_labels(): Render the frames of a timeline batch with one animation render and generate the labels of each frame.
 
     References
     ----------
@@ -51,6 +71,13 @@ class YOLOLabeler:
                  
         self.output_img_path = output_img_path
         self.output_label_path = output_label_path
+        self.render_worker_id = None
+        self.labels = []
+        self.output_long_sides = []
+        self.output_min_box_size = 8
+        self.num_resize_threads = 2
+        self.batch_labels = []
+        self.plate_compositor = None
         self.__obj_name_and_id_dict = {}
         self.__obj_name_and_bbox_dict = {}
         self.__target_obj_collection = bpy.data.collections["ForegroundObjectCollection"]
@@ -141,8 +168,18 @@ class YOLOLabeler:
         now = datetime.datetime.now(tz=datetime.timezone(datetime.timedelta(hours=8)))
         time_id = now.strftime("%Y%m%d%H%M%S").zfill(15)
         render_machine_id = self.__render_machine_id
+        # Blender processes rendering at the same time on the same PC
+        if self.render_worker_id is not None:
+            time_id = time_id + "_w" + str(self.render_worker_id)
         self.__gen_img_id = render_machine_id + time_id
 
+        # Several images can be generated within one second in a blender session, keep the ID unique
+        duplicate_num = 0
+        while os.path.exists(os.path.join(self.output_img_path, self.__gen_img_id + ".png")) or \
+              os.path.exists(os.path.join(self.output_img_path, self.__gen_img_id + "_0001.png")):
+            duplicate_num += 1
+            self.__gen_img_id = render_machine_id + time_id + "_" + str(duplicate_num)
+
         return id
     
 
@@ -172,11 +209,17 @@ class YOLOLabeler:
         links.new(node_RenderLayers.outputs["IndexOB"], node_Viewer.inputs["Image"])
 
 
-    def __add_pass_index(self):
-        """Add index number for the "Object Index" render pass.""" 
+    def __add_pass_index(self, target_objects = None):
+        """Add index number for the "Object Index" render pass.
+
+        Args:
+            target_objects (list of bpy.types.Object): The objects to label, None for the objects of attribute-__target_obj_collection.
+        """ 
         bpy.data.scenes['Scene_Annot'].view_layers["ViewLayer"].use_pass_object_index = True
 
-        for index, obj in enumerate(self.__target_obj_collection.objects, start=1): 
+        if target_objects is None:
+            target_objects = self.__target_obj_collection.objects
+        for index, obj in enumerate(target_objects, start=1): 
             obj.pass_index = index
             self.__obj_name_and_id_dict[obj.name] = index
 
@@ -185,7 +228,10 @@ class YOLOLabeler:
         """Render image for annotation/labeling purpose."""
         # Render using Cycle
         bpy.data.scenes['Scene_Annot'].render.engine = "CYCLES"
-        bpy.data.scenes['Scene_Annot'].cycles.device = "GPU"
+        # Use the device and threads chosen for the main scene by the Initializer
+        bpy.data.scenes['Scene_Annot'].cycles.device = bpy.data.scenes['Scene'].cycles.device
+        bpy.data.scenes['Scene_Annot'].render.threads_mode = bpy.data.scenes['Scene'].render.threads_mode
+        bpy.data.scenes['Scene_Annot'].render.threads = bpy.data.scenes['Scene'].render.threads
         bpy.data.scenes['Scene_Annot'].cycles.samples = 1
         bpy.data.scenes['Scene_Annot'].cycles.use_denoising = False
         print("Start Render Annot")
@@ -302,8 +348,21 @@ class YOLOLabeler:
         return main_text_coordinates # Return all coordinates
 
 
+    def get_class_id_mapping(self):
+        """Get the object names paired with their yolo class id.
+
+        Return:
+            obj_name_and_class_id_mapping (dict of str: int): A copy of attribute-__obj_name_and_class_id_mapping.
+        """
+        return dict(self.__obj_name_and_class_id_mapping)
+
+
     def get_and_save_yolo_label(self):
-        """Render the image and generate the corresponding annotation/labeling data.""" 
+        """Render the image and generate the corresponding annotation/labeling data.
+
+        Return:
+            gen_img_id (str): ID of the generated synthetic image data.
+        """
         self.__create_gen_img_id()
         self.__create_and_switch_annotation_scene()
 
@@ -313,6 +372,9 @@ class YOLOLabeler:
         print("Start Render Image")         
         bpy.ops.render.render(write_still=True, scene='Scene')
         print("End Render Image")
+        img_pixels = None
+        if self.plate_compositor is not None:
+            img_pixels = self.plate_compositor.composite_plate(img_file_path = img_file_path)
 
         # Get objects bbox
         print("Start Find BBOX") 
@@ -320,9 +382,26 @@ class YOLOLabeler:
         self.__add_pass_index()
         self.__find_obj_bbox()
 
+        self.__save_yolo_label(img_file_path = img_file_path, img_pixels = img_pixels)
+
+        return self.__gen_img_id
+
+
+    def __save_yolo_label(self, img_file_path, img_pixels = None):
+        """Save the labels of the bounding boxes found in the current image.
+
+        Args:
+            img_file_path (str): The path of the rendered image.
+            img_pixels (numpy.ndarray): The pixels of the image composited over a background plate, None reads the
+                                        rendered image for the downscaled copies.
+        """
         # Get objects labels
         text_coordinates = self.__get_all_coordinates()
         splitted_coordinates = text_coordinates.split('\n')[:-1] # Delete last '\n' in coordinates
+        self.labels = []
+        for line in splitted_coordinates:
+            class_id, cx, cy, width, height = line.split(' ')
+            self.labels.append((class_id, float(cx), float(cy), float(width), float(height)))
 
         # Save labels
         text_file_path = os.path.join(self.output_label_path, str(self.__gen_img_id)+".txt")
@@ -330,12 +409,70 @@ class YOLOLabeler:
         text_file.write('\n'.join(splitted_coordinates))
         text_file.close()
 
+        # Save downscaled copies
+        multiResolution.submit(img_file_path = img_file_path,
+                               gen_img_id = self.__gen_img_id,
+                               labels = self.labels,
+                               output_img_path = self.output_img_path,
+                               output_label_path = self.output_label_path,
+                               long_sides = self.output_long_sides,
+                               min_box_size = self.output_min_box_size,
+                               num_resize_threads = self.num_resize_threads,
+                               pixels = img_pixels)
+
         print("YOLO-coordinates:\n{}".format(splitted_coordinates))
         print("SAVE IMG AT {}".format(img_file_path))
         print("SAVE LABLE AT {}".format(text_file_path))
         print("Auto Labeling COMPLERED !!!")
 
 
+    def get_and_save_batch_yolo_labels(self, frame_objects, frame_plate_compositors = None):
+        """Render the frames of a timeline batch with one animation render and generate the labels of each frame.
+
+        The objects of each frame are only visible on their frame, the annotation scene is rendered once per frame.
+
+        Args:
+            frame_objects (list of list of bpy.types.Object): The foreground objects of each frame, frame 1 first.
+            frame_plate_compositors (list of BackgroundPlateCompositor): The plate compositor of each frame, None keeps the rendered images.
+
+        Return:
+            gen_img_ids (list of str): IDs of the generated synthetic image data of each frame.
+        """
+        self.__create_gen_img_id()
+        batch_id = self.__gen_img_id
+
+        # Save png imgs, "####" is replaced by the frame number
+        scene = bpy.data.scenes["Scene"]
+        scene.frame_start = 1
+        scene.frame_end = len(frame_objects)
+        scene.render.filepath = os.path.join(self.output_img_path, batch_id + "_####")
+        print("Start Render Animation")
+        bpy.ops.render.render(animation=True, scene='Scene')
+        print("End Render Animation")
+
+        self.__create_and_switch_annotation_scene()
+        self.__create_id_mask_nodes()
+        gen_img_ids = []
+        self.batch_labels = []
+        for frame, objects in enumerate(frame_objects, start=1):
+            bpy.data.scenes['Scene_Annot'].frame_set(frame)
+            self.__gen_img_id = batch_id + "_{:04d}".format(frame)
+            self.__obj_name_and_id_dict = {}
+            self.__obj_name_and_bbox_dict = {}
+            print("Start Find BBOX Of Frame {}".format(frame))
+            self.__add_pass_index(target_objects = objects)
+            self.__find_obj_bbox()
+            img_file_path = os.path.join(self.output_img_path, self.__gen_img_id + ".png")
+            img_pixels = None
+            if frame_plate_compositors is not None:
+                img_pixels = frame_plate_compositors[frame - 1].composite_plate(img_file_path = img_file_path)
+            self.__save_yolo_label(img_file_path = img_file_path, img_pixels = img_pixels)
+            gen_img_ids.append(self.__gen_img_id)
+            self.batch_labels.append(self.labels)
+
+        return gen_img_ids
+
+
 if __name__ == '__main__':
     yolo_labeler = YOLOLabeler()
     yolo_labeler.get_and_save_yolo_label()       
\ No newline at end of file
@@ -0,0 +1,186 @@
+import bpy
+import ctypes
+import json
+import os
+import re
+import sys
+import time
+
+
+class ResourceMonitor:
+    """
+    A class which measures the memory and data-block usage of the blender process after each generated image, writes
+    the measurements to the run metrics file and decides when the blender process should be recycled.
+
+    A blender session which generates several images can leak memory or data blocks if the scene reset is not perfect,
+    the resident set size (RSS) growth since the first image is compared with a limit, a new blender process is started
+    by SDG_400_Looper.py when the limit is exceeded.
+
+    Attributes
+    ----------
+    output_metrics_path (str): The path where the run metrics (JSON lines) will be saved.
+    max_rss_growth_mb (float): Recycle the blender process when its RSS grows more than this since the first image, None disables it.
+    worker_id (int): ID of the blender process when several processes render on the same PC, each of them writes its own metrics file.
+    __baseline_rss_mb (float): RSS of the blender process after the first image.
+    __last_rss_mb (float): RSS of the blender process after the last image.
+    __num_img (int): The quantity of synthetic images measured in the current blender session.
+
+    Methods
+    -------
+    __get_process_rss_mb(): Get the resident set size of the current process.
+    __get_blender_memory_mb(): Get the memory usage reported by the blender scene statistics.
+    __count_data_blocks(): Count the data blocks and the orphan data blocks in each bpy.data collection.
+    record(): Measure the blender process after one image and append the measurement to the run metrics file.
+    should_recycle(): Check whether the blender process should exit and be replaced by a new one.
+
+    References
+    ----------
+    https://docs.blender.org/api/current/bpy.types.Scene.html#bpy.types.Scene.statistics
+    https://man7.org/linux/man-pages/man5/proc.5.html
+    https://learn.microsoft.com/en-us/windows/win32/api/psapi/nf-psapi-getprocessmemoryinfo
+
+    """
+
+    def __init__(self,
+                 output_metrics_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/metrics",
+                 max_rss_growth_mb = 2048
+                 ):
+        self.output_metrics_path = output_metrics_path
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.worker_id = None
+        self.__baseline_rss_mb = None
+        self.__last_rss_mb = None
+        self.__num_img = 0
+
+
+    def __get_process_rss_mb(self):
+        """Get the resident set size of the current process.
+
+        Return:
+            rss_mb (float): The resident set size in MB, None if the platform is not supported.
+        """
+        if sys.platform == "win32":
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", ctypes.c_ulong),
+                            ("PageFaultCount", ctypes.c_ulong),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), ctypes.c_ulong]
+            get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+            get_current_process.restype = ctypes.c_void_p
+            if get_process_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / 1024 / 1024
+            return None
+
+        if os.path.exists("/proc/self/statm"):
+            with open("/proc/self/statm") as f:
+                rss_pages = int(f.read().split()[1])
+            return rss_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+        try:
+            import resource
+        except ImportError:
+            return None
+        # Peak RSS, in bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / 1024
+
+
+    def __get_blender_memory_mb(self):
+        """Get the memory usage reported by the blender scene statistics.
+
+        Return:
+            blender_memory_mb (float): The memory usage in MB, None if the statistics do not report it.
+        """
+        scene = bpy.data.scenes["Scene"]
+        statistics = scene.statistics(scene.view_layers[0])
+        match = re.search(r"Memory:\s*([\d.]+)\s*([KMG])i?B", statistics)
+        if match is None:
+            return None
+        unit_scale = {"K": 1 / 1024, "M": 1, "G": 1024}
+
+        return float(match.group(1)) * unit_scale[match.group(2)]
+
+
+    def __count_data_blocks(self):
+        """Count the data blocks and the orphan data blocks in each bpy.data collection.
+
+        Return:
+            data_block_num (dict of str: int): Number of data blocks in each non-empty bpy.data collection.
+            orphan_num (dict of str: int): Number of data blocks without users in each bpy.data collection which has some.
+        """
+        data_block_num = {}
+        orphan_num = {}
+        for collection in dir(bpy.data):
+            data_structure = getattr(bpy.data, collection)
+            if not isinstance(data_structure, bpy.types.bpy_prop_collection) or len(data_structure) == 0:
+                continue
+            data_block_num[collection] = len(data_structure)
+            num_orphan = sum(1 for block in data_structure if getattr(block, "users", 1) == 0)
+            if num_orphan > 0:
+                orphan_num[collection] = num_orphan
+
+        return data_block_num, orphan_num
+
+
+    def record(self, gen_img_id, extra_metrics = None):
+        """Measure the blender process after one image and append the measurement to the run metrics file.
+
+        Args:
+            gen_img_id (str): ID of the generated synthetic image data.
+            extra_metrics (dict): Other metrics of this image recorded in the same line.
+        """
+        self.__num_img += 1
+        self.__last_rss_mb = self.__get_process_rss_mb()
+        if self.__baseline_rss_mb is None:
+            self.__baseline_rss_mb = self.__last_rss_mb
+        data_block_num, orphan_num = self.__count_data_blocks()
+
+        metrics = {
+            "type": "worker_resource",
+            "time": time.time(),
+            "gen_img_id": gen_img_id,
+            "pid": os.getpid(),
+            "worker_id": self.worker_id,
+            "session_img_num": self.__num_img,
+            "rss_mb": self.__last_rss_mb,
+            "rss_growth_mb": None if self.__last_rss_mb is None else self.__last_rss_mb - self.__baseline_rss_mb,
+            "blender_memory_mb": self.__get_blender_memory_mb(),
+            "data_block_num": data_block_num,
+            "orphan_num": orphan_num,
+        }
+        if extra_metrics:
+            metrics.update(extra_metrics)
+
+        os.makedirs(self.output_metrics_path, exist_ok = True)
+        metrics_file_name = "run_metrics.jsonl" if self.worker_id is None else f"run_metrics_w{self.worker_id}.jsonl"
+        with open(os.path.join(self.output_metrics_path, metrics_file_name), "a") as f:
+            f.write(json.dumps(metrics) + "\n")
+
+        print("RSS: {} MB, Data Blocks: {}, Orphans: {}".format(
+            None if self.__last_rss_mb is None else round(self.__last_rss_mb, 1),
+            sum(data_block_num.values()), sum(orphan_num.values())))
+
+
+    def should_recycle(self):
+        """Check whether the blender process should exit and be replaced by a new one.
+
+        Return:
+            recycle (bool): True if the RSS grows more than max_rss_growth_mb since the first image.
+        """
+        if self.max_rss_growth_mb is None or self.__last_rss_mb is None:
+            return False
+        rss_growth_mb = self.__last_rss_mb - self.__baseline_rss_mb
+        if rss_growth_mb > self.max_rss_growth_mb:
+            print(f"RSS grows {rss_growth_mb:.1f} MB since the first image, recycle the blender process")
+            return True
+
+        return False
@@ -0,0 +1,203 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import json
+import math
+from glob import glob
+
+
+class DatasetStatistics:
+    """
+    A class which aggregates the distribution of the generated dataset while it is generated, so it can be checked
+    during a long run without scanning the label files.
+
+    Only running counts and fixed-size histograms are kept, the memory does not grow with the number of images. Each
+    blender process writes its own summary file (dataset_statistics.json or dataset_statistics_w<worker_id>.json) in the
+    metrics folder after each image, continuing the counts of the previous blender sessions. merge_statistics() adds
+    up the summary files of all blender processes and can be called at any time.
+
+    Attributes
+    ----------
+    output_metrics_path (str): The path where the summary file will be saved.
+    worker_id (int): ID of the blender process when several processes render on the same PC, each of them writes its own summary file.
+    num_size_bin (int): Number of bins of the bounding box width and height histograms over the normalized size [0, 1].
+    num_area_bin (int): Number of bins of the bounding box area histogram, bin k counts the areas in (2^-(k+1), 2^-k] of the image.
+    __statistics (dict): The running counts and histograms.
+
+    Methods
+    -------
+    __get_summary_path(): Get the path of the summary file of this blender process.
+    __create_empty_statistics(): Create the counts of an empty dataset.
+    __load(): Load the counts of the previous blender sessions.
+    update(): Add the labels, camera effects and HDRI of one image to the counts.
+    save(): Write the summary file, readers never see a partly written file.
+
+    References
+    ----------
+    https://docs.python.org/3/library/os.html#os.replace
+
+    """
+
+    def __init__(self,
+                 output_metrics_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/metrics",
+                 worker_id = None,
+                 num_size_bin = 20,
+                 num_area_bin = 16
+                 ):
+        self.output_metrics_path = output_metrics_path
+        self.worker_id = worker_id
+        self.num_size_bin = num_size_bin
+        self.num_area_bin = num_area_bin
+        self.__statistics = self.__load()
+
+
+    def __get_summary_path(self):
+        """Get the path of the summary file of this blender process.
+
+        Return:
+            summary_path (str): The path of the summary file.
+        """
+        summary_file_name = "dataset_statistics.json" if self.worker_id is None else f"dataset_statistics_w{self.worker_id}.json"
+
+        return os.path.join(self.output_metrics_path, summary_file_name)
+
+
+    def __create_empty_statistics(self):
+        """Create the counts of an empty dataset.
+
+        Return:
+            statistics (dict): The counts and histograms of an empty dataset.
+        """
+        return {
+            "num_img": 0,
+            "num_empty_img": 0,
+            "num_instance": 0,
+            "class_instance_num": {},
+            "img_instance_num": {},
+            "bbox_width_histogram": [0] * self.num_size_bin,
+            "bbox_height_histogram": [0] * self.num_size_bin,
+            "bbox_area_histogram": [0] * self.num_area_bin,
+            "camera_effect_num": {},
+            "hdri_num": {}
+        }
+
+
+    def __load(self):
+        """Load the counts of the previous blender sessions.
+
+        Return:
+            statistics (dict): The counts and histograms, empty if there is no valid summary file.
+        """
+        statistics = self.__create_empty_statistics()
+        summary_path = self.__get_summary_path()
+        if not os.path.exists(summary_path):
+            return statistics
+        try:
+            with open(summary_path) as f:
+                saved_statistics = json.load(f)
+        except ValueError:
+            print(f"Warning!!! Can not read the dataset statistics {summary_path}, start new counts")
+            return statistics
+        if len(saved_statistics.get("bbox_width_histogram", [])) != self.num_size_bin or \
+           len(saved_statistics.get("bbox_area_histogram", [])) != self.num_area_bin:
+            print(f"Warning!!! The histogram bins of {summary_path} changed, start new counts")
+            return statistics
+        statistics.update(saved_statistics)
+
+        return statistics
+
+
+    def update(self, labels, camera_effects = None, hdri_name = None):
+        """Add the labels, camera effects and HDRI of one image to the counts.
+
+        Args:
+            labels (list of tuple): The (class id, center x, center y, width, height) YOLO label of each object, normalized by the image size.
+            camera_effects (list of str): The camera effects enabled for the image.
+            hdri_name (str): The name of the HDRI lighting the image.
+        """
+        statistics = self.__statistics
+        statistics["num_img"] += 1
+        if len(labels) == 0:
+            statistics["num_empty_img"] += 1
+        statistics["num_instance"] += len(labels)
+        img_instance_num = statistics["img_instance_num"]
+        img_instance_num[str(len(labels))] = img_instance_num.get(str(len(labels)), 0) + 1
+
+        for class_id, center_x, center_y, width, height in labels:
+            class_instance_num = statistics["class_instance_num"]
+            class_instance_num[str(class_id)] = class_instance_num.get(str(class_id), 0) + 1
+            statistics["bbox_width_histogram"][min(int(width * self.num_size_bin), self.num_size_bin - 1)] += 1
+            statistics["bbox_height_histogram"][min(int(height * self.num_size_bin), self.num_size_bin - 1)] += 1
+            area = width * height
+            area_bin = self.num_area_bin - 1 if area <= 0 else int(-math.log2(min(area, 1.0)))
+            statistics["bbox_area_histogram"][min(area_bin, self.num_area_bin - 1)] += 1
+
+        for camera_effect in camera_effects or []:
+            statistics["camera_effect_num"][camera_effect] = statistics["camera_effect_num"].get(camera_effect, 0) + 1
+        if hdri_name is not None:
+            statistics["hdri_num"][hdri_name] = statistics["hdri_num"].get(hdri_name, 0) + 1
+
+
+    def save(self):
+        """Write the summary file, readers never see a partly written file."""
+        os.makedirs(self.output_metrics_path, exist_ok = True)
+        summary_path = self.__get_summary_path()
+        with open(summary_path + ".tmp", "w") as f:
+            json.dump(self.__statistics, f)
+        os.replace(summary_path + ".tmp", summary_path)
+
+
+def merge_statistics(output_metrics_path, num_size_bin = 20, num_area_bin = 16):
+    """Add up the summary files of all blender processes.
+
+    Args:
+        output_metrics_path (str): The path where the summary files are saved.
+        num_size_bin (int): Number of bins of the width and height histograms, files with other bins are skipped.
+        num_area_bin (int): Number of bins of the area histogram, files with other bins are skipped.
+
+    Return:
+        statistics (dict): The merged counts and histograms with the empty image rate and the mean objects per image,
+                           None if there is no summary file.
+    """
+    merged = None
+    for summary_path in glob(os.path.join(output_metrics_path, "dataset_statistics*.json")):
+        try:
+            with open(summary_path) as f:
+                statistics = json.load(f)
+        except ValueError:
+            print(f"Warning!!! Can not read the dataset statistics {summary_path}, skip it")
+            continue
+        if len(statistics.get("bbox_width_histogram", [])) != num_size_bin or \
+           len(statistics.get("bbox_height_histogram", [])) != num_size_bin or \
+           len(statistics.get("bbox_area_histogram", [])) != num_area_bin:
+            print(f"Warning!!! The histogram bins of {summary_path} are different, skip it")
+            continue
+        if merged is None:
+            merged = statistics
+            continue
+        for key, value in statistics.items():
+            if isinstance(value, dict):
+                for sub_key, num in value.items():
+                    merged[key][sub_key] = merged[key].get(sub_key, 0) + num
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+
+    if merged is not None and merged["num_img"] > 0:
+        merged["empty_img_rate"] = merged["num_empty_img"] / merged["num_img"]
+        merged["mean_instance_per_img"] = merged["num_instance"] / merged["num_img"]
+
+    return merged
+
+
+if __name__ == '__main__':
+    from SDG_200_SDGParameter import SDGParameter
+    parameter = SDGParameter()
+    print(json.dumps(merge_statistics(output_metrics_path = parameter.output_metrics_path), indent = 2))
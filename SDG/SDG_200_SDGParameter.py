@@ -8,17 +8,50 @@ class SDGParameter:
     asset_background_object_folder_path (str): The path to background object assets.
     asset_foreground_object_folder_path (str): The path to foreground object assets.
     asset_ambientCGMaterial_folder_path (str): The path to the downloaded ambientCG PBR materials.
+    use_texture_lod (bool): Load the texture tier built by SDG_510_TextureLODBuilder.py which covers the projected size of each object.
+    texture_memory_budget_mb (float): The estimated texture memory budget of the scene in MB, larger textures are stepped down to fit, None disables it.
     asset_hdri_lighting_folder_path (str): The path to the downloaded Poly Haven HDRIs.
+    asset_hdri_cache_folder_path (str): The path where SDG_500_HDRIPreprocessor.py saves the converted HDRIs, None uses the downloaded HDRIs.
+    hdri_cache_max_resolution (int): The maximum width of the converted HDRIs.
     asset_occluder_folder_path (str): The path to occlusion object assets.
+    asset_pack_path (str): The path of the asset pack written by SDG_520_AssetPacker.py, from which the objects are built instead of parsing their .blend files, None disables it.
     output_img_path (str): The path where rendered images will be saved.
     output_label_path (str): The path where YOLO format bounding box annotations will be saved.
+    output_metrics_path (str): The path where the run metrics (JSON lines) will be saved.
+    timeline_batch_size (int): Number of randomized scenes kept on the frames of the timeline and rendered with one animation render, 1 renders each image on its own.
+    output_long_sides (list of int): The long side in pixels of each downscaled copy of the images and labels, saved in <output_img_path>_<long side> and <output_label_path>_<long side>, empty disables them.
+    output_min_box_size (int): The minimum width and height in pixels of a box in the labels of a downscaled copy.
+    num_resize_threads (int): Number of threads of each blender process writing the downscaled copies.
+    use_dataset_statistics (bool): Aggregate the class, bounding box, camera effect and HDRI distribution of the generated images in the metrics folder while generating.
+    dataset_index_path (str): The path of the dataset index (JSON lines) written by SDG_600_DatasetValidator.py.
+    num_validator_process (int): Number of worker processes of SDG_600_DatasetValidator.py, 0 uses the number of CPUs.
+    metrics_http_port (int): The local port of the run status endpoint of SDG_400_Looper.py, None disables it.
+    profile_every_n_img (int): Profile the stages of about every N-th image with cProfile, the .pstats files and the summary of the hottest functions are saved in the "profiles" sub folder of output_metrics_path, a profiled timeline batch is saved as a whole in the .pstats file of its first image, 0 disables it.
     background_poisson_disk_sampling_radius (float): Background objects separation distance.
+    background_density_map (str): "center" places the background objects closer at the center and sparser at the edges, "edge" the opposite, or the path to a .npy density map in [0, 1] (rows along y, columns along x), None keeps the fixed separation distance.
+    background_poisson_disk_sampling_radius_range (dict of str: float): The background objects separation distance of the densest and of the sparsest areas of the density map.
+    use_background_instancing (bool): Instance the background objects on a point cloud with geometry nodes instead of creating one object per particle.
+    num_background_material_variant (int): Number of differently textured copies of each background asset when use_background_instancing is True.
+    use_foreground_only_render (bool): Render only the foreground and occlusion objects on a transparent film with a shadow catcher and composite them over a background plate instead of building the background wall.
+    background_plate_folder_path (str): The path to the background plates (png or jpg), pre-rendered backgrounds or real shelf photos.
+    max_cached_background_plate (int): The maximum number of background plates kept in memory by a blender session.
+    background_plate_reuse_count (int): Render one background wall as a plate and composite the foreground-only renders of this many images over it, with the HDRI and HDRI rotation of the plate, 1 disables it.
+    background_plate_cache_path (str): The path where the background plates rendered for the plate reuse will be saved.
     num_foreground_object_in_scene_range (dict of str: int): The distribution of the number of retail items within the blender scene.
+    foreground_selection_policy (str): How the foreground assets are selected, "random" samples them uniformly, "balanced" samples them by the deficit of their class in the labeled instances so far.
+    foreground_class_weights_path (str): The path of the target class weights (json, class name: weight) of the "balanced" policy, None for a uniform class distribution.
     foreground_area (list of float): Spatial distribution area of foreground objects.
     foreground_poisson_disk_sampling_radius (float): Foreground objects separation distance.
+    foreground_density_map (str): "center" places the foreground objects closer at the center and sparser at the edges, "edge" the opposite, or the path to a .npy density map in [0, 1] (rows along y, columns along x), None keeps the fixed separation distance.
+    foreground_poisson_disk_sampling_radius_range (dict of str: float): The foreground objects separation distance of the densest and of the sparsest areas of the density map.
     num_occluder_in_scene_range (dict of str: int): The distribution of the number of occlusion objects within the blender scene.
     occluder_area (list of float): Spatial distribution area of occlusion objects.
     occluder_poisson_disk_sampling_radius (float): Occlusion objects separation distance.
+    occluder_density_map (str): "center" places the occlusion objects closer at the center and sparser at the edges, "edge" the opposite, or the path to a .npy density map in [0, 1] (rows along y, columns along x), None keeps the fixed separation distance.
+    occluder_poisson_disk_sampling_radius_range (dict of str: float): The occlusion objects separation distance of the densest and of the sparsest areas of the density map.
+    use_overlap_resolver (bool): Relocate or remove the foreground and occlusion objects which intersect each other after scaling and rotation.
+    overlap_test (str): "obb" tests the oriented bounding boxes of the objects, "bvh" also tests the meshes of the intersecting boxes with BVH trees.
+    max_relocation_attempts (int): Number of random locations tried for an intersecting object before it is removed.
     bg_obj_scale_ratio_range (dict of str: float): The distribution of the scale ratio of background objects within the blender scene.
     fg_obj_scale_ratio_range (dict of str: float): The distribution of the scale ratio of foreground objects within the blender scene.
     occluder_scale_ratio_range (dict of str: float): The distribution of the scale ratio of occluder objects within the blender scene.
@@ -46,6 +79,23 @@ class SDGParameter:
     contrast_value_range (dict of str: float): The distribution of the value of Bright/Contrast nodes input-Contrast, which adjust the contrast.
     hue_value_range (dict of str: float): The distribution of the value of Hue Saturation Value nodes input-Hue, which adjust the hue.
     saturation_value_range (dict of str: float): The distribution of the value of Hue Saturation Value nodes input-Saturation, which adjust the saturation.
+    num_img_per_blender_session (int): The quantity of synthetic images generated by one blender process before it exits.
+    scene_reset_mode (str): How the scene is cleaned up before each image, "full" removes every data block, "incremental" keeps the cacheable data blocks.
+    cacheable_datablock_types (dict of str: int): The bpy.data collections kept by the incremental reset, paired with the maximum number of unused data blocks kept for each of them.
+    use_object_pool (bool): Reuse the imported objects in the following images instead of importing them again, needs the incremental scene reset.
+    max_pooled_object_per_asset (int): The maximum number of pooled objects of each asset.
+    render_device (str): Device to use for rendering, "AUTO" detects the available Cycles devices, "GPU" or "CPU" forces one.
+    num_render_threads (int): Number of CPU render threads of each blender process, 0 uses the calibrated layout of this PC or lets blender detect it.
+    num_blender_process (int): Number of blender processes rendering at the same time, 0 uses the calibrated layout of this PC or 1.
+    render_device_profile_path (str): The path where SDG_410_RenderDeviceCalibrator.py saves the best render layout of each PC.
+    sweep_profile_path (str): The path of the parameter profiles (json) generated together by SDG_420_SweepScheduler.py.
+    sweep_output_path (str): The path where SDG_420_SweepScheduler.py saves the outputs of each profile and the sweep report.
+    image_timeout_s (float): Kill a blender session which made no progress for this long per image in seconds, the time between two heartbeats of a session is scaled by timeline_batch_size, plus one image for the render of a reused background plate, None disables the watchdog.
+    session_startup_timeout_s (float): The extra time allowed before the first image of a blender session in seconds.
+    retry_backoff_s (float): The delay before restarting a failed blender session in seconds, doubled with each failure of its worker slot in a row.
+    max_retry_backoff_s (float): The maximum delay before restarting a failed blender session in seconds.
+    max_consecutive_failures (int): Abort the run when the blender sessions of a worker slot fail this many times in a row.
+    worker_max_rss_growth_mb (float): Recycle the blender process when its memory grows more than this since its first image, None disables it.
 
     References
     ----------
@@ -63,13 +113,20 @@ class SDGParameter:
         self.asset_occluder_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/background_occluder_object"
         self.output_img_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/images"
         self.output_label_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/labels"
+        self.output_metrics_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/metrics"
         self.background_poisson_disk_sampling_radius = 0.2
+        self.background_density_map = None
+        self.background_poisson_disk_sampling_radius_range = {"min": 0.15, "max": 0.3}
         self.num_foreground_object_in_scene_range = {"min": 8 ,"max": 20}
         self.foreground_area = [2.5, 1.5, 0.5]
         self.foreground_poisson_disk_sampling_radius = 0.3
+        self.foreground_density_map = None
+        self.foreground_poisson_disk_sampling_radius_range = {"min": 0.2, "max": 0.35}
         self.num_occluder_in_scene_range = {"min": 5 , "max": 10} # !!maximum : 20
         self.occluder_area = [1.2, 0.8, 0.4]
         self.occluder_poisson_disk_sampling_radius = 0.25
+        self.occluder_density_map = None
+        self.occluder_poisson_disk_sampling_radius_range = {"min": 0.15, "max": 0.25}
         self.bg_obj_scale_ratio_range = {"min": 2.5, "max": 2.5}
         self.fg_obj_scale_ratio_range = {"min": 0.5, "max": 2.5}
         self.occluder_scale_ratio_range = {"min": 0.5, "max": 1.5}
@@ -96,4 +153,47 @@ class SDGParameter:
         self.brightness_value_range = {"min": -1.0, "max": 1.0}
         self.contrast_value_range = {"min": -1.0, "max": 5.0}
         self.hue_value_range =  {"min": 0.45, "max": 0.55}
-        self.saturation_value_range = {"min": 0.75, "max": 1.25}
\ No newline at end of file
+        self.saturation_value_range = {"min": 0.75, "max": 1.25}
+        self.num_img_per_blender_session = 1
+        self.scene_reset_mode = "full"
+        self.cacheable_datablock_types = {"meshes": 256, "images": 64, "node_groups": 8, "worlds": 1}
+        self.use_object_pool = False
+        self.max_pooled_object_per_asset = 32
+        self.worker_max_rss_growth_mb = 2048
+        self.render_device = "AUTO"
+        self.num_render_threads = 0
+        self.num_blender_process = 0
+        self.render_device_profile_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/SDG/render_device_profile.json"
+        self.use_background_instancing = False
+        self.num_background_material_variant = 16
+        self.asset_hdri_cache_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/HDRI_cache"
+        self.hdri_cache_max_resolution = 2048
+        self.use_texture_lod = False
+        self.texture_memory_budget_mb = 1024
+        self.sweep_profile_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/SDG/sweep_profile.json"
+        self.sweep_output_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/sweep"
+        self.use_dataset_statistics = True
+        self.foreground_selection_policy = "random"
+        self.foreground_class_weights_path = None
+        self.dataset_index_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/dataset_index.jsonl"
+        self.num_validator_process = 0
+        self.metrics_http_port = 8765
+        self.profile_every_n_img = 0
+        self.image_timeout_s = 1800
+        self.session_startup_timeout_s = 600
+        self.retry_backoff_s = 10
+        self.max_retry_backoff_s = 600
+        self.max_consecutive_failures = 5
+        self.output_long_sides = []
+        self.output_min_box_size = 8
+        self.num_resize_threads = 2
+        self.use_overlap_resolver = False
+        self.overlap_test = "obb"
+        self.max_relocation_attempts = 20
+        self.timeline_batch_size = 1
+        self.use_foreground_only_render = False
+        self.background_plate_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/background_plate"
+        self.max_cached_background_plate = 16
+        self.background_plate_reuse_count = 1
+        self.background_plate_cache_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/background_plates"
+        self.asset_pack_path = None
\ No newline at end of file
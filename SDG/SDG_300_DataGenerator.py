@@ -10,6 +10,13 @@ if module_path not in sys_path_list:
 # Prevent to create __pycache__ file[1]
 sys.dont_write_bytecode = True
 
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import random
+import time
 import bpy
 from SDG_000_Initializer import Initializer
 from SDG_010_BackgroundObjectPlacementRandomizer import BackgroundObjectPlacementRandomizer
@@ -19,10 +26,19 @@ from SDG_040_ObjectScaleRandomizer import ObjectScaleRandomizer
 from SDG_050_TextureRandomizer import TextureRandomizer
 from SDG_060_RotationRandomizer import RotationRandomizer
 from SDG_070_UnifiedRotationRandomizer import UnifiedRotationRandomizer
+from SDG_075_OverlapResolver import OverlapResolver
 from SDG_080_LightRandomizer import LightRandomizer
 from SDG_090_CameraRandomizer import CameraRandomizer
+from SDG_095_BackgroundPlateCompositor import BackgroundPlateCompositor
 from SDG_100_YOLOLabeler_IDMask import YOLOLabeler
+from SDG_110_ResourceMonitor import ResourceMonitor
+from SDG_120_DatasetStatistics import DatasetStatistics, merge_statistics
 from SDG_200_SDGParameter import SDGParameter
+from util import objectPool
+from util import classBalance
+from util import exitCode
+from util import multiResolution
+from util import timelineBatch
 
 
 class DataGenerator:
@@ -30,23 +46,189 @@ class DataGenerator:
     A class that instantiates all components of the Synthetic Data Generation (SDG) process, updates instance attributes, 
     and then calls methods in a specific sequence to complete the entire process of generating synthetic data.
 
+    Attributes
+    ----------
+    worker_id (int): ID of the blender process when several processes render on the same PC, None for a single process.
+    parameter_override (dict): SDGParameter attributes replaced for this blender session, e.g. by a calibration run.
+    __scene_reset_report (dict of str: float): Number of removed and kept data blocks and time consumed by the last scene reset.
+    __dataset_statistics (DatasetStatistics): The running dataset statistics updated after each image, None disables them.
+    __class_instance_num (dict of str: int): The labeled instances of each yolo class id, for the balanced foreground selection.
+    __class_weights (dict of str: float): The target weight of each class name of the balanced foreground selection, None for uniform.
+    __stage_time (dict of str: float): Time consumed by each stage of the last generated image or timeline batch in seconds.
+    __profiler (cProfile.Profile): The profiler of the stages of the current image, None if the image is not profiled.
+    __profile_stats (tuple): The path of the merged profile summary of this worker and its pstats.Stats, None before the first profiled image.
+    __background_plate (dict of str: object): The "path" of the reused background plate, the "hdri_path" and the "hdri_rotation" of its lighting, None if no plate is reused.
+    __num_img_on_background_plate (int): The quantity of images composited over the reused background plate.
+    __num_background_plate (int): The quantity of background plates rendered in the blender session.
+
     Methods
     -------
+    __get_parameter(): Get the SDGParameter configuration with the overridden attributes.
+    __run_stage(): Run one stage of the data generate flow and measure its time.
+    __initialize_scene(): Reset the blender scene with the SDGParameter configuration of this blender session.
+    __create_components(): Instantiate the randomizers and the labeler of one scene and pass the parameters to them.
+    __randomize_scene(): Run the randomizers of one scene.
+    __update_statistics(): Count the labeled instances of each class and update the dataset statistics with the labels of one image.
+    __print_pool_statistics(): Print the object pool hits and misses of the last scene.
+    __save_profile_summary(): Add the profile of one image to the profile summary of this worker and write its hottest functions to a text file.
+    __write_session_report(): Write the progress of the blender session, which is also the heartbeat watched by the looper.
+    get_stage_time(): Get the time consumed by each stage of the last generated image or timeline batch.
     gen_one_data(): Generates one synthetic data.
+    gen_batch_data(): Generates the synthetic data of several randomized scenes rendered with one animation render.
+    gen_background_plate(): Builds and renders one background wall as the plate reused by the following images.
+    gen_data(): Generates a number of synthetic data in the current blender session, then exits blender.
 
     References
     ----------
     [1]prevent create __pycache__ file, https://stackoverflow.com/questions/50752302/python3-pycache-generating-even-if-pythondontwritebytecode-1
     [2]Update view layer, https://blender.stackexchange.com/questions/140789/what-is-the-replacement-for-scene-update
+    [3]Pass arguments to the python script, https://docs.blender.org/manual/en/latest/advanced/command_line/arguments.html
 
     """
-    
-    def gen_one_data(self):
-        """ Generates one synthetic data.""" 
-        # Instantiating SDG components
-        initializer = Initializer()
+
+    def __init__(self, worker_id = None, parameter_override = None):
+        self.worker_id = worker_id
+        self.parameter_override = parameter_override
+        self.__scene_reset_report = None
+        self.__dataset_statistics = None
+        self.__class_instance_num = {}
+        self.__class_weights = None
+        self.__stage_time = {}
+        self.__profiler = None
+        self.__profile_stats = None
+        self.__background_plate = None
+        self.__num_img_on_background_plate = 0
+        self.__num_background_plate = 0
+
+
+    def __get_parameter(self):
+        """Get the SDGParameter configuration with the overridden attributes.
+
+        Return:
+            parameter (SDGParameter): The configuration of this blender session.
+        """
         parameter = SDGParameter()
-        initializer.init() # Need to initialize the blender scene at first.
+        if self.parameter_override:
+            for key, value in self.parameter_override.items():
+                if not hasattr(parameter, key):
+                    print(f"Warning!!! SDGParameter has no attribute {key}, ignore it")
+                    continue
+                setattr(parameter, key, value)
+
+        return parameter
+
+
+    def __run_stage(self, stage_name, stage_function):
+        """Run one stage of the data generate flow and measure its time, the times of the frames of a timeline batch are summed.
+
+        Args:
+            stage_name (str): The name of the stage in the run metrics.
+            stage_function (function): The stage, called without arguments.
+
+        Return:
+            result: The return value of the stage.
+        """
+        start_time = time.perf_counter()
+        if self.__profiler is None:
+            result = stage_function()
+        else:
+            result = self.__profiler.runcall(stage_function)
+        self.__stage_time[stage_name] = self.__stage_time.get(stage_name, 0) + time.perf_counter() - start_time
+
+        return result
+
+
+    def __save_profile_summary(self, profile_path, pstats_path, num_function = 40):
+        """Add the profile of one image to the profile summary of this worker and write its hottest functions to a text file.
+
+        The merged stats of the worker are kept in memory and saved next to the text file, so a new blender session of
+        the worker continues them and each profile is read once.
+
+        Args:
+            profile_path (str): The folder of the .pstats files of the profiled images.
+            pstats_path (str): The .pstats file of the new profiled image.
+            num_function (int): Number of functions listed for each sort order.
+        """
+        summary_name = "profile_summary" if self.worker_id is None else f"profile_summary_w{self.worker_id}"
+        merged_path = os.path.join(profile_path, summary_name + ".prof")
+        if self.__profile_stats is None or self.__profile_stats[0] != merged_path:
+            stats = None
+            if os.path.exists(merged_path):
+                try:
+                    stats = pstats.Stats(merged_path)
+                except (EOFError, ValueError, TypeError):
+                    print(f"Warning!!! Can not read the profile summary {merged_path}, start a new one")
+            self.__profile_stats = (merged_path, stats)
+        stats = self.__profile_stats[1]
+        if stats is None:
+            stats = pstats.Stats(pstats_path)
+            self.__profile_stats = (merged_path, stats)
+        else:
+            stats.add(pstats_path)
+        stats.dump_stats(merged_path + ".tmp")
+        os.replace(merged_path + ".tmp", merged_path)
+
+        summary = io.StringIO()
+        stats.stream = summary
+        for sort_key in ["tottime", "cumulative"]:
+            stats.sort_stats(sort_key).print_stats(num_function)
+        summary_path = os.path.join(profile_path, summary_name + ".txt")
+        with open(summary_path + ".tmp", "w") as f:
+            f.write(summary.getvalue())
+        os.replace(summary_path + ".tmp", summary_path)
+
+
+    def __write_session_report(self, session_report_path, session_report):
+        """Write the progress of the blender session, which is also the heartbeat watched by the looper.
+
+        Args:
+            session_report_path (str): The path where the session report (json) will be saved, None disables it.
+            session_report (dict): The num_generated_img, recycle_reason and profile_num_generated_img of the session.
+        """
+        if session_report_path is None:
+            return
+        with open(session_report_path + ".tmp", "w") as f:
+            json.dump(session_report, f)
+        os.replace(session_report_path + ".tmp", session_report_path)
+
+
+    def __initialize_scene(self):
+        """Reset the blender scene with the SDGParameter configuration of this blender session.
+
+        Return:
+            initializer (Initializer): The initializer, which holds the report of the scene reset.
+            parameter (SDGParameter): The configuration of this blender session.
+            use_object_pool (bool): The placement randomizers reuse the objects released to the object pool.
+        """
+        initializer = Initializer()
+        parameter = self.__get_parameter()
+        initializer.scene_reset_mode = parameter.scene_reset_mode
+        initializer.cacheable_datablock_types = parameter.cacheable_datablock_types
+        use_object_pool = parameter.scene_reset_mode == "incremental" and parameter.use_object_pool
+        initializer.use_object_pool = use_object_pool
+        initializer.max_pooled_object_per_asset = parameter.max_pooled_object_per_asset
+        initializer.render_device = parameter.render_device
+        initializer.num_render_threads = parameter.num_render_threads
+        # The images of a reused background plate are foreground-only renders
+        if self.__background_plate is not None:
+            parameter.use_foreground_only_render = True
+        self.__stage_time = {}
+        self.__run_stage("initialize", initializer.init) # Need to initialize the blender scene at first.
+
+        return initializer, parameter, use_object_pool
+
+
+    def __create_components(self, parameter, use_object_pool):
+        """Instantiate the randomizers and the labeler of one scene and pass the parameters to them.
+
+        Args:
+            parameter (SDGParameter): The configuration of this blender session.
+            use_object_pool (bool): The placement randomizers reuse the objects released to the object pool.
+
+        Return:
+            components (dict of str: object): The names of the SDG components paired with the components.
+        """
+        # Instantiating SDG components
         background_object_placement_randomizer = BackgroundObjectPlacementRandomizer()
         foreground_object_placement_randomizer = ForegroundObjectPlacementRandomizer()
         occluder_placement_randomizer = OccluderPlacementRandomizer()
@@ -54,29 +236,63 @@ class DataGenerator:
         texture_randomizer = TextureRandomizer()
         rotation_randomizer = RotationRandomizer()
         unified_rotation_randomizer = UnifiedRotationRandomizer()
+        overlap_resolver = OverlapResolver()
         light_randomizer = LightRandomizer()
         camera_randomizer = CameraRandomizer()
+        background_plate_compositor = BackgroundPlateCompositor()
         yolo_labeler = YOLOLabeler()
 
         print("Components Initialize Completed!!!")
 
         # Passing params
+        use_asset_template_cache = parameter.scene_reset_mode == "incremental" and "meshes" in parameter.cacheable_datablock_types
         background_object_placement_randomizer.background_poisson_disk_sampling_radius = parameter.background_poisson_disk_sampling_radius
+        background_object_placement_randomizer.background_density_map = parameter.background_density_map
+        background_object_placement_randomizer.background_poisson_disk_sampling_radius_range = parameter.background_poisson_disk_sampling_radius_range
         background_object_placement_randomizer.asset_background_object_folder_path = parameter.asset_background_object_folder_path
+        background_object_placement_randomizer.use_asset_template_cache = use_asset_template_cache
+        background_object_placement_randomizer.asset_pack_path = parameter.asset_pack_path
+        background_object_placement_randomizer.use_object_pool = use_object_pool
+        background_object_placement_randomizer.use_instancing = parameter.use_background_instancing
+        background_object_placement_randomizer.num_background_material_variant = parameter.num_background_material_variant
         foreground_object_placement_randomizer.num_foreground_object_in_scene_range = parameter.num_foreground_object_in_scene_range
         foreground_object_placement_randomizer.foreground_area = parameter.foreground_area
         foreground_object_placement_randomizer.foreground_poisson_disk_sampling_radius = parameter.foreground_poisson_disk_sampling_radius
+        foreground_object_placement_randomizer.foreground_density_map = parameter.foreground_density_map
+        foreground_object_placement_randomizer.foreground_poisson_disk_sampling_radius_range = parameter.foreground_poisson_disk_sampling_radius_range
         foreground_object_placement_randomizer.asset_foreground_object_folder_path = parameter.asset_foreground_object_folder_path
+        foreground_object_placement_randomizer.use_asset_template_cache = use_asset_template_cache
+        foreground_object_placement_randomizer.asset_pack_path = parameter.asset_pack_path
+        foreground_object_placement_randomizer.use_object_pool = use_object_pool
+        foreground_object_placement_randomizer.foreground_selection_policy = parameter.foreground_selection_policy
+        foreground_object_placement_randomizer.class_instance_num = self.__class_instance_num
+        foreground_object_placement_randomizer.class_weights = self.__class_weights
+        foreground_object_placement_randomizer.class_id_mapping = yolo_labeler.get_class_id_mapping()
         occluder_placement_randomizer.num_occluder_in_scene_range = parameter.num_occluder_in_scene_range
         occluder_placement_randomizer.occluder_area = parameter.occluder_area
         occluder_placement_randomizer.occluder_poisson_disk_sampling_radius = parameter.occluder_poisson_disk_sampling_radius
+        occluder_placement_randomizer.occluder_density_map = parameter.occluder_density_map
+        occluder_placement_randomizer.occluder_poisson_disk_sampling_radius_range = parameter.occluder_poisson_disk_sampling_radius_range
         occluder_placement_randomizer.asset_occluder_folder_path = parameter.asset_occluder_folder_path
+        occluder_placement_randomizer.use_asset_template_cache = use_asset_template_cache
+        occluder_placement_randomizer.asset_pack_path = parameter.asset_pack_path
+        occluder_placement_randomizer.use_object_pool = use_object_pool
         object_scale_randomizer.bg_obj_scale_ratio_range = parameter.bg_obj_scale_ratio_range
         object_scale_randomizer.fg_obj_scale_ratio_range = parameter.fg_obj_scale_ratio_range
         object_scale_randomizer.occluder_scale_ratio_range = parameter.occluder_scale_ratio_range
         texture_randomizer.asset_ambientCGMaterial_folder_path = parameter.asset_ambientCGMaterial_folder_path
+        texture_randomizer.use_texture_lod = parameter.use_texture_lod
+        texture_randomizer.texture_memory_budget_mb = parameter.texture_memory_budget_mb
+        texture_randomizer.img_resolution_x = parameter.img_resolution_x
+        texture_randomizer.camera_focal_length = camera_randomizer.camera_focal_length
+        overlap_resolver.foreground_area = parameter.foreground_area
+        overlap_resolver.occluder_area = parameter.occluder_area
+        overlap_resolver.overlap_test = parameter.overlap_test
+        overlap_resolver.max_relocation_attempts = parameter.max_relocation_attempts
         light_randomizer.asset_hdri_lighting_folder_path = parameter.asset_hdri_lighting_folder_path
         light_randomizer.hdri_lighting_strength_range = parameter.hdri_lighting_strength_range
+        light_randomizer.asset_hdri_cache_folder_path = parameter.asset_hdri_cache_folder_path
+        light_randomizer.hdri_cache_max_resolution = parameter.hdri_cache_max_resolution
         camera_randomizer.img_resolution_x = parameter.img_resolution_x
         camera_randomizer.img_resolution_y = parameter.img_resolution_y
         camera_randomizer.max_samples = parameter.max_samples
@@ -102,24 +318,336 @@ class DataGenerator:
         camera_randomizer.saturation_value_range = parameter.saturation_value_range
         yolo_labeler.output_img_path = parameter.output_img_path
         yolo_labeler.output_label_path = parameter.output_label_path
+        yolo_labeler.render_worker_id = self.worker_id
+        yolo_labeler.output_long_sides = parameter.output_long_sides
+        yolo_labeler.output_min_box_size = parameter.output_min_box_size
+        yolo_labeler.num_resize_threads = parameter.num_resize_threads
+        background_plate_compositor.background_plate_folder_path = parameter.background_plate_folder_path
+        background_plate_compositor.max_cached_background_plate = parameter.max_cached_background_plate
+        if parameter.use_foreground_only_render:
+            yolo_labeler.plate_compositor = background_plate_compositor
+        # The images of a reused background plate are lit like the plate
+        if self.__background_plate is not None:
+            background_plate_compositor.plate_path = self.__background_plate["path"]
+            light_randomizer.fixed_hdri_path = self.__background_plate["hdri_path"]
+            light_randomizer.fixed_hdri_rotation = self.__background_plate["hdri_rotation"]
+
+        return {
+            "background_object_placement_randomizer": background_object_placement_randomizer,
+            "foreground_object_placement_randomizer": foreground_object_placement_randomizer,
+            "occluder_placement_randomizer": occluder_placement_randomizer,
+            "object_scale_randomizer": object_scale_randomizer,
+            "texture_randomizer": texture_randomizer,
+            "rotation_randomizer": rotation_randomizer,
+            "unified_rotation_randomizer": unified_rotation_randomizer,
+            "overlap_resolver": overlap_resolver,
+            "light_randomizer": light_randomizer,
+            "camera_randomizer": camera_randomizer,
+            "background_plate_compositor": background_plate_compositor,
+            "yolo_labeler": yolo_labeler
+        }
+
+
+    def __randomize_scene(self, components, parameter):
+        """Run the randomizers of one scene.
+
+        Args:
+            components (dict of str: object): The SDG components of the scene.
+            parameter (SDGParameter): The configuration of this blender session.
+        """
+        # The foreground-only render replaces the background wall with a background plate
+        if not parameter.use_foreground_only_render:
+            self.__run_stage("background", components["background_object_placement_randomizer"].background_object_placement_randomize)
+        self.__run_stage("foreground", components["foreground_object_placement_randomizer"].foreground_object_placement_randomize)
+        self.__run_stage("occluder", components["occluder_placement_randomizer"].occluder_placement_randomize)
+        self.__run_stage("scale", components["object_scale_randomizer"].object_scale_randomize)
+        self.__run_stage("texture", components["texture_randomizer"].texture_randomize)
+        self.__run_stage("rotation", components["rotation_randomizer"].rotation_randomize)
+        self.__run_stage("unified_rotation", components["unified_rotation_randomizer"].unified_rotation_randomize)
+        if parameter.use_overlap_resolver:
+            self.__run_stage("overlap", components["overlap_resolver"].overlap_resolve)
+        if parameter.use_foreground_only_render:
+            self.__run_stage("foreground_only_setup", components["background_plate_compositor"].foreground_only_render_setup)
+        self.__run_stage("light", components["light_randomizer"].light_randomize)
+        self.__run_stage("camera", components["camera_randomizer"].camera_randomize)
+        self.__run_stage("view_layer_update", bpy.data.scenes["Scene"].view_layers.update) # Update view layer[2]
+
+
+    def __update_statistics(self, labels, camera_effects, hdri_name):
+        """Count the labeled instances of each class and update the dataset statistics with the labels of one image.
+
+        Args:
+            labels (list of tuple): The (class id, center x, center y, width, height) YOLO labels of the image.
+            camera_effects (list of str): The camera effects active in the image.
+            hdri_name (str): The name of the HDRI of the image.
+        """
+        for label in labels:
+            self.__class_instance_num[label[0]] = self.__class_instance_num.get(label[0], 0) + 1
+        if self.__dataset_statistics is not None:
+            self.__dataset_statistics.update(labels = labels,
+                                             camera_effects = camera_effects,
+                                             hdri_name = hdri_name)
+            self.__dataset_statistics.save()
+
+
+    def __print_pool_statistics(self):
+        """Print the object pool hits and misses of the last scene."""
+        pool_statistics = objectPool.get_pool_statistics()
+        print("Object Pool Hit: {}, Miss: {}, Pooled: {}".format(
+            pool_statistics["frame_hit"], pool_statistics["frame_miss"], pool_statistics["pooled"]))
+
+
+    def get_stage_time(self):
+        """Get the time consumed by each stage of the last generated image or timeline batch.
+
+        Return:
+            stage_time (dict of str: float): A copy of attribute-__stage_time, the stage names paired with their time in seconds.
+        """
+        return dict(self.__stage_time)
+
+
+    def gen_one_data(self):
+        """ Generates one synthetic data.
+
+        Return:
+            gen_img_id (str): ID of the generated synthetic image data.
+        """
+        initializer, parameter, use_object_pool = self.__initialize_scene()
+        components = self.__create_components(parameter = parameter, use_object_pool = use_object_pool)
 
         # Main data generate flow
-        background_object_placement_randomizer.background_object_placement_randomize()
-        foreground_object_placement_randomizer.foreground_object_placement_randomize()
-        occluder_placement_randomizer.occluder_placement_randomize()
-        object_scale_randomizer.object_scale_randomize()
-        texture_randomizer.texture_randomize()
-        rotation_randomizer.rotation_randomize()
-        unified_rotation_randomizer.unified_rotation_randomize()
-        light_randomizer.light_randomize()
-        camera_randomizer.camera_randomize()
-        bpy.data.scenes["Scene"].view_layers.update() # Update view layer[2]
-        yolo_labeler.get_and_save_yolo_label()
+        self.__randomize_scene(components = components, parameter = parameter)
+        yolo_labeler = components["yolo_labeler"]
+        gen_img_id = self.__run_stage("render_and_label", yolo_labeler.get_and_save_yolo_label)
+        self.__scene_reset_report = initializer.reset_report
+        self.__update_statistics(labels = yolo_labeler.labels,
+                                 camera_effects = components["camera_randomizer"].active_effects,
+                                 hdri_name = components["light_randomizer"].selected_hdri_name)
+        if use_object_pool:
+            self.__print_pool_statistics()
 
         print("One Data Generating Cylce Completed!!!")
-        sys.exit()
+
+        return gen_img_id
+
+
+    def gen_batch_data(self, num_frame):
+        """Generates the synthetic data of num_frame randomized scenes kept on the timeline and rendered with one animation render.
+
+        Each frame is randomized with new components, then its objects are held on their frame and the node values are
+        keyframed by util/timelineBatch.py. The frames share the HDRI of the first frame, the background instancing
+        is not used because its prototypes would be shared by the frames.
+
+        Args:
+            num_frame (int): Number of randomized scenes of the batch.
+
+        Return:
+            gen_img_ids (list of str): IDs of the generated synthetic image data of each frame.
+        """
+        initializer, parameter, use_object_pool = self.__initialize_scene()
+        scene_collections = [bpy.data.collections[name] for name in ["BackgroundObjectCollection", "ForegroundObjectCollection", "OccluderCollection"]]
+        if parameter.use_background_instancing:
+            print("Warning!!! use_background_instancing is not supported by the timeline batch, place background objects instead")
+
+        frame_foreground_objects = []
+        frame_camera_effects = []
+        frame_plate_compositors = [] if parameter.use_foreground_only_render else None
+        for frame in range(1, num_frame + 1):
+            components = self.__create_components(parameter = parameter, use_object_pool = use_object_pool)
+            components["background_object_placement_randomizer"].use_instancing = False
+            components["light_randomizer"].keep_hdri = frame > 1
+            self.__randomize_scene(components = components, parameter = parameter)
+            frame_objects = self.__run_stage("timeline_keyframe", lambda: timelineBatch.hold_frame(frame = frame,
+                                                                                                 num_frame = num_frame,
+                                                                                                 collections = scene_collections))
+            frame_foreground_objects.append(frame_objects["ForegroundObjectCollection"])
+            frame_camera_effects.append(list(components["camera_randomizer"].active_effects))
+            if frame_plate_compositors is not None:
+                frame_plate_compositors.append(components["background_plate_compositor"])
+            print(f"Timeline Batch Frame {frame}/{num_frame} Randomized")
+
+        timelineBatch.prepare_render(num_frame = num_frame)
+        yolo_labeler = components["yolo_labeler"]
+        gen_img_ids = self.__run_stage("render_and_label", lambda: yolo_labeler.get_and_save_batch_yolo_labels(frame_objects = frame_foreground_objects,
+                                                                                                                  frame_plate_compositors = frame_plate_compositors))
+        timelineBatch.release_frames()
+        self.__scene_reset_report = initializer.reset_report
+        for labels, camera_effects in zip(yolo_labeler.batch_labels, frame_camera_effects):
+            self.__update_statistics(labels = labels,
+                                     camera_effects = camera_effects,
+                                     hdri_name = components["light_randomizer"].selected_hdri_name)
+        if use_object_pool:
+            self.__print_pool_statistics()
+
+        print("Timeline Batch Of {} Data Generating Cylce Completed!!!".format(num_frame))
+
+        return gen_img_ids
+
+
+    def gen_background_plate(self):
+        """Builds and renders one background wall as the plate reused by the following images.
+
+        The following background_plate_reuse_count images render only their foreground and occlusion objects and are
+        composited over the plate, with the HDRI and the HDRI rotation of the plate.
+
+        Return:
+            plate_path (str): The path of the rendered plate.
+        """
+        self.__background_plate = None
+        initializer, parameter, use_object_pool = self.__initialize_scene()
+        components = self.__create_components(parameter = parameter, use_object_pool = use_object_pool)
+
+        # Only the background objects are in the scene
+        self.__run_stage("background", components["background_object_placement_randomizer"].background_object_placement_randomize)
+        self.__run_stage("scale", components["object_scale_randomizer"].object_scale_randomize)
+        self.__run_stage("texture", components["texture_randomizer"].texture_randomize)
+        self.__run_stage("rotation", components["rotation_randomizer"].rotation_randomize)
+        self.__run_stage("light", components["light_randomizer"].light_randomize)
+        self.__run_stage("camera", components["camera_randomizer"].camera_randomize)
+        self.__run_stage("view_layer_update", bpy.data.scenes["Scene"].view_layers.update) # Update view layer[2]
+
+        self.__num_background_plate += 1
+        plate_name = "plate_{}_{}".format(time.strftime("%Y%m%d%H%M%S"), self.__num_background_plate)
+        if self.worker_id is not None:
+            plate_name += "_w" + str(self.worker_id)
+        plate_path = os.path.join(parameter.background_plate_cache_path, plate_name + ".png")
+        self.__run_stage("background_plate_render", lambda: components["background_plate_compositor"].render_background_plate(plate_path = plate_path))
+        self.__background_plate = {"path": plate_path,
+                                   "hdri_path": components["light_randomizer"].selected_hdri_path,
+                                   "hdri_rotation": components["light_randomizer"].selected_hdri_rotation}
+        self.__num_img_on_background_plate = 0
+
+        print("Background Plate Generating Cylce Completed!!!")
+
+        return plate_path
+
+
+    def gen_data(self, num_img = 1, session_report_path = None, session_plan = None):
+        """Generates a number of synthetic data in the current blender session, then exits blender.
+
+        The session ends early when the resource monitor asks to recycle the blender process, the number of generated
+        images is written to the session report for SDG_400_Looper.py after each image, with the recycle reason
+        "running" until the session ends. A session plan of SDG_420_SweepScheduler.py
+        generates the images of several parameter profiles in turn, which share the data kept by the scene reset.
+
+        Args:
+            num_img (int): The quantity of synthetic images generated in the current blender session.
+            session_report_path (str): The path where the session report (json) will be saved, None disables it.
+            session_plan (list of dict): The profile name, parameter_override and num_img of each step of the session,
+                                         None generates num_img images with the parameter_override of the session.
+        """
+        if session_plan is None:
+            session_plan = [{"profile": None, "parameter_override": None, "num_img": num_img}]
+        session_parameter_override = self.parameter_override or {}
+        num_img = sum(step["num_img"] for step in session_plan)
+
+        resource_monitor = ResourceMonitor()
+        resource_monitor.worker_id = self.worker_id
+        # Random phase of the profiled images, so short blender sessions also profile about every N-th image
+        profile_phase = random.random()
+
+        num_generated_img = 0
+        profile_num_generated_img = {}
+        recycle_reason = "num_img"
+        for step in session_plan:
+            self.parameter_override = dict(session_parameter_override, **(step["parameter_override"] or {}))
+            parameter = self.__get_parameter()
+            resource_monitor.output_metrics_path = parameter.output_metrics_path
+            resource_monitor.max_rss_growth_mb = parameter.worker_max_rss_growth_mb
+            # Continue the class counts of all blender processes saved in the dataset statistics
+            self.__class_instance_num = {}
+            if parameter.foreground_selection_policy == "balanced":
+                merged_statistics = merge_statistics(output_metrics_path = parameter.output_metrics_path)
+                if merged_statistics is not None:
+                    self.__class_instance_num = dict(merged_statistics["class_instance_num"])
+                self.__class_weights = classBalance.load_class_weights(class_weights_path = parameter.foreground_class_weights_path)
+            self.__dataset_statistics = None
+            if parameter.use_dataset_statistics:
+                self.__dataset_statistics = DatasetStatistics(output_metrics_path = parameter.output_metrics_path,
+                                                              worker_id = self.worker_id)
+            profile_path = os.path.join(parameter.output_metrics_path, "profiles")
+            # The plate of the previous step was built with its parameters
+            self.__background_plate = None
+            use_background_plate_reuse = parameter.background_plate_reuse_count > 1
+            num_step_generated_img = 0
+            while num_step_generated_img < step["num_img"]:
+                num_frame = min(parameter.timeline_batch_size, step["num_img"] - num_step_generated_img)
+                new_background_plate = use_background_plate_reuse and \
+                    (self.__background_plate is None or self.__num_img_on_background_plate >= parameter.background_plate_reuse_count)
+                if use_background_plate_reuse:
+                    num_frame = min(num_frame, parameter.background_plate_reuse_count -
+                                               (0 if new_background_plate else self.__num_img_on_background_plate))
+                # Profile the batch if the images [num_generated_img, num_generated_img + num_frame) pass a multiple
+                # of N, the whole batch is saved in the .pstats file of its first image
+                if parameter.profile_every_n_img > 0:
+                    profile_offset = profile_phase * parameter.profile_every_n_img
+                    if (num_generated_img + num_frame + profile_offset) // parameter.profile_every_n_img > \
+                       (num_generated_img + profile_offset) // parameter.profile_every_n_img:
+                        self.__profiler = cProfile.Profile()
+                background_plate_time = 0
+                if new_background_plate:
+                    self.gen_background_plate()
+                    background_plate_time = sum(self.__stage_time.values())
+                if num_frame > 1:
+                    gen_img_ids = self.gen_batch_data(num_frame = num_frame)
+                else:
+                    gen_img_ids = [self.gen_one_data()]
+                if self.__profiler is not None:
+                    os.makedirs(profile_path, exist_ok = True)
+                    pstats_path = os.path.join(profile_path, f"{gen_img_ids[0]}.pstats")
+                    self.__profiler.dump_stats(pstats_path)
+                    self.__profiler = None
+                    self.__save_profile_summary(profile_path = profile_path, pstats_path = pstats_path)
+                num_step_generated_img += num_frame
+                num_generated_img += num_frame
+                self.__num_img_on_background_plate += num_frame
+                if step["profile"] is not None:
+                    profile_num_generated_img[step["profile"]] = profile_num_generated_img.get(step["profile"], 0) + num_frame
+                # One record per image, with its share of the stage times of the batch
+                stage_time = {stage_name: value / num_frame for stage_name, value in self.__stage_time.items()}
+                for gen_img_id in gen_img_ids:
+                    resource_monitor.record(gen_img_id = gen_img_id,
+                                            extra_metrics = {"profile": step["profile"],
+                                                             "stage_time": stage_time,
+                                                             "timeline_batch_size": num_frame,
+                                                             "background_plate_time": background_plate_time / num_frame,
+                                                             "scene_reset": self.__scene_reset_report,
+                                                             "object_pool": objectPool.get_pool_statistics(),
+                                                             "multi_resolution": multiResolution.get_statistics()})
+                self.__write_session_report(session_report_path = session_report_path,
+                                            session_report = {"num_generated_img": num_generated_img,
+                                                              "recycle_reason": "running",
+                                                              "profile_num_generated_img": profile_num_generated_img})
+                print(f"Blender Session Generated {num_generated_img}/{num_img} Images")
+                if resource_monitor.should_recycle():
+                    recycle_reason = "rss_growth"
+                    break
+            if recycle_reason != "num_img":
+                break
+
+        multiResolution.wait_all()
+        self.__write_session_report(session_report_path = session_report_path,
+                                    session_report = {"num_generated_img": num_generated_img,
+                                                      "recycle_reason": recycle_reason,
+                                                      "profile_num_generated_img": profile_num_generated_img})
+        sys.exit(exitCode.SUCCESS)
 
 
 if __name__ == '__main__':
-    datagen = DataGenerator()
-    datagen.gen_one_data()
\ No newline at end of file
+    # Arguments after "--" are passed to this script by SDG_400_Looper.py[3]
+    script_argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--num_img", type = int, default = 1)
+    arg_parser.add_argument("--session_report", default = None)
+    arg_parser.add_argument("--worker_id", type = int, default = None)
+    arg_parser.add_argument("--parameter_override", type = json.loads, default = None) # JSON object
+    arg_parser.add_argument("--session_plan", default = None) # Path of a JSON list written by SDG_420_SweepScheduler.py
+    script_args = arg_parser.parse_args(script_argv)
+
+    session_plan = None
+    if script_args.session_plan is not None:
+        with open(script_args.session_plan) as f:
+            session_plan = json.load(f)
+
+    datagen = DataGenerator(worker_id = script_args.worker_id, parameter_override = script_args.parameter_override)
+    datagen.gen_data(num_img = script_args.num_img, session_report_path = script_args.session_report, session_plan = session_plan)
\ No newline at end of file
@@ -5,8 +5,14 @@ sys.dont_write_bytecode = True
 import subprocess
 import os
 from SDG_200_SDGParameter import SDGParameter
+from SDG_410_RenderDeviceCalibrator import load_render_layout
+from SDG_430_MetricsExporter import MetricsExporter
+from util import exitCode
+from util import sessionWatchdog
 import collections
 import time
+import json
+import tempfile
 
 
 class Looper:
@@ -14,10 +20,15 @@ class Looper:
     A class for repeatedly run the file SDG_300_DataGenerator.py in Blender, this class also provide the Estimated time consumption 
     to generate n synthetic images, and save the current configuration to a txt file.
 
+    The blender sessions are supervised: a session which makes no progress for image_timeout_s per image of a timeline batch is killed, a failed
+    session is restarted after a delay doubling with each failure of its worker slot in a row, and the run exits with
+    exit code RUN_ABORTED after a configuration error or max_consecutive_failures failures in a row.
+
     Attributes
     ----------
     __gen_num (int): The quantity of synthetic images needed to be generated.
     __gen_num_counter (int): The quantity of synthetic images that have already been generated.
+    __scheduled_num (int): The quantity of synthetic images requested from the running blender sessions.
     __remain_gen_num (int): The quantity of synthetic images remaining to be generated.
     __start_time (float): The starting time of synthetic image generation.
     __end_time (float): The ending time of synthetic image generation.
@@ -33,6 +44,9 @@ class Looper:
     __create_and_save_logger(): Save the current configuration to a txt file.
     __convert_time(): Converts seconds into days, hours, minutes, and seconds.
     __caculate_gen_imgs_eta(): Calculate the time consumption for generating synthetic images.
+    __read_session_report(): Read the quantity of synthetic images generated by a blender session.
+    __get_render_layout(): Get the number of concurrent blender processes and CPU render threads.
+    __start_session(): Start a blender session running SDG_300_DataGenerator.py.
     loop(): Repeatedly run the file SDG_300_DataGenerator.py in Blender.
 
     References
@@ -45,6 +59,7 @@ class Looper:
     def __init__(self, gen_num =  5000):
         self.__gen_num = gen_num
         self.__gen_num_counter = 0
+        self.__scheduled_num = 0
         self.__remain_gen_num = 0
         self.__start_time = 0
         self.__end_time = 0
@@ -61,6 +76,7 @@ class Looper:
             "asset_hdri_lighting_folder_path": None,
             "output_img_path": None,
             "output_label_path": None,
+            "output_long_sides": None,
             "num_foreground_object_in_scene_range": None,
             "num_occluder_in_scene_range": None,
             "max_samples": None,
@@ -73,7 +89,30 @@ class Looper:
             "brightness_probability": None,
             "contrast_probability": None,
             "hue_probability": None,
-            "saturation_probability": None
+            "saturation_probability": None,
+            "num_img_per_blender_session": None,
+            "scene_reset_mode": None,
+            "worker_max_rss_growth_mb": None,
+            "render_device": None,
+            "num_blender_process": None,
+            "num_render_threads": None,
+            "use_background_instancing": None,
+            "use_foreground_only_render": None,
+            "background_plate_reuse_count": None,
+            "asset_pack_path": None,
+            "use_overlap_resolver": None,
+            "timeline_batch_size": None,
+            "asset_hdri_cache_folder_path": None,
+            "hdri_cache_max_resolution": None,
+            "use_texture_lod": None,
+            "texture_memory_budget_mb": None,
+            "use_dataset_statistics": None,
+            "foreground_selection_policy": None,
+            "foreground_class_weights_path": None,
+            "metrics_http_port": None,
+            "image_timeout_s": None,
+            "max_consecutive_failures": None,
+            "profile_every_n_img": None
         }
 
 
@@ -87,6 +126,7 @@ class Looper:
         self.__logger["asset_hdri_lighting_folder_path"] = parameter.asset_hdri_lighting_folder_path
         self.__logger["output_img_path"] = parameter.output_img_path
         self.__logger["output_label_path"] = parameter.output_label_path
+        self.__logger["output_long_sides"] = parameter.output_long_sides
         self.__logger["num_foreground_object_in_scene_range"] = parameter.num_foreground_object_in_scene_range
         self.__logger["num_occluder_in_scene_range"] = parameter.num_occluder_in_scene_range
         self.__logger["max_samples"] = parameter.max_samples
@@ -100,6 +140,28 @@ class Looper:
         self.__logger["contrast_probability"] = parameter.contrast_probability
         self.__logger["hue_probability"] = parameter.hue_probability
         self.__logger["saturation_probability"] = parameter.saturation_probability
+        self.__logger["num_img_per_blender_session"] = parameter.num_img_per_blender_session
+        self.__logger["scene_reset_mode"] = parameter.scene_reset_mode
+        self.__logger["worker_max_rss_growth_mb"] = parameter.worker_max_rss_growth_mb
+        self.__logger["render_device"] = parameter.render_device
+        self.__logger["use_background_instancing"] = parameter.use_background_instancing
+        self.__logger["use_foreground_only_render"] = parameter.use_foreground_only_render
+        self.__logger["background_plate_reuse_count"] = parameter.background_plate_reuse_count
+        self.__logger["asset_pack_path"] = parameter.asset_pack_path
+        self.__logger["use_overlap_resolver"] = parameter.use_overlap_resolver
+        self.__logger["timeline_batch_size"] = parameter.timeline_batch_size
+        self.__logger["asset_hdri_cache_folder_path"] = parameter.asset_hdri_cache_folder_path
+        self.__logger["hdri_cache_max_resolution"] = parameter.hdri_cache_max_resolution
+        self.__logger["use_texture_lod"] = parameter.use_texture_lod
+        self.__logger["texture_memory_budget_mb"] = parameter.texture_memory_budget_mb
+        self.__logger["use_dataset_statistics"] = parameter.use_dataset_statistics
+        self.__logger["foreground_selection_policy"] = parameter.foreground_selection_policy
+        self.__logger["foreground_class_weights_path"] = parameter.foreground_class_weights_path
+        self.__logger["metrics_http_port"] = parameter.metrics_http_port
+        self.__logger["image_timeout_s"] = parameter.image_timeout_s
+        self.__logger["max_consecutive_failures"] = parameter.max_consecutive_failures
+        self.__logger["profile_every_n_img"] = parameter.profile_every_n_img
+        self.__logger["num_blender_process"], self.__logger["num_render_threads"] = self.__get_render_layout(parameter = parameter)
 
         # Save to txt
         with open("SDG_log.txt",'w') as f:
@@ -120,9 +182,14 @@ class Looper:
         return "d:h:m:s-> %d:%02d:%02d:%02d" % (day, hour, minutes, seconds)
 
 
-    def __caculate_gen_imgs_eta(self):
-        """Calculate the time consumption for generating synthetic images."""
-        time_consume = self.__end_time - self.__start_time
+    def __caculate_gen_imgs_eta(self, num_img, num_blender_process = 1):
+        """Calculate the time consumption for generating synthetic images.
+
+        Args:
+            num_img (int): The quantity of synthetic images generated by the last blender session.
+            num_blender_process (int): Number of blender sessions running at the same time.
+        """
+        time_consume = (self.__end_time - self.__start_time) / num_img / num_blender_process
         self.__time_seque.appendleft(time_consume)
         time_list = list(self.__time_seque)
         self.__average_time_consume_per_img = sum(time_list) / len(time_list)
@@ -137,6 +204,110 @@ class Looper:
         self.__gen_n_imgs_eta = self.__convert_time(time = gen_n_imgs_time_consume)
 
 
+    def __read_session_report(self, session_report_path, num_img, failed = False):
+        """Read the quantity of synthetic images generated by a blender session.
+
+        A blender session exits early when its memory grows too much, it reports how many images it generated.
+
+        Args:
+            session_report_path (str): The path of the session report written by SDG_300_DataGenerator.py.
+            num_img (int): The quantity of synthetic images requested from the blender session.
+            failed (bool): The blender session exited with an error or was killed.
+
+        Return:
+            num_generated_img (int): The quantity of synthetic images generated by the blender session.
+        """
+        try:
+            with open(session_report_path) as f:
+                session_report = json.load(f)
+        except (OSError, ValueError):
+            if failed:
+                return 0
+            print(f"Warning!!! blender session wrote no session report, assume {num_img} images were generated")
+            return num_img
+        finally:
+            for path in [session_report_path, session_report_path + ".tmp"]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if session_report["recycle_reason"] == "running":
+            print(f"Blender session stopped after {session_report['num_generated_img']} images")
+        elif session_report["recycle_reason"] != "num_img":
+            print(f"Blender session recycled ({session_report['recycle_reason']}) after {session_report['num_generated_img']} images")
+
+        return session_report["num_generated_img"]
+
+
+    def __get_render_layout(self, parameter):
+        """Get the number of concurrent blender processes and CPU render threads.
+
+        Values of SDGParameter larger than 0 are used as they are, the others come from the render device profile
+        of this PC saved by SDG_410_RenderDeviceCalibrator.py.
+
+        Args:
+            parameter (SDGParameter): The configuration of the generator.
+
+        Return:
+            num_blender_process (int): Number of blender processes rendering at the same time.
+            num_render_threads (int): Number of CPU render threads of each blender process, 0 lets blender detect it.
+        """
+        num_blender_process = parameter.num_blender_process
+        num_render_threads = parameter.num_render_threads
+        if num_blender_process <= 0 or num_render_threads <= 0:
+            render_layout = load_render_layout(render_device_profile_path = parameter.render_device_profile_path)
+            if render_layout is not None:
+                print(f"Use The Calibrated Render Layout Of This PC: {render_layout['num_blender_process']} Blender Process x {render_layout['num_render_threads']} Threads")
+                if num_blender_process <= 0:
+                    num_blender_process = render_layout["num_blender_process"]
+                if num_render_threads <= 0:
+                    num_render_threads = render_layout["num_render_threads"]
+
+        return max(num_blender_process, 1), max(num_render_threads, 0)
+
+
+    def __start_session(self, parameter, num_img, worker_id, num_render_threads):
+        """Start a blender session running SDG_300_DataGenerator.py.
+
+        Args:
+            parameter (SDGParameter): The configuration of the generator.
+            num_img (int): The quantity of synthetic images requested from the blender session.
+            worker_id (int): ID of the blender session, None when only one session runs at a time.
+            num_render_threads (int): Number of CPU render threads, 0 lets blender detect it.
+
+        Return:
+            process (subprocess.Popen): The blender process.
+            session_report_path (str): The path where the blender session writes its session report.
+        """
+        # Get SDG_300_DataGenerator.py path
+        module_path = os.path.dirname(os.path.abspath(__file__))
+        data_generator_path = os.path.join(module_path,"SDG_300_DataGenerator.py")
+
+        session_report_file, session_report_path = tempfile.mkstemp(prefix = "SDG_session_", suffix = ".json")
+        os.close(session_report_file)
+
+        # Set args[2]
+        args = [parameter.blender_exe_path]
+        if num_render_threads > 0:
+            args += ["--threads", str(num_render_threads)] # Use amount of <threads> for rendering and other operations.
+        args += [
+            "--python-exit-code", str(exitCode.UNEXPECTED_ERROR), # Exit code of an uncaught exception in the script.
+            "--python", # Run the given Python script file.
+            data_generator_path,
+            "--window-geometry","0","0","100","100", # Open with lower left corner at <sx>, <sy> and width and height as <w>, <h>.
+            "--no-window-focus", # Open behind other windows and without taking focus.
+            "--", # Pass the remaining arguments to SDG_300_DataGenerator.py
+            "--num_img", str(num_img),
+            "--session_report", session_report_path
+            ]
+        if worker_id is not None:
+            args += ["--worker_id", str(worker_id)]
+
+        # Create new process
+        process = subprocess.Popen(args)
+
+        return process, session_report_path
+
+
     def loop(self):
         """Repeatedly run the file SDG_300_DataGenerator.py in Blender."""
         self.__create_and_save_logger()
@@ -144,43 +315,100 @@ class Looper:
         # Passing gen_num param
         parameter = SDGParameter()
         self.__gen_num = parameter.gen_num
+        num_blender_process, num_render_threads = self.__get_render_layout(parameter = parameter)
+        metrics_exporter = MetricsExporter(output_metrics_path = parameter.output_metrics_path,
+                                           output_folder_paths = [parameter.output_img_path, parameter.output_label_path],
+                                           metrics_http_port = parameter.metrics_http_port)
+        metrics_exporter.start(gen_num = self.__gen_num, num_blender_process = num_blender_process)
 
-        while self.__gen_num_counter < self.__gen_num:
+        # worker_id -> (process, session_report_path, num_img, start_time)
+        running_sessions = dict()
+        num_consecutive_failure = [0] * num_blender_process
+        retry_time = [0] * num_blender_process
+        timeout_worker_ids = set()
+        while self.__gen_num_counter < self.__gen_num or len(running_sessions) > 0:
 
-            # Log start time
-            self.__start_time = time.time()
+            # Fill the free worker slots
+            for worker_id in range(num_blender_process):
+                if worker_id in running_sessions or self.__gen_num_counter + self.__scheduled_num >= self.__gen_num:
+                    continue
+                if time.time() < retry_time[worker_id]:
+                    continue
+                if num_consecutive_failure[worker_id] > 0:
+                    metrics_exporter.record_retry(worker_id = worker_id)
+                # Number of images generated by this blender session
+                num_img = min(parameter.num_img_per_blender_session, self.__gen_num - self.__gen_num_counter - self.__scheduled_num)
+                process, session_report_path = self.__start_session(parameter = parameter,
+                                                                     num_img = num_img,
+                                                                     worker_id = worker_id if num_blender_process > 1 else None,
+                                                                     num_render_threads = num_render_threads)
+                running_sessions[worker_id] = (process, session_report_path, num_img, time.time())
+                self.__scheduled_num += num_img
 
-            # Get blender exe path
-            blender_exe_path = parameter.blender_exe_path
+            # Kill the blender sessions which made no progress for too long
+            num_img_per_heartbeat = sessionWatchdog.get_num_img_per_heartbeat(timeline_batch_size = parameter.timeline_batch_size,
+                                                                               background_plate_reuse_count = parameter.background_plate_reuse_count)
+            for worker_id, (process, session_report_path, num_img, start_time) in running_sessions.items():
+                if process.poll() is None and sessionWatchdog.is_session_hung(session_report_path = session_report_path,
+                                                                              start_time = start_time,
+                                                                              image_timeout_s = parameter.image_timeout_s,
+                                                                              session_startup_timeout_s = parameter.session_startup_timeout_s,
+                                                                              num_img_per_heartbeat = num_img_per_heartbeat):
+                    print(f"Warning!!! blender session {worker_id} made no progress for {parameter.image_timeout_s * num_img_per_heartbeat} seconds, kill it")
+                    sessionWatchdog.kill_session(process = process)
+                    timeout_worker_ids.add(worker_id)
 
-            # Get SDG_300_DataGenerator.py path
-            module_path = os.path.dirname(os.path.abspath(__file__))
-            data_generator_path = os.path.join(module_path,"SDG_300_DataGenerator.py")
+            # Wait for a blender session to exit
+            finished_worker_ids = [worker_id for worker_id, session in running_sessions.items() if session[0].poll() is not None]
+            if len(finished_worker_ids) == 0:
+                time.sleep(0.5)
+                continue
 
-            # Set args[2]
-            args = [
-                blender_exe_path,
-                "--python", # Run the given Python script file.
-                data_generator_path,
-                "--window-geometry","0","0","100","100", # Open with lower left corner at <sx>, <sy> and width and height as <w>, <h>.
-                "--no-window-focus" # Open behind other windows and without taking focus.
-                ]
+            for worker_id in finished_worker_ids:
+                process, session_report_path, num_img, self.__start_time = running_sessions.pop(worker_id)
+                exit_code = exitCode.IMAGE_TIMEOUT if worker_id in timeout_worker_ids else process.returncode
+                timeout_worker_ids.discard(worker_id)
+                failed = exit_code != exitCode.SUCCESS
+                num_generated_img = self.__read_session_report(session_report_path = session_report_path, num_img = num_img, failed = failed)
+                self.__gen_num_counter += num_generated_img
+                self.__scheduled_num -= num_img
 
-            # Create new process
-            subprocess.run(args)
+                # Log end time
+                self.__end_time = time.time()
 
-            self.__gen_num_counter += 1
-            
-            # Log end time
-            self.__end_time = time.time()
+                # A session which crashed or was killed before its first image tells nothing about the time per image
+                if num_generated_img > 0:
+                    self.__caculate_gen_imgs_eta(num_img = num_generated_img, num_blender_process = num_blender_process)
+                metrics_exporter.record_session(worker_id = worker_id,
+                                                num_img = num_img,
+                                                num_generated_img = num_generated_img,
+                                                time_consume = self.__end_time - self.__start_time,
+                                                failed = failed,
+                                                exit_code_name = exitCode.get_exit_code_name(exit_code))
 
-            self.__caculate_gen_imgs_eta()
+                if failed:
+                    num_consecutive_failure[worker_id] += 1
+                    retry_delay = sessionWatchdog.get_retry_delay(num_consecutive_failure = num_consecutive_failure[worker_id],
+                                                                  retry_backoff_s = parameter.retry_backoff_s,
+                                                                  max_retry_backoff_s = parameter.max_retry_backoff_s)
+                    retry_time[worker_id] = time.time() + retry_delay
+                    print(f"Warning!!! blender session {worker_id} failed ({exitCode.get_exit_code_name(exit_code)}), "
+                          f"{num_consecutive_failure[worker_id]} failures in a row, retry in {retry_delay:.0f} seconds")
+                    if exit_code in exitCode.configuration_errors or num_consecutive_failure[worker_id] >= parameter.max_consecutive_failures:
+                        print(f"ERROR!!! abort the run after the failure {exitCode.get_exit_code_name(exit_code)} of blender session {worker_id}")
+                        for running_process, *_ in running_sessions.values():
+                            sessionWatchdog.kill_session(process = running_process)
+                        metrics_exporter.stop()
+                        sys.exit(exitCode.RUN_ABORTED)
+                else:
+                    num_consecutive_failure[worker_id] = 0
 
-            print(f"Generate 1 Image ETA: {int(self.__average_time_consume_per_img)} Seconds")
-            print(f"Generate 1k Images ETA: {self.__gen_1k_imgs_eta}")
-            print(f"Already Generated {self.__gen_num_counter}/{self.__gen_num} Images")
-            print(f"Remain {self.__remain_gen_num} Images Need To Generate, ETA: {self.__gen_n_imgs_eta}")
+                print(f"Generate 1 Image ETA: {int(self.__average_time_consume_per_img)} Seconds")
+                print(f"Generate 1k Images ETA: {self.__gen_1k_imgs_eta}")
+                print(f"Already Generated {self.__gen_num_counter}/{self.__gen_num} Images")
+                print(f"Remain {self.__remain_gen_num} Images Need To Generate, ETA: {self.__gen_n_imgs_eta}")
 
+        metrics_exporter.stop()
         print(f"Generate {self.__gen_num} Images COMPLERED !!!")
 
 
@@ -0,0 +1,193 @@
+# Prevent to create __pycache__ file
+import sys
+sys.dont_write_bytecode = True
+
+import subprocess
+import os
+from SDG_200_SDGParameter import SDGParameter
+import json
+import time
+import socket
+import shutil
+import tempfile
+from util import exitCode
+
+
+class RenderDeviceCalibrator:
+    """
+    A class which measures the image throughput of this PC for different numbers of CPU render threads and concurrent
+    blender processes, then saves the best render layout of this PC to the render device profile.
+
+    Every candidate layout runs num_blender_process copies of SDG_300_DataGenerator.py at the same time, each of them
+    renders num_img_per_trial images with num_render_threads threads into a temporary folder. SDG_400_Looper.py reads
+    the profile of the current host name when SDGParameter.num_blender_process or num_render_threads is 0.
+
+    Attributes
+    ----------
+    num_img_per_trial (int): The quantity of synthetic images generated by each blender process of a candidate layout.
+    candidate_num_blender_process (list of int): The numbers of concurrent blender processes to measure.
+    __num_cpu (int): Number of logical CPUs of this PC.
+    __trial_results (list of dict): Throughput measured for each candidate layout.
+
+    Methods
+    -------
+    __get_candidate_layouts(): Get the (num_blender_process, num_render_threads) layouts which fit in the CPUs of this PC.
+    __run_trial(): Measure the image throughput of one layout.
+    calibrate(): Measure every candidate layout and save the best one to the render device profile.
+
+    References
+    ----------
+    [1]Command Line Arguments, https://docs.blender.org/manual/en/latest/advanced/command_line/arguments.html
+    [2]Render Performance, https://docs.blender.org/manual/en/latest/render/cycles/render_settings/performance.html
+
+    """
+
+    def __init__(self,
+                 num_img_per_trial = 3,
+                 candidate_num_blender_process = [1, 2, 4]
+                 ):
+        self.num_img_per_trial = num_img_per_trial
+        self.candidate_num_blender_process = candidate_num_blender_process
+        self.__num_cpu = os.cpu_count() or 1
+        self.__trial_results = list()
+
+
+    def __get_candidate_layouts(self):
+        """Get the (num_blender_process, num_render_threads) layouts which fit in the CPUs of this PC.
+
+        Each blender process uses an equal share of the CPUs, half of the share is also measured because the scene
+        building and the compositing of a blender process are mostly single threaded.
+
+        Return:
+            layouts (list of tuple of int): The candidate (num_blender_process, num_render_threads) layouts.
+        """
+        layouts = list()
+        for num_blender_process in self.candidate_num_blender_process:
+            if num_blender_process > self.__num_cpu:
+                continue
+            num_render_threads = self.__num_cpu // num_blender_process
+            for threads in sorted({num_render_threads, max(num_render_threads // 2, 1)}):
+                layouts.append((num_blender_process, threads))
+
+        return layouts
+
+
+    def __run_trial(self, num_blender_process, num_render_threads):
+        """Measure the image throughput of one layout[1][2].
+
+        Args:
+            num_blender_process (int): Number of blender processes rendering at the same time.
+            num_render_threads (int): Number of CPU render threads of each blender process.
+
+        Return:
+            img_per_hour (float): The quantity of synthetic images generated by this PC in one hour.
+        """
+        parameter = SDGParameter()
+        module_path = os.path.dirname(os.path.abspath(__file__))
+        data_generator_path = os.path.join(module_path, "SDG_300_DataGenerator.py")
+        trial_path = tempfile.mkdtemp(prefix = "SDG_calibration_")
+        # Keep the calibration images out of the dataset
+        parameter_override = {
+            "output_img_path": os.path.join(trial_path, "images"),
+            "output_label_path": os.path.join(trial_path, "labels"),
+            "output_metrics_path": os.path.join(trial_path, "metrics"),
+            "num_render_threads": num_render_threads
+        }
+        os.makedirs(parameter_override["output_img_path"])
+        os.makedirs(parameter_override["output_label_path"])
+
+        start_time = time.time()
+        processes = list()
+        for worker_id in range(num_blender_process):
+            args = [
+                parameter.blender_exe_path,
+                "--threads", str(num_render_threads),
+                "--python-exit-code", str(exitCode.UNEXPECTED_ERROR),
+                "--python",
+                data_generator_path,
+                "--window-geometry","0","0","100","100",
+                "--no-window-focus",
+                "--",
+                "--num_img", str(self.num_img_per_trial),
+                "--worker_id", str(worker_id),
+                "--parameter_override", json.dumps(parameter_override)
+                ]
+            processes.append(subprocess.Popen(args))
+        trial_timeout = None
+        if parameter.image_timeout_s is not None:
+            trial_timeout = parameter.session_startup_timeout_s + parameter.image_timeout_s * self.num_img_per_trial
+        for process in processes:
+            try:
+                process.wait(timeout = max(trial_timeout - (time.time() - start_time), 0) if trial_timeout is not None else None)
+            except subprocess.TimeoutExpired:
+                print("Warning!!! calibration trial timed out, kill the blender process")
+                process.kill()
+                process.wait()
+        time_consume = time.time() - start_time
+
+        num_generated_img = len(os.listdir(parameter_override["output_img_path"]))
+        shutil.rmtree(trial_path, ignore_errors = True)
+        img_per_hour = num_generated_img / time_consume * 3600
+        print(f"Layout {num_blender_process} Blender Process x {num_render_threads} Threads: {num_generated_img} Images, {img_per_hour:.1f} Images/Hour")
+
+        return img_per_hour
+
+
+    def calibrate(self):
+        """Measure every candidate layout and save the best one to the render device profile."""
+        parameter = SDGParameter()
+        self.__trial_results = list()
+        for num_blender_process, num_render_threads in self.__get_candidate_layouts():
+            img_per_hour = self.__run_trial(num_blender_process = num_blender_process, num_render_threads = num_render_threads)
+            self.__trial_results.append({"num_blender_process": num_blender_process,
+                                         "num_render_threads": num_render_threads,
+                                         "img_per_hour": img_per_hour})
+
+        best_layout = max(self.__trial_results, key = lambda result: result["img_per_hour"])
+        if best_layout["img_per_hour"] == 0:
+            print("Warning!!! No image was generated, check blender_exe_path and the asset paths, profile not saved")
+            return
+
+        render_device_profile = dict()
+        if os.path.exists(parameter.render_device_profile_path):
+            with open(parameter.render_device_profile_path) as f:
+                render_device_profile = json.load(f)
+        render_device_profile[socket.gethostname()] = {
+            "num_blender_process": best_layout["num_blender_process"],
+            "num_render_threads": best_layout["num_render_threads"],
+            "img_per_hour": best_layout["img_per_hour"],
+            "num_cpu": self.__num_cpu,
+            "calibration_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "trial_results": self.__trial_results
+        }
+        with open(parameter.render_device_profile_path, "w") as f:
+            json.dump(render_device_profile, f, indent = 4)
+
+        print(f"Best Layout: {best_layout['num_blender_process']} Blender Process x {best_layout['num_render_threads']} Threads")
+        print("Render Device Calibration COMPLERED !!!")
+
+
+def load_render_layout(render_device_profile_path):
+    """Load the calibrated render layout of this PC.
+
+    Args:
+        render_device_profile_path (str): The path of the render device profile saved by RenderDeviceCalibrator.
+
+    Return:
+        render_layout (dict): The num_blender_process and num_render_threads of this PC, None if it was not calibrated.
+    """
+    if not os.path.exists(render_device_profile_path):
+        return None
+    try:
+        with open(render_device_profile_path) as f:
+            render_device_profile = json.load(f)
+    except ValueError:
+        print(f"Warning!!! Can not read the render device profile {render_device_profile_path}")
+        return None
+
+    return render_device_profile.get(socket.gethostname())
+
+
+if __name__ == '__main__':
+    calibrator = RenderDeviceCalibrator()
+    calibrator.calibrate()
@@ -0,0 +1,417 @@
+# Prevent to create __pycache__ file
+import sys
+sys.dont_write_bytecode = True
+
+import subprocess
+import os
+from SDG_200_SDGParameter import SDGParameter
+from SDG_410_RenderDeviceCalibrator import load_render_layout
+import time
+import json
+import tempfile
+from util import exitCode
+from util import sessionWatchdog
+
+
+class SweepScheduler:
+    """
+    A class which generates the images of several named parameter profiles in one run, sharing one pool of blender
+    processes, e.g. the ablation variants of a dataset.
+
+    A profile is a JSON object {"name": str, "gen_num": int, "parameter_override": {SDGParameter attribute: value}}, the
+    sweep profile file is a JSON list of profiles. The images, labels and metrics of each profile are saved in
+    <sweep_output_path>/<name>/ unless its parameter_override sets output_img_path, output_label_path or output_metrics_path.
+
+    Profiles using the same assets and HDRIs are grouped, the groups are assigned to the blender process slots, largest
+    first. A blender session generates the images of the profiles of one group in turn, so the data blocks kept by the
+    incremental scene reset and the object pool serve all of them. A slot whose groups are done takes over the group
+    with the most remaining images. The images, time and ETA of each profile are tracked separately and saved to
+    <sweep_output_path>/sweep_report.json. The blender sessions are supervised like in SDG_400_Looper.py, a hung session
+    is killed and a failed session is restarted with a backoff.
+
+    Attributes
+    ----------
+    sweep_profile_path (str): The path of the sweep profile file (json).
+    sweep_output_path (str): The path where the outputs of each profile are saved.
+    __profiles (dict of str: dict): The profiles paired with their name.
+    __profile_status (dict of str: dict): The generated, scheduled and time of each profile, paired with its name.
+    __groups (list of list of str): The profile names of each group of profiles sharing the same assets.
+    __slot_groups (list of list of int): The group indices assigned to each blender process slot.
+    __shared_state_parameters (list of str): The SDGParameter attributes whose data a blender session shares between images.
+
+    Methods
+    -------
+    __load_profiles(): Read the sweep profile file and set the default output paths of each profile.
+    __group_profiles(): Group the profiles by their shared assets and assign the groups to the blender process slots.
+    __get_remain_num(): Get the quantity of images of a profile which are neither generated nor scheduled.
+    __make_session_plan(): Interleave the images of one group of profiles for the next blender session of a slot.
+    __start_session(): Start a blender session running SDG_300_DataGenerator.py with a session plan.
+    __read_session_report(): Read the quantity of images of each profile generated by a blender session.
+    __convert_time(): Converts seconds into days, hours, minutes, and seconds.
+    __print_and_save_status(): Print the throughput and ETA of each profile and save the sweep report.
+    sweep(): Generate the images of every profile.
+
+    References
+    ----------
+    [1]Longest processing time scheduling, https://en.wikipedia.org/wiki/Longest-processing-time-first_scheduling
+    [2]Command Line Arguments, https://docs.blender.org/manual/en/latest/advanced/command_line/arguments.html
+
+    """
+
+    def __init__(self,
+                sweep_profile_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/SDG/sweep_profile.json",
+                sweep_output_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/sweep"
+                ):
+        self.sweep_profile_path = sweep_profile_path
+        self.sweep_output_path = sweep_output_path
+        self.__profiles = dict()
+        self.__profile_status = dict()
+        self.__groups = list()
+        self.__slot_groups = list()
+        self.__shared_state_parameters = ["asset_background_object_folder_path",
+                                          "asset_foreground_object_folder_path",
+                                          "asset_occluder_folder_path",
+                                          "asset_ambientCGMaterial_folder_path",
+                                          "asset_hdri_lighting_folder_path",
+                                          "asset_hdri_cache_folder_path"]
+
+
+    def __load_profiles(self):
+        """Read the sweep profile file and set the default output paths of each profile."""
+        with open(self.sweep_profile_path) as f:
+            profile_list = json.load(f)
+
+        for profile in profile_list:
+            if profile["name"] in self.__profiles:
+                raise ValueError(f"Duplicate sweep profile name {profile['name']}")
+            parameter_override = dict(profile.get("parameter_override", {}))
+            profile_output_path = os.path.join(self.sweep_output_path, profile["name"])
+            parameter_override.setdefault("output_img_path", os.path.join(profile_output_path, "images"))
+            parameter_override.setdefault("output_label_path", os.path.join(profile_output_path, "labels"))
+            parameter_override.setdefault("output_metrics_path", os.path.join(profile_output_path, "metrics"))
+            for output_path in ["output_img_path", "output_label_path", "output_metrics_path"]:
+                os.makedirs(parameter_override[output_path], exist_ok = True)
+
+            self.__profiles[profile["name"]] = {"gen_num": profile["gen_num"], "parameter_override": parameter_override}
+            self.__profile_status[profile["name"]] = {"gen_num": profile["gen_num"],
+                                                      "generated": 0,
+                                                      "scheduled": 0,
+                                                      "time_consume": 0.0}
+
+
+    def __group_profiles(self, parameter, num_blender_process):
+        """Group the profiles by their shared assets and assign the groups to the blender process slots.
+
+        The groups are assigned largest first to the slot with the fewest assigned images[1].
+
+        Args:
+            parameter (SDGParameter): The base configuration of the generator.
+            num_blender_process (int): Number of blender processes rendering at the same time.
+        """
+        group_keys = dict()
+        for name, profile in self.__profiles.items():
+            key = tuple(profile["parameter_override"].get(attribute, getattr(parameter, attribute))
+                        for attribute in self.__shared_state_parameters)
+            group_keys.setdefault(key, []).append(name)
+        self.__groups = list(group_keys.values())
+
+        group_gen_num = [sum(self.__profiles[name]["gen_num"] for name in group) for group in self.__groups]
+        slot_gen_num = [0] * num_blender_process
+        self.__slot_groups = [[] for i in range(num_blender_process)]
+        for group_index in sorted(range(len(self.__groups)), key = lambda i: group_gen_num[i], reverse = True):
+            slot = slot_gen_num.index(min(slot_gen_num))
+            self.__slot_groups[slot].append(group_index)
+            slot_gen_num[slot] += group_gen_num[group_index]
+
+        for slot, group_indices in enumerate(self.__slot_groups):
+            profile_names = [name for group_index in group_indices for name in self.__groups[group_index]]
+            print(f"Blender Process Slot {slot}: {slot_gen_num[slot]} Images Of Profiles {profile_names}")
+
+
+    def __get_remain_num(self, name):
+        """Get the quantity of images of a profile which are neither generated nor scheduled.
+
+        Args:
+            name (str): The name of the profile.
+
+        Return:
+            remain_num (int): The quantity of images left to schedule.
+        """
+        status = self.__profile_status[name]
+
+        return status["gen_num"] - status["generated"] - status["scheduled"]
+
+
+    def __make_session_plan(self, slot, num_img_per_blender_session):
+        """Interleave the images of one group of profiles for the next blender session of a slot.
+
+        Args:
+            slot (int): The blender process slot.
+            num_img_per_blender_session (int): The quantity of images generated by one blender session.
+
+        Return:
+            session_plan (list of dict): The profile, parameter_override and num_img of each step, empty if every image is scheduled.
+        """
+        def group_remain_num(group_index):
+            return sum(self.__get_remain_num(name) for name in self.__groups[group_index])
+
+        group_indices = [i for i in self.__slot_groups[slot] if group_remain_num(i) > 0]
+        if len(group_indices) == 0:
+            # Take over the group with the most remaining images
+            group_indices = [max(range(len(self.__groups)), key = group_remain_num)]
+            if group_remain_num(group_indices[0]) == 0:
+                return []
+
+        # Round-robin over the profiles of the group
+        profile_num_img = {name: 0 for name in self.__groups[group_indices[0]]}
+        num_img = 0
+        while num_img < num_img_per_blender_session:
+            added = False
+            for name in profile_num_img:
+                if num_img < num_img_per_blender_session and self.__get_remain_num(name) - profile_num_img[name] > 0:
+                    profile_num_img[name] += 1
+                    num_img += 1
+                    added = True
+            if not added:
+                break
+
+        session_plan = []
+        for name, profile_num in profile_num_img.items():
+            if profile_num > 0:
+                session_plan.append({"profile": name,
+                                     "parameter_override": self.__profiles[name]["parameter_override"],
+                                     "num_img": profile_num})
+                self.__profile_status[name]["scheduled"] += profile_num
+
+        return session_plan
+
+
+    def __start_session(self, parameter, session_plan, worker_id, num_render_threads):
+        """Start a blender session running SDG_300_DataGenerator.py with a session plan.
+
+        Args:
+            parameter (SDGParameter): The base configuration of the generator.
+            session_plan (list of dict): The profile, parameter_override and num_img of each step.
+            worker_id (int): ID of the blender session, None when only one session runs at a time.
+            num_render_threads (int): Number of CPU render threads, 0 lets blender detect it.
+
+        Return:
+            process (subprocess.Popen): The blender process.
+            session_report_path (str): The path where the blender session writes its session report.
+            session_plan_path (str): The path of the session plan file.
+        """
+        # Get SDG_300_DataGenerator.py path
+        module_path = os.path.dirname(os.path.abspath(__file__))
+        data_generator_path = os.path.join(module_path,"SDG_300_DataGenerator.py")
+
+        session_report_file, session_report_path = tempfile.mkstemp(prefix = "SDG_session_", suffix = ".json")
+        os.close(session_report_file)
+        session_plan_file, session_plan_path = tempfile.mkstemp(prefix = "SDG_plan_", suffix = ".json")
+        with os.fdopen(session_plan_file, "w") as f:
+            json.dump(session_plan, f)
+
+        args = [parameter.blender_exe_path]
+        if num_render_threads > 0:
+            args += ["--threads", str(num_render_threads)]
+        args += [
+            "--python-exit-code", str(exitCode.UNEXPECTED_ERROR),
+            "--python",
+            data_generator_path,
+            "--window-geometry","0","0","100","100",
+            "--no-window-focus",
+            "--",
+            "--num_img", str(sum(step["num_img"] for step in session_plan)),
+            "--session_report", session_report_path,
+            "--session_plan", session_plan_path
+            ]
+        if worker_id is not None:
+            args += ["--worker_id", str(worker_id)]
+
+        process = subprocess.Popen(args)
+
+        return process, session_report_path, session_plan_path
+
+
+    def __read_session_report(self, session_report_path, session_plan, failed = False):
+        """Read the quantity of images of each profile generated by a blender session.
+
+        Args:
+            session_report_path (str): The path of the session report written by SDG_300_DataGenerator.py.
+            session_plan (list of dict): The session plan of the blender session.
+            failed (bool): The blender session exited with an error or was killed.
+
+        Return:
+            profile_num_generated_img (dict of str: int): The quantity of generated images paired with the profile name.
+        """
+        try:
+            with open(session_report_path) as f:
+                session_report = json.load(f)
+        except (OSError, ValueError):
+            if failed:
+                return {}
+            print("Warning!!! blender session wrote no session report, assume the session plan was completed")
+            return {step["profile"]: step["num_img"] for step in session_plan}
+        finally:
+            for path in [session_report_path, session_report_path + ".tmp"]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if session_report["recycle_reason"] == "running":
+            print(f"Blender session stopped after {session_report['num_generated_img']} images")
+        elif session_report["recycle_reason"] != "num_img":
+            print(f"Blender session recycled ({session_report['recycle_reason']}) after {session_report['num_generated_img']} images")
+
+        return session_report["profile_num_generated_img"]
+
+
+    def __convert_time(self, time):
+        """Converts seconds into days, hours, minutes, and seconds."""
+        day = time // (24 * 3600)
+        time = time % (24 * 3600)
+        hour = time // 3600
+        time %= 3600
+        minutes = time // 60
+        time %= 60
+        seconds = time
+
+        return "d:h:m:s-> %d:%02d:%02d:%02d" % (day, hour, minutes, seconds)
+
+
+    def __print_and_save_status(self, num_blender_process):
+        """Print the throughput and ETA of each profile and save the sweep report.
+
+        The time of a blender session is shared among its profiles in proportion to their generated images, the ETA
+        assumes the remaining images of a profile are spread over all blender processes.
+
+        Args:
+            num_blender_process (int): Number of blender processes rendering at the same time.
+        """
+        sweep_report = dict()
+        for name, status in self.__profile_status.items():
+            remain_num = status["gen_num"] - status["generated"]
+            if status["generated"] > 0:
+                time_consume_per_img = status["time_consume"] / status["generated"]
+                img_per_hour = 3600 / time_consume_per_img * num_blender_process
+                eta = self.__convert_time(time = time_consume_per_img * remain_num / num_blender_process)
+            else:
+                img_per_hour = None
+                eta = None
+            print(f"Profile {name}: Already Generated {status['generated']}/{status['gen_num']} Images, "
+                  f"{img_per_hour if img_per_hour is None else int(img_per_hour)} Images/Hour, Remain ETA: {eta}")
+            sweep_report[name] = dict(status, img_per_hour = img_per_hour, eta = eta)
+
+        with open(os.path.join(self.sweep_output_path, "sweep_report.json"), "w") as f:
+            json.dump(sweep_report, f, indent = 2)
+
+
+    def sweep(self):
+        """Generate the images of every profile."""
+        parameter = SDGParameter()
+        os.makedirs(self.sweep_output_path, exist_ok = True)
+        self.__load_profiles()
+
+        num_blender_process = parameter.num_blender_process
+        num_render_threads = parameter.num_render_threads
+        if num_blender_process <= 0 or num_render_threads <= 0:
+            render_layout = load_render_layout(render_device_profile_path = parameter.render_device_profile_path)
+            if render_layout is not None:
+                if num_blender_process <= 0:
+                    num_blender_process = render_layout["num_blender_process"]
+                if num_render_threads <= 0:
+                    num_render_threads = render_layout["num_render_threads"]
+        num_blender_process = max(num_blender_process, 1)
+        num_render_threads = max(num_render_threads, 0)
+        self.__group_profiles(parameter = parameter, num_blender_process = num_blender_process)
+
+        # worker_id -> (process, session_report_path, session_plan_path, session_plan, start_time)
+        running_sessions = dict()
+        num_consecutive_failure = [0] * num_blender_process
+        retry_time = [0] * num_blender_process
+        timeout_worker_ids = set()
+        while True:
+            # Fill the free worker slots
+            for worker_id in range(num_blender_process):
+                if worker_id in running_sessions or time.time() < retry_time[worker_id]:
+                    continue
+                session_plan = self.__make_session_plan(slot = worker_id,
+                                                        num_img_per_blender_session = parameter.num_img_per_blender_session)
+                if len(session_plan) == 0:
+                    continue
+                process, session_report_path, session_plan_path = self.__start_session(parameter = parameter,
+                                                                                       session_plan = session_plan,
+                                                                                       worker_id = worker_id if num_blender_process > 1 else None,
+                                                                                       num_render_threads = num_render_threads)
+                running_sessions[worker_id] = (process, session_report_path, session_plan_path, session_plan, time.time())
+
+            if len(running_sessions) == 0:
+                if sum(self.__get_remain_num(name) for name in self.__profiles) == 0:
+                    break
+                time.sleep(0.5) # Every free slot waits to retry
+                continue
+
+            # Kill the blender sessions which made no progress for too long
+            for worker_id, (process, session_report_path, session_plan_path, session_plan, start_time) in running_sessions.items():
+                # The profiles of the session may render larger timeline batches than the base configuration
+                num_img_per_heartbeat = max(sessionWatchdog.get_num_img_per_heartbeat(
+                    timeline_batch_size = step["parameter_override"].get("timeline_batch_size", parameter.timeline_batch_size),
+                    background_plate_reuse_count = step["parameter_override"].get("background_plate_reuse_count", parameter.background_plate_reuse_count))
+                    for step in session_plan)
+                if process.poll() is None and sessionWatchdog.is_session_hung(session_report_path = session_report_path,
+                                                                              start_time = start_time,
+                                                                              image_timeout_s = parameter.image_timeout_s,
+                                                                              session_startup_timeout_s = parameter.session_startup_timeout_s,
+                                                                              num_img_per_heartbeat = num_img_per_heartbeat):
+                    print(f"Warning!!! blender session {worker_id} made no progress for {parameter.image_timeout_s * num_img_per_heartbeat} seconds, kill it")
+                    sessionWatchdog.kill_session(process = process)
+                    timeout_worker_ids.add(worker_id)
+
+            # Wait for a blender session to exit
+            finished_worker_ids = [worker_id for worker_id, session in running_sessions.items() if session[0].poll() is not None]
+            if len(finished_worker_ids) == 0:
+                time.sleep(0.5)
+                continue
+
+            for worker_id in finished_worker_ids:
+                process, session_report_path, session_plan_path, session_plan, start_time = running_sessions.pop(worker_id)
+                os.remove(session_plan_path)
+                session_time_consume = time.time() - start_time
+                exit_code = exitCode.IMAGE_TIMEOUT if worker_id in timeout_worker_ids else process.returncode
+                timeout_worker_ids.discard(worker_id)
+                profile_num_generated_img = self.__read_session_report(session_report_path = session_report_path,
+                                                                       session_plan = session_plan,
+                                                                       failed = exit_code != exitCode.SUCCESS)
+                num_generated_img = max(sum(profile_num_generated_img.values()), 1)
+                for step in session_plan:
+                    status = self.__profile_status[step["profile"]]
+                    num_img = profile_num_generated_img.get(step["profile"], 0)
+                    status["scheduled"] -= step["num_img"]
+                    status["generated"] += num_img
+                    status["time_consume"] += session_time_consume * num_img / num_generated_img
+
+                if exit_code == exitCode.SUCCESS:
+                    num_consecutive_failure[worker_id] = 0
+                    continue
+                num_consecutive_failure[worker_id] += 1
+                retry_delay = sessionWatchdog.get_retry_delay(num_consecutive_failure = num_consecutive_failure[worker_id],
+                                                              retry_backoff_s = parameter.retry_backoff_s,
+                                                              max_retry_backoff_s = parameter.max_retry_backoff_s)
+                retry_time[worker_id] = time.time() + retry_delay
+                print(f"Warning!!! blender session {worker_id} failed ({exitCode.get_exit_code_name(exit_code)}), retry in {retry_delay:.0f} seconds")
+                if exit_code in exitCode.configuration_errors or num_consecutive_failure[worker_id] >= parameter.max_consecutive_failures:
+                    print(f"ERROR!!! abort the sweep after the failure {exitCode.get_exit_code_name(exit_code)} of blender session {worker_id}")
+                    for running_process, *_ in running_sessions.values():
+                        sessionWatchdog.kill_session(process = running_process)
+                    self.__print_and_save_status(num_blender_process = num_blender_process)
+                    sys.exit(exitCode.RUN_ABORTED)
+
+            self.__print_and_save_status(num_blender_process = num_blender_process)
+
+        print(f"Sweep Of {len(self.__profiles)} Profiles COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    parameter = SDGParameter()
+    scheduler = SweepScheduler()
+    scheduler.sweep_profile_path = parameter.sweep_profile_path
+    scheduler.sweep_output_path = parameter.sweep_output_path
+    scheduler.sweep()
@@ -0,0 +1,275 @@
+# Prevent to create __pycache__ file
+import sys
+sys.dont_write_bytecode = True
+
+import collections
+import glob
+import http.server
+import json
+import os
+import threading
+import time
+
+
+class MetricsExporter:
+    """
+    A class which aggregates the metrics of a generation run in the SDG_400_Looper.py process and serves them on a
+    local HTTP status endpoint, so the throughput of a farm run can be watched while it is running.
+
+    The per-image records (stage times, memory) are read incrementally from the run metrics files written by the
+    blender processes, the sessions (generated images, failures, retries) are reported by the looper and appended to
+    looper_metrics.jsonl. The status is a JSON object with the images per hour of the whole run and of the last hour,
+    the percentiles of the stage times of the last images, the failure and retry counts, the state of each worker, the
+    disk usage of the output folders and an ETA from the exponentially smoothed throughput of the sessions.
+
+    Attributes
+    ----------
+    output_metrics_path (str): The path where the run metrics (JSON lines) are saved.
+    output_folder_paths (list of str): The folders whose disk usage is reported, e.g. the image and label folders.
+    metrics_http_port (int): The local port of the status endpoint, None disables the endpoint.
+    smoothing_factor (float): Weight of the last session in the smoothed throughput.
+    __start_time (float): The starting time of the run, earlier records of the metrics files are ignored.
+    __file_offsets (dict of str: int): The metrics files paired with the position read so far.
+    __img_times (deque of float): The times the images of the last hour were generated.
+    __stage_times (dict of str: deque of float): The stage times of the last 1000 images of each stage.
+    __num_img (int): The quantity of images generated since the start of the run.
+    __num_failed_session (int): The quantity of blender sessions which exited with an error.
+    __num_retry (int): The quantity of restarted blender sessions.
+    __worker_status (dict of str: dict): The last session of each worker.
+    __smoothed_img_per_hour (float): The exponentially smoothed images per hour of one worker.
+    __disk_usage (dict of str: float): The size of each output folder in MB, refreshed at most once a minute.
+    __disk_usage_time (float): The time the disk usage was measured.
+    __lock (threading.Lock): The lock shared by the looper and the endpoint thread.
+    __disk_usage_lock (threading.Lock): The lock of the disk usage, held by one endpoint request while it scans the output folders.
+    __server (http.server.ThreadingHTTPServer): The status endpoint server.
+
+    Methods
+    -------
+    __read_new_records(): Read the image records appended to the run metrics files since the last read.
+    __get_disk_usage(): Get the size of each output folder.
+    __get_percentiles(): Get the 50th, 90th and 99th percentiles of the stage times.
+    record_session(): Record a finished blender session.
+    record_retry(): Record a restarted blender session.
+    get_status(): Get the status of the run.
+    start(): Start the status endpoint in a background thread.
+    stop(): Stop the status endpoint.
+
+    References
+    ----------
+    https://docs.python.org/3/library/http.server.html
+    https://en.wikipedia.org/wiki/Exponential_smoothing
+
+    """
+
+    def __init__(self,
+                 output_metrics_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/metrics",
+                 output_folder_paths = [],
+                 metrics_http_port = 8765,
+                 smoothing_factor = 0.2
+                 ):
+        self.output_metrics_path = output_metrics_path
+        self.output_folder_paths = output_folder_paths
+        self.metrics_http_port = metrics_http_port
+        self.smoothing_factor = smoothing_factor
+        self.__start_time = time.time()
+        self.__file_offsets = {}
+        self.__img_times = collections.deque()
+        self.__stage_times = {}
+        self.__num_img = 0
+        self.__num_failed_session = 0
+        self.__num_retry = 0
+        self.__worker_status = {}
+        self.__smoothed_img_per_hour = None
+        self.__disk_usage = {}
+        self.__disk_usage_time = 0
+        self.__lock = threading.Lock()
+        self.__disk_usage_lock = threading.Lock()
+        self.__server = None
+
+
+    def __read_new_records(self):
+        """Read the image records appended to the run metrics files since the last read."""
+        for metrics_file_path in glob.glob(os.path.join(self.output_metrics_path, "run_metrics*.jsonl")):
+            with open(metrics_file_path) as f:
+                f.seek(self.__file_offsets.get(metrics_file_path, 0))
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break # A line still being written is read next time
+                    self.__file_offsets[metrics_file_path] = f.tell()
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("type") != "worker_resource" or record["time"] < self.__start_time:
+                        continue
+                    self.__num_img += 1
+                    self.__img_times.append(record["time"])
+                    for stage_name, stage_time in (record.get("stage_time") or {}).items():
+                        self.__stage_times.setdefault(stage_name, collections.deque(maxlen = 1000)).append(stage_time)
+
+        while len(self.__img_times) > 0 and self.__img_times[0] < time.time() - 3600:
+            self.__img_times.popleft()
+
+
+    def __get_disk_usage(self):
+        """Get the size of each output folder.
+
+        The output folders may hold millions of files, they are scanned without the lock of the looper.
+
+        Return:
+            disk_usage (dict of str: float): The output folders paired with their size in MB.
+        """
+        with self.__disk_usage_lock:
+            if time.time() - self.__disk_usage_time >= 60:
+                disk_usage = {}
+                for folder_path in self.output_folder_paths:
+                    folder_size = 0
+                    if os.path.isdir(folder_path):
+                        with os.scandir(folder_path) as entries:
+                            folder_size = sum(entry.stat().st_size for entry in entries if entry.is_file())
+                    disk_usage[folder_path] = folder_size / 1024 / 1024
+                self.__disk_usage = disk_usage
+                self.__disk_usage_time = time.time()
+
+            return dict(self.__disk_usage)
+
+
+    def __get_percentiles(self, values):
+        """Get the 50th, 90th and 99th percentiles of the stage times.
+
+        Args:
+            values (deque of float): The stage times.
+
+        Return:
+            percentiles (dict of str: float): The percentiles in seconds.
+        """
+        values = sorted(values)
+
+        return {f"p{p}": values[min(int(len(values) * p / 100), len(values) - 1)] for p in [50, 90, 99]}
+
+
+    def record_session(self, worker_id, num_img, num_generated_img, time_consume, failed = False, exit_code_name = None):
+        """Record a finished blender session.
+
+        Args:
+            worker_id (int): ID of the blender session.
+            num_img (int): The quantity of synthetic images requested from the blender session.
+            num_generated_img (int): The quantity of synthetic images generated by the blender session.
+            time_consume (float): The running time of the blender session in seconds.
+            failed (bool): The blender session exited with an error.
+            exit_code_name (str): The failure class of the exit code of the blender session.
+        """
+        with self.__lock:
+            if failed:
+                self.__num_failed_session += 1
+            if num_generated_img > 0:
+                img_per_hour = num_generated_img / time_consume * 3600
+                if self.__smoothed_img_per_hour is None:
+                    self.__smoothed_img_per_hour = img_per_hour
+                else:
+                    self.__smoothed_img_per_hour += self.smoothing_factor * (img_per_hour - self.__smoothed_img_per_hour)
+            session = {"type": "session",
+                       "time": time.time(),
+                       "worker_id": worker_id,
+                       "num_img": num_img,
+                       "num_generated_img": num_generated_img,
+                       "time_consume": time_consume,
+                       "failed": failed,
+                       "exit_code": exit_code_name}
+            self.__worker_status[str(worker_id)] = session
+
+            os.makedirs(self.output_metrics_path, exist_ok = True)
+            with open(os.path.join(self.output_metrics_path, "looper_metrics.jsonl"), "a") as f:
+                f.write(json.dumps(session) + "\n")
+
+
+    def record_retry(self, worker_id):
+        """Record a restarted blender session.
+
+        Args:
+            worker_id (int): ID of the blender session.
+        """
+        with self.__lock:
+            self.__num_retry += 1
+
+
+    def get_status(self, gen_num = None, num_blender_process = 1):
+        """Get the status of the run.
+
+        Args:
+            gen_num (int): The quantity of synthetic images needed to be generated, None leaves out the ETA.
+            num_blender_process (int): Number of blender sessions running at the same time.
+
+        Return:
+            status (dict): The throughput, stage times, failures, workers, disk usage and ETA of the run.
+        """
+        disk_usage = self.__get_disk_usage()
+        with self.__lock:
+            self.__read_new_records()
+            run_time = time.time() - self.__start_time
+            status = {
+                "run_time": run_time,
+                "num_img": self.__num_img,
+                "img_per_hour": self.__num_img / run_time * 3600 if run_time > 0 else None,
+                "img_per_hour_last_hour": len(self.__img_times) * 3600 / min(run_time, 3600) if run_time > 0 else None,
+                "smoothed_img_per_hour": None if self.__smoothed_img_per_hour is None else self.__smoothed_img_per_hour * num_blender_process,
+                "stage_time": {stage_name: self.__get_percentiles(values) for stage_name, values in self.__stage_times.items()},
+                "num_failed_session": self.__num_failed_session,
+                "num_retry": self.__num_retry,
+                "workers": dict(self.__worker_status),
+                "disk_usage_mb": disk_usage,
+                "eta": None
+            }
+            if gen_num is not None and status["smoothed_img_per_hour"]:
+                status["eta"] = max(gen_num - self.__num_img, 0) / status["smoothed_img_per_hour"] * 3600
+
+        return status
+
+
+    def start(self, gen_num = None, num_blender_process = 1):
+        """Start the status endpoint in a background thread.
+
+        The metrics files of earlier runs are skipped from their current end. If the port is not available, the run
+        continues without the status endpoint.
+
+        Args:
+            gen_num (int): The quantity of synthetic images needed to be generated.
+            num_blender_process (int): Number of blender sessions running at the same time.
+        """
+        self.__start_time = time.time()
+        for metrics_file_path in glob.glob(os.path.join(self.output_metrics_path, "run_metrics*.jsonl")):
+            self.__file_offsets[metrics_file_path] = os.path.getsize(metrics_file_path)
+        if self.metrics_http_port is None:
+            return
+        exporter = self
+
+        class StatusHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(exporter.get_status(gen_num = gen_num, num_blender_process = num_blender_process), indent = 2).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.__server = http.server.ThreadingHTTPServer(("127.0.0.1", self.metrics_http_port), StatusHandler)
+        except OSError as e:
+            # The status endpoint is optional, the metrics files are still written
+            print(f"Warning!!! status endpoint not started on port {self.metrics_http_port}: {e}")
+            self.__server = None
+            return
+        threading.Thread(target = self.__server.serve_forever, daemon = True).start()
+        print(f"Run Status At http://127.0.0.1:{self.metrics_http_port}/")
+
+
+    def stop(self):
+        """Stop the status endpoint."""
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
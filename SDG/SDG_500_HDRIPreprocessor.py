@@ -0,0 +1,114 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import bpy
+from glob import glob
+from SDG_200_SDGParameter import SDGParameter
+
+
+class HDRIPreprocessor:
+    """
+    A class which converts the downloaded Poly Haven HDRIs once into size-capped half float OpenEXR files, which
+    LightRandomizer loads instead of the full resolution files.
+
+    A smaller environment image is faster to load, uses less memory and makes Cycles build the world importance map
+    faster. The converted files are named <hdri name>_<max resolution>.exr, a file is only converted again when the
+    source HDRI is newer than its cached version.
+
+    Run it in blender: blender --background --python SDG_500_HDRIPreprocessor.py
+
+    Attributes
+    ----------
+    asset_hdri_lighting_folder_path (str): The path to the downloaded Poly Haven HDRIs.
+    asset_hdri_cache_folder_path (str): The path where the converted HDRIs will be saved.
+    hdri_cache_max_resolution (int): The maximum width of the converted HDRIs, the height keeps the aspect ratio.
+
+    Methods
+    -------
+    __get_cache_path(): Get the path of the converted version of a HDRI.
+    __convert_hdri(): Scale down a HDRI and save it as a half float OpenEXR file.
+    preprocess(): Convert every HDRI which has no up-to-date converted version.
+
+    References
+    ----------
+    https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.scale
+    https://docs.blender.org/api/current/bpy.types.ImageFormatSettings.html
+
+    """
+
+    def __init__(self,
+                asset_hdri_lighting_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/HDRI",
+                asset_hdri_cache_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/HDRI_cache",
+                hdri_cache_max_resolution = 2048
+                ):
+        self.asset_hdri_lighting_folder_path = asset_hdri_lighting_folder_path
+        self.asset_hdri_cache_folder_path = asset_hdri_cache_folder_path
+        self.hdri_cache_max_resolution = hdri_cache_max_resolution
+
+
+    def __get_cache_path(self, hdri_path):
+        """Get the path of the converted version of a HDRI.
+
+        Args:
+            hdri_path (str): The path of the source HDRI.
+
+        Return:
+            cache_path (str): The path of the converted HDRI.
+        """
+        hdri_name = os.path.splitext(os.path.basename(hdri_path))[0]
+
+        return os.path.join(self.asset_hdri_cache_folder_path, f"{hdri_name}_{self.hdri_cache_max_resolution}.exr")
+
+
+    def __convert_hdri(self, hdri_path, cache_path):
+        """Scale down a HDRI and save it as a half float OpenEXR file.
+
+        Args:
+            hdri_path (str): The path of the source HDRI.
+            cache_path (str): The path of the converted HDRI.
+        """
+        image = bpy.data.images.load(hdri_path)
+        width, height = image.size
+        if width > self.hdri_cache_max_resolution:
+            image.scale(self.hdri_cache_max_resolution, max(round(height * self.hdri_cache_max_resolution / width), 1))
+
+        image_settings = bpy.context.scene.render.image_settings
+        image_settings.file_format = "OPEN_EXR"
+        image_settings.color_depth = "16" # Half float
+        image_settings.exr_codec = "ZIP"
+        image.save_render(cache_path, scene = bpy.context.scene)
+        print(f"{os.path.basename(hdri_path)}: {width}x{height} -> {image.size[0]}x{image.size[1]}")
+        bpy.data.images.remove(image)
+
+
+    def preprocess(self):
+        """Convert every HDRI which has no up-to-date converted version."""
+        os.makedirs(self.asset_hdri_cache_folder_path, exist_ok = True)
+        hdri_path_list = glob(os.path.join(self.asset_hdri_lighting_folder_path, "*.exr")) + \
+                         glob(os.path.join(self.asset_hdri_lighting_folder_path, "*.hdr"))
+
+        num_converted = 0
+        for hdri_path in hdri_path_list:
+            cache_path = self.__get_cache_path(hdri_path = hdri_path)
+            if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(hdri_path):
+                continue
+            self.__convert_hdri(hdri_path = hdri_path, cache_path = cache_path)
+            num_converted += 1
+
+        print(f"Converted {num_converted} HDRIs, {len(hdri_path_list) - num_converted} HDRIs were up to date")
+        print("HDRI Preprocess COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    parameter = SDGParameter()
+    preprocessor = HDRIPreprocessor()
+    preprocessor.asset_hdri_lighting_folder_path = parameter.asset_hdri_lighting_folder_path
+    preprocessor.asset_hdri_cache_folder_path = parameter.asset_hdri_cache_folder_path
+    preprocessor.hdri_cache_max_resolution = parameter.hdri_cache_max_resolution
+    preprocessor.preprocess()
@@ -0,0 +1,124 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import bpy
+from glob import glob
+from SDG_200_SDGParameter import SDGParameter
+from util import textureLOD
+
+
+class TextureLODBuilder:
+    """
+    A class which writes the 1K, 512 and 256 level of detail (LOD) tiers of the ambientCG PBR texture maps and of the
+    simple image textures, which TextureRandomizer and SimpleTextureRandomizer select by projected screen size.
+
+    The ambientCG tiers are saved next to the 2K maps, named like the maps ambientCG provides (<asset>_1K_Color.jpg).
+    The image texture tiers are saved in the "lod" sub folder. A tier is only written again when its source is newer.
+
+    Run it in blender: blender --background --python SDG_510_TextureLODBuilder.py
+
+    Attributes
+    ----------
+    asset_ambientCGMaterial_folder_path (str): The path to the downloaded ambientCG PBR materials.
+    asset_img_texture_path (str): The path to the image textures of SimpleTextureRandomizer, None skips them.
+
+    Methods
+    -------
+    __get_source_image_paths(): Get the full size texture maps.
+    __build_tiers(): Write the smaller tiers of a texture map.
+    build(): Write the missing or outdated tiers of every texture map.
+
+    References
+    ----------
+    https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.scale
+    https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.save
+
+    """
+
+    def __init__(self,
+                asset_ambientCGMaterial_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/pbr_texture",
+                asset_img_texture_path = None
+                ):
+        self.asset_ambientCGMaterial_folder_path = asset_ambientCGMaterial_folder_path
+        self.asset_img_texture_path = asset_img_texture_path
+
+
+    def __get_source_image_paths(self):
+        """Get the full size texture maps.
+
+        Return:
+            source_image_path_list (list of str): The paths of the 2K ambientCG maps and of the image textures.
+        """
+        source_image_path_list = glob(os.path.join(self.asset_ambientCGMaterial_folder_path, "*", "*_2K_*.jpg")) + \
+                                 glob(os.path.join(self.asset_ambientCGMaterial_folder_path, "*", "*_2K_*.png"))
+        if self.asset_img_texture_path is not None:
+            source_image_path_list += glob(os.path.join(self.asset_img_texture_path, "*.jpg")) + \
+                                      glob(os.path.join(self.asset_img_texture_path, "*.png"))
+
+        return source_image_path_list
+
+
+    def __build_tiers(self, source_image_path):
+        """Write the smaller tiers of a texture map.
+
+        Image.save writes the pixels as they are, without the view transform of the scene, so the non-color maps keep their values.
+
+        Args:
+            source_image_path (str): The path of the full size texture map.
+
+        Return:
+            num_written (int): The quantity of tiers written.
+        """
+        num_written = 0
+        image = None
+        for tier_size in textureLOD.texture_tiers:
+            if tier_size == max(textureLOD.texture_tiers):
+                continue
+            tier_path = textureLOD.get_tier_file_path(source_image_path, tier_size)
+            if os.path.exists(tier_path) and os.path.getmtime(tier_path) >= os.path.getmtime(source_image_path):
+                continue
+
+            if image is None:
+                image = bpy.data.images.load(source_image_path)
+                width, height = image.size
+            if width <= tier_size:
+                continue
+            tier_image = image.copy()
+            tier_image.scale(tier_size, max(round(height * tier_size / width), 1))
+            os.makedirs(os.path.dirname(tier_path), exist_ok = True)
+            tier_image.filepath_raw = tier_path
+            tier_image.file_format = "PNG" if tier_path.lower().endswith(".png") else "JPEG"
+            tier_image.save()
+            bpy.data.images.remove(tier_image)
+            num_written += 1
+
+        if image is not None:
+            bpy.data.images.remove(image)
+
+        return num_written
+
+
+    def build(self):
+        """Write the missing or outdated tiers of every texture map."""
+        source_image_path_list = self.__get_source_image_paths()
+        num_written = 0
+        for i, source_image_path in enumerate(source_image_path_list):
+            num_written += self.__build_tiers(source_image_path = source_image_path)
+            if (i + 1) % 100 == 0:
+                print(f"Processed {i + 1}/{len(source_image_path_list)} Texture Maps")
+
+        print(f"Wrote {num_written} texture tiers of {len(source_image_path_list)} texture maps")
+        print("Texture LOD Build COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    parameter = SDGParameter()
+    builder = TextureLODBuilder()
+    builder.asset_ambientCGMaterial_folder_path = parameter.asset_ambientCGMaterial_folder_path
+    builder.build()
@@ -0,0 +1,214 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import bpy
+import numpy as np
+from glob import glob
+from SDG_200_SDGParameter import SDGParameter
+from util import assetPack
+
+
+class AssetPacker:
+    """
+    A class which extracts the meshes of the foreground, background and occlusion object assets once into an asset pack,
+    from which the placement randomizers build the objects with foreach_set instead of parsing a .blend file per object.
+
+    The vertex coordinates, loop vertex indices, polygon loop starts and sizes, material indices, smooth flags, UV maps
+    and custom normals of each object are written to one memory-mappable pack file (util/assetPack.py), the materials
+    of the objects to a material library (.blend) next to the pack, with absolute image paths. Only the assets made of
+    mesh objects without parent, modifiers and object linked materials are packed, the other assets are always loaded from their .blend file.
+    A pack is only written again when an asset file or the asset list changed since the last pack.
+
+    Run it in blender: blender --background --python SDG_520_AssetPacker.py
+
+    Attributes
+    ----------
+    asset_folder_path_list (list of str): The paths to the object asset folders.
+    asset_pack_path (str): The path where the asset pack will be saved.
+
+    Methods
+    -------
+    __get_asset_path_list(): Get the .blend files of the asset folders.
+    __is_pack_up_to_date(): Check the existing pack was written from the current asset files.
+    __extract_object(): Extract the mesh arrays, transform and material names of an object.
+    __extract_asset(): Load an asset file and extract its objects.
+    pack(): Write the asset pack and its material library.
+
+    References
+    ----------
+    https://docs.blender.org/api/current/bpy.types.Mesh.html
+    https://docs.blender.org/api/current/bpy.types.BlendDataLibraries.html#bpy.types.BlendDataLibraries.write
+    https://numpy.org/doc/stable/reference/generated/numpy.memmap.html
+
+    """
+
+    def __init__(self,
+                asset_folder_path_list = ["C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/foreground_object",
+                                          "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/background_occluder_object"],
+                asset_pack_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/asset_pack.sdgpack"
+                ):
+        self.asset_folder_path_list = asset_folder_path_list
+        self.asset_pack_path = asset_pack_path
+
+
+    def __get_asset_path_list(self):
+        """Get the .blend files of the asset folders.
+
+        Return:
+            asset_path_list (list of str): The paths of the asset files, each file once.
+        """
+        asset_paths = {}
+        for asset_folder_path in self.asset_folder_path_list:
+            for asset_path in glob(os.path.join(asset_folder_path, "*.blend")):
+                asset_paths[assetPack.get_asset_key(asset_path)] = asset_path
+
+        return [asset_paths[asset_key] for asset_key in sorted(asset_paths)]
+
+
+    def __is_pack_up_to_date(self, asset_path_list):
+        """Check the existing pack was written from the current asset files.
+
+        Args:
+            asset_path_list (list of str): The paths of the asset files.
+
+        Return:
+            up_to_date (bool): True if the pack has the same assets, with the same size and modification time.
+        """
+        if not os.path.exists(self.asset_pack_path) or not os.path.exists(assetPack.get_material_library_path(self.asset_pack_path)):
+            return False
+        index = assetPack.read_index(self.asset_pack_path)[0]
+        if index is None:
+            return False
+        packed_keys = set(index["assets"]) | set(index["skipped_assets"])
+        if packed_keys != set(assetPack.get_asset_key(asset_path) for asset_path in asset_path_list):
+            return False
+        for asset_path in asset_path_list:
+            asset_key = assetPack.get_asset_key(asset_path)
+            stamp = index["assets"].get(asset_key) or index["skipped_assets"][asset_key]
+            stat = os.stat(asset_path)
+            if stat.st_size != stamp["size"] or stat.st_mtime_ns != stamp["mtime_ns"]:
+                return False
+
+        return True
+
+
+    def __extract_object(self, obj):
+        """Extract the mesh arrays, transform and material names of an object.
+
+        Args:
+            obj (bpy.types.Object): The mesh object.
+
+        Return:
+            packed_object (dict of str: object): The "name", "transform", "materials" and "arrays" of the object.
+        """
+        mesh = obj.data
+        num_vertex, num_loop, num_polygon = len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+        arrays = {"co": np.empty(num_vertex * 3, dtype = np.float32),
+                  "loop_vertex_index": np.empty(num_loop, dtype = np.int32),
+                  "loop_start": np.empty(num_polygon, dtype = np.int32),
+                  "loop_total": np.empty(num_polygon, dtype = np.int32),
+                  "material_index": np.empty(num_polygon, dtype = np.int32),
+                  "use_smooth": np.empty(num_polygon, dtype = bool)}
+        mesh.vertices.foreach_get("co", arrays["co"])
+        mesh.loops.foreach_get("vertex_index", arrays["loop_vertex_index"])
+        mesh.polygons.foreach_get("loop_start", arrays["loop_start"])
+        mesh.polygons.foreach_get("loop_total", arrays["loop_total"])
+        mesh.polygons.foreach_get("material_index", arrays["material_index"])
+        mesh.polygons.foreach_get("use_smooth", arrays["use_smooth"])
+        for uv_layer in mesh.uv_layers:
+            uv = np.empty(num_loop * 2, dtype = np.float32)
+            uv_layer.data.foreach_get("uv", uv)
+            arrays["uv:" + uv_layer.name] = uv
+        if mesh.has_custom_normals:
+            normals = np.empty(num_loop * 3, dtype = np.float32)
+            if bpy.app.version < (4, 1, 0):
+                mesh.calc_normals_split()
+                mesh.loops.foreach_get("normal", normals)
+            else:
+                mesh.corner_normals.foreach_get("vector", normals)
+            arrays["normals"] = normals
+
+        return {"name": obj.name,
+                "transform": {"rotation_mode": obj.rotation_mode,
+                              "location": list(obj.location),
+                              "rotation_euler": list(obj.rotation_euler),
+                              "scale": list(obj.scale)},
+                "materials": [material.name if material is not None else None for material in mesh.materials],
+                "arrays": arrays}
+
+
+    def __extract_asset(self, asset_path, materials):
+        """Load an asset file and extract its objects.
+
+        Args:
+            asset_path (str): The path of the asset file.
+            materials (set of bpy.types.Material): The materials of the packed objects, the materials of the asset are added.
+
+        Return:
+            packed_objects (list of dict): The extracted objects, None if the asset can not be packed.
+        """
+        with bpy.data.libraries.load(asset_path, link = False, assets_only = True) as (data_from, data_to):
+            data_to.objects = data_from.objects
+        objects = [obj for obj in data_to.objects if obj is not None]
+
+        packed_objects = None
+        if len(objects) > 0 and all(obj.type == "MESH" and obj.parent is None and len(obj.modifiers) == 0 and
+                                    all(slot.link == "DATA" for slot in obj.material_slots) for obj in objects):
+            packed_objects = [self.__extract_object(obj) for obj in objects]
+            for obj in objects:
+                materials.update(material for material in obj.data.materials if material is not None)
+
+        # The meshes and materials stay in the file until the material library is written
+        for obj in objects:
+            bpy.data.objects.remove(obj, do_unlink = True)
+
+        return packed_objects
+
+
+    def pack(self):
+        """Write the asset pack and its material library."""
+        asset_path_list = self.__get_asset_path_list()
+        if self.__is_pack_up_to_date(asset_path_list = asset_path_list):
+            print(f"Asset pack {self.asset_pack_path} is up to date")
+            print("Asset Pack COMPLERED !!!")
+            return
+
+        assets = {}
+        skipped_assets = {}
+        materials = set()
+        for i, asset_path in enumerate(asset_path_list):
+            asset_key = assetPack.get_asset_key(asset_path)
+            stamp = assetPack.get_file_stamp(asset_path)
+            packed_objects = self.__extract_asset(asset_path = asset_path, materials = materials)
+            if packed_objects is None:
+                print(f"Warning!!! {asset_path} has objects other than meshes without parent, modifiers and object linked materials, it is not packed")
+                skipped_assets[asset_key] = stamp
+            else:
+                assets[asset_key] = {"stamp": stamp, "objects": packed_objects}
+            if (i + 1) % 10 == 0:
+                print(f"Extracted {i + 1}/{len(asset_path_list)} Assets")
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.asset_pack_path)), exist_ok = True)
+        bpy.data.libraries.write(assetPack.get_material_library_path(self.asset_pack_path), materials,
+                                 path_remap = "ABSOLUTE", fake_user = True)
+        version_hash = assetPack.write_pack(pack_path = self.asset_pack_path, assets = assets, skipped_assets = skipped_assets)
+
+        print("Packed {} assets ({} skipped) and {} materials, version {}".format(len(assets), len(skipped_assets), len(materials), version_hash[:12]))
+        print("Asset Pack COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    parameter = SDGParameter()
+    packer = AssetPacker()
+    packer.asset_folder_path_list = [parameter.asset_foreground_object_folder_path,
+                                     parameter.asset_background_object_folder_path,
+                                     parameter.asset_occluder_folder_path]
+    if parameter.asset_pack_path is not None:
+        packer.asset_pack_path = parameter.asset_pack_path
+    packer.pack()
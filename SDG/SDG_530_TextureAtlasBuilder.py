@@ -0,0 +1,162 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import bpy
+import numpy as np
+from glob import glob
+from util import textureAtlas
+
+
+class TextureAtlasBuilder:
+    """
+    A class which packs the image textures of SimpleTextureRandomizer into a few large texture atlases and writes the
+    lookup table of their tiles (util/textureAtlas.py).
+
+    Each image is scaled to a square tile, the UV maps of the objects cover the whole image so the image is stretched
+    over the object in the same way. The border of each tile repeats its edge pixels over tile_padding pixels, so the
+    linear interpolation at the edge of a tile does not bleed into the next tile. The atlases are only written again
+    when an image texture was added, removed or modified since the last build.
+
+    Run it in blender: blender --background --python SDG_530_TextureAtlasBuilder.py
+
+    Attributes
+    ----------
+    asset_img_texture_path (str): The path to the image textures of SimpleTextureRandomizer.
+    texture_atlas_folder_path (str): The path where the atlases and their lookup table will be saved.
+    atlas_size (int): The width and height of an atlas in pixels.
+    tile_size (int): The width and height of a tile in pixels, with its padding.
+    tile_padding (int): Number of edge pixels repeated around the image of a tile.
+
+    Methods
+    -------
+    __get_source_stamps(): Get the image textures and their modification times.
+    __load_tile(): Load an image texture scaled and padded to a tile.
+    __save_atlas(): Save the pixels of an atlas.
+    build(): Write the atlases and the lookup table.
+
+    References
+    ----------
+    https://en.wikipedia.org/wiki/Texture_atlas
+    https://docs.blender.org/manual/en/latest/render/shader_nodes/input/attribute.html
+    https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.scale
+
+    """
+
+    def __init__(self,
+                asset_img_texture_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/img_texture",
+                texture_atlas_folder_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/Assets/img_texture_atlas",
+                atlas_size = 4096,
+                tile_size = 256,
+                tile_padding = 4
+                ):
+        self.asset_img_texture_path = asset_img_texture_path
+        self.texture_atlas_folder_path = texture_atlas_folder_path
+        self.atlas_size = atlas_size
+        self.tile_size = tile_size
+        self.tile_padding = tile_padding
+
+
+    def __get_source_stamps(self):
+        """Get the image textures and their modification times.
+
+        Return:
+            source_stamps (dict of str: float): The file names of the image textures paired with their modification time.
+        """
+        source_path_list = glob(os.path.join(self.asset_img_texture_path, "*.jpg")) + \
+                           glob(os.path.join(self.asset_img_texture_path, "*.png"))
+
+        return {os.path.basename(source_path): os.path.getmtime(source_path) for source_path in sorted(source_path_list)}
+
+
+    def __load_tile(self, source_path):
+        """Load an image texture scaled and padded to a tile.
+
+        Args:
+            source_path (str): The path of the image texture.
+
+        Return:
+            tile (numpy.ndarray): The (tile_size, tile_size, 4) RGBA pixels of the tile, the first row is the bottom.
+        """
+        inner_size = self.tile_size - 2 * self.tile_padding
+        image = bpy.data.images.load(source_path)
+        image.scale(inner_size, inner_size)
+        num_channel = image.channels
+        pixels = np.empty(inner_size * inner_size * num_channel, dtype = np.float32)
+        image.pixels.foreach_get(pixels)
+        bpy.data.images.remove(image)
+
+        pixels = pixels.reshape(inner_size, inner_size, num_channel)
+        tile = np.ones((inner_size, inner_size, 4), dtype = np.float32)
+        if num_channel < 3:
+            tile[:, :, :3] = pixels[:, :, :1]
+        else:
+            tile[:, :, :3] = pixels[:, :, :3]
+
+        return np.pad(tile, ((self.tile_padding, self.tile_padding), (self.tile_padding, self.tile_padding), (0, 0)), mode = "edge")
+
+
+    def __save_atlas(self, atlas_pixels, atlas_path):
+        """Save the pixels of an atlas.
+
+        Args:
+            atlas_pixels (numpy.ndarray): The (atlas_size, atlas_size, 4) RGBA pixels, the first row is the bottom.
+            atlas_path (str): The path where the atlas (PNG) will be saved.
+        """
+        image = bpy.data.images.new(os.path.basename(atlas_path), width = self.atlas_size, height = self.atlas_size)
+        image.pixels.foreach_set(atlas_pixels.ravel())
+        image.filepath_raw = atlas_path
+        image.file_format = "PNG"
+        image.save()
+        bpy.data.images.remove(image)
+
+
+    def build(self):
+        """Write the atlases and the lookup table."""
+        source_stamps = self.__get_source_stamps()
+        lookup_table = textureAtlas.read_lookup_table(self.texture_atlas_folder_path)
+        if lookup_table is not None and lookup_table["source_stamps"] == source_stamps and \
+                [lookup_table["atlas_size"], lookup_table["tile_size"], lookup_table["tile_padding"]] == \
+                [self.atlas_size, self.tile_size, self.tile_padding]:
+            print(f"Texture atlases in {self.texture_atlas_folder_path} are up to date")
+            print("Texture Atlas Build COMPLERED !!!")
+            return
+
+        os.makedirs(self.texture_atlas_folder_path, exist_ok = True)
+        num_tile_per_row = self.atlas_size // self.tile_size
+        num_tile_per_atlas = num_tile_per_row * num_tile_per_row
+        source_name_list = list(source_stamps)
+        atlases = []
+        for atlas_index, first_tile in enumerate(range(0, len(source_name_list), num_tile_per_atlas)):
+            atlas_pixels = np.zeros((self.atlas_size, self.atlas_size, 4), dtype = np.float32)
+            tiles = []
+            for i, source_name in enumerate(source_name_list[first_tile:first_tile + num_tile_per_atlas]):
+                row, column = divmod(i, num_tile_per_row)
+                y, x = row * self.tile_size, column * self.tile_size
+                atlas_pixels[y:y + self.tile_size, x:x + self.tile_size] = self.__load_tile(os.path.join(self.asset_img_texture_path, source_name))
+                tiles.append({"source": source_name,
+                              "offset": [(x + self.tile_padding) / self.atlas_size, (y + self.tile_padding) / self.atlas_size]})
+
+            atlas_file_name = "texture_atlas_{:03d}.png".format(atlas_index)
+            self.__save_atlas(atlas_pixels = atlas_pixels, atlas_path = os.path.join(self.texture_atlas_folder_path, atlas_file_name))
+            atlases.append({"file_name": atlas_file_name, "tiles": tiles})
+            print(f"Packed {first_tile + len(tiles)}/{len(source_name_list)} Image Textures")
+
+        textureAtlas.write_lookup_table(self.texture_atlas_folder_path, {"atlas_size": self.atlas_size,
+                                                                         "tile_size": self.tile_size,
+                                                                         "tile_padding": self.tile_padding,
+                                                                         "source_stamps": source_stamps,
+                                                                         "atlases": atlases})
+
+        print(f"Wrote {len(atlases)} texture atlases of {len(source_name_list)} image textures")
+        print("Texture Atlas Build COMPLERED !!!")
+
+
+if __name__ == '__main__':
+    builder = TextureAtlasBuilder()
+    builder.build()
@@ -0,0 +1,248 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.abspath(__file__))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+# Prevent to create __pycache__ file
+sys.dont_write_bytecode = True
+
+import hashlib
+import json
+import multiprocessing
+import struct
+import time
+from SDG_200_SDGParameter import SDGParameter
+
+
+_png_signature = b"\x89PNG\r\n\x1a\n"
+_png_end_chunk = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+
+def _validate_pair(task):
+    """Check one image and its label file, run in the worker processes.
+
+    Args:
+        task (tuple): The image ID, the image path (None if missing), the label path (None if missing) and the number of classes.
+
+    Return:
+        record (dict): The index record of the image: its sizes, label count, checksum and errors.
+    """
+    img_id, img_path, label_path, num_class = task
+    record = {"img_id": img_id, "width": None, "height": None, "num_label": None, "sha1": None, "errors": []}
+    data = None
+    if img_path is None:
+        record["errors"].append("missing image")
+    else:
+        # The dataset may still grow, a file removed or replaced since it was listed is an error of this pass, the
+        # record keeps no modification time so the next incremental pass checks it again
+        try:
+            img_mtime = os.path.getmtime(img_path)
+            with open(img_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            record["errors"].append(f"can not read image: {e.strerror}")
+        else:
+            record["img_mtime"] = img_mtime
+    if data is not None:
+        record["sha1"] = hashlib.sha1(data).hexdigest()
+        # PNG signature, IHDR chunk with the image size, and IEND chunk at the end of a complete file
+        if data[:8] != _png_signature or data[12:16] != b"IHDR":
+            record["errors"].append("not a png image")
+        else:
+            record["width"], record["height"] = struct.unpack(">II", data[16:24])
+            if not data.endswith(_png_end_chunk):
+                record["errors"].append("truncated png image")
+
+    if label_path is None:
+        record["errors"].append("missing label")
+        return record
+    try:
+        label_mtime = os.path.getmtime(label_path)
+        with open(label_path) as f:
+            rows = [row for row in f.read().split("\n") if row.strip() != ""]
+    except OSError as e:
+        record["errors"].append(f"can not read label: {e.strerror}")
+        return record
+    record["label_mtime"] = label_mtime
+    record["num_label"] = len(rows)
+    for row_index, row in enumerate(rows):
+        values = row.split()
+        try:
+            class_id = int(values[0])
+            cx, cy, width, height = [float(value) for value in values[1:]]
+        except (ValueError, IndexError):
+            record["errors"].append(f"row {row_index}: not a yolo label")
+            continue
+        if len(values) != 5:
+            record["errors"].append(f"row {row_index}: not a yolo label")
+        elif not 0 <= class_id < num_class:
+            record["errors"].append(f"row {row_index}: class id {class_id} out of range")
+        elif not (0 < width <= 1 and 0 < height <= 1 and
+                  cx - width / 2 >= -1e-6 and cx + width / 2 <= 1 + 1e-6 and
+                  cy - height / 2 >= -1e-6 and cy + height / 2 <= 1 + 1e-6):
+            record["errors"].append(f"row {row_index}: box out of the image")
+
+    return record
+
+
+class DatasetValidator:
+    """
+    A class which checks the generated dataset and writes an index of it, which training pipelines can read instead of
+    scanning every file again.
+
+    Each PNG image of output_img_path must have a YOLO label file of the same name in output_label_path, the image must
+    have a valid PNG header and end chunk, and each label row must have a class id in range and a box inside the image.
+    The index (JSON lines) has one record per image with its size, number of labels, SHA-1 checksum and errors. The
+    checks run in a process pool. In incremental mode, only the images and labels which are new or modified since
+    they were indexed are checked and their records are appended, the last record of an image is the valid one.
+
+    Run it with python: python SDG_600_DatasetValidator.py [--full]
+
+    Attributes
+    ----------
+    output_img_path (str): The path where rendered images are saved.
+    output_label_path (str): The path where YOLO format bounding box annotations are saved.
+    dataset_index_path (str): The path of the dataset index (JSON lines).
+    num_class (int): Number of yolo classes, the class ids must be in [0, num_class).
+    num_validator_process (int): Number of worker processes, 0 uses the number of CPUs.
+    incremental (bool): Only check the files new or modified since the last index.
+
+    Methods
+    -------
+    __load_index(): Load the last record of each image of the dataset index.
+    __list_files(): List the files of a folder with their modification time.
+    __get_tasks(): Pair the images with their labels and keep the pairs which need a check.
+    validate(): Check the dataset and update the dataset index.
+
+    References
+    ----------
+    http://www.libpng.org/pub/png/spec/1.2/PNG-Structure.html
+    https://docs.python.org/3/library/multiprocessing.html#multiprocessing.pool.Pool.imap_unordered
+
+    """
+
+    def __init__(self,
+                 output_img_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/images",
+                 output_label_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/labels",
+                 dataset_index_path = "C:/Users/user/Documents/project/Synthetic-Data-Generator-for-Retail-Products-Detection/gen_data/dataset_index.jsonl",
+                 num_class = 63,
+                 num_validator_process = 0,
+                 incremental = True
+                 ):
+        self.output_img_path = output_img_path
+        self.output_label_path = output_label_path
+        self.dataset_index_path = dataset_index_path
+        self.num_class = num_class
+        self.num_validator_process = num_validator_process
+        self.incremental = incremental
+
+
+    def __load_index(self):
+        """Load the last record of each image of the dataset index.
+
+        Return:
+            index (dict of str: dict): The image IDs paired with their last index record.
+        """
+        index = {}
+        if not os.path.exists(self.dataset_index_path):
+            return index
+        with open(self.dataset_index_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # A line cut by an interrupted run
+                index[record["img_id"]] = record
+
+        return index
+
+
+    def __list_files(self, folder_path, extension):
+        """List the files of a folder with their modification time.
+
+        Args:
+            folder_path (str): The folder.
+            extension (str): The extension of the files, e.g. ".png".
+
+        Return:
+            files (dict of str: tuple): The file names without extension paired with their path and modification time.
+        """
+        files = {}
+        if not os.path.isdir(folder_path):
+            return files
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(extension):
+                    files[entry.name[:-len(extension)]] = (entry.path, entry.stat().st_mtime)
+
+        return files
+
+
+    def __get_tasks(self, index):
+        """Pair the images with their labels and keep the pairs which need a check.
+
+        Args:
+            index (dict of str: dict): The image IDs paired with their last index record.
+
+        Return:
+            tasks (list of tuple): The image ID, image path, label path and number of classes of each pair to check.
+            img_ids (set of str): The IDs of the images or labels in the output folders.
+        """
+        img_files = self.__list_files(folder_path = self.output_img_path, extension = ".png")
+        label_files = self.__list_files(folder_path = self.output_label_path, extension = ".txt")
+
+        tasks = []
+        img_ids = set(img_files) | set(label_files)
+        for img_id in sorted(img_ids):
+            img_path, img_mtime = img_files.get(img_id, (None, None))
+            label_path, label_mtime = label_files.get(img_id, (None, None))
+            record = index.get(img_id)
+            if self.incremental and record is not None and \
+               record.get("img_mtime") == img_mtime and record.get("label_mtime") == label_mtime:
+                continue
+            tasks.append((img_id, img_path, label_path, self.num_class))
+
+        return tasks, img_ids
+
+
+    def validate(self):
+        """Check the dataset and update the dataset index.
+
+        Return:
+            num_invalid (int): Number of images or labels with errors in the whole index.
+        """
+        start_time = time.time()
+        index = self.__load_index() if self.incremental else {}
+        tasks, img_ids = self.__get_tasks(index = index)
+        print(f"Check {len(tasks)} Images, {len(index)} Images Already Indexed")
+
+        num_process = self.num_validator_process if self.num_validator_process > 0 else os.cpu_count()
+        os.makedirs(os.path.dirname(os.path.abspath(self.dataset_index_path)), exist_ok = True)
+        with open(self.dataset_index_path, "a" if self.incremental else "w") as f, \
+             multiprocessing.Pool(processes = num_process) as pool:
+            for i, record in enumerate(pool.imap_unordered(_validate_pair, tasks, chunksize = 64)):
+                index[record["img_id"]] = record
+                f.write(json.dumps(record) + "\n")
+                for error in record["errors"]:
+                    print(f"Warning!!! {record['img_id']}: {error}")
+                if (i + 1) % 10000 == 0:
+                    print(f"Checked {i + 1}/{len(tasks)} Images")
+
+        num_removed = len(set(index) - img_ids)
+        num_invalid = sum(1 for img_id, record in index.items() if img_id in img_ids and len(record["errors"]) > 0)
+        print(f"{len(index) - num_removed} Images Indexed, {num_invalid} Invalid, {num_removed} Removed Since Indexed, Time: {time.time() - start_time:.1f} Seconds")
+        print("Dataset Validation COMPLERED !!!")
+
+        return num_invalid
+
+
+if __name__ == '__main__':
+    parameter = SDGParameter()
+    validator = DatasetValidator()
+    validator.output_img_path = parameter.output_img_path
+    validator.output_label_path = parameter.output_label_path
+    validator.dataset_index_path = parameter.dataset_index_path
+    validator.num_validator_process = parameter.num_validator_process
+    validator.incremental = "--full" not in sys.argv
+    validator.validate()
@@ -0,0 +1,88 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import bpy
+import random
+import time
+from glob import glob
+from SDG_200_SDGParameter import SDGParameter
+from SDG_520_AssetPacker import AssetPacker
+from util import assetLoader
+
+
+"""
+Compare the time to load the object assets from their .blend files with the time to build them from the asset pack of
+SDG_520_AssetPacker.py, for the foreground, background and occlusion object assets of SDG_200_SDGParameter.py.
+
+The pack is written first if it is missing or out of date. Run it in blender:
+blender --background --python SDG/benchmark/assetPackBenchmark.py
+"""
+
+
+num_asset_list = [10, 50, 200]
+num_repeat = 3
+
+
+def time_loading(asset_path_list, collection, asset_pack_path):
+    """Load the assets into a collection and remove them again.
+
+    Args:
+        asset_path_list (list of str): The paths of the asset files.
+        collection (bpy.types.Collection): The collection the loaded objects are linked to.
+        asset_pack_path (str): The path of the asset pack, None loads the .blend files.
+
+    Return:
+        load_time (float): The time to load all assets in seconds.
+    """
+    start_time = time.perf_counter()
+    objects = []
+    for asset_path in asset_path_list:
+        objects += assetLoader.load_object(filepath = asset_path, collection = collection, asset_pack_path = asset_pack_path)
+    load_time = time.perf_counter() - start_time
+
+    for obj in objects:
+        mesh = obj.data
+        bpy.data.objects.remove(obj, do_unlink = True)
+        if mesh is not None and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+    return load_time
+
+
+def benchmark():
+    """Print the load time per asset of the .blend files and of the asset pack for each number of assets."""
+    parameter = SDGParameter()
+    asset_folder_path_list = [parameter.asset_foreground_object_folder_path,
+                              parameter.asset_background_object_folder_path,
+                              parameter.asset_occluder_folder_path]
+    packer = AssetPacker(asset_folder_path_list = asset_folder_path_list)
+    if parameter.asset_pack_path is not None:
+        packer.asset_pack_path = parameter.asset_pack_path
+    packer.pack()
+
+    asset_path_list = []
+    for asset_folder_path in asset_folder_path_list:
+        asset_path_list += glob(os.path.join(asset_folder_path, "*.blend"))
+    collection = bpy.data.collections.new("AssetPackBenchmarkCollection")
+    bpy.data.scenes["Scene"].collection.children.link(collection)
+
+    # Warm up the material library and the memory map of the pack
+    time_loading(asset_path_list = asset_path_list[:1], collection = collection, asset_pack_path = packer.asset_pack_path)
+
+    print("num_asset, blend_ms_per_asset, pack_ms_per_asset, speedup")
+    for num_asset in num_asset_list:
+        sampled_asset_path_list = random.choices(asset_path_list, k = num_asset)
+        blend_time = min(time_loading(asset_path_list = sampled_asset_path_list, collection = collection, asset_pack_path = None)
+                         for i in range(num_repeat)) / num_asset
+        pack_time = min(time_loading(asset_path_list = sampled_asset_path_list, collection = collection, asset_pack_path = packer.asset_pack_path)
+                        for i in range(num_repeat)) / num_asset
+        print("{}, {:.2f}, {:.2f}, {:.2f}x".format(num_asset, blend_time * 1000, pack_time * 1000, blend_time / pack_time))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,1622 @@
+import importlib.util
+import math
+import os
+import re
+import struct
+import sys
+import time
+import types
+import zlib
+import numpy as np
+
+
+"""
+An in-process stand-in for the parts of the bpy and mathutils API used by the SDG pipeline, so the randomizers, the
+labeler and DataGenerator.gen_one_data run with plain python outside blender (benchmark/dryRunBenchmark.py).
+
+The data blocks keep what the project writes and reads back: names, transforms, custom properties, mesh arrays,
+material slots, node trees and their sockets, fake users and the user counts of the orphan purge. The asset files
+are not parsed, an object asset loaded with bpy.data.libraries.load is one box mesh named after the file. Images are
+1024 x 1024 (the PNG files written by the stand-in keep their size) with constant pixels.
+
+A render writes a flat PNG. If the compositor of the rendered scene has a Viewer node, the "Viewer Node" image gets a
+synthetic object index pass: the boxes of the visible mesh objects of the scene, projected through the scene camera
+and drawn far to near with their pass index. The time spent in the render calls is accumulated separately from the
+time of the project, see get_statistics().
+
+Only for benchmarking the Python overhead of the project, shading, geometry nodes and the compositor are not evaluated.
+"""
+
+
+_default_image_size = (1024, 1024)
+# Counts and times of the stand-in since the last reset_statistics()
+_statistics = {"render_time": 0.0, "num_render": 0, "num_library_load": 0, "num_image_load": 0, "num_image_cache_hit": 0}
+# Bumped when a reference between data blocks changes, the user counts are only computed again after a change
+_data_version = 0
+_user_counts = {"version": -1, "counts": {}}
+data = None
+context = None
+
+
+def _bump_data_version():
+    """Invalidate the cached user counts."""
+    global _data_version
+    _data_version += 1
+
+
+def _unique_name(name, existing_names):
+    """Get a name which is not in existing_names, with the ".001" suffix of blender.
+
+    Args:
+        name (str): The requested name.
+        existing_names (container of str): The names already used.
+
+    Return:
+        unique_name (str): The name, or the name with the first free numeric suffix.
+    """
+    if name not in existing_names:
+        return name
+    match = re.match(r"^(.*)\.\d{3,}$", name)
+    base_name = match.group(1) if match else name
+    number = 1
+    while f"{base_name}.{number:03d}" in existing_names:
+        number += 1
+
+    return f"{base_name}.{number:03d}"
+
+
+# mathutils
+
+class Vector:
+    """mathutils.Vector backed by a numpy array, the transform vectors of an object are written in place."""
+
+    def __init__(self, values = (0.0, 0.0, 0.0)):
+        self._values = np.array(values, dtype = np.float64)
+
+    def __array__(self, dtype = None, copy = None):
+        return np.array(self._values, dtype = dtype)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return tuple(self._values[key].tolist())
+        return float(self._values[key])
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+
+    def __add__(self, other):
+        return Vector(self._values + np.asarray(other, dtype = np.float64))
+
+    def __sub__(self, other):
+        return Vector(self._values - np.asarray(other, dtype = np.float64))
+
+    def __mul__(self, other):
+        return Vector(self._values * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return Vector(self._values / other)
+
+    def __neg__(self):
+        return Vector(-self._values)
+
+    def __eq__(self, other):
+        try:
+            return len(other) == len(self) and bool(np.all(self._values == np.asarray(other, dtype = np.float64)))
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return "Vector({})".format(tuple(self._values.tolist()))
+
+    x = property(lambda self: self[0], lambda self, value: self.__setitem__(0, value))
+    y = property(lambda self: self[1], lambda self, value: self.__setitem__(1, value))
+    z = property(lambda self: self[2], lambda self, value: self.__setitem__(2, value))
+    w = property(lambda self: self[3], lambda self, value: self.__setitem__(3, value))
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self._values))
+
+    def normalized(self):
+        return Vector(self._values / max(self.length, 1e-12))
+
+    def dot(self, other):
+        return float(np.dot(self._values, np.asarray(other, dtype = np.float64)))
+
+    def copy(self):
+        return Vector(self._values)
+
+    def to_tuple(self):
+        return tuple(self._values.tolist())
+
+
+class Euler(Vector):
+    """mathutils.Euler, a rotation vector with its order."""
+
+    def __init__(self, angles = (0.0, 0.0, 0.0), order = "XYZ"):
+        super().__init__(angles)
+        self.order = order
+
+    def copy(self):
+        return Euler(self._values, self.order)
+
+
+class Matrix:
+    """mathutils.Matrix, the world matrix of an object moves the object when its translation is written."""
+
+    def __init__(self, rows = None, owner = None):
+        self._values = np.identity(4) if rows is None else np.array(rows, dtype = np.float64)
+        self._owner = owner
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    def __array__(self, dtype = None, copy = None):
+        return np.array(self._values, dtype = dtype)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        return Vector(self._values[index])
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self._values @ other._values)
+        vector = np.asarray(other, dtype = np.float64)
+        if len(vector) == 3 and len(self._values) == 4:
+            # A 3D vector is transformed as a point
+            return Vector(self._values[:3, :3] @ vector + self._values[:3, 3])
+        return Vector(self._values @ vector)
+
+    @property
+    def translation(self):
+        return Vector(self._values[:3, 3])
+
+    @translation.setter
+    def translation(self, value):
+        self._values[:3, 3] = np.asarray(value, dtype = np.float64)[:3]
+        if self._owner is not None:
+            self._owner.location = self._values[:3, 3]
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(self._values))
+
+    def to_translation(self):
+        return self.translation
+
+    def copy(self):
+        return Matrix(self._values)
+
+
+class BVHTree:
+    """mathutils.bvhtree.BVHTree reduced to the bounding box of its vertices."""
+
+    def __init__(self, box_min, box_max):
+        self._box_min = box_min
+        self._box_max = box_max
+
+    @classmethod
+    def FromPolygons(cls, vertices, polygons, all_triangles = False, epsilon = 0.0):
+        vertices = np.asarray(vertices, dtype = np.float64).reshape(-1, 3)
+        if len(vertices) == 0:
+            return cls(np.zeros(3), np.zeros(3))
+        return cls(vertices.min(axis = 0) - epsilon, vertices.max(axis = 0) + epsilon)
+
+    def overlap(self, other):
+        if np.all(self._box_min <= other._box_max) and np.all(other._box_min <= self._box_max):
+            return [(0, 0)]
+        return []
+
+
+# bpy.types
+
+class bpy_prop_collection:
+    """An ordered collection of named items."""
+
+    def __init__(self, items = None):
+        self._items = list(items or [])
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        # Iterate over a snapshot, the project removes items while iterating
+        return iter(list(self._items))
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+            return item
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return key in self._items
+
+    def get(self, key, default = None):
+        for item in self._items:
+            if item.name == key:
+                return item
+        return default
+
+    def find(self, key):
+        for index, item in enumerate(self._items):
+            if item.name == key:
+                return index
+        return -1
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def items(self):
+        return [(item.name, item) for item in self._items]
+
+    def foreach_get(self, attribute, buffer):
+        if len(self._items) == 0:
+            return
+        buffer[:] = np.concatenate([np.ravel(np.asarray(getattr(item, attribute), dtype = np.float64)) for item in self._items])
+
+    def foreach_set(self, attribute, values):
+        if len(self._items) == 0:
+            return
+        values = np.asarray(values)
+        size = len(values) // len(self._items)
+        for index, item in enumerate(self._items):
+            value = values[index * size:(index + 1) * size]
+            setattr(item, attribute, value if size > 1 else value[0].item())
+
+
+class _IDPointer:
+    """A data block pointer, a removed data block reads as None like after the unlinking of blender."""
+
+    def __set_name__(self, owner, name):
+        self.__attribute = "_" + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        block = instance.__dict__.get(self.__attribute)
+        if block is not None and block._removed:
+            return None
+        return block
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.__attribute] = value
+        _bump_data_version()
+
+
+class _Settings:
+    """A struct of settings, settings which were never set raise AttributeError like unknown RNA properties."""
+
+    def __init__(self, **settings):
+        self.__dict__.update(settings)
+
+    def copy(self):
+        return _Settings(**{key: value.copy() if isinstance(value, _Settings) else value for key, value in self.__dict__.items()})
+
+
+class ID:
+    """A data block with custom properties, fake user and user count."""
+
+    def __init__(self, name):
+        self._name = name
+        self._collection = None
+        self._removed = False
+        self._properties = {}
+        self.use_fake_user = False
+        self.is_evaluated = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if value == self._name:
+            return
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    @property
+    def users(self):
+        return _get_user_counts().get(id(self), 0) + int(self.use_fake_user)
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value):
+        self._properties[key] = value
+
+    def __delitem__(self, key):
+        del self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def get(self, key, default = None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return list(self._properties)
+
+    def __repr__(self):
+        return f'bpy.data.{type(self).__name__}("{self._name}")'
+
+    def animation_data_clear(self):
+        pass
+
+    def keyframe_insert(self, *args, **kwargs):
+        return True
+
+    def update_tag(self, refresh = set()):
+        pass
+
+    def _references(self):
+        """The data blocks used by this data block."""
+        return []
+
+    def _copy_properties(self, source):
+        self._properties = {key: value for key, value in source._properties.items()}
+
+
+class _MaterialList:
+    """The material slots of a mesh, a removed material reads as None."""
+
+    def __init__(self, materials = None):
+        self._materials = list(materials or [])
+
+    def __len__(self):
+        return len(self._materials)
+
+    def __getitem__(self, index):
+        material = self._materials[index]
+        return None if material is not None and material._removed else material
+
+    def __setitem__(self, index, material):
+        self._materials[index] = material
+        _bump_data_version()
+
+    def __iter__(self):
+        return iter([self[index] for index in range(len(self._materials))])
+
+    def append(self, material):
+        self._materials.append(material)
+        _bump_data_version()
+
+    def pop(self, index = -1):
+        _bump_data_version()
+        return self._materials.pop(index)
+
+    def clear(self):
+        self._materials = []
+        _bump_data_version()
+
+
+class _ElementArray:
+    """The vertices, loops or polygons of a mesh, an attribute is stored as one flat array."""
+
+    def __init__(self, length = 0):
+        self._length = length
+        self._arrays = {}
+
+    def __len__(self):
+        return self._length
+
+    def add(self, count):
+        self._length += count
+
+    def foreach_get(self, attribute, buffer):
+        if attribute in self._arrays:
+            buffer[:] = self._arrays[attribute]
+        else:
+            buffer[:] = 0
+
+    def foreach_set(self, attribute, values):
+        self._arrays[attribute] = np.array(values)
+
+    def copy(self):
+        element_array = _ElementArray(self._length)
+        element_array._arrays = {key: value.copy() for key, value in self._arrays.items()}
+        return element_array
+
+
+class _Layer:
+    """An attribute or UV layer of a mesh."""
+
+    def __init__(self, name, length, data_type = None, domain = None):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        self.data = _ElementArray(length)
+
+
+class _LayerCollection(bpy_prop_collection):
+    """The attributes or UV maps of a mesh."""
+
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def new(self, name = "UVMap", type = "FLOAT", domain = "POINT", do_init = True):
+        length = len(self._mesh.vertices) if domain == "POINT" else len(self._mesh.loops)
+        layer = _Layer(name = name, length = length, data_type = type, domain = domain)
+        self._items.append(layer)
+        return layer
+
+    def remove(self, layer):
+        self._items.remove(layer)
+
+
+class Mesh(ID):
+    """A mesh data block."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.vertices = _ElementArray()
+        self.loops = _ElementArray()
+        self.polygons = _ElementArray()
+        self.loop_triangles = _ElementArray()
+        self.corner_normals = _ElementArray()
+        self.attributes = _LayerCollection(self)
+        self.uv_layers = _LayerCollection(self)
+        self.materials = _MaterialList()
+        self.has_custom_normals = False
+
+    def _references(self):
+        return [material for material in self.materials if material is not None]
+
+    def update(self, calc_edges = False, calc_edges_loose = False):
+        pass
+
+    def validate(self, verbose = False, clean_customdata = True):
+        return False
+
+    def calc_loop_triangles(self):
+        pass
+
+    def calc_normals_split(self):
+        pass
+
+    def normals_split_custom_set(self, normals):
+        self.has_custom_normals = True
+
+    def from_pydata(self, vertices, edges, faces):
+        vertices = np.asarray(vertices, dtype = np.float32).reshape(-1, 3)
+        self.vertices = _ElementArray(len(vertices))
+        self.vertices.foreach_set("co", vertices.ravel())
+        loop_vertex_index = [index for face in faces for index in face]
+        self.loops = _ElementArray(len(loop_vertex_index))
+        self.loops.foreach_set("vertex_index", loop_vertex_index)
+        self.polygons = _ElementArray(len(faces))
+        self.polygons.foreach_set("loop_start", np.cumsum([0] + [len(face) for face in faces[:-1]]))
+        self.polygons.foreach_set("loop_total", [len(face) for face in faces])
+        # Fan triangulation of each polygon
+        triangles = [(face[0], face[i], face[i + 1]) for face in faces for i in range(1, len(face) - 1)]
+        self.loop_triangles = _ElementArray(len(triangles))
+        self.loop_triangles.foreach_set("vertices", np.ravel(triangles))
+
+    def copy(self):
+        mesh = data.meshes.new(self._name)
+        for attribute in ["vertices", "loops", "polygons", "loop_triangles", "corner_normals"]:
+            setattr(mesh, attribute, getattr(self, attribute).copy())
+        for layer_collection in ["attributes", "uv_layers"]:
+            for layer in getattr(self, layer_collection):
+                new_layer = getattr(mesh, layer_collection).new(layer.name, layer.data_type, layer.domain)
+                new_layer.data = layer.data.copy()
+        mesh.materials = _MaterialList(self.materials)
+        mesh.has_custom_normals = self.has_custom_normals
+        mesh._copy_properties(self)
+        return mesh
+
+
+class Camera(ID):
+    """A camera data block."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.lens = 50.0
+        self.sensor_width = 36.0
+        self.sensor_fit = "AUTO"
+        self.clip_start = 0.1
+        self.clip_end = 100.0
+        self.type = "PERSP"
+
+
+class _MaterialSlot:
+    """A material slot of an object."""
+
+    def __init__(self, material):
+        self.material = material
+        self.link = "DATA"
+
+
+class _Modifier:
+    """A modifier of an object."""
+
+    node_group = _IDPointer()
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+        self.show_render = True
+        self.node_group = None
+
+
+class _ModifierCollection(bpy_prop_collection):
+    """The modifiers of an object."""
+
+    def new(self, name, type):
+        modifier = _Modifier(name = name, type = type)
+        self._items.append(modifier)
+        return modifier
+
+    def remove(self, modifier):
+        self._items.remove(modifier)
+        _bump_data_version()
+
+
+class Object(ID):
+    """An object data block, its world matrix is computed from its transform on access."""
+
+    data = _IDPointer()
+    parent = _IDPointer()
+
+    def __init__(self, name, object_data):
+        super().__init__(name)
+        self.data = object_data
+        self.parent = None
+        self.type = {Mesh: "MESH", Camera: "CAMERA"}.get(type(object_data), "EMPTY")
+        self.mode = "OBJECT"
+        self._location = Vector()
+        self._rotation_euler = Euler()
+        self._scale = Vector((1.0, 1.0, 1.0))
+        self.rotation_mode = "XYZ"
+        self.pass_index = 0
+        self.hide_render = False
+        self.hide_viewport = False
+        self.is_shadow_catcher = False
+        self.modifiers = _ModifierCollection()
+
+    def _references(self):
+        references = [modifier.node_group for modifier in self.modifiers if modifier.node_group is not None]
+        if self.data is not None:
+            references.append(self.data)
+        return references
+
+    location = property(lambda self: self._location,
+                        lambda self, value: self._location.__setitem__(slice(None), np.asarray(value, dtype = np.float64)[:3]))
+    rotation_euler = property(lambda self: self._rotation_euler,
+                              lambda self, value: self._rotation_euler.__setitem__(slice(None), np.asarray(value, dtype = np.float64)[:3]))
+    scale = property(lambda self: self._scale,
+                     lambda self, value: self._scale.__setitem__(slice(None), np.asarray(value, dtype = np.float64)[:3]))
+
+    def __get_local_box(self):
+        """The local bounding box of the mesh, (min corner, max corner)."""
+        mesh = self.data
+        if not isinstance(mesh, Mesh) or len(mesh.vertices) == 0:
+            return np.zeros(3), np.zeros(3)
+        coordinates = np.empty(len(mesh.vertices) * 3, dtype = np.float64)
+        mesh.vertices.foreach_get("co", coordinates)
+        coordinates = coordinates.reshape(-1, 3)
+        return coordinates.min(axis = 0), coordinates.max(axis = 0)
+
+    @property
+    def dimensions(self):
+        box_min, box_max = self.__get_local_box()
+        return Vector((box_max - box_min) * np.abs(self._scale._values))
+
+    @property
+    def bound_box(self):
+        box_min, box_max = self.__get_local_box()
+        return [(float(x), float(y), float(z)) for x in (box_min[0], box_max[0])
+                                                 for y in (box_min[1], box_max[1])
+                                                 for z in (box_min[2], box_max[2])]
+
+    @property
+    def matrix_world(self):
+        rx, ry, rz = self._rotation_euler._values
+        rotation_x = np.array([[1, 0, 0], [0, math.cos(rx), -math.sin(rx)], [0, math.sin(rx), math.cos(rx)]])
+        rotation_y = np.array([[math.cos(ry), 0, math.sin(ry)], [0, 1, 0], [-math.sin(ry), 0, math.cos(ry)]])
+        rotation_z = np.array([[math.cos(rz), -math.sin(rz), 0], [math.sin(rz), math.cos(rz), 0], [0, 0, 1]])
+        matrix = np.identity(4)
+        matrix[:3, :3] = rotation_z @ rotation_y @ rotation_x * self._scale._values
+        matrix[:3, 3] = self._location._values
+        return Matrix(matrix, owner = self)
+
+    @matrix_world.setter
+    def matrix_world(self, value):
+        self.location = np.asarray(value, dtype = np.float64)[:3, 3]
+
+    @property
+    def material_slots(self):
+        if not isinstance(self.data, Mesh):
+            return []
+        return [_MaterialSlot(material) for material in self.data.materials]
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def to_mesh(self, preserve_all_data_layers = False, depsgraph = None):
+        return self.data
+
+    def to_mesh_clear(self):
+        pass
+
+    def copy(self):
+        obj = data.objects.new(self._name, self.data)
+        obj.location = self._location
+        obj.rotation_euler = self._rotation_euler
+        obj.scale = self._scale
+        obj.rotation_mode = self.rotation_mode
+        obj.pass_index = self.pass_index
+        obj.hide_render = self.hide_render
+        obj.use_fake_user = self.use_fake_user
+        for modifier in self.modifiers:
+            obj.modifiers.new(modifier.name, modifier.type).node_group = modifier.node_group
+        obj._copy_properties(self)
+        return obj
+
+
+class _LinkCollection(bpy_prop_collection):
+    """The objects or child collections linked to a collection."""
+
+    def link(self, block):
+        if block in self._items:
+            raise RuntimeError(f"Object '{block.name}' already in collection")
+        self._items.append(block)
+        _bump_data_version()
+
+    def unlink(self, block):
+        self._items.remove(block)
+        _bump_data_version()
+
+
+class Collection(ID):
+    """A collection data block, also used for the master collection of a scene."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.objects = _LinkCollection()
+        self.children = _LinkCollection()
+        self.hide_render = False
+
+    def _references(self):
+        return list(self.objects._items) + list(self.children._items)
+
+    @property
+    def all_objects(self):
+        objects = list(self.objects._items)
+        for child in self.children._items:
+            objects += child.all_objects
+        return objects
+
+
+class _Socket:
+    """An input or output socket of a node, or a socket of the interface of a node group."""
+
+    _default_values = {"Hue": 0.5, "Saturation": 1.0, "Strength": 1.0, "Fac": 1.0}
+    _color_names = {"Color", "Base Color", "Image"}
+    _vector_names = {"Vector", "Normal", "Location", "Rotation", "Speed"}
+
+    def __init__(self, name, default_value = None):
+        self.name = name
+        self.identifier = name
+        if default_value is None:
+            if name in self._color_names:
+                default_value = [0.0, 0.0, 0.0, 1.0]
+            elif name in self._vector_names:
+                default_value = [0.0, 0.0, 0.0]
+            else:
+                default_value = self._default_values.get(name, 0.0)
+        self._default_value = default_value
+        self.enabled = True
+        self.is_linked = False
+        self.hide = False
+
+    @property
+    def default_value(self):
+        if isinstance(self._default_value, ID) and self._default_value._removed:
+            return None
+        return self._default_value
+
+    @default_value.setter
+    def default_value(self, value):
+        if isinstance(value, ID) or isinstance(self._default_value, ID):
+            _bump_data_version()
+        self._default_value = value
+
+    def keyframe_insert(self, *args, **kwargs):
+        return True
+
+
+class _SocketCollection(bpy_prop_collection):
+    """The input or output sockets of a node, a socket is created on its first access."""
+
+    def __init__(self, names = (), group_sockets = None):
+        super().__init__([_Socket(name) for name in names])
+        self._group_sockets = group_sockets
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            socket = self.get(key)
+            if socket is None:
+                socket = self.new("NodeSocket", key)
+            return socket
+        while key >= len(self._items):
+            self.new("NodeSocket", f"Socket_{len(self._items)}")
+        return self._items[key]
+
+    def new(self, type, name, identifier = None):
+        default_value = None
+        # The sockets of a group node start with the defaults of the group interface
+        if self._group_sockets is not None and self._group_sockets() is not None:
+            group_socket = self._group_sockets().get(name)
+            if group_socket is not None and not isinstance(group_socket.default_value, list):
+                default_value = group_socket.default_value
+        socket = _Socket(name, default_value = default_value)
+        socket.type = type
+        self._items.append(socket)
+        return socket
+
+    def remove(self, socket):
+        self._items.remove(socket)
+
+    def clear(self):
+        self._items = []
+
+
+class _CurvePoint:
+    """A point of a curve mapping."""
+
+    def __init__(self, x, y):
+        self.location = [x, y]
+        self.handle_type = "AUTO"
+        self.select = False
+
+
+class _CurvePointCollection(bpy_prop_collection):
+    """The points of a curve."""
+
+    def new(self, position, value):
+        point = _CurvePoint(position, value)
+        self._items.append(point)
+        return point
+
+    def remove(self, point):
+        self._items.remove(point)
+
+
+class _CurveMapping:
+    """The curves of an RGB Curves node, each curve starts with two points."""
+
+    def __init__(self):
+        self.curves = [types.SimpleNamespace(points = _CurvePointCollection([_CurvePoint(0.0, 0.0), _CurvePoint(1.0, 1.0)]))
+                       for i in range(4)]
+
+    def update(self):
+        pass
+
+    def initialize(self):
+        pass
+
+
+# Default UI names of the nodes created by the project, other nodes are named after their type
+_node_names = {
+    "ShaderNodeBsdfPrincipled": "Principled BSDF", "ShaderNodeOutputMaterial": "Material Output",
+    "ShaderNodeTexImage": "Image Texture", "ShaderNodeMixRGB": "Mix", "ShaderNodeMapping": "Mapping",
+    "ShaderNodeTexCoord": "Texture Coordinate", "ShaderNodeSeparateRGB": "Separate RGB", "ShaderNodeInvert": "Invert",
+    "ShaderNodeCombineRGB": "Combine RGB", "ShaderNodeNormalMap": "Normal Map", "ShaderNodeDisplacement": "Displacement",
+    "ShaderNodeOutputWorld": "World Output", "ShaderNodeBackground": "Background",
+    "ShaderNodeTexEnvironment": "Environment Texture", "ShaderNodeAttribute": "Attribute",
+    "ShaderNodeVectorMath": "Vector Math", "ShaderNodeSeparateXYZ": "Separate XYZ", "ShaderNodeMath": "Math",
+    "ShaderNodeHueSaturation": "Hue/Saturation/Value",
+    "CompositorNodeRLayers": "Render Layers", "CompositorNodeLensdist": "Lens Distortion", "CompositorNodeBlur": "Blur",
+    "CompositorNodeVecBlur": "Vector Blur", "CompositorNodeExposure": "Exposure", "CompositorNodeMixRGB": "Mix",
+    "CompositorNodeTexture": "Texture", "CompositorNodeGroup": "Group", "CompositorNodeBrightContrast": "Bright/Contrast",
+    "CompositorNodeHueSat": "Hue Saturation Value", "CompositorNodeComposite": "Composite",
+    "CompositorNodeViewer": "Viewer", "CompositorNodeCurveRGB": "RGB Curves", "CompositorNodeMath": "Math",
+    "CompositorNodeImage": "Image", "CompositorNodeAlphaOver": "Alpha Over", "CompositorNodeScale": "Scale",
+    "NodeGroupInput": "Group Input", "NodeGroupOutput": "Group Output",
+    "GeometryNodeCollectionInfo": "Collection Info", "GeometryNodeInstanceOnPoints": "Instance on Points",
+    "GeometryNodeInputNamedAttribute": "Named Attribute",
+}
+# Sockets created with the node, for the sockets the project reads by index or iterates over
+_node_sockets = {
+    "ShaderNodeMixRGB": (["Fac", "Color1", "Color2"], ["Color"]),
+    "CompositorNodeMixRGB": (["Fac", "Image", "Image_001"], ["Image"]),
+    "ShaderNodeMath": (["Value", "Value_001", "Value_002"], ["Value"]),
+    "CompositorNodeMath": (["Value", "Value_001", "Value_002"], ["Value"]),
+    "ShaderNodeVectorMath": (["Vector", "Vector_001", "Vector_002"], ["Vector", "Value"]),
+    "GeometryNodeInputNamedAttribute": (["Name"], ["Attribute"]),
+}
+
+
+class _Node:
+    """A node of a node tree, the settings of the node are plain attributes."""
+
+    image = _IDPointer()
+    node_tree = _IDPointer()
+    texture = _IDPointer()
+
+    def __init__(self, tree, bl_idname):
+        self._tree = tree
+        self.bl_idname = bl_idname
+        self.type = bl_idname
+        self._name = _unique_name(_node_names.get(bl_idname, re.sub(r"^(Shader|Compositor|Geometry)Node", "", bl_idname)),
+                                  tree.nodes)
+        self.label = ""
+        self._location = Vector((0.0, 0.0))
+        self.mute = False
+        self.hide = False
+        self.image = None
+        self.node_tree = None
+        self.texture = None
+        self.size_x = 0
+        self.size_y = 0
+        input_names, output_names = _node_sockets.get(bl_idname, ([], []))
+        self.inputs = _SocketCollection(input_names, group_sockets = lambda: self.node_tree.inputs if self.node_tree is not None else None)
+        self.outputs = _SocketCollection(output_names)
+        if bl_idname == "CompositorNodeCurveRGB":
+            self.mapping = _CurveMapping()
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if value != self._name:
+            self._name = _unique_name(value, self._tree.nodes)
+
+    location = property(lambda self: self._location,
+                        lambda self, value: self._location.__setitem__(slice(None), np.asarray(value, dtype = np.float64)[:2]))
+
+    def _references(self):
+        references = [block for block in [self.image, self.node_tree, self.texture] if block is not None]
+        references += [socket.default_value for socket in self.inputs._items if isinstance(socket.default_value, ID)]
+        return references
+
+    def keyframe_insert(self, *args, **kwargs):
+        return True
+
+
+class _NodeCollection(bpy_prop_collection):
+    """The nodes of a node tree."""
+
+    def __init__(self, tree):
+        super().__init__()
+        self._tree = tree
+
+    def new(self, type):
+        node = _Node(self._tree, type)
+        self._items.append(node)
+        return node
+
+    def remove(self, node):
+        self._items.remove(node)
+        _bump_data_version()
+
+    def clear(self):
+        self._items = []
+        self._tree.links.clear()
+        _bump_data_version()
+
+
+class _Link:
+    """A link between two sockets."""
+
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.is_valid = True
+
+
+class _LinkList(bpy_prop_collection):
+    """The links of a node tree."""
+
+    def new(self, from_socket, to_socket, verify_limits = True):
+        to_socket.is_linked = True
+        from_socket.is_linked = True
+        link = _Link(from_socket, to_socket)
+        self._items.append(link)
+        return link
+
+    def remove(self, link):
+        self._items.remove(link)
+
+    def clear(self):
+        self._items = []
+
+
+class NodeTree(ID):
+    """A node tree, registered in bpy.data.node_groups for a node group or embedded in a material, world or scene."""
+
+    def __init__(self, name, type = "ShaderNodeTree"):
+        super().__init__(name)
+        self.bl_idname = type
+        self.type = type.replace("NodeTree", "").upper()
+        self.nodes = _NodeCollection(self)
+        self.links = _LinkList()
+        self.inputs = _SocketCollection()
+        self.outputs = _SocketCollection()
+        self.use_opencl = False
+
+    def _references(self):
+        return [block for node in self.nodes._items for block in node._references()]
+
+    def _copy_nodes(self, source):
+        """Copy the nodes of another tree, the links are not copied."""
+        for node in source.nodes._items:
+            new_node = self.nodes.new(node.bl_idname)
+            for key, value in node.__dict__.items():
+                if key not in ["_tree", "inputs", "outputs", "_location"]:
+                    new_node.__dict__[key] = value
+            new_node.location = node.location
+            for socket_collection in ["inputs", "outputs"]:
+                for socket in getattr(node, socket_collection)._items:
+                    getattr(new_node, socket_collection)[socket.name].default_value = \
+                        socket.default_value.copy() if isinstance(socket.default_value, list) else socket.default_value
+        _bump_data_version()
+
+    def copy(self):
+        tree = data.node_groups.new(self._name, self.bl_idname)
+        tree._copy_nodes(self)
+        tree._copy_properties(self)
+        return tree
+
+
+GeometryNodeTree = NodeTree
+
+
+def _create_embedded_tree(name, tree_type, node_types):
+    """Create the node tree of a material, world or scene with its default nodes."""
+    tree = NodeTree(name, tree_type)
+    for node_type in node_types:
+        tree.nodes.new(node_type)
+    return tree
+
+
+class _ShaderOwner(ID):
+    """A data block with an embedded shader node tree, created with its default nodes by use_nodes."""
+
+    _default_node_types = []
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.node_tree = None
+
+    def _references(self):
+        return self.node_tree._references() if self.node_tree is not None else []
+
+    @property
+    def use_nodes(self):
+        return self.node_tree is not None
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        if value and self.node_tree is None:
+            self.node_tree = _create_embedded_tree("Shader Nodetree", "ShaderNodeTree", self._default_node_types)
+
+    def copy(self):
+        block = getattr(data, type(self)._collection_name).new(self._name)
+        if self.node_tree is not None:
+            block.node_tree = NodeTree("Shader Nodetree", "ShaderNodeTree")
+            block.node_tree._copy_nodes(self.node_tree)
+        block._copy_properties(self)
+        return block
+
+
+class Material(_ShaderOwner):
+    """A material data block."""
+
+    _default_node_types = ["ShaderNodeBsdfPrincipled", "ShaderNodeOutputMaterial"]
+    _collection_name = "materials"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.diffuse_color = [0.8, 0.8, 0.8, 1.0]
+        self.blend_method = "OPAQUE"
+
+
+class World(_ShaderOwner):
+    """A world data block."""
+
+    _default_node_types = ["ShaderNodeBackground", "ShaderNodeOutputWorld"]
+    _collection_name = "worlds"
+
+
+class Texture(ID):
+    """A texture data block."""
+
+    def __init__(self, name, type = "NOISE"):
+        super().__init__(name)
+        self.type = type
+        self.intensity = 1.0
+        self.contrast = 1.0
+        self.noise_scale = 0.25
+
+
+class _PixelBuffer:
+    """The pixels of an image, allocated on their first access."""
+
+    def __init__(self, image):
+        self._image = image
+        self._array = None
+
+    def _get_array(self):
+        width, height = self._image.size
+        if self._array is None or len(self._array) != width * height * self._image.channels:
+            self._array = np.full(width * height * self._image.channels, 0.5, dtype = np.float32)
+        return self._array
+
+    def __len__(self):
+        width, height = self._image.size
+        return width * height * self._image.channels
+
+    def __getitem__(self, key):
+        # Reading a slice of the pixels returns a tuple in blender
+        if isinstance(key, slice):
+            return tuple(self._get_array()[key].tolist())
+        return float(self._get_array()[key])
+
+    def __setitem__(self, key, value):
+        self._get_array()[key] = value
+
+    def foreach_get(self, buffer):
+        buffer[:] = self._get_array()
+
+    def foreach_set(self, values):
+        self._array = np.array(values, dtype = np.float32)
+
+
+class Image(ID):
+    """An image data block."""
+
+    def __init__(self, name, width = _default_image_size[0], height = _default_image_size[1], alpha = False,
+                 float_buffer = False, stereo3d = False, is_data = False, tiled = False):
+        super().__init__(name)
+        self.size = (width, height)
+        self.channels = 4
+        self.filepath = ""
+        self.filepath_raw = ""
+        self.file_format = "PNG"
+        self.source = "GENERATED"
+        self.alpha_mode = "STRAIGHT"
+        self.colorspace_settings = _Settings(name = "sRGB")
+        self.pixels = _PixelBuffer(self)
+
+    def scale(self, width, height):
+        self.size = (width, height)
+
+    def save(self, filepath = None, quality = None):
+        filepath = filepath or self.filepath_raw or self.filepath
+        _write_png(filepath = filepath, width = self.size[0], height = self.size[1], num_channel = self.channels)
+
+    def save_render(self, filepath, scene = None):
+        _write_png(filepath = filepath, width = self.size[0], height = self.size[1], num_channel = self.channels)
+
+    def reload(self):
+        pass
+
+    def update(self):
+        pass
+
+    def copy(self):
+        image = data.images.new(self._name, width = self.size[0], height = self.size[1])
+        image.filepath = self.filepath
+        image.filepath_raw = self.filepath_raw
+        image.pixels.foreach_set(self.pixels._get_array())
+        image._copy_properties(self)
+        return image
+
+
+class _ViewLayer:
+    """A view layer of a scene."""
+
+    def __init__(self, name):
+        self.name = name
+        self.use_pass_z = False
+        self.use_pass_object_index = False
+        self.use_pass_combined = True
+
+    def update(self):
+        pass
+
+
+class _ViewLayerCollection(bpy_prop_collection):
+    """The view layers of a scene."""
+
+    def update(self):
+        pass
+
+
+def _create_render_settings():
+    return _Settings(engine = "BLENDER_EEVEE", resolution_x = 1920, resolution_y = 1080, resolution_percentage = 100,
+                     filepath = "/tmp/", film_transparent = False, threads_mode = "AUTO", threads = os.cpu_count() or 1,
+                     use_persistent_data = False, use_motion_blur = False, fps = 24,
+                     image_settings = _Settings(file_format = "PNG", color_mode = "RGBA", color_depth = "8", compression = 15))
+
+
+class Scene(ID):
+    """A scene data block with its master collection, render settings and compositor."""
+
+    world = _IDPointer()
+    camera = _IDPointer()
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.world = None
+        self.camera = None
+        self.render = _create_render_settings()
+        self.cycles = _Settings(device = "CPU", samples = 4096, use_denoising = True, use_adaptive_sampling = True)
+        self.view_layers = _ViewLayerCollection([_ViewLayer("ViewLayer")])
+        self.node_tree = None
+        self._use_nodes = False
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+
+    def _references(self):
+        references = [block for block in [self.world, self.camera] if block is not None]
+        references += self.collection._references()
+        if self.node_tree is not None:
+            references += self.node_tree._references()
+        return references
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = value
+        if value and self.node_tree is None:
+            self.node_tree = _create_embedded_tree("Compositing", "CompositorNodeTree",
+                                                   ["CompositorNodeRLayers", "CompositorNodeComposite"])
+
+    def frame_set(self, frame, subframe = 0.0):
+        self.frame_current = frame
+
+    def statistics(self, view_layer):
+        return f"{self._name} | Objects:0/{len(data.objects)} | Memory: 0.0 MiB"
+
+    def copy(self):
+        scene = data.scenes.new(self._name)
+        # Like the "Link Collections" copy of blender, the copy shares the collections and objects of the scene
+        for obj in self.collection.objects._items:
+            scene.collection.objects.link(obj)
+        for child in self.collection.children._items:
+            scene.collection.children.link(child)
+        scene.world = self.world
+        scene.camera = self.camera
+        scene.render = self.render.copy()
+        scene.cycles = self.cycles.copy()
+        for view_layer in scene.view_layers:
+            view_layer.__dict__.update(self.view_layers[view_layer.name].__dict__)
+        if self.node_tree is not None:
+            scene.node_tree = NodeTree("Compositing", "CompositorNodeTree")
+            scene.node_tree._copy_nodes(self.node_tree)
+        scene._use_nodes = self.use_nodes
+        scene.frame_start, scene.frame_end, scene.frame_current = self.frame_start, self.frame_end, self.frame_current
+        scene._copy_properties(self)
+        return scene
+
+
+# bpy.data
+
+class _IDCollection(bpy_prop_collection):
+    """A collection of bpy.data, with a name index and the unique names of blender."""
+
+    def __init__(self, id_type):
+        super().__init__()
+        self._id_type = id_type
+        self._index = {}
+
+    def get(self, key, default = None):
+        return self._index.get(key, default)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self._index
+        return key in self._items
+
+    def _add(self, block):
+        block._name = _unique_name(block._name, self._index)
+        block._collection = self
+        self._items.append(block)
+        self._index[block._name] = block
+        _bump_data_version()
+        return block
+
+    def _rename(self, block, name):
+        del self._index[block._name]
+        block._name = _unique_name(name, self._index)
+        self._index[block._name] = block
+
+    def new(self, name, *args, **kwargs):
+        return self._add(self._id_type(name, *args, **kwargs))
+
+    def remove(self, block, do_unlink = True, do_id_user = True, do_ui_user = True):
+        if block._removed:
+            raise ReferenceError(f"StructRNA of type {type(block).__name__} has been removed")
+        self._items.remove(block)
+        del self._index[block._name]
+        block._removed = True
+        data._unlink(block)
+        _bump_data_version()
+
+
+class _ImageCollection(_IDCollection):
+    """bpy.data.images, with the loading of image files."""
+
+    def load(self, filepath, check_existing = False):
+        if check_existing:
+            for image in self._items:
+                if image.filepath == filepath:
+                    _statistics["num_image_cache_hit"] += 1
+                    return image
+        if not os.path.exists(filepath):
+            raise RuntimeError(f"Error: Cannot read image '{filepath}'")
+        width, height = _default_image_size
+        with open(filepath, "rb") as f:
+            header = f.read(24)
+        if header[:8] == b"\x89PNG\r\n\x1a\n":
+            width, height = struct.unpack(">II", header[16:24])
+        image = self.new(os.path.basename(filepath), width = width, height = height)
+        _statistics["num_image_load"] += 1
+        image.filepath = filepath
+        image.filepath_raw = filepath
+        image.source = "FILE"
+        return image
+
+
+class _LibraryData:
+    """The data_from or data_to of bpy.data.libraries.load, the names (or data blocks) of each type."""
+
+    def __init__(self, **names):
+        self.objects = names.get("objects", [])
+        self.meshes = names.get("meshes", [])
+        self.materials = names.get("materials", [])
+        self.node_groups = names.get("node_groups", [])
+        self.images = names.get("images", [])
+
+
+class _LibraryLoad:
+    """The context manager of bpy.data.libraries.load, an object asset file holds one box named after the file."""
+
+    def __init__(self, filepath):
+        self.__filepath = filepath
+        self.__name = os.path.splitext(os.path.basename(filepath))[0]
+
+    def __enter__(self):
+        if not os.path.exists(self.__filepath):
+            raise OSError(f"load: {self.__filepath} failed, '{self.__filepath}': No such file or directory")
+        _statistics["num_library_load"] += 1
+        self.__data_to = _LibraryData()
+        return _LibraryData(objects = [self.__name]), self.__data_to
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            return False
+        self.__data_to.materials = [data.materials.new(name) for name in self.__data_to.materials]
+        self.__data_to.meshes = [_create_box_mesh(name) for name in self.__data_to.meshes]
+        self.__data_to.objects = [data.objects.new(name, _create_box_mesh(name)) for name in self.__data_to.objects]
+        return False
+
+
+class _LibraryCollection(_IDCollection):
+    """bpy.data.libraries, appending reads no file content."""
+
+    def load(self, filepath, link = False, relative = False, assets_only = False):
+        return _LibraryLoad(filepath)
+
+    def write(self, filepath, datablocks, path_remap = "NONE", fake_user = False, compress = False):
+        with open(filepath, "wb") as f:
+            f.write(b"BLENDER-stand-in")
+
+
+class BlendData:
+    """bpy.data, the data block collections of one blend file."""
+
+    def __init__(self):
+        self.cameras = _IDCollection(Camera)
+        self.collections = _IDCollection(Collection)
+        self.images = _ImageCollection(Image)
+        self.libraries = _LibraryCollection(ID)
+        self.materials = _IDCollection(Material)
+        self.meshes = _IDCollection(Mesh)
+        self.node_groups = _IDCollection(NodeTree)
+        self.objects = _IDCollection(Object)
+        self.scenes = _IDCollection(Scene)
+        self.textures = _IDCollection(Texture)
+        self.worlds = _IDCollection(World)
+        self.scenes.new("Scene")
+
+    def _get_id_collections(self):
+        return [value for value in self.__dict__.values() if isinstance(value, _IDCollection)]
+
+    def _unlink(self, block):
+        """Unlink a removed object or collection from the collections and the scenes, switch the window from a removed scene."""
+        if context is not None and context.window.scene is block:
+            context.window.scene = self.scenes._items[0]
+        if not isinstance(block, (Object, Collection)):
+            return
+        master_collections = [scene.collection for scene in self.scenes._items]
+        for collection in self.collections._items + master_collections:
+            links = collection.objects if isinstance(block, Object) else collection.children
+            if block in links._items:
+                links._items.remove(block)
+
+    def batch_remove(self, ids):
+        for block in list(ids):
+            if not block._removed:
+                block._collection.remove(block)
+
+    def orphans_purge(self, do_local_ids = True, do_linked_ids = True, do_recursive = False):
+        num_removed = 0
+        while True:
+            orphans = [block for collection in self._get_id_collections() if collection is not self.scenes
+                       for block in collection._items if block.users == 0]
+            for block in orphans:
+                block._collection.remove(block)
+            num_removed += len(orphans)
+            if len(orphans) == 0 or not do_recursive:
+                return num_removed
+
+
+def _create_box_mesh(name):
+    """Create the box mesh of an asset, its size is derived from the name so each asset keeps its size.
+
+    Args:
+        name (str): The name of the asset.
+
+    Return:
+        mesh (Mesh): The box mesh with one material.
+    """
+    seed = zlib.crc32(name.encode())
+    half_size = [0.05 + ((seed >> shift) & 0xff) / 255 * 0.12 for shift in (0, 8, 16)]
+    vertices = [(x * half_size[0], y * half_size[1], z * half_size[2]) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    mesh = data.meshes.new(name)
+    mesh.from_pydata(vertices, [], faces)
+    mesh.uv_layers.new(name = "UVMap")
+    mesh.materials.append(data.materials.new("Material_" + name))
+    return mesh
+
+
+# bpy.context
+
+class _CyclesPreferences:
+    """The preferences of the cycles add-on, no GPU backend is available."""
+
+    def __init__(self):
+        self._compute_device_type = "NONE"
+        self.devices = []
+
+    @property
+    def compute_device_type(self):
+        return self._compute_device_type
+
+    @compute_device_type.setter
+    def compute_device_type(self, value):
+        if value != "NONE":
+            raise TypeError(f"bpy_struct: item.attr = val: enum \"{value}\" not found in ('NONE')")
+        self._compute_device_type = value
+
+    def get_devices(self):
+        return self.devices
+
+    def refresh_devices(self):
+        pass
+
+
+class Context:
+    """bpy.context of a background session with one window."""
+
+    def __init__(self, blend_data):
+        self.window = _Settings(scene = blend_data.scenes["Scene"])
+        self.object = None
+        self.preferences = _Settings(addons = {"cycles": _Settings(preferences = _CyclesPreferences())})
+
+    @property
+    def scene(self):
+        return self.window.scene
+
+    @property
+    def view_layer(self):
+        return self.window.scene.view_layers[0]
+
+    def evaluated_depsgraph_get(self):
+        return _Settings(scene = self.scene, update = lambda: None)
+
+
+def _get_user_counts():
+    """Count the users of each data block, the counts are only computed again after a reference changed.
+
+    Return:
+        counts (dict of int: int): The id() of the used data blocks paired with their number of users.
+    """
+    if _user_counts["version"] == _data_version:
+        return _user_counts["counts"]
+    counts = {}
+    for collection in data._get_id_collections():
+        for block in collection._items:
+            for reference in block._references():
+                counts[id(reference)] = counts.get(id(reference), 0) + 1
+    # The window uses its scene
+    counts[id(context.window.scene)] = counts.get(id(context.window.scene), 0) + 1
+    _user_counts["version"] = _data_version
+    _user_counts["counts"] = counts
+
+    return counts
+
+
+# bpy.ops.render
+
+def _write_png(filepath, width, height, num_channel, value = 128):
+    """Write a flat gray 8 bit PNG.
+
+    Args:
+        filepath (str): The path of the PNG.
+        width (int): The width in pixels.
+        height (int): The height in pixels.
+        num_channel (int): 3 for RGB, 4 for RGBA.
+        value (int): The value of all channels of the pixels.
+    """
+    def chunk(tag, body):
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body) & 0xffffffff)
+
+    rows = (b"\x00" + bytes([value]) * (width * num_channel)) * height
+    header = struct.pack(">IIBBBBB", width, height, 8, 6 if num_channel == 4 else 2, 0, 0, 0)
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok = True)
+    with open(filepath, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b""))
+
+
+def _draw_object_index_pass(scene, width, height):
+    """Draw the projected boxes of the visible mesh objects of a scene with their pass index into the "Viewer Node" image.
+
+    Args:
+        scene (Scene): The rendered scene.
+        width (int): The width of the render in pixels.
+        height (int): The height of the render in pixels.
+    """
+    index_pass = np.zeros((height, width), dtype = np.float32)
+    camera = scene.camera
+    if camera is not None:
+        camera_inverse = np.linalg.inv(np.asarray(camera.matrix_world))
+        pixel_per_unit = camera.data.lens / camera.data.sensor_width * max(width, height)
+        boxes = []
+        for obj in set(scene.collection.all_objects):
+            if obj.type != "MESH" or obj.hide_render:
+                continue
+            local_location = camera_inverse[:3, :3] @ obj.location._values + camera_inverse[:3, 3]
+            depth = -local_location[2]
+            if depth <= camera.data.clip_start:
+                continue
+            dimensions = obj.dimensions._values
+            center_x = width / 2 + local_location[0] / depth * pixel_per_unit
+            center_y = height / 2 + local_location[1] / depth * pixel_per_unit
+            half_width = dimensions[0] / 2 / depth * pixel_per_unit
+            half_height = dimensions[1] / 2 / depth * pixel_per_unit
+            boxes.append((depth, obj.pass_index, center_x, center_y, half_width, half_height))
+        # Far to near, the near objects occlude the far ones
+        for depth, pass_index, center_x, center_y, half_width, half_height in sorted(boxes, key = lambda box: -box[0]):
+            x0, x1 = max(int(center_x - half_width), 0), min(int(center_x + half_width), width)
+            y0, y1 = max(int(center_y - half_height), 0), min(int(center_y + half_height), height)
+            if x0 < x1 and y0 < y1:
+                index_pass[y0:y1, x0:x1] = pass_index
+
+    # The first row is the bottom like the pixels of blender
+    pixels = np.repeat(index_pass[:, :, np.newaxis], 4, axis = 2)
+    pixels[:, :, 3] = 1
+    viewer_image = data.images.get("Viewer Node")
+    if viewer_image is None:
+        viewer_image = data.images.new("Viewer Node", width = width, height = height)
+    viewer_image.size = (width, height)
+    viewer_image.pixels.foreach_set(pixels.ravel())
+
+
+def _render(write_still = False, animation = False, scene = None, layer = "", use_viewport = False):
+    """bpy.ops.render.render, writes flat images and the object index pass of a Viewer node."""
+    start_time = time.perf_counter()
+    scene = data.scenes[scene] if scene else context.scene
+    render = scene.render
+    width = int(render.resolution_x * render.resolution_percentage / 100)
+    height = int(render.resolution_y * render.resolution_percentage / 100)
+    num_channel = 4 if render.image_settings.color_mode == "RGBA" else 3
+    if scene.use_nodes and any(node.bl_idname == "CompositorNodeViewer" for node in scene.node_tree.nodes):
+        _draw_object_index_pass(scene = scene, width = width, height = height)
+    if animation:
+        for frame in range(scene.frame_start, scene.frame_end + 1):
+            scene.frame_set(frame)
+            filepath = render.filepath.replace("####", "{:04d}".format(frame))
+            _write_png(filepath = filepath if filepath.endswith(".png") else filepath + ".png",
+                       width = width, height = height, num_channel = num_channel)
+    elif write_still:
+        _write_png(filepath = render.filepath, width = width, height = height, num_channel = num_channel)
+    _statistics["num_render"] += 1
+    _statistics["render_time"] += time.perf_counter() - start_time
+
+    return {"FINISHED"}
+
+
+def get_statistics():
+    """Get the counts and times of the stand-in since the last reset.
+
+    Return:
+        statistics (dict of str: float): The "render_time" in seconds, the "num_render", "num_library_load",
+            "num_image_load" (new images only) and "num_image_cache_hit" (images returned by check_existing).
+    """
+    return dict(_statistics)
+
+
+def reset_statistics():
+    """Reset the counts and times of the stand-in."""
+    for key in _statistics:
+        _statistics[key] = 0 if key != "render_time" else 0.0
+
+
+def install():
+    """Register the stand-in as the bpy, mathutils and mathutils.bvhtree modules of this python process.
+
+    Return:
+        installed (bool): False if the real bpy is available, the stand-in is then not installed.
+    """
+    global data, context
+    if getattr(sys.modules.get("bpy"), "is_stand_in", False):
+        return True
+    if "bpy" in sys.modules or importlib.util.find_spec("bpy") is not None:
+        return False
+
+    data = BlendData()
+    context = Context(data)
+
+    bpy_module = types.ModuleType("bpy")
+    bpy_module.is_stand_in = True
+    bpy_module.data = data
+    bpy_module.context = context
+    bpy_module.types = types.SimpleNamespace(bpy_prop_collection = bpy_prop_collection, ID = ID, Object = Object, Mesh = Mesh,
+                                             Camera = Camera, Collection = Collection, Material = Material, World = World,
+                                             Texture = Texture, Image = Image, Scene = Scene, NodeTree = NodeTree,
+                                             GeometryNodeTree = GeometryNodeTree)
+    bpy_module.ops = types.SimpleNamespace(render = types.SimpleNamespace(render = _render),
+                                           object = types.SimpleNamespace(mode_set = lambda mode = "OBJECT": {"FINISHED"}))
+    bpy_module.app = types.SimpleNamespace(version = (4, 1, 0), version_string = "4.1.0 (stand-in)", background = True,
+                                           binary_path = "")
+    bpy_module.path = types.SimpleNamespace(abspath = lambda path, start = None, library = None: path, basename = os.path.basename)
+
+    mathutils_module = types.ModuleType("mathutils")
+    mathutils_module.Vector = Vector
+    mathutils_module.Euler = Euler
+    mathutils_module.Matrix = Matrix
+    bvhtree_module = types.ModuleType("mathutils.bvhtree")
+    bvhtree_module.BVHTree = BVHTree
+    mathutils_module.bvhtree = bvhtree_module
+
+    sys.modules.update({"bpy": bpy_module, "mathutils": mathutils_module, "mathutils.bvhtree": bvhtree_module})
+
+    return True
@@ -0,0 +1,109 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import numpy as np
+import random
+from util import classBalance
+
+
+"""
+Simulate how many images the "random" and "balanced" foreground selection policies need until every class reaches its
+target number of labeled instances.
+
+Each class has its own probability that an imported object is labeled, smaller or more often occluded products are
+dropped more often by the minimum pixel filter of the labeler, which is what makes some classes rare. The simulation
+does not render, it runs with plain python: python SDG/benchmark/classBalanceSimulation.py
+"""
+
+
+num_class = 63
+num_foreground_object_in_scene_range = {"min": 8, "max": 20}
+target_num_instance = 6300 * 10 # Labeled instances of the whole dataset
+max_num_img = 200000
+num_repeat = 3
+
+
+def random_policy(num_select, class_instance_num, target_share):
+    """Select the assets like the "random" policy of ForegroundObjectPlacementRandomizer.
+
+    Args:
+        num_select (int): Number of assets in the image.
+        class_instance_num (dict of str: int): The labeled instances of each class so far, unused.
+        target_share (dict of str: float): The classes paired with their target share, unused.
+
+    Return:
+        selected_classes (list of int): The selected classes.
+    """
+    if num_select >= num_class:
+        return [i % num_class for i in range(num_select)]
+    return random.sample(range(num_class), num_select)
+
+
+def balanced_policy(num_select, class_instance_num, target_share):
+    """Select the assets like the "balanced" policy of ForegroundObjectPlacementRandomizer.
+
+    Args:
+        num_select (int): Number of assets in the image.
+        class_instance_num (dict of str: int): The labeled instances of each class so far.
+        target_share (dict of str: float): The classes paired with their target share.
+
+    Return:
+        selected_classes (list of int): The selected classes.
+    """
+    return classBalance.select_balanced(asset_class_ids = [str(i) for i in range(num_class)],
+                                        num_select = num_select,
+                                        class_instance_num = class_instance_num,
+                                        target_share = target_share)
+
+
+def simulate(policy, label_probability, target_share):
+    """Generate images until every class reaches its target number of labeled instances.
+
+    Args:
+        policy (function): The selection policy.
+        label_probability (numpy.ndarray): The probability that an imported object of each class is labeled.
+        target_share (dict of str: float): The classes paired with their target share.
+
+    Return:
+        num_img (int): Number of images needed, max_num_img if the targets are not reached.
+        num_instance (int): Number of labeled instances when the targets are reached.
+    """
+    target_num = {class_id: share * target_num_instance for class_id, share in target_share.items()}
+    class_instance_num = {str(i): 0 for i in range(num_class)}
+    for num_img in range(1, max_num_img + 1):
+        num_select = random.randint(num_foreground_object_in_scene_range["min"], num_foreground_object_in_scene_range["max"])
+        for class_index in policy(num_select, class_instance_num, target_share):
+            if random.random() < label_probability[class_index]:
+                class_instance_num[str(class_index)] += 1
+        if all(class_instance_num[class_id] >= num for class_id, num in target_num.items()):
+            break
+
+    return num_img, sum(class_instance_num.values())
+
+
+def simulation():
+    """Print the images needed by each policy for a uniform and a weighted target distribution."""
+    np.random.seed(0)
+    random.seed(0)
+    label_probability = np.random.uniform(0.3, 0.95, num_class)
+    class_ids = [str(i) for i in range(num_class)]
+    weighted_share = classBalance.get_target_share(class_ids = class_ids,
+                                                   class_weights = {class_id: 1 + int(class_id) % 3 for class_id in class_ids})
+    target_shares = {"uniform": classBalance.get_target_share(class_ids = class_ids), "weighted": weighted_share}
+
+    print("target, policy, num_img, num_instance")
+    for target_name, target_share in target_shares.items():
+        for policy in [random_policy, balanced_policy]:
+            results = [simulate(policy, label_probability, target_share) for i in range(num_repeat)]
+            print("{}, {}, {:.0f}, {:.0f}".format(target_name, policy.__name__,
+                                                  np.mean([result[0] for result in results]),
+                                                  np.mean([result[1] for result in results])))
+
+
+if __name__ == '__main__':
+    simulation()
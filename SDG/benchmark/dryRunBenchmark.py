@@ -0,0 +1,146 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import argparse
+import json
+import tempfile
+import bpyStandIn
+# The stand-in has to be registered before the SDG modules import bpy
+stand_in_installed = bpyStandIn.install()
+from SDG_000_Initializer import Initializer
+from SDG_100_YOLOLabeler_IDMask import YOLOLabeler
+from SDG_300_DataGenerator import DataGenerator
+from util import multiResolution
+
+
+"""
+Measure the Python overhead of each stage of DataGenerator.gen_one_data without blender, against the bpy stand-in of
+benchmark/bpyStandIn.py, e.g. to compare two revisions of the randomizers and the labeler on a CI machine.
+
+The assets are empty placeholder files created in a temporary folder: foreground assets named after the classes of
+the labeler, background and occlusion boxes, PBR texture folders and HDRIs. The stand-in time of the render calls,
+which replaces the render time of blender, is reported separately and subtracted from the render_and_label stage.
+The absolute times only compare runs on the same machine, the stand-in keeps its own cost small but not zero.
+
+Run it with python (not in blender):
+python SDG/benchmark/dryRunBenchmark.py -- --num_img 5 --parameter_override '{"scene_reset_mode": "incremental"}'
+The optional JSON object of --parameter_override overrides SDGParameter attributes, --report writes the result as JSON.
+"""
+
+
+num_foreground_asset = 30
+num_background_asset = 10
+num_pbr_texture = 8
+num_hdri = 4
+
+
+def create_assets(asset_path):
+    """Create the placeholder asset files in a folder.
+
+    Args:
+        asset_path (str): The folder of the placeholder assets.
+
+    Return:
+        parameter_override (dict of str: str): The SDGParameter asset and output paths of the placeholder assets.
+    """
+    folder_paths = {name: os.path.join(asset_path, name) for name in ["foreground_object", "background_occluder_object",
+                                                                       "pbr_texture", "hdri_lighting",
+                                                                       "images", "labels", "metrics"]}
+    for folder_path in folder_paths.values():
+        os.makedirs(folder_path, exist_ok = True)
+    asset_file_paths = []
+
+    # The class id mapping is read from the labeler of an initialized scene
+    Initializer().init()
+    for class_name in list(YOLOLabeler().get_class_id_mapping())[:num_foreground_asset]:
+        asset_file_paths.append(os.path.join(folder_paths["foreground_object"], f"{class_name}.blend"))
+    for i in range(num_background_asset):
+        asset_file_paths.append(os.path.join(folder_paths["background_occluder_object"], f"box_{i:03d}.blend"))
+    for i in range(num_pbr_texture):
+        texture_name = f"Synthetic{i:03d}"
+        os.makedirs(os.path.join(folder_paths["pbr_texture"], texture_name), exist_ok = True)
+        # Every second texture has the other PBR maps too
+        map_names = ["Color", "AmbientOcclusion", "Roughness", "NormalGL", "Displacement"] if i % 2 == 0 else ["Color"]
+        for map_name in map_names:
+            asset_file_paths.append(os.path.join(folder_paths["pbr_texture"], texture_name, f"{texture_name}_2K_{map_name}.jpg"))
+    for i in range(num_hdri):
+        asset_file_paths.append(os.path.join(folder_paths["hdri_lighting"], f"hdri_{i:03d}.exr"))
+    for asset_file_path in asset_file_paths:
+        open(asset_file_path, "wb").close()
+
+    return {"asset_foreground_object_folder_path": folder_paths["foreground_object"],
+            "asset_background_object_folder_path": folder_paths["background_occluder_object"],
+            "asset_occluder_folder_path": folder_paths["background_occluder_object"],
+            "asset_ambientCGMaterial_folder_path": folder_paths["pbr_texture"],
+            "asset_hdri_lighting_folder_path": folder_paths["hdri_lighting"],
+            "asset_hdri_cache_folder_path": None,
+            "asset_pack_path": None,
+            "output_img_path": folder_paths["images"],
+            "output_label_path": folder_paths["labels"],
+            "output_metrics_path": folder_paths["metrics"]}
+
+
+def benchmark():
+    """Print the mean and minimum time of each stage of gen_one_data and the stand-in render time."""
+    if not stand_in_installed:
+        print("Warning!!! bpy is available, run the dry run with python outside blender")
+        return
+    script_argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--num_img", type = int, default = 5)
+    arg_parser.add_argument("--parameter_override", type = json.loads, default = {}) # JSON object
+    arg_parser.add_argument("--report", default = None) # Path of the JSON result
+    script_args = arg_parser.parse_args(script_argv)
+
+    asset_path = tempfile.mkdtemp(prefix = "sdg_dry_run_")
+    parameter_override = create_assets(asset_path = asset_path)
+    parameter_override.update(script_args.parameter_override)
+    datagen = DataGenerator(parameter_override = parameter_override)
+
+    # Warm up the caches kept between the images of a session
+    datagen.gen_one_data()
+
+    stage_time_list = {}
+    stand_in_statistics_list = []
+    for i in range(script_args.num_img):
+        bpyStandIn.reset_statistics()
+        datagen.gen_one_data()
+        stand_in_statistics = bpyStandIn.get_statistics()
+        stage_time = datagen.get_stage_time()
+        # The render calls of the stand-in are not time of the project
+        stage_time["render_and_label"] -= stand_in_statistics["render_time"]
+        for stage_name, value in stage_time.items():
+            stage_time_list.setdefault(stage_name, []).append(value)
+        stand_in_statistics_list.append(stand_in_statistics)
+    multiResolution.wait_all()
+
+    total_time = sum(sum(values) for values in stage_time_list.values()) / script_args.num_img
+    result = {"num_img": script_args.num_img,
+              "stage_time": {stage_name: {"mean": sum(values) / len(values), "min": min(values)}
+                             for stage_name, values in stage_time_list.items()},
+              "total_time": total_time}
+    for key in stand_in_statistics_list[0]:
+        result["stand_in_" + key] = sum(statistics[key] for statistics in stand_in_statistics_list) / script_args.num_img
+
+    print("stage, mean_ms, min_ms, share")
+    for stage_name, stage_result in result["stage_time"].items():
+        print("{}, {:.1f}, {:.1f}, {:.1%}".format(stage_name, stage_result["mean"] * 1000, stage_result["min"] * 1000,
+                                                 stage_result["mean"] / total_time))
+    print("Python Overhead Per Image: {:.1f} ms".format(total_time * 1000))
+    print("Stand-in Render Per Image: {:.1f} ms in {:.1f} renders, excluded".format(result["stand_in_render_time"] * 1000,
+                                                                                  result["stand_in_num_render"]))
+    print("Asset Loads Per Image: {:.1f}, Image Loads Per Image: {:.1f}, Image Cache Hits Per Image: {:.1f}".format(
+        result["stand_in_num_library_load"], result["stand_in_num_image_load"], result["stand_in_num_image_cache_hit"]))
+    if script_args.report is not None:
+        with open(script_args.report, "w") as f:
+            json.dump(result, f, indent = 2)
+    print(f"Images written to {asset_path}")
+
+
+if __name__ == '__main__':
+    benchmark()
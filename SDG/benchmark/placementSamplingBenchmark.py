@@ -0,0 +1,75 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import numpy as np
+import time
+from util import poissonDiscSampling
+from util import bridsonVariableRadius
+
+
+"""
+Compare the sampling time of the fixed-radius Poisson disk sampling of util/poissonDiscSampling.py with the
+variable-radius sampling of util/bridsonVariableRadius.py on the domains of the placement randomizers, for a uniform
+radius map of the fixed radius and for the "center" and "edge" density maps.
+
+util/poissonDiscSampling.py imports bpy, run it in blender: blender --background --python SDG/benchmark/placementSamplingBenchmark.py
+"""
+
+
+# Domain size, fixed radius and radius range of the density maps of each placement randomizer (SDG_200_SDGParameter.py)
+domains = {
+    "background": (np.array([3.2, 2.4]), 0.2, {"min": 0.15, "max": 0.3}),
+    "foreground": (np.array([2.5, 1.5, 0.5]), 0.3, {"min": 0.2, "max": 0.35}),
+    "occluder": (np.array([1.2, 0.8, 0.4]), 0.25, {"min": 0.15, "max": 0.25})
+}
+num_repeat = 50
+
+
+def time_sampling(sampling_function):
+    """Run a sampling function num_repeat times.
+
+    Args:
+        sampling_function (function): The sampling function without arguments, it returns the sampled points.
+
+    Return:
+        time_consume (float): The mean sampling time in ms.
+        num_point (float): The mean number of sampled points.
+    """
+    num_point = []
+    start_time = time.perf_counter()
+    for i in range(num_repeat):
+        num_point.append(len(sampling_function()))
+
+    return (time.perf_counter() - start_time) / num_repeat * 1000, np.mean(num_point)
+
+
+def benchmark():
+    """Print the mean sampling time and number of points of each sampler on each domain."""
+    np.random.seed(0)
+    print("domain, sampler, time_ms, num_point")
+    for domain_name, (domain_size, radius, radius_range) in domains.items():
+        samplers = {
+            "fixed": lambda: poissonDiscSampling.poisson_disc_sampling(radius = radius,
+                                                                      sample_domain_size = domain_size,
+                                                                      sample_rejection_threshold = 30)
+        }
+        radius_maps = {"variable_uniform": np.full((64, 64), radius)}
+        for density_map in ["center", "edge"]:
+            radius_maps[f"variable_{density_map}"] = bridsonVariableRadius.make_radius_map(radius_range = radius_range,
+                                                                                           density_map = density_map)
+        for sampler_name, radius_map in radius_maps.items():
+            samplers[sampler_name] = lambda radius_map = radius_map: bridsonVariableRadius.variable_radius_poisson_disc_sampling(radius_map = radius_map,
+                                                                                                                                sample_domain_size = domain_size,
+                                                                                                                                k = 30)
+        for sampler_name, sampling_function in samplers.items():
+            time_consume, num_point = time_sampling(sampling_function = sampling_function)
+            print("{}, {}, {:.2f}, {:.1f}".format(domain_name, sampler_name, time_consume, num_point))
+
+
+if __name__ == '__main__':
+    benchmark()
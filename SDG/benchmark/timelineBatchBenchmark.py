@@ -0,0 +1,57 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import json
+import tempfile
+import time
+from SDG_300_DataGenerator import DataGenerator
+
+
+"""
+Compare the time of K images rendered one by one (gen_one_data) with one timeline batch of K frames rendered with one
+animation render (gen_batch_data), for several K, in one blender session with the assets of SDG_200_SDGParameter.py.
+
+The images are written to a temporary folder. Run it in blender:
+blender --background --python SDG/benchmark/timelineBatchBenchmark.py -- '{"max_samples": 64}'
+The optional JSON object after "--" overrides SDGParameter attributes.
+"""
+
+
+batch_size_list = [2, 4, 8]
+
+
+def benchmark():
+    """Print the time per image of the single renders and of the timeline batch for each batch size."""
+    script_argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parameter_override = json.loads(script_argv[0]) if script_argv else {}
+    output_path = tempfile.mkdtemp(prefix = "sdg_timeline_batch_")
+    for folder_name in ["images", "labels", "metrics"]:
+        os.makedirs(os.path.join(output_path, folder_name), exist_ok = True)
+    parameter_override.update({"output_img_path": os.path.join(output_path, "images"),
+                               "output_label_path": os.path.join(output_path, "labels"),
+                               "output_metrics_path": os.path.join(output_path, "metrics")})
+    datagen = DataGenerator(parameter_override = parameter_override)
+
+    # Warm up the caches kept between the images of a session
+    datagen.gen_one_data()
+
+    print("batch_size, single_s_per_img, batch_s_per_img, speedup")
+    for batch_size in batch_size_list:
+        start_time = time.perf_counter()
+        for i in range(batch_size):
+            datagen.gen_one_data()
+        single_time = (time.perf_counter() - start_time) / batch_size
+        start_time = time.perf_counter()
+        datagen.gen_batch_data(num_frame = batch_size)
+        batch_time = (time.perf_counter() - start_time) / batch_size
+        print("{}, {:.2f}, {:.2f}, {:.2f}x".format(batch_size, single_time, batch_time, single_time / batch_time))
+    print(f"Images written to {output_path}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,111 @@
+# Add SDG related python files path to system path
+import sys
+import os
+module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if module_path not in sys.path:
+    sys.path.append(module_path)
+sys.dont_write_bytecode = True
+
+import bpy
+import math
+import numpy as np
+import random
+import time
+from mathutils import Euler
+from util import batchTransform
+
+
+"""
+Compare the per-frame transform time of the per-object randomization (obj.dimensions, mathutils.Euler, location tuples)
+with the batched foreach_set randomization of util/batchTransform.py for a growing number of objects.
+
+Run it in blender: blender --background --python SDG/benchmark/transformBenchmark.py
+"""
+
+
+num_obj_list = [100, 250, 500, 1000, 2000]
+num_repeat = 5
+scale_ratio_range = {"min": 0.5, "max": 2.5}
+
+
+def create_objects(num_obj):
+    """Create a collection of num_obj cubes sharing one mesh.
+
+    Args:
+        num_obj (int): Number of objects.
+
+    Return:
+        collection (bpy.types.Collection): The collection of the cubes.
+    """
+    collection = bpy.data.collections.new("TransformBenchmarkCollection")
+    bpy.context.scene.collection.children.link(collection)
+    mesh = bpy.data.meshes.new("TransformBenchmarkCube")
+    mesh.from_pydata([(x, y, z) for x in (-0.1, 0.1) for y in (-0.1, 0.1) for z in (-0.1, 0.1)], [],
+                     [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)])
+    for i in range(num_obj):
+        collection.objects.link(bpy.data.objects.new(f"TransformBenchmark_{i}", mesh))
+
+    return collection
+
+
+def remove_objects(collection):
+    """Remove the benchmark collection, its objects and their mesh.
+
+    Args:
+        collection (bpy.types.Collection): The collection of the cubes.
+    """
+    mesh = collection.objects[0].data
+    bpy.data.batch_remove(list(collection.objects) + [collection, mesh])
+
+
+def per_object_transform(collection):
+    """Randomize the transforms one object at a time, like the randomizers before batching.
+
+    Args:
+        collection (bpy.types.Collection): The collection of the cubes.
+    """
+    for obj in collection.objects:
+        obj.location = (random.uniform(-1.6, 1.6), random.uniform(-1.2, 1.2), 0)
+    for obj in collection.objects:
+        scale_ratio = random.randrange(int(scale_ratio_range["min"]*10), int(scale_ratio_range["max"]*10), 1)/10
+        obj.dimensions.xyz = obj.dimensions.xyz * scale_ratio
+    for obj in collection.objects:
+        random_rot = (random.random() * 2 * math.pi, random.random() * 2 * math.pi, random.random() * 2 * math.pi)
+        obj.rotation_euler = Euler(random_rot, 'XYZ')
+    bpy.context.view_layer.update()
+
+
+def batched_transform(collection):
+    """Randomize the transforms of the whole collection with foreach_set.
+
+    Args:
+        collection (bpy.types.Collection): The collection of the cubes.
+    """
+    num_obj = len(collection.objects)
+    locations = [(random.uniform(-1.6, 1.6), random.uniform(-1.2, 1.2)) for i in range(num_obj)]
+    batchTransform.set_locations(objects = collection.objects, locations = np.array(locations))
+    batchTransform.randomize_scales(objects = collection.objects, scale_ratio_range = scale_ratio_range)
+    batchTransform.randomize_rotations(objects = collection.objects)
+    bpy.context.view_layer.update()
+
+
+def benchmark():
+    """Print the mean per-frame transform time of both methods for each number of objects."""
+    print("num_obj, per_object_ms, batched_ms, speedup")
+    for num_obj in num_obj_list:
+        time_consume = {}
+        for method in [per_object_transform, batched_transform]:
+            collection = create_objects(num_obj = num_obj)
+            start_time = time.perf_counter()
+            for i in range(num_repeat):
+                method(collection)
+            time_consume[method.__name__] = (time.perf_counter() - start_time) / num_repeat * 1000
+            remove_objects(collection = collection)
+        print("{}, {:.2f}, {:.2f}, {:.1f}x".format(num_obj,
+                                                   time_consume["per_object_transform"],
+                                                   time_consume["batched_transform"],
+                                                   time_consume["per_object_transform"] / time_consume["batched_transform"]))
+
+
+if __name__ == '__main__':
+    benchmark()
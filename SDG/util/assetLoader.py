@@ -0,0 +1,134 @@
+import bpy
+from util import assetPack
+
+
+"""
+Load objects from .blend asset files into the current blendfile.
+
+With the template cache enabled, the first import of an asset file keeps an unlinked copy (template) of every imported
+object, protected by a fake user. Later imports of the same file copy the templates in memory instead of parsing the
+.blend file again. Templates survive the incremental scene reset of the Initializer and are removed by the full reset.
+
+With an asset pack written by SDG_520_AssetPacker.py, the objects of the packed assets are built from the mesh arrays
+of the pack (util/assetPack.py), the assets which are not packed or whose pack entry is stale load the .blend file.
+"""
+
+
+# Asset filepath -> names of its template objects, only valid inside one blender session
+_asset_template_names = {}
+
+
+def _get_templates(filepath):
+    """Get the template objects of an asset file, None if the asset is not cached (or the cache was reset).
+
+    Args:
+        filepath (str): The path to the object asset.
+
+    Return:
+        templates (list of bpy.types.Object): The template objects of the asset file.
+    """
+    template_names = _asset_template_names.get(filepath)
+    if template_names is None:
+        return None
+
+    templates = []
+    for template_name in template_names:
+        template = bpy.data.objects.get(template_name)
+        if template is None or not template.get("sdg_template", False):
+            # Template removed by a full scene reset
+            del _asset_template_names[filepath]
+            return None
+        templates.append(template)
+
+    return templates
+
+
+def _create_templates(filepath, objects):
+    """Keep an unlinked copy of the imported objects as templates of the asset file.
+
+    Args:
+        filepath (str): The path to the object asset.
+        objects (list of bpy.types.Object): The objects imported from the asset file.
+    """
+    template_names = []
+    for obj in objects:
+        if obj.type != "MESH":
+            # Only mesh assets are cached, others always load from the .blend file
+            return
+    for obj in objects:
+        template = obj.copy()
+        template.data = obj.data.copy()
+        template["sdg_template"] = True
+        template["sdg_asset_path"] = filepath
+        template["sdg_object_name"] = obj.name
+        template.use_fake_user = True
+        template_names.append(template.name)
+    _asset_template_names[filepath] = template_names
+
+
+def _copy_templates(templates, collection):
+    """Copy the template objects and link the copies to a collection.
+
+    Args:
+        templates (list of bpy.types.Object): The template objects of an asset file.
+        collection (bpy.types.Collection): The collection the copies are linked to.
+
+    Return:
+        objects (list of bpy.types.Object): The copied objects.
+    """
+    objects = []
+    for template in templates:
+        obj = template.copy()
+        obj.data = template.data.copy()
+        obj.use_fake_user = False
+        del obj["sdg_template"]
+        obj.name = template["sdg_object_name"]
+        collection.objects.link(obj)
+        objects.append(obj)
+
+    return objects
+
+
+def load_object(filepath, collection, use_template_cache = False, asset_pack_path = None):
+    """Load asset from other blendfile to the current blendfile and link it to a collection.
+
+    Args:
+        filepath (str): The path to the object asset.
+        collection (bpy.types.Collection): The collection the loaded objects are linked to.
+        use_template_cache (bool): Copy cached templates instead of parsing the .blend file again.
+        asset_pack_path (str): The path of the asset pack to build the objects from, None always loads the .blend file.
+
+    Return:
+        objects (list of bpy.types.Object): The loaded objects.
+
+    References
+    ----------
+    https://studio.blender.org/training/scripting-for-artists/5eabe54d521eafd0953f6d45/
+    https://docs.blender.org/api/current/bpy.types.BlendDataLibraries.html
+    https://blender.stackexchange.com/questions/17876/import-object-without-bpy-ops-wm-link-append/33998#33998
+    https://blender.stackexchange.com/questions/34540/how-to-link-append-a-data-block-using-the-python-api?noredirect=1&lq=1
+    """
+    if use_template_cache:
+        templates = _get_templates(filepath)
+        if templates is not None:
+            return _copy_templates(templates, collection)
+
+    if asset_pack_path is not None:
+        objects = assetPack.load_object(pack_path = asset_pack_path, filepath = filepath, collection = collection)
+        if objects is not None:
+            return objects
+
+    # Append object from .blend file
+    with bpy.data.libraries.load(filepath, link = False, assets_only = True) as (data_from, data_to):
+        data_to.objects = data_from.objects
+    # Link object to current scene
+    objects = []
+    for obj in data_to.objects:
+        if obj is not None:
+            collection.objects.link(obj)
+            objects.append(obj)
+
+    if use_template_cache:
+        _create_templates(filepath, objects)
+
+    return objects
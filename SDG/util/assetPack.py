@@ -0,0 +1,346 @@
+import bpy
+import numpy as np
+import hashlib
+import json
+import os
+import struct
+
+
+"""
+Build objects from the asset pack written by SDG_520_AssetPacker.py instead of parsing their .blend files.
+
+The pack is one file: an 8 byte magic, the length and the JSON index of the packed assets, then the mesh arrays
+(vertex coordinates, loop vertex indices, polygon loop starts, material indices, smooth flags, UV maps and custom
+normals) aligned to 64 bytes. The file is memory-mapped, the arrays are numpy views of the mapping which are written
+into new meshes with foreach_set, so only the pages of the loaded assets are read.
+
+The materials of the packed objects are saved in a material library (.blend) next to the pack, loaded at once the
+first time a packed object is built in a blender session and kept with a fake user.
+
+Each packed asset records the size, modification time and SHA-1 of its .blend file, the pack records a version hash
+of the pack format, of every asset and of the material library. An asset whose .blend file changed, or every asset of
+a pack of another format or whose material library changed, is stale and load_object returns None, so the caller
+loads the .blend file instead.
+"""
+
+
+_pack_magic = b"SDGPACK1"
+_pack_format_version = 1
+_alignment = 64
+# Pack path -> {"index", "data", "data_offset"} of the opened pack, None if it can not be used, only valid inside one blender session
+_open_packs = {}
+# Asset filepath -> whether the pack entry of the asset matches the .blend file
+_asset_fresh = {}
+# Pack path -> material names in the pack paired with the names of the loaded materials
+_pack_material_names = {}
+
+
+def get_asset_key(filepath):
+    """Get the key of an asset in the pack index.
+
+    Args:
+        filepath (str): The path to the object asset.
+
+    Return:
+        asset_key (str): The normalized absolute path of the asset.
+    """
+    return os.path.normcase(os.path.abspath(filepath)).replace("\\", "/")
+
+
+def get_file_hash(filepath):
+    """Get the SHA-1 of a file.
+
+    Args:
+        filepath (str): The path of the file.
+
+    Return:
+        file_hash (str): The hexadecimal SHA-1 of the file content.
+    """
+    sha1 = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+
+def get_file_stamp(filepath):
+    """Get the size, modification time and SHA-1 of an asset file.
+
+    Args:
+        filepath (str): The path to the object asset.
+
+    Return:
+        file_stamp (dict of str: object): The "size", "mtime_ns" and "sha1" of the file.
+    """
+    stat = os.stat(filepath)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": get_file_hash(filepath)}
+
+
+def get_version_hash(asset_stamps, material_library_hash):
+    """Get the version hash of a pack.
+
+    Args:
+        asset_stamps (dict of str: dict): The asset keys paired with the file stamp of their .blend file.
+        material_library_hash (str): The SHA-1 of the material library.
+
+    Return:
+        version_hash (str): The SHA-1 of the pack format, of every asset and of the material library.
+    """
+    sha1 = hashlib.sha1(str(_pack_format_version).encode())
+    for asset_key in sorted(asset_stamps):
+        sha1.update(asset_key.encode())
+        sha1.update(asset_stamps[asset_key]["sha1"].encode())
+    sha1.update(material_library_hash.encode())
+
+    return sha1.hexdigest()
+
+
+def get_material_library_path(pack_path):
+    """Get the path of the material library of a pack.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+
+    Return:
+        material_library_path (str): The path of the .blend file holding the materials of the packed objects.
+    """
+    return os.path.splitext(pack_path)[0] + ".materials.blend"
+
+
+def write_pack(pack_path, assets, skipped_assets):
+    """Write the asset pack, its material library must be written first.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+        assets (dict of str: dict): The asset keys paired with the "stamp" of their .blend file and their "objects", each
+                                    object is a dict of its "name", "transform", "materials" and "arrays" (name: numpy.ndarray).
+        skipped_assets (dict of str: dict): The asset keys of the assets which can not be packed paired with the stamp of their .blend file.
+
+    Return:
+        version_hash (str): The version hash of the pack.
+    """
+    index = {"format_version": _pack_format_version, "assets": {}, "skipped_assets": skipped_assets}
+    array_list = []
+    offset = 0
+    for asset_key, asset in assets.items():
+        asset_entry = dict(asset["stamp"], objects = [])
+        for obj in asset["objects"]:
+            obj_entry = {"name": obj["name"], "transform": obj["transform"], "materials": obj["materials"], "arrays": {}}
+            for array_name, array in obj["arrays"].items():
+                array = np.ascontiguousarray(array)
+                obj_entry["arrays"][array_name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+                array_list.append((offset, array))
+                offset += -(-array.nbytes // _alignment) * _alignment
+            asset_entry["objects"].append(obj_entry)
+        index["assets"][asset_key] = asset_entry
+    index["material_library_sha1"] = get_file_hash(get_material_library_path(pack_path))
+    index["version_hash"] = get_version_hash(asset_stamps = dict(index["assets"], **skipped_assets),
+                                             material_library_hash = index["material_library_sha1"])
+
+    index_bytes = json.dumps(index).encode()
+    header_size = len(_pack_magic) + 8 + len(index_bytes)
+    data_offset = -(-header_size // _alignment) * _alignment
+    with open(pack_path + ".tmp", "wb") as f:
+        f.write(_pack_magic)
+        f.write(struct.pack("<Q", len(index_bytes)))
+        f.write(index_bytes)
+        f.write(b"\0" * (data_offset - header_size))
+        for array_offset, array in array_list:
+            f.seek(data_offset + array_offset)
+            f.write(array.tobytes())
+    os.replace(pack_path + ".tmp", pack_path)
+
+    return index["version_hash"]
+
+
+def read_index(pack_path):
+    """Read the index of an asset pack.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+
+    Return:
+        index (dict of str: object): The pack index, None if the file is not an asset pack of the current format.
+        data_offset (int): The position of the arrays in the file.
+    """
+    with open(pack_path, "rb") as f:
+        if f.read(len(_pack_magic)) != _pack_magic:
+            return None, 0
+        index_length = struct.unpack("<Q", f.read(8))[0]
+        index = json.loads(f.read(index_length))
+    if index.get("format_version") != _pack_format_version:
+        return None, 0
+
+    return index, -(-(len(_pack_magic) + 8 + index_length) // _alignment) * _alignment
+
+
+def _open_pack(pack_path):
+    """Open and memory-map an asset pack, keep it open for the blender session.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+
+    Return:
+        pack (dict of str: object): The "index", the memory-mapped "data" and the "data_offset" of the arrays, None if the pack can not be used.
+    """
+    if pack_path in _open_packs:
+        return _open_packs[pack_path]
+
+    pack = None
+    if not os.path.exists(pack_path):
+        print(f"Warning!!! asset pack {pack_path} not found, load the .blend files instead")
+    else:
+        index, data_offset = read_index(pack_path)
+        material_library_path = get_material_library_path(pack_path)
+        if index is None:
+            print(f"Warning!!! asset pack {pack_path} has another format, run SDG_520_AssetPacker.py again")
+        elif not os.path.exists(material_library_path) or get_file_hash(material_library_path) != index["material_library_sha1"]:
+            print(f"Warning!!! material library of asset pack {pack_path} changed, run SDG_520_AssetPacker.py again")
+        else:
+            pack = {"index": index, "data": np.memmap(pack_path, dtype = np.uint8, mode = "r"), "data_offset": data_offset}
+            print("Opened asset pack {} ({} assets, version {})".format(pack_path, len(index["assets"]), index["version_hash"][:12]))
+    _open_packs[pack_path] = pack
+
+    return pack
+
+
+def _is_asset_fresh(asset_entry, filepath):
+    """Check the pack entry of an asset matches its .blend file, the SHA-1 is only compared when the size or the modification time changed.
+
+    Args:
+        asset_entry (dict of str: object): The pack index entry of the asset.
+        filepath (str): The path to the object asset.
+
+    Return:
+        fresh (bool): True if the packed asset can be used.
+    """
+    if filepath not in _asset_fresh:
+        stat = os.stat(filepath)
+        fresh = stat.st_size == asset_entry["size"] and stat.st_mtime_ns == asset_entry["mtime_ns"]
+        if not fresh and stat.st_size == asset_entry["size"]:
+            fresh = get_file_hash(filepath) == asset_entry["sha1"]
+        if not fresh:
+            print(f"Warning!!! packed asset {filepath} is stale, load the .blend file instead")
+        _asset_fresh[filepath] = fresh
+
+    return _asset_fresh[filepath]
+
+
+def _get_array(pack, array_entry):
+    """Get a packed array as a view of the memory-mapped pack.
+
+    Args:
+        pack (dict of str: object): The opened pack.
+        array_entry (dict of str: object): The "offset", "dtype" and "shape" of the array.
+
+    Return:
+        array (numpy.ndarray): The flat array.
+    """
+    dtype = np.dtype(array_entry["dtype"])
+    count = int(np.prod(array_entry["shape"]))
+    start = pack["data_offset"] + array_entry["offset"]
+
+    return pack["data"][start:start + count * dtype.itemsize].view(dtype)
+
+
+def _get_materials(pack_path):
+    """Get the materials of the packed objects, load the material library if they are not loaded in the blender session.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+
+    Return:
+        materials (dict of str: bpy.types.Material): The material names in the pack paired with the loaded materials.
+    """
+    material_names = _pack_material_names.get(pack_path, {})
+    materials = {name: bpy.data.materials.get(loaded_name) for name, loaded_name in material_names.items()}
+    if pack_path in _pack_material_names and all(material is not None and material.get("sdg_pack_material", False) for material in materials.values()):
+        return materials
+
+    # First packed object of the session, or the materials were removed by a full scene reset
+    with bpy.data.libraries.load(get_material_library_path(pack_path), link = False) as (data_from, data_to):
+        data_to.materials = list(data_from.materials)
+        library_material_names = list(data_from.materials)
+    materials = {}
+    for name, material in zip(library_material_names, data_to.materials):
+        if material is None:
+            continue
+        material["sdg_pack_material"] = True
+        material.use_fake_user = True
+        materials[name] = material
+    _pack_material_names[pack_path] = {name: material.name for name, material in materials.items()}
+
+    return materials
+
+
+def _build_object(pack, obj_entry, materials, collection):
+    """Build a mesh object from its packed arrays.
+
+    Args:
+        pack (dict of str: object): The opened pack.
+        obj_entry (dict of str: object): The pack index entry of the object.
+        materials (dict of str: bpy.types.Material): The material names in the pack paired with the loaded materials.
+        collection (bpy.types.Collection): The collection the object is linked to.
+
+    Return:
+        obj (bpy.types.Object): The built object.
+    """
+    arrays = {array_name: _get_array(pack, array_entry) for array_name, array_entry in obj_entry["arrays"].items()}
+    mesh = bpy.data.meshes.new(obj_entry["name"])
+    mesh.vertices.add(len(arrays["co"]) // 3)
+    mesh.vertices.foreach_set("co", arrays["co"])
+    mesh.loops.add(len(arrays["loop_vertex_index"]))
+    mesh.loops.foreach_set("vertex_index", arrays["loop_vertex_index"])
+    mesh.polygons.add(len(arrays["loop_start"]))
+    mesh.polygons.foreach_set("loop_start", arrays["loop_start"])
+    # The polygon sizes are derived from the loop starts since blender 3.6
+    if bpy.app.version < (3, 6, 0):
+        mesh.polygons.foreach_set("loop_total", arrays["loop_total"])
+    mesh.polygons.foreach_set("material_index", arrays["material_index"])
+    mesh.polygons.foreach_set("use_smooth", arrays["use_smooth"])
+    for array_name, array in arrays.items():
+        if array_name.startswith("uv:"):
+            uv_layer = mesh.uv_layers.new(name = array_name[3:])
+            uv_layer.data.foreach_set("uv", array)
+    mesh.update(calc_edges = True)
+    if "normals" in arrays:
+        if bpy.app.version < (4, 1, 0):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set(arrays["normals"].reshape(-1, 3))
+    for material_name in obj_entry["materials"]:
+        mesh.materials.append(materials.get(material_name))
+
+    obj = bpy.data.objects.new(obj_entry["name"], mesh)
+    transform = obj_entry["transform"]
+    obj.rotation_mode = transform["rotation_mode"]
+    obj.location = transform["location"]
+    obj.rotation_euler = transform["rotation_euler"]
+    obj.scale = transform["scale"]
+    collection.objects.link(obj)
+
+    return obj
+
+
+def load_object(pack_path, filepath, collection):
+    """Build the objects of an asset from the pack and link them to a collection.
+
+    Args:
+        pack_path (str): The path of the asset pack.
+        filepath (str): The path to the object asset.
+        collection (bpy.types.Collection): The collection the built objects are linked to.
+
+    Return:
+        objects (list of bpy.types.Object): The built objects, None if the asset is not in the pack or is stale.
+    """
+    pack = _open_pack(pack_path)
+    if pack is None:
+        return None
+    asset_entry = pack["index"]["assets"].get(get_asset_key(filepath))
+    if asset_entry is None or not _is_asset_fresh(asset_entry, filepath):
+        return None
+
+    materials = _get_materials(pack_path)
+
+    return [_build_object(pack, obj_entry, materials, collection) for obj_entry in asset_entry["objects"]]
@@ -0,0 +1,96 @@
+import bpy
+import math
+import numpy as np
+
+
+"""
+Read and write the transforms of all objects of a collection with one foreach_get/foreach_set call per property.
+
+The randomizers draw the locations, rotations and scales of a whole collection as numpy arrays instead of setting
+Python tuples and mathutils.Euler one object at a time. Scaling multiplies the object scale, which gives the same
+result as scaling obj.dimensions without evaluating the bounding box of each object. foreach_set does not tag the
+objects for the depsgraph update, so the written objects are tagged afterwards.
+"""
+
+
+def get_transform(objects, attribute):
+    """Read a transform property of all objects.
+
+    Args:
+        objects (bpy.types.bpy_prop_collection): The objects, e.g. collection.objects.
+        attribute (str): "location", "rotation_euler" or "scale".
+
+    Return:
+        values (numpy.ndarray): The (number of objects, 3) property values.
+    """
+    values = np.empty(len(objects) * 3, dtype = np.float32)
+    objects.foreach_get(attribute, values)
+
+    return values.reshape(-1, 3)
+
+
+def set_transform(objects, attribute, values):
+    """Write a transform property of all objects and tag them for the depsgraph update.
+
+    Args:
+        objects (bpy.types.bpy_prop_collection): The objects, e.g. collection.objects.
+        attribute (str): "location", "rotation_euler" or "scale".
+        values (numpy.ndarray): The (number of objects, 3) property values.
+    """
+    objects.foreach_set(attribute, np.ascontiguousarray(values, dtype = np.float32).ravel())
+    for obj in objects:
+        obj.update_tag(refresh = {"OBJECT"})
+
+
+def set_locations(objects, locations):
+    """Move the first len(locations) objects to the locations, the other objects keep their location.
+
+    Args:
+        objects (bpy.types.bpy_prop_collection): The objects, e.g. collection.objects.
+        locations (numpy.ndarray): The (n, 2) or (n, 3) locations, z is 0 for 2D locations.
+    """
+    num_location = len(locations)
+    if num_location == 0:
+        return
+    all_locations = get_transform(objects, "location")
+    all_locations[:num_location, :] = 0
+    all_locations[:num_location, :locations.shape[1]] = locations
+    set_transform(objects, "location", all_locations)
+
+
+def randomize_rotations(objects, unified = False):
+    """Give the objects random XYZ euler rotations.
+
+    Args:
+        objects (bpy.types.bpy_prop_collection): The objects, e.g. collection.objects.
+        unified (bool): Give all objects the same random rotation.
+    """
+    num_obj = len(objects)
+    if num_obj == 0:
+        return
+    if unified:
+        rotations = np.tile(np.random.random(3) * 2 * math.pi, (num_obj, 1))
+    else:
+        rotations = np.random.random((num_obj, 3)) * 2 * math.pi
+    set_transform(objects, "rotation_euler", rotations)
+
+
+def randomize_scales(objects, scale_ratio_range):
+    """Multiply the scale of each object by a random ratio.
+
+    The ratio is drawn in steps of 0.1 in [min, max), or is max if min equals max.
+
+    Args:
+        objects (bpy.types.bpy_prop_collection): The objects, e.g. collection.objects.
+        scale_ratio_range (dict of str: float): The distribution of the scale ratio of objects.
+    """
+    num_obj = len(objects)
+    if num_obj == 0:
+        return
+    if scale_ratio_range["min"] == scale_ratio_range["max"]:
+        scale_ratio = np.full(num_obj, scale_ratio_range["max"], dtype = np.float32)
+    else:
+        scale_ratio = np.random.randint(int(scale_ratio_range["min"]*10),
+                                        int(scale_ratio_range["max"]*10), size = num_obj).astype(np.float32)/10
+    scales = get_transform(objects, "scale") * scale_ratio[:, np.newaxis]
+    set_transform(objects, "scale", scales)
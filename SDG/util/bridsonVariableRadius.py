@@ -1,17 +1,149 @@
 import numpy as np
+import os
 
 
 """
-Implementation of the fast Poisson Disk Sampling algorithm of 
-Bridson (2007) adapted to support spatially varying sampling radii. 
+Implementation of the fast Poisson Disk Sampling algorithm of
+Bridson (2007) adapted to support spatially varying sampling radii.
 
 Adrian Bittner, 2021
-Published under MIT license. 
+Published under MIT license.
+
+Rewritten for the placement randomizers: the particles are stored in a background grid used as a spatial hash whose
+cells are small enough to hold at most one particle, the k candidates around an active particle are generated and
+checked against the particles of the grid window around it as one numpy batch, and the sampling domain is given in
+blender units with the radius map stretched over its first two axes.
 """
 
 
-def getGridCoordinates(coords):
-    return np.floor(coords).astype('int')
+def make_radius_map(radius_range, density_map, resolution = 64):
+    """Make a radius map from a density map, the densest cells get the minimum radius.
+
+    Args:
+        radius_range (dict of str: float): The minimum and maximum sampling radius.
+        density_map (str): "center" for dense placement at the center and sparse edges, "edge" for the opposite, or the
+                           path to a .npy 2d array of densities in [0, 1] whose rows follow the y axis and columns the x axis.
+        resolution (int): The number of rows and columns of the "center" and "edge" maps.
+
+    Return:
+        radius_map (numpy.ndarray): 2d array of the sampling radius over the first two axes of the sampling domain.
+    """
+    if density_map in ["center", "edge"]:
+        axis = (np.arange(resolution) + 0.5) / resolution * 2 - 1
+        distance_to_center = np.minimum(np.hypot(axis[:, None], axis[None, :]), 1)
+        density = 1 - distance_to_center if density_map == "center" else distance_to_center
+    elif os.path.splitext(density_map)[1] == ".npy":
+        density = np.clip(np.load(density_map).astype(float), 0, 1)
+    else:
+        raise ValueError(f"unknown density map {density_map}")
+
+    return radius_range["max"] - density * (radius_range["max"] - radius_range["min"])
+
+
+def _get_radius(radius_map, points, sample_domain_size):
+    """Look up the sampling radius at each point.
+
+    Args:
+        radius_map (numpy.ndarray): 2d array of the sampling radius, rows follow the second and columns the first axis.
+        points (numpy.ndarray): (n, dimension) array of points.
+        sample_domain_size (numpy.ndarray): The size of the sampling domain.
+
+    Return:
+        radius (numpy.ndarray): The sampling radius at each point.
+    """
+    num_row, num_col = radius_map.shape
+    col = np.clip((points[:, 0] / sample_domain_size[0] * num_col).astype(int), 0, num_col - 1)
+    row = np.clip((points[:, 1] / sample_domain_size[1] * num_row).astype(int), 0, num_row - 1)
+
+    return radius_map[row, col]
+
+
+def variable_radius_poisson_disc_sampling(radius_map, sample_domain_size, k = 30, radius_type = 'default'):
+    """Sample points whose distance to each other is at least the larger sampling radius of the two points.
+
+    Args:
+        radius_map (numpy.ndarray): 2d array of the sampling radius over the first two axes of the sampling domain,
+                                    rows follow the second axis (y) and columns the first axis (x).
+        sample_domain_size (numpy.ndarray): The size of the sampling domain, 2 or 3 dimensional.
+        k (int): Number of candidates generated around an active point before it is removed from the active list.
+        radius_type (str): 'default' generates the candidates uniformly between r and 2r from the active point,
+                           'normDist' at distances drawn from a normal distribution around 1.5r with a dispersion of 0.2r.
+
+    Return:
+        points (numpy.ndarray): (n, dimension) array of the sampled points.
+    """
+    sample_domain_size = np.asarray(sample_domain_size, dtype = float)
+    radius_map = np.asarray(radius_map, dtype = float)
+    dimension = sample_domain_size.shape[0]
+    min_radius = radius_map.min()
+    max_radius = radius_map.max()
+
+    # A cell diagonal equals the minimum radius, so a cell holds at most one point
+    cell_size = min_radius / np.sqrt(dimension)
+    grid_shape = np.maximum(np.ceil(sample_domain_size / cell_size).astype(int), 1)
+    grid = np.full(grid_shape, -1, dtype = np.int64)
+    capacity = int(np.prod(grid_shape))
+    points = np.empty((capacity, dimension))
+    point_radius = np.empty(capacity)
+    max_distance_factor = 2 if radius_type == 'default' else 1.5 + 5 * 0.2
+
+    initial_point = np.random.random(dimension) * sample_domain_size
+    points[0] = initial_point
+    point_radius[0] = _get_radius(radius_map, initial_point[None, :], sample_domain_size)[0]
+    grid[tuple((initial_point // cell_size).astype(int))] = 0
+    num_point = 1
+    active_list = [0]
+
+    while active_list:
+        active_index = np.random.randint(len(active_list))
+        active_point = points[active_list[active_index]]
+        active_radius = point_radius[active_list[active_index]]
+
+        # Generate the batch of candidates in the annulus around the active point
+        directions = np.random.normal(size = (k, dimension))
+        directions /= np.linalg.norm(directions, axis = 1, keepdims = True)
+        if radius_type == 'default':
+            distances = active_radius * (np.random.random(k) + 1)
+        else:
+            distances = active_radius * np.clip(np.random.normal(1.5, 0.2, k), 1, max_distance_factor)
+        candidates = active_point + directions * distances[:, None]
+        candidates = candidates[np.all((candidates >= 0) & (candidates < sample_domain_size), axis = 1)]
+
+        accepted = False
+        if len(candidates) > 0:
+            candidate_radius = _get_radius(radius_map, candidates, sample_domain_size)
+
+            # Points which may conflict with a candidate are in the grid window around the active point
+            reach = active_radius * max_distance_factor + max_radius
+            low = np.maximum(((active_point - reach) // cell_size).astype(int), 0)
+            high = np.minimum(((active_point + reach) // cell_size).astype(int) + 1, grid_shape)
+            neighbors = grid[tuple(slice(l, h) for l, h in zip(low, high))]
+            neighbors = neighbors[neighbors >= 0]
+
+            valid = np.ones(len(candidates), dtype = bool)
+            if len(neighbors) > 0:
+                squared_distance = ((candidates[:, None, :] - points[neighbors][None, :, :]) ** 2).sum(axis = 2)
+                required_distance = np.maximum(candidate_radius[:, None], point_radius[neighbors][None, :])
+                valid = np.all(squared_distance >= required_distance ** 2, axis = 1)
+
+            for candidate_index in np.flatnonzero(valid):
+                cell = tuple((candidates[candidate_index] // cell_size).astype(int))
+                if grid[cell] >= 0:
+                    continue
+                points[num_point] = candidates[candidate_index]
+                point_radius[num_point] = candidate_radius[candidate_index]
+                grid[cell] = num_point
+                active_list.append(num_point)
+                num_point += 1
+                accepted = True
+                break
+
+        if not accepted:
+            # No new point could be placed around the active point, remove it from the active list
+            active_list[active_index] = active_list[-1]
+            active_list.pop()
+
+    return points[:num_point].copy()
 
 
 def poissonDiskSampling(radius, k=30, radiusType='default'):
@@ -26,77 +158,12 @@ def poissonDiskSampling(radius, k=30, radiusType='default'):
                        'normDist' instead creates new particles at distances drawn from a normal distribution centered
                        around 1.5r with a dispersion of 0.2r.
     :return: nParticle: Number of particles in the sampling.
-             particleCoordinates: 2d array containing the coordinates of the created particles.
+             particleCoordinates: 2d array containing the (row, column) coordinates of the created particles.
     """
-    # Set-up background grid
     gridHeight, gridWidth = radius.shape
-    grid = np.zeros((gridHeight, gridWidth))
-
-    # Pick initial (active) point
-    coords = (np.random.random() * gridHeight, np.random.random() * gridWidth)
-    idx = getGridCoordinates(coords)
-    nParticle = 1
-    grid[idx[0], idx[1]] = nParticle
-
-    # Initialise active queue
-    queue = [coords]  # Appending to list is much quicker than to numpy array, if you do it very often
-    particleCoordinates = [coords] # List containing the exact positions of the final particles
-
-    # Continue iteration while there is still points in active list
-    while queue:
-
-        # Pick random element in active queue
-        idx = np.random.randint(len(queue))
-        activeCoords = queue[idx]
-        activeGridCoords = getGridCoordinates(activeCoords)
-
-        success = False
-        for _ in range(k):
-
-            if radiusType == 'default':
-                # Pick radius for new sample particle ranging between 1 and 2 times the local radius
-                newRadius = radius[activeGridCoords[1], activeGridCoords[0]] * (np.random.random() + 1)
-            elif radiusType == 'normDist':
-                # Pick radius for new sample particle from a normal distribution around 1.5 times the local radius
-                newRadius = radius[activeGridCoords[1], activeGridCoords[0]] * np.random.normal(1.5, 0.2)
-
-            # Pick the angle to the sample particle and determine its coordinates
-            angle = 2 * np.pi * np.random.random()
-            newCoords = np.zeros(2)
-            newCoords[0] = activeCoords[0] + newRadius * np.sin(angle)
-            newCoords[1] = activeCoords[1] + newRadius * np.cos(angle)
-
-            # Prevent that the new particle is outside of the grid
-            if not (0 <= newCoords[1] <= gridWidth and 0 <= newCoords[0] <= gridHeight):
-                continue
-
-            # Check that particle is not too close to other particle
-            newGridCoords = getGridCoordinates((newCoords[1], newCoords[0]))
-
-            radiusThere = np.ceil(radius[newGridCoords[1], newGridCoords[0]])
-            gridRangeX = (np.max([newGridCoords[0] - radiusThere, 0]).astype('int'),
-                          np.min([newGridCoords[0] + radiusThere + 1, gridWidth]).astype('int'))
-            gridRangeY = (np.max([newGridCoords[1] - radiusThere, 0]).astype('int'),
-                          np.min([newGridCoords[1] + radiusThere + 1, gridHeight]).astype('int'))
-
-            searchGrid = grid[slice(gridRangeY[0], gridRangeY[1]), slice(gridRangeX[0], gridRangeX[1])]
-            conflicts = np.where(searchGrid > 0)
-
-            if len(conflicts[0]) == 0 and len(conflicts[1]) == 0:
-                # No conflicts detected. Create a new particle at this position!
-                queue.append(newCoords)
-                particleCoordinates.append(newCoords)
-                nParticle += 1
-                grid[newGridCoords[1], newGridCoords[0]] = nParticle
-                success = True
-
-            else:
-                # There is a conflict. Do NOT create a new particle at this position!
-                continue
-
-        if success == False:
-            # No new particle could be associated to the currently active particle.
-            # Remove current particle from the active queue!
-            del queue[idx]
-
-    return(nParticle, np.array(particleCoordinates))
+    points = variable_radius_poisson_disc_sampling(radius_map = radius,
+                                                   sample_domain_size = np.array([gridWidth, gridHeight], dtype = float),
+                                                   k = k,
+                                                   radius_type = radiusType)
+
+    return(len(points), points[:, ::-1])
@@ -0,0 +1,94 @@
+import json
+import numpy as np
+
+
+"""
+Select the foreground assets of an image so the labeled instances per class converge to a target distribution.
+
+The target share of each class is uniform or proportional to its weight. Before each pick, the deficit of a class is
+the number of instances it should have once the image is labeled minus the number it has, the asset is drawn with a
+probability proportional to the deficit of its class. A small share of the target is added to every deficit, so a
+class above its target can still be drawn, which keeps the images varied. An asset is picked again only once every
+asset was picked in the image, like the round-robin import of the random policy.
+"""
+
+
+def load_class_weights(class_weights_path):
+    """Load the per-class weights of the target distribution.
+
+    Args:
+        class_weights_path (str): The path of a JSON object {class name: weight}, None for a uniform distribution.
+
+    Return:
+        class_weights (dict of str: float): The class names paired with their weight, None for a uniform distribution.
+    """
+    if class_weights_path is None:
+        return None
+    with open(class_weights_path) as f:
+        return json.load(f)
+
+
+def get_target_share(class_ids, class_weights = None):
+    """Get the target share of each class.
+
+    Args:
+        class_ids (list of str): The classes of the assets, a class can appear several times.
+        class_weights (dict of str: float): The classes paired with their weight, a missing class has weight 0, None for a uniform distribution.
+
+    Return:
+        target_share (dict of str: float): The classes paired with their share of the instances, summing to 1.
+    """
+    class_ids = sorted(set(class_ids))
+    if class_weights is None:
+        weights = np.ones(len(class_ids))
+    else:
+        weights = np.array([class_weights.get(class_id, 0) for class_id in class_ids], dtype = np.float64)
+        if weights.sum() <= 0:
+            print("Warning!!! no class of the assets has a positive weight, use a uniform distribution")
+            weights = np.ones(len(class_ids))
+
+    return dict(zip(class_ids, weights / weights.sum()))
+
+
+def select_balanced(asset_class_ids, num_select, class_instance_num, target_share, smoothing = 0.05):
+    """Select assets for one image by the deficit of their class.
+
+    Args:
+        asset_class_ids (list of str): The class of each asset.
+        num_select (int): Number of assets in the image.
+        class_instance_num (dict of str: int): The labeled instances of each class so far.
+        target_share (dict of str: float): The classes paired with their target share of the instances.
+        smoothing (float): Share of the target count added to every deficit.
+
+    Return:
+        selected_indices (list of int): The indices of the selected assets.
+    """
+    num_asset = len(asset_class_ids)
+    share = np.array([target_share.get(class_id, 0) for class_id in asset_class_ids], dtype = np.float64)
+    asset_num = np.array([class_instance_num.get(class_id, 0) for class_id in asset_class_ids], dtype = np.float64)
+    # Assets sharing a class share its target and its count
+    num_asset_of_class = {}
+    for class_id in asset_class_ids:
+        num_asset_of_class[class_id] = num_asset_of_class.get(class_id, 0) + 1
+    num_asset_of_class = np.array([num_asset_of_class[class_id] for class_id in asset_class_ids], dtype = np.float64)
+
+    total_num = sum(class_instance_num.get(class_id, 0) for class_id in target_share) + num_select
+    available = np.ones(num_asset, dtype = bool)
+    selected_indices = []
+    for i in range(num_select):
+        if not available.any():
+            available[:] = True
+        target_num = share * total_num
+        deficit = np.maximum(target_num - asset_num, 0) + smoothing * target_num
+        probability = np.where(available, deficit / num_asset_of_class, 0)
+        if probability.sum() <= 0:
+            probability = (available & (share > 0)).astype(np.float64)
+        if probability.sum() <= 0:
+            probability = available.astype(np.float64)
+        index = int(np.random.choice(num_asset, p = probability / probability.sum()))
+        selected_indices.append(index)
+        available[index] = False
+        # Count the pick for every asset of the same class
+        asset_num[[j for j in range(num_asset) if asset_class_ids[j] == asset_class_ids[index]]] += 1
+
+    return selected_indices
@@ -0,0 +1,59 @@
+import sys
+
+
+"""
+Exit codes of the blender sessions running SDG_300_DataGenerator.py and of the run supervisors.
+
+A randomizer which can not continue prints the error and exits with the code of its failure class instead of waiting
+for a key press, so an unattended run never blocks. SDG_400_Looper.py restarts the failed sessions with a backoff,
+except after a configuration error, which fails again in every session and aborts the run.
+"""
+
+
+SUCCESS = 0
+ASSET_NOT_FOUND = 10 # An asset folder has no asset
+PLACEMENT_FAILED = 11 # The Poisson disk sampling has fewer particles than objects to place
+MATERIAL_MISMATCH = 12 # The number of selected textures differs from the number of objects
+UNEXPECTED_ERROR = 20 # An uncaught Python exception, passed to blender with --python-exit-code
+IMAGE_TIMEOUT = 30 # The session made no progress for image_timeout_s and was killed by the watchdog
+RUN_ABORTED = 40 # The supervisor gave up after a configuration error or too many consecutive failures
+
+exit_code_names = {
+    SUCCESS: "success",
+    ASSET_NOT_FOUND: "asset_not_found",
+    PLACEMENT_FAILED: "placement_failed",
+    MATERIAL_MISMATCH: "material_mismatch",
+    UNEXPECTED_ERROR: "unexpected_error",
+    IMAGE_TIMEOUT: "image_timeout",
+    RUN_ABORTED: "run_aborted"
+}
+
+# Failures which happen again in every session with the same configuration
+configuration_errors = {ASSET_NOT_FOUND}
+
+
+def fail(exit_code, message):
+    """Print the error and exit the blender session with the exit code of the failure class.
+
+    Args:
+        exit_code (int): The exit code of the failure class.
+        message (str): The error message.
+    """
+    print(f"ERROR!!! {message} (exit code {exit_code}: {exit_code_names.get(exit_code, 'unknown')})")
+    sys.stdout.flush()
+    sys.exit(exit_code)
+
+
+def get_exit_code_name(exit_code):
+    """Get the name of the failure class of an exit code.
+
+    Args:
+        exit_code (int): The exit code of a blender session, negative if the process was killed by a signal.
+
+    Return:
+        exit_code_name (str): The name of the failure class.
+    """
+    if exit_code is not None and exit_code < 0:
+        return "killed"
+
+    return exit_code_names.get(exit_code, f"exit_code_{exit_code}")
@@ -0,0 +1,195 @@
+import bpy
+import numpy as np
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+"""
+Write downscaled copies of the rendered image and its labels for the other training input sizes.
+
+The pixels of the blender render result can not be read from python and the compositor Viewer node holds the object
+index pass of the labeler, so the rendered PNG is read once into a numpy array on the main thread, because bpy may
+only be used there. An image composited over a background plate is passed as the numpy array it was written from,
+without reading it again. The time of the reads is kept in get_statistics(). The area averaged resampling and the PNG encoding run on a thread pool while blender goes on with the next image, numpy and
+zlib release the GIL during the heavy work. The YOLO labels are normalized, so they are the same at every resolution,
+except the boxes smaller than the minimum box size at a resolution which are left out of its label file.
+"""
+
+
+# Only valid inside one blender session
+_executor = None
+_pending_futures = []
+_statistics = {"num_reload": 0, "reload_time": 0.0}
+
+
+def get_resolution_path(output_path, long_side):
+    """Get the output folder of a resolution, next to the full resolution folder.
+
+    Args:
+        output_path (str): The full resolution output folder, e.g. gen_data/images.
+        long_side (int): The long side of the resolution in pixels.
+
+    Return:
+        resolution_path (str): The output folder of the resolution, e.g. gen_data/images_1280.
+    """
+    return os.path.normpath(output_path) + f"_{long_side}"
+
+
+def area_resize(image, out_width, out_height):
+    """Downscale an image by averaging the area of the source pixels each output pixel covers.
+
+    Each axis is resampled from the cumulative sum of the pixels, the sum over a fractional interval is interpolated
+    linearly inside the boundary pixels, which is exact for pixels of constant value.
+
+    Args:
+        image (numpy.ndarray): The (height, width, channels) float32 image.
+        out_width (int): The width of the output image.
+        out_height (int): The height of the output image.
+
+    Return:
+        resized_image (numpy.ndarray): The (out_height, out_width, channels) float32 image.
+    """
+    def resize_axis(array, out_size, axis):
+        in_size = array.shape[axis]
+        cumulative = np.cumsum(array, axis = axis, dtype = np.float64)
+        cumulative = np.concatenate([np.zeros_like(np.take(cumulative, [0], axis = axis)), cumulative], axis = axis)
+        boundaries = np.arange(out_size + 1) * in_size / out_size
+        index = np.minimum(np.floor(boundaries).astype(np.int64), in_size - 1)
+        fraction = (boundaries - index).astype(np.float64)
+        shape = [1] * array.ndim
+        shape[axis] = out_size + 1
+        lower = np.take(cumulative, index, axis = axis)
+        upper = np.take(cumulative, index + 1, axis = axis)
+        integral = lower + fraction.reshape(shape) * (upper - lower)
+        return (np.diff(integral, axis = axis) * (out_size / in_size)).astype(np.float32)
+
+    return resize_axis(resize_axis(image, out_height, axis = 0), out_width, axis = 1)
+
+
+def write_png(filepath, image):
+    """Write an 8-bit PNG file without an image library.
+
+    Args:
+        filepath (str): The path of the PNG file.
+        image (numpy.ndarray): The (height, width, 3 or 4) image with values in [0, 1], the first row is the top.
+    """
+    height, width, num_channel = image.shape
+    pixels = np.clip(np.rint(image * 255), 0, 255).astype(np.uint8).reshape(height, width * num_channel)
+    # Filter type 0 (None) before each row
+    raw_data = np.concatenate([np.zeros((height, 1), dtype = np.uint8), pixels], axis = 1).tobytes()
+
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff)
+
+    color_type = 6 if num_channel == 4 else 2
+    with open(filepath, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw_data, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def filter_labels(labels, out_width, out_height, min_box_size):
+    """Leave out the boxes smaller than the minimum box size at a resolution.
+
+    Args:
+        labels (list of tuple): The (class id, center x, center y, width, height) normalized YOLO labels.
+        out_width (int): The width of the resolution.
+        out_height (int): The height of the resolution.
+        min_box_size (int): The minimum width and height of a box in pixels.
+
+    Return:
+        filtered_labels (list of tuple): The labels of the boxes large enough at the resolution.
+    """
+    return [label for label in labels if label[3] * out_width >= min_box_size and label[4] * out_height >= min_box_size]
+
+
+def _write_resolutions(image, gen_img_id, labels, output_img_path, output_label_path, long_sides, min_box_size):
+    """Write the downscaled images and labels of one render, run on the thread pool.
+
+    Args:
+        image (numpy.ndarray): The (height, width, channels) full resolution image, the first row is the top.
+        gen_img_id (str): ID of the generated synthetic image data.
+        labels (list of tuple): The (class id, center x, center y, width, height) normalized YOLO labels.
+        output_img_path (str): The full resolution image folder.
+        output_label_path (str): The full resolution label folder.
+        long_sides (list of int): The long side of each resolution in pixels.
+        min_box_size (int): The minimum width and height of a box in pixels.
+    """
+    height, width = image.shape[:2]
+    for long_side in long_sides:
+        scale = long_side / max(width, height)
+        if scale >= 1:
+            print(f"Warning!!! output long side {long_side} is not smaller than the render, skip it")
+            continue
+        out_width, out_height = max(round(width * scale), 1), max(round(height * scale), 1)
+        img_folder_path = get_resolution_path(output_img_path, long_side)
+        label_folder_path = get_resolution_path(output_label_path, long_side)
+        os.makedirs(img_folder_path, exist_ok = True)
+        os.makedirs(label_folder_path, exist_ok = True)
+
+        write_png(os.path.join(img_folder_path, gen_img_id + ".png"), area_resize(image, out_width, out_height))
+        resolution_labels = filter_labels(labels, out_width, out_height, min_box_size)
+        with open(os.path.join(label_folder_path, gen_img_id + ".txt"), "w") as f:
+            f.write("\n".join(" ".join(str(value) for value in label) for label in resolution_labels))
+
+
+def submit(img_file_path, gen_img_id, labels, output_img_path, output_label_path, long_sides, min_box_size = 8, num_resize_threads = 2,
+           pixels = None):
+    """Read the rendered image and write its downscaled copies on the thread pool.
+
+    At most two images per thread wait in the pool, so the memory stays bounded when resizing is slower than rendering.
+
+    Args:
+        img_file_path (str): The path of the rendered full resolution PNG.
+        gen_img_id (str): ID of the generated synthetic image data.
+        labels (list of tuple): The (class id, center x, center y, width, height) normalized YOLO labels.
+        output_img_path (str): The full resolution image folder.
+        output_label_path (str): The full resolution label folder.
+        long_sides (list of int): The long side of each resolution in pixels.
+        min_box_size (int): The minimum width and height of a box in pixels.
+        num_resize_threads (int): Number of threads of the pool.
+        pixels (numpy.ndarray): The (height, width, channels) full resolution image already in memory, the first row is
+                                the top, None reads img_file_path.
+    """
+    global _executor
+    if len(long_sides) == 0:
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers = num_resize_threads)
+
+    if pixels is None:
+        start_time = time.perf_counter()
+        image = bpy.data.images.load(img_file_path)
+        width, height = image.size
+        num_channel = image.channels
+        pixels = np.empty(width * height * num_channel, dtype = np.float32)
+        image.pixels.foreach_get(pixels)
+        bpy.data.images.remove(image)
+        # Blender stores the bottom row first
+        pixels = np.flipud(pixels.reshape(height, width, num_channel))
+        _statistics["num_reload"] += 1
+        _statistics["reload_time"] += time.perf_counter() - start_time
+
+    while len(_pending_futures) >= 2 * num_resize_threads:
+        _pending_futures.pop(0).result()
+    _pending_futures.append(_executor.submit(_write_resolutions, pixels, gen_img_id, labels,
+                                             output_img_path, output_label_path, long_sides, min_box_size))
+
+
+def get_statistics():
+    """Get the number and time of the rendered images read again in the blender session.
+
+    Return:
+        statistics (dict of str: float): The "num_reload" and the "reload_time" in seconds.
+    """
+    return dict(_statistics)
+
+
+def wait_all():
+    """Wait until every submitted image is written, call it before blender exits."""
+    while len(_pending_futures) > 0:
+        _pending_futures.pop(0).result()
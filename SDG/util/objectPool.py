@@ -0,0 +1,126 @@
+import bpy
+from util import assetLoader
+
+
+"""
+A pool of already imported objects which are reused by the following images of a blender session.
+
+Before the incremental scene reset, the objects of the scene collections are released to the pool: their transform
+is restored and they are moved to a collection which is not linked to the scene, so they are neither evaluated nor
+rendered. The placement randomizers acquire objects from the pool and import an asset only when the pool has no
+object of it left. Only assets made of one object are pooled.
+"""
+
+
+_pool_collection_name = "SDGObjectPool"
+# Asset filepath -> names of the pooled objects of the asset, only valid inside one blender session
+_pooled_object_names = {}
+_pool_statistics = {"hit": 0, "miss": 0, "frame_hit": 0, "frame_miss": 0, "frame_released": 0}
+
+
+def _get_pool_collection():
+    """Get the collection holding the pooled objects, create it if the pool is empty or was removed by a full reset.
+
+    Return:
+        pool_collection (bpy.types.Collection): The collection holding the pooled objects.
+    """
+    pool_collection = bpy.data.collections.get(_pool_collection_name)
+    if pool_collection is None:
+        pool_collection = bpy.data.collections.new(_pool_collection_name)
+        pool_collection.use_fake_user = True
+        _pooled_object_names.clear()
+
+    return pool_collection
+
+
+def acquire_object(filepath, collection, use_template_cache = False, asset_pack_path = None):
+    """Link a pooled object of an asset to a collection, import the asset if the pool has no object of it left.
+
+    Args:
+        filepath (str): The path to the object asset.
+        collection (bpy.types.Collection): The collection the objects are linked to.
+        use_template_cache (bool): Copy cached templates instead of parsing the .blend file again on a pool miss.
+        asset_pack_path (str): The path of the asset pack to build the objects from on a pool miss, None loads the .blend file.
+
+    Return:
+        objects (list of bpy.types.Object): The acquired objects.
+    """
+    pool_collection = _get_pool_collection()
+    pooled_names = _pooled_object_names.get(filepath, [])
+    while pooled_names:
+        obj = bpy.data.objects.get(pooled_names.pop())
+        if obj is None:
+            continue
+        pool_collection.objects.unlink(obj)
+        collection.objects.link(obj)
+        _pool_statistics["hit"] += 1
+        _pool_statistics["frame_hit"] += 1
+        return [obj]
+
+    _pool_statistics["miss"] += 1
+    _pool_statistics["frame_miss"] += 1
+    objects = assetLoader.load_object(filepath = filepath, collection = collection, use_template_cache = use_template_cache,
+                                      asset_pack_path = asset_pack_path)
+    if len(objects) == 1:
+        obj = objects[0]
+        obj["sdg_asset_path"] = filepath
+        obj["sdg_base_location"] = tuple(obj.location)
+        obj["sdg_base_rotation"] = tuple(obj.rotation_euler)
+        obj["sdg_base_scale"] = tuple(obj.scale)
+
+    return objects
+
+
+def release_objects(collections, max_pooled_object_per_asset = 32):
+    """Move the pooled assets of the collections to the pool and restore their transform.
+
+    Objects above max_pooled_object_per_asset stay in the collections and are removed by the scene reset.
+
+    Args:
+        collections (list of bpy.types.Collection): The collections whose objects are released.
+        max_pooled_object_per_asset (int): The maximum number of pooled objects of each asset.
+
+    Return:
+        num_released (int): The quantity of objects moved to the pool.
+    """
+    pool_collection = _get_pool_collection()
+    num_released = 0
+    for collection in collections:
+        for obj in list(collection.objects):
+            filepath = obj.get("sdg_asset_path")
+            if filepath is None or "sdg_base_scale" not in obj:
+                continue
+            pooled_names = _pooled_object_names.setdefault(filepath, [])
+            if len(pooled_names) >= max_pooled_object_per_asset:
+                continue
+            # Randomizers scale the current object dimensions, always start from the imported transform
+            obj.location = obj["sdg_base_location"]
+            obj.rotation_euler = obj["sdg_base_rotation"]
+            obj.scale = obj["sdg_base_scale"]
+            # Per-frame materials of the texture randomizers would keep their images alive
+            if obj.data is not None:
+                for index, material in enumerate(obj.data.materials):
+                    if material is not None and material.get("sdg_per_frame", False):
+                        obj.data.materials[index] = None
+            collection.objects.unlink(obj)
+            pool_collection.objects.link(obj)
+            pooled_names.append(obj.name)
+            num_released += 1
+
+    _pool_statistics["frame_hit"] = 0
+    _pool_statistics["frame_miss"] = 0
+    _pool_statistics["frame_released"] = num_released
+
+    return num_released
+
+
+def get_pool_statistics():
+    """Get the hit and miss counts of the pool, in the blender session and in the current image.
+
+    Return:
+        pool_statistics (dict of str: int): The hit and miss counts and the number of pooled objects.
+    """
+    pool_statistics = dict(_pool_statistics)
+    pool_statistics["pooled"] = sum(len(names) for names in _pooled_object_names.values())
+
+    return pool_statistics
@@ -44,7 +44,7 @@ def _get_random_n_dim_vector(dimension: int, min_length: float, max_length: floa
     length = np.random.uniform(min_length, max_length)
     vector = np.empty(dimension)
     for i in range(dimension):
-        x_i = length * np.product(np.sin(random_angles[:i]))
+        x_i = length * np.prod(np.sin(random_angles[:i]))
         if i != dimension - 1:
             x_i *= np.cos(random_angles[i])
         vector[i] = x_i
@@ -0,0 +1,80 @@
+import bpy
+
+
+"""
+Detect the Cycles render devices of the current machine and configure a scene to use them.
+
+The GPU backends are probed in order of preference, the first backend with at least one device is used. Machines without
+a supported GPU render on the CPU, with a fixed number of threads if requested.
+"""
+
+
+_gpu_device_types = ["OPTIX", "CUDA", "HIP", "METAL", "ONEAPI"]
+# Result of the device probe, only valid inside one blender session
+_probed_device = None
+
+
+def probe_render_device():
+    """Detect the Cycles compute device type of the current machine.
+
+    Return:
+        render_device (str): "GPU" if a supported GPU is found, else "CPU".
+        compute_device_type (str): The Cycles compute device type, "NONE" for the CPU.
+
+    References
+    ----------
+    https://docs.blender.org/manual/en/latest/render/cycles/gpu_rendering.html
+    https://blender.stackexchange.com/questions/154310/selecting-between-cpu-and-cuda-devices-from-the-command-line
+    """
+    global _probed_device
+    if _probed_device is not None:
+        return _probed_device
+
+    cycles_preferences = bpy.context.preferences.addons["cycles"].preferences
+    for device_type in _gpu_device_types:
+        try:
+            cycles_preferences.compute_device_type = device_type
+        except TypeError:
+            # Backend is not available in this blender build
+            continue
+        if hasattr(cycles_preferences, "refresh_devices"):
+            cycles_preferences.refresh_devices()
+        else:
+            cycles_preferences.get_devices()
+        gpu_devices = [device for device in cycles_preferences.devices if device.type == device_type]
+        if len(gpu_devices) > 0:
+            for device in cycles_preferences.devices:
+                device.use = device.type == device_type
+            _probed_device = ("GPU", device_type)
+            print(f"Render device: GPU ({device_type}) {[device.name for device in gpu_devices]}")
+            return _probed_device
+
+    cycles_preferences.compute_device_type = "NONE"
+    _probed_device = ("CPU", "NONE")
+    print("Render device: CPU")
+
+    return _probed_device
+
+
+def configure_render_device(scene, render_device = "AUTO", num_render_threads = 0):
+    """Set the Cycles device and the number of render threads of a scene.
+
+    Args:
+        scene (bpy.types.Scene): The scene to configure.
+        render_device (str): "AUTO" to probe the machine, "GPU" or "CPU" to force a device.
+        num_render_threads (int): Number of CPU render threads, 0 to let blender detect it.
+
+    Return:
+        render_device (str): The device used by the scene, "GPU" or "CPU".
+    """
+    if render_device == "AUTO":
+        render_device = probe_render_device()[0]
+    scene.cycles.device = render_device
+
+    if num_render_threads > 0:
+        scene.render.threads_mode = "FIXED"
+        scene.render.threads = num_render_threads
+    else:
+        scene.render.threads_mode = "AUTO"
+
+    return render_device
@@ -0,0 +1,78 @@
+import os
+import time
+
+
+"""
+Detect the hung blender sessions of a run and space out the restarts of failing sessions.
+
+SDG_300_DataGenerator.py rewrites its session report after each image or timeline batch, the modification time of the
+report is the heartbeat of the session. A session which made no progress for image_timeout_s per image between two
+heartbeats, plus session_startup_timeout_s before its first image, is killed. A worker slot whose sessions fail in a
+row waits twice as long before each restart.
+"""
+
+
+def get_num_img_per_heartbeat(timeline_batch_size, background_plate_reuse_count):
+    """Get the maximum number of images rendered by a blender session between two writes of its session report.
+
+    Args:
+        timeline_batch_size (int): Number of images rendered with one animation render.
+        background_plate_reuse_count (int): Number of images composited over one background plate, the plate is
+                                            rendered before the first of them and counts as one more image.
+
+    Return:
+        num_img_per_heartbeat (int): The images of one timeline batch, plus the background plate.
+    """
+    return max(timeline_batch_size, 1) + (1 if background_plate_reuse_count > 1 else 0)
+
+
+def is_session_hung(session_report_path, start_time, image_timeout_s, session_startup_timeout_s, num_img_per_heartbeat = 1):
+    """Check whether a blender session made no progress for too long.
+
+    Args:
+        session_report_path (str): The path where the blender session writes its session report.
+        start_time (float): The starting time of the blender session.
+        image_timeout_s (float): The maximum time of one image in seconds, None disables the watchdog.
+        session_startup_timeout_s (float): The extra time allowed before the first image, e.g. to start blender and load the assets.
+        num_img_per_heartbeat (int): The maximum number of images between two writes of the session report.
+
+    Return:
+        hung (bool): True if the blender session exceeded its time.
+    """
+    if image_timeout_s is None:
+        return False
+    image_timeout_s *= num_img_per_heartbeat
+    last_progress_time = start_time
+    if os.path.exists(session_report_path) and os.path.getsize(session_report_path) > 0:
+        last_progress_time = max(os.path.getmtime(session_report_path), start_time)
+    else:
+        image_timeout_s += session_startup_timeout_s
+
+    return time.time() - last_progress_time > image_timeout_s
+
+
+def kill_session(process):
+    """Kill a hung blender session and wait for it to exit.
+
+    Args:
+        process (subprocess.Popen): The blender process.
+    """
+    process.kill()
+    process.wait()
+
+
+def get_retry_delay(num_consecutive_failure, retry_backoff_s, max_retry_backoff_s):
+    """Get the time to wait before restarting a worker slot whose sessions failed.
+
+    Args:
+        num_consecutive_failure (int): Number of sessions of the slot which failed in a row.
+        retry_backoff_s (float): The delay after the first failure in seconds.
+        max_retry_backoff_s (float): The maximum delay in seconds.
+
+    Return:
+        retry_delay (float): The delay in seconds, 0 if the last session succeeded.
+    """
+    if num_consecutive_failure <= 0:
+        return 0
+
+    return min(retry_backoff_s * 2 ** (num_consecutive_failure - 1), max_retry_backoff_s)
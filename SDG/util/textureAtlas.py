@@ -0,0 +1,212 @@
+import bpy
+import json
+import os
+
+
+"""
+Texture the objects of SimpleTextureRandomizer with tiles of a few large texture atlases instead of one material and
+one image per object.
+
+SDG_530_TextureAtlasBuilder.py packs the image textures into square tiles of atlases and writes a lookup table with
+the UV offset of each tile. One shared material holds a fixed number of atlas slots, each object picks its atlas slot
+and tile through the "sdg_atlas_tile" custom property (u offset, v offset, slot) read by an Attribute node, so the
+texture of an object changes with one property write and the number of images of a render stays the same.
+"""
+
+
+_lookup_table_file_name = "texture_atlas.json"
+_lookup_table_format_version = 1
+_material_name = "SDGTextureAtlasMaterial"
+tile_property_name = "sdg_atlas_tile"
+# Atlas folder path paired with its lookup table and the modification time of the file, only valid inside one blender session
+_lookup_tables = {}
+
+
+def get_lookup_table_path(atlas_folder_path):
+    """Get the path of the lookup table of an atlas folder.
+
+    Args:
+        atlas_folder_path (str): The path to the texture atlases.
+
+    Return:
+        lookup_table_path (str): The path of the lookup table.
+    """
+    return os.path.join(atlas_folder_path, _lookup_table_file_name)
+
+
+def write_lookup_table(atlas_folder_path, lookup_table):
+    """Write the lookup table of an atlas folder, the previous table is replaced only once the new one is complete.
+
+    Args:
+        atlas_folder_path (str): The path to the texture atlases.
+        lookup_table (dict of str: object): The "atlas_size", "tile_size", "tile_padding", "source_stamps" and "atlases" of the folder.
+    """
+    lookup_table_path = get_lookup_table_path(atlas_folder_path)
+    lookup_table = dict(lookup_table, format_version = _lookup_table_format_version)
+    with open(lookup_table_path + ".tmp", "w") as f:
+        json.dump(lookup_table, f)
+    os.replace(lookup_table_path + ".tmp", lookup_table_path)
+
+
+def read_lookup_table(atlas_folder_path):
+    """Read the lookup table of an atlas folder, the table is read again only when the file changed.
+
+    Args:
+        atlas_folder_path (str): The path to the texture atlases.
+
+    Return:
+        lookup_table (dict of str: object): The lookup table, None if the folder has no lookup table of this format.
+    """
+    lookup_table_path = get_lookup_table_path(atlas_folder_path)
+    if not os.path.exists(lookup_table_path):
+        return None
+    mtime = os.path.getmtime(lookup_table_path)
+    if atlas_folder_path in _lookup_tables and _lookup_tables[atlas_folder_path][1] == mtime:
+        return _lookup_tables[atlas_folder_path][0]
+
+    with open(lookup_table_path, "r") as f:
+        lookup_table = json.load(f)
+    if lookup_table.get("format_version") != _lookup_table_format_version:
+        print(f"Warning!!! {lookup_table_path} was written by another version of SDG_530_TextureAtlasBuilder.py, build the atlases again")
+        lookup_table = None
+    _lookup_tables[atlas_folder_path] = (lookup_table, mtime)
+
+    return lookup_table
+
+
+def get_tile_uv_scale(lookup_table):
+    """Get the UV scale from the UV map of an object to the inner area of its tile.
+
+    Args:
+        lookup_table (dict of str: object): The lookup table.
+
+    Return:
+        tile_uv_scale (float): The size of the tile without its padding, in UV units of the atlas.
+    """
+    return (lookup_table["tile_size"] - 2 * lookup_table["tile_padding"]) / lookup_table["atlas_size"]
+
+
+def _create_material(num_atlas_slot, tile_uv_scale):
+    """Create the shared atlas material.
+
+    Args:
+        num_atlas_slot (int): Number of atlas image textures of the material.
+        tile_uv_scale (float): The size of the tile without its padding, in UV units of the atlas.
+
+    Return:
+        material (bpy.types.Material): The atlas material.
+    """
+    material = bpy.data.materials.new(name = _material_name)
+    material.use_nodes = True
+    material.use_fake_user = True
+    material["sdg_num_atlas_slot"] = num_atlas_slot
+    material["sdg_tile_uv_scale"] = tile_uv_scale
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    node_PrincipledBSDF = nodes.get("Principled BSDF")
+
+    node_TextureCoordinate = nodes.new("ShaderNodeTexCoord")
+    node_Attribute = nodes.new("ShaderNodeAttribute")
+    node_Attribute.attribute_type = "OBJECT"
+    node_Attribute.attribute_name = tile_property_name
+    # Repeat the UV map inside the tile, then move it to the tile of the object
+    node_Fraction = nodes.new("ShaderNodeVectorMath")
+    node_Fraction.operation = "FRACTION"
+    node_TileUV = nodes.new("ShaderNodeVectorMath")
+    node_TileUV.operation = "MULTIPLY_ADD"
+    node_TileUV.inputs[1].default_value = (tile_uv_scale, tile_uv_scale, 0)
+    node_SeparateXYZ = nodes.new("ShaderNodeSeparateXYZ")
+    node_HueSaturationValue = nodes.new("ShaderNodeHueSaturation")
+
+    node_TextureCoordinate.location = (-1400, 200)
+    node_Attribute.location = (-1400, -100)
+    node_Fraction.location = (-1150, 200)
+    node_TileUV.location = (-900, 200)
+    node_SeparateXYZ.location = (-900, -100)
+    node_HueSaturationValue.location = (-200, 200)
+
+    links.new(node_TextureCoordinate.outputs["UV"], node_Fraction.inputs[0])
+    links.new(node_Fraction.outputs["Vector"], node_TileUV.inputs[0])
+    links.new(node_Attribute.outputs["Vector"], node_TileUV.inputs[2])
+    links.new(node_Attribute.outputs["Vector"], node_SeparateXYZ.inputs["Vector"])
+
+    # The slot of the object selects one of the atlas image textures
+    color_output = None
+    for slot in range(num_atlas_slot):
+        node_ImageTexture = nodes.new("ShaderNodeTexImage")
+        node_ImageTexture.name = f"Atlas {slot}"
+        node_ImageTexture.interpolation = "Linear"
+        node_ImageTexture.extension = "EXTEND"
+        node_ImageTexture.location = (-650, 200 - slot * 300)
+        links.new(node_TileUV.outputs["Vector"], node_ImageTexture.inputs["Vector"])
+        if color_output is None:
+            color_output = node_ImageTexture.outputs["Color"]
+            continue
+        node_Compare = nodes.new("ShaderNodeMath")
+        node_Compare.operation = "COMPARE"
+        node_Compare.inputs[1].default_value = slot
+        node_Compare.inputs[2].default_value = 0.5
+        node_Compare.location = (-450, -100 - slot * 300)
+        node_Mix = nodes.new("ShaderNodeMixRGB")
+        node_Mix.location = (-400, 200 - slot * 300)
+        links.new(node_SeparateXYZ.outputs["Z"], node_Compare.inputs[0])
+        links.new(node_Compare.outputs["Value"], node_Mix.inputs["Fac"])
+        links.new(color_output, node_Mix.inputs["Color1"])
+        links.new(node_ImageTexture.outputs["Color"], node_Mix.inputs["Color2"])
+        color_output = node_Mix.outputs["Color"]
+
+    links.new(color_output, node_HueSaturationValue.inputs["Color"])
+    links.new(node_HueSaturationValue.outputs["Color"], node_PrincipledBSDF.inputs["Base Color"])
+
+    return material
+
+
+def get_atlas_material(num_atlas_slot, tile_uv_scale):
+    """Get the shared atlas material, it is created again only when the scene was cleaned up or the layout changed.
+
+    Args:
+        num_atlas_slot (int): Number of atlas image textures of the material.
+        tile_uv_scale (float): The size of the tile without its padding, in UV units of the atlas.
+
+    Return:
+        material (bpy.types.Material): The atlas material.
+    """
+    material = bpy.data.materials.get(_material_name)
+    if material is not None and (material.get("sdg_num_atlas_slot") != num_atlas_slot or
+                                 material.get("sdg_tile_uv_scale") != tile_uv_scale):
+        bpy.data.materials.remove(material)
+        material = None
+    if material is None:
+        material = _create_material(num_atlas_slot = num_atlas_slot, tile_uv_scale = tile_uv_scale)
+
+    return material
+
+
+def set_atlas_slots(material, atlas_path_list):
+    """Put the atlases of the current image into the atlas slots of the material.
+
+    Args:
+        material (bpy.types.Material): The atlas material.
+        atlas_path_list (list of str): The path of the atlas of each slot.
+    """
+    # Unused atlases are kept for the next images by the incremental scene reset like the other images
+    for slot, atlas_path in enumerate(atlas_path_list):
+        image = bpy.data.images.load(atlas_path, check_existing = True)
+        material.node_tree.nodes[f"Atlas {slot}"].image = image
+
+
+def assign_tile(obj, tile_offset, slot, material):
+    """Apply the atlas material to an object and select its tile.
+
+    Args:
+        obj (bpy.types.Object): The object.
+        tile_offset (list of float): The UV offset of the inner area of the tile.
+        slot (int): The atlas slot of the tile.
+        material (bpy.types.Material): The atlas material.
+    """
+    obj[tile_property_name] = (tile_offset[0], tile_offset[1], float(slot))
+    if obj.data.materials:
+        if obj.data.materials[0] != material:
+            obj.data.materials[0] = material
+    else:
+        obj.data.materials.append(material)
@@ -0,0 +1,175 @@
+import bpy
+import numpy as np
+import os
+
+
+"""
+Select the texture level of detail (LOD) of each object from its projected size in the rendered image.
+
+SDG_510_TextureLODBuilder.py writes smaller versions of the texture maps. The smallest tier whose width still covers
+the projected size of an object is used, then the tiers are stepped down, largest first, while the estimated texture
+memory of the scene exceeds the budget.
+"""
+
+
+# Tier width in pixels -> tier label in the ambientCG file name, largest first
+texture_tiers = {2048: "2K", 1024: "1K", 512: "512", 256: "256"}
+
+
+def get_tier_file_path(image_path, tier_size):
+    """Get the file path of a texture map at a tier, whether the tier exists or not.
+
+    ambientCG maps are named <asset>_2K_<map>.jpg, the tiers replace "_2K_" by their label. Other images have their
+    tiers in the "lod" sub folder, named <image name>_<label>.<extension>.
+
+    Args:
+        image_path (str): The path of the full size texture map.
+        tier_size (int): The width of the tier.
+
+    Return:
+        tier_path (str): The file path of the tier.
+    """
+    if tier_size == max(texture_tiers):
+        return image_path
+    tier_label = texture_tiers[tier_size]
+    file_name = os.path.basename(image_path)
+    if "_2K_" in file_name:
+        return os.path.join(os.path.dirname(image_path), file_name.replace("_2K_", f"_{tier_label}_"))
+    name, extension = os.path.splitext(file_name)
+
+    return os.path.join(os.path.dirname(image_path), "lod", f"{name}_{tier_label}{extension}")
+
+
+def get_tier_path(image_path, tier_size):
+    """Get the path of a texture map at a tier, the full size path if the tier was not built.
+
+    Args:
+        image_path (str): The path of the full size texture map.
+        tier_size (int): The width of the tier.
+
+    Return:
+        tier_path (str): The path of the tier.
+    """
+    tier_path = get_tier_file_path(image_path, tier_size)
+
+    return tier_path if os.path.exists(tier_path) else image_path
+
+
+def estimate_projected_size(obj, camera, focal_length, img_resolution_x, scale_ratio = 1.0, location = None):
+    """Estimate the width in pixels of an object in the rendered image.
+
+    The largest dimension of the object is projected at its distance in front of the camera, with the horizontal
+    sensor fit of the camera.
+
+    Args:
+        obj (bpy.types.Object): The object.
+        camera (bpy.types.Object): The scene camera.
+        focal_length (float): Focal length of the camera in millimeters used for the render.
+        img_resolution_x (int): Number of horizontal pixels in the rendered image.
+        scale_ratio (float): Extra scale of the object, e.g. the largest instance scale of a prototype.
+        location (mathutils.Vector): World location of the object, None uses the object location.
+
+    Return:
+        projected_size (float): The projected width in pixels.
+    """
+    if location is None:
+        location = obj.matrix_world.translation
+    local_location = camera.matrix_world.inverted() @ location
+    distance = max(-local_location.z, camera.data.clip_start)
+    visible_width = camera.data.sensor_width * distance / focal_length
+
+    obj_size = max(obj.dimensions)
+    if obj_size == 0 and obj.type == "MESH" and len(obj.data.vertices) > 0:
+        # Objects outside the scene may have no evaluated bounding box
+        coordinates = np.empty(len(obj.data.vertices) * 3, dtype = np.float32)
+        obj.data.vertices.foreach_get("co", coordinates)
+        coordinates = coordinates.reshape(-1, 3)
+        obj_size = float((coordinates.max(axis = 0) - coordinates.min(axis = 0)).max()) * max(obj.scale)
+
+    return obj_size * scale_ratio / visible_width * img_resolution_x
+
+
+def select_tier(projected_size):
+    """Select the smallest tier whose width covers the projected size.
+
+    Args:
+        projected_size (float): The projected width in pixels.
+
+    Return:
+        tier_size (int): The width of the tier.
+    """
+    for tier_size in sorted(texture_tiers):
+        if tier_size >= projected_size:
+            return tier_size
+
+    return max(texture_tiers)
+
+
+def select_object_tiers(objects, focal_length, img_resolution_x):
+    """Select the tier of each object from its projected size.
+
+    Prototypes of the instanced background are not in the scene, they are projected at the instancer location with the
+    largest scale of their instances.
+
+    Args:
+        objects (list of bpy.types.Object): The objects which need a texture.
+        focal_length (float): Focal length of the camera in millimeters used for the render.
+        img_resolution_x (int): Number of horizontal pixels in the rendered image.
+
+    Return:
+        tier_size_list (list of int): The tier width of each object.
+    """
+    camera = bpy.data.objects["Camera"]
+    instancer = None
+    background_object_collection = bpy.data.collections.get("BackgroundObjectCollection")
+    if background_object_collection is not None:
+        for obj in background_object_collection.objects:
+            if obj.get("sdg_instancer", False):
+                instancer = obj
+    max_instance_scale = 1.0
+    if instancer is not None and len(instancer.data.vertices) > 0:
+        instance_scale = np.empty(len(instancer.data.vertices), dtype = np.float32)
+        instancer.data.attributes["sdg_scale"].data.foreach_get("value", instance_scale)
+        max_instance_scale = float(instance_scale.max())
+
+    tier_size_list = []
+    for obj in objects:
+        if obj.get("sdg_prototype", False) and instancer is not None:
+            projected_size = estimate_projected_size(obj, camera, focal_length, img_resolution_x,
+                                                     scale_ratio = max_instance_scale,
+                                                     location = instancer.matrix_world.translation)
+        else:
+            projected_size = estimate_projected_size(obj, camera, focal_length, img_resolution_x)
+        tier_size_list.append(select_tier(projected_size))
+
+    return tier_size_list
+
+
+def apply_memory_budget(tier_selections, num_map_list, texture_memory_budget_mb):
+    """Step the largest tiers down until the estimated texture memory fits in the budget.
+
+    The memory of one map is estimated as width * width * 4 bytes, a texture shared by several objects is counted once.
+
+    Args:
+        tier_selections (dict of str: int): The full size color map paths paired with their selected tier width.
+        num_map_list (dict of str: int): The full size color map paths paired with the number of maps of their material.
+        texture_memory_budget_mb (float): The texture memory budget of the scene in MB, None disables it.
+
+    Return:
+        tier_selections (dict of str: int): The color map paths paired with the tier width that fits in the budget.
+        texture_memory_mb (float): The estimated texture memory of the scene in MB.
+    """
+    def get_memory_mb():
+        return sum(tier_size * tier_size * 4 * num_map_list[path] for path, tier_size in tier_selections.items()) / 1024 / 1024
+
+    texture_memory_mb = get_memory_mb()
+    min_tier_size = min(texture_tiers)
+    while texture_memory_budget_mb is not None and texture_memory_mb > texture_memory_budget_mb:
+        largest_path = max(tier_selections, key = lambda path: tier_selections[path] * tier_selections[path] * num_map_list[path])
+        if tier_selections[largest_path] <= min_tier_size:
+            print(f"Warning!!! texture memory {texture_memory_mb:.1f} MB exceeds the budget at the smallest tier")
+            break
+        tier_selections[largest_path] //= 2
+        texture_memory_mb = get_memory_mb()
+
+    return tier_selections, texture_memory_mb
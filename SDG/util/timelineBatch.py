@@ -0,0 +1,132 @@
+import bpy
+
+
+"""
+Keep the randomized scenes of a timeline batch on the frames 1..K of the scene timeline, so they are rendered with one
+animation render which shares the render setup of the frames.
+
+The randomizers work on the whole content of the scene collections. After the randomization of a frame, its objects are
+moved to a holding collection and only visible on their frame (keyframed hide_render), so each frame has its own
+objects and their transforms and materials need no keyframes. The values shared by all frames, the input values and the
+muting of the compositing nodes, the world shader nodes and the sensor noise texture, are keyframed on each frame. The
+image of the world environment texture can not be keyframed, all frames of a batch use the HDRI of the first frame.
+After the labels are saved, the objects go back to their collections and the keyframes are removed, so the scene
+reset and the object pool handle them like the objects of a single image.
+"""
+
+
+_holding_collection_name = "TimelineBatchCollection"
+# Object names paired with the name of their scene collection, only valid inside one blender session
+_held_object_collections = {}
+_use_compositor = False
+_animated_node_properties = ["size_x", "size_y", "factor"]
+
+
+def _keyframe_node_tree(node_tree, frame):
+    """Keyframe the muting and the unlinked input values of all nodes of a node tree.
+
+    Args:
+        node_tree (bpy.types.NodeTree): The node tree.
+        frame (int): The frame of the keyframes.
+    """
+    for node in node_tree.nodes:
+        node.keyframe_insert("mute", frame = frame)
+        for property_name in _animated_node_properties:
+            if hasattr(node, property_name):
+                node.keyframe_insert(property_name, frame = frame)
+        for node_input in node.inputs:
+            if node_input.is_linked or not hasattr(node_input, "default_value"):
+                continue
+            node_input.keyframe_insert("default_value", frame = frame)
+
+
+def hold_frame(frame, num_frame, collections):
+    """Move the objects of the randomized frame to the holding collection and keyframe the frame.
+
+    Args:
+        frame (int): The frame of the randomized scene, 1 for the first frame.
+        num_frame (int): Number of frames of the batch.
+        collections (list of bpy.types.Collection): The scene collections whose objects belong to the frame.
+
+    Return:
+        frame_objects (dict of str: list of bpy.types.Object): Collection names paired with the objects of the frame.
+    """
+    global _use_compositor
+    scene = bpy.data.scenes["Scene"]
+    holding_collection = bpy.data.collections.get(_holding_collection_name)
+    if holding_collection is None:
+        holding_collection = bpy.data.collections.new(_holding_collection_name)
+        scene.collection.children.link(holding_collection)
+
+    frame_objects = {}
+    for collection in collections:
+        frame_objects[collection.name] = list(collection.objects)
+        for obj in frame_objects[collection.name]:
+            obj.hide_render = True
+            for hidden_frame in [frame - 1, frame + 1]:
+                if 1 <= hidden_frame <= num_frame:
+                    obj.keyframe_insert("hide_render", frame = hidden_frame)
+            obj.hide_render = False
+            obj.keyframe_insert("hide_render", frame = frame)
+            collection.objects.unlink(obj)
+            holding_collection.objects.link(obj)
+            _held_object_collections[obj.name] = collection.name
+
+    if scene.node_tree is not None:
+        _keyframe_node_tree(node_tree = scene.node_tree, frame = frame)
+        _use_compositor = _use_compositor or scene.use_nodes
+    if scene.world is not None and scene.world.node_tree is not None:
+        _keyframe_node_tree(node_tree = scene.world.node_tree, frame = frame)
+    texture = bpy.data.textures.get("camera_sensor_noise")
+    if texture is not None:
+        texture.keyframe_insert("intensity", frame = frame)
+
+    return frame_objects
+
+
+def prepare_render(num_frame):
+    """Set the frame range and the render options shared by the frames of the batch.
+
+    Args:
+        num_frame (int): Number of frames of the batch.
+    """
+    scene = bpy.data.scenes["Scene"]
+    scene.frame_start = 1
+    scene.frame_end = num_frame
+    scene.frame_set(1)
+    # Keep the scene data of the renderer between the frames
+    scene.render.use_persistent_data = True
+    # Muted compositing nodes pass the image through, the frames without camera effect are not changed
+    scene.use_nodes = _use_compositor
+
+
+def release_frames():
+    """Move the held objects back to their scene collections and remove the keyframes of the batch."""
+    global _use_compositor
+    scene = bpy.data.scenes["Scene"]
+    holding_collection = bpy.data.collections.get(_holding_collection_name)
+    if holding_collection is not None:
+        for obj in list(holding_collection.objects):
+            obj.animation_data_clear()
+            obj.hide_render = False
+            collection = bpy.data.collections.get(_held_object_collections.get(obj.name, ""))
+            holding_collection.objects.unlink(obj)
+            if collection is not None:
+                collection.objects.link(obj)
+        bpy.data.collections.remove(holding_collection)
+    _held_object_collections.clear()
+
+    node_trees = [scene.node_tree]
+    if scene.world is not None:
+        node_trees.append(scene.world.node_tree)
+    for node_tree in node_trees:
+        if node_tree is not None:
+            node_tree.animation_data_clear()
+    texture = bpy.data.textures.get("camera_sensor_noise")
+    if texture is not None:
+        texture.animation_data_clear()
+    scene.render.use_persistent_data = False
+    scene.frame_start = 1
+    scene.frame_end = 1
+    scene.frame_set(1)
+    _use_compositor = False